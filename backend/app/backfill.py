@@ -0,0 +1,283 @@
+"""
+Resumable backfill of signed-contract PDFs.
+
+Finds signed contracts with no stored PDF, a PDF rendered from an older
+template version, or (with ``--verify-files``) a stored PDF that is missing
+from storage, and queues a ``backfill`` render job for each. At most
+``--concurrency`` jobs of a run are queued or rendering at once; render
+workers (embedded in the API, ``python -m pdf_gen_engine.worker`` or
+``--workers`` here) render them in parallel.
+
+Progress and the last scanned contract id are checkpointed in the
+``backfill_runs`` collection, so an interrupted run continues where it
+stopped.
+
+Run from the backend directory:
+    python -m app.backfill --concurrency 8 --workers 2
+"""
+
+import argparse
+import asyncio
+from datetime import datetime, timezone
+from typing import Optional
+
+from bson import ObjectId
+
+from app.core.pdf_engine import (
+    JOB_ACTIVE_STATUSES,
+    build_pdf_key,
+    current_template_versions,
+    get_pdf_storage,
+    resolve_output_profile,
+    start_embedded_workers,
+)
+from app.db.mongo import close_mongo_connection, contracts_collection, db, render_jobs_collection
+from app.models.contract import ContractStatus
+from app.routes.contracts import queue_pdf_backfill
+from app.routes.signatures import NO_STORED_PDF, has_stored_pdf
+
+backfill_runs_collection = db["backfill_runs"]
+
+RUN_RUNNING = "running"
+RUN_DONE = "done"
+RUN_CANCELLED = "cancelled"
+
+DEFAULT_CONCURRENCY = 8
+DEFAULT_BATCH_SIZE = 100
+POLL_SECONDS = 1.0
+
+
+def _utcnow() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+def _outdated_filters(versions: dict) -> list:
+    """Match contracts rendered from another template version, or never recorded."""
+    known_types = [contract_type for contract_type in versions if contract_type]
+    filters = [
+        {"type": contract_type, "renderMeta.templateVersion": {"$ne": versions[contract_type]}}
+        for contract_type in known_types
+    ]
+    filters.append({"type": {"$nin": known_types}, "renderMeta.templateVersion": {"$ne": versions[""]}})
+    return filters
+
+
+def build_candidate_filter(options: dict, versions: dict, after_id: Optional[ObjectId]) -> dict:
+    query: dict = {"status": ContractStatus.signed.value}
+    if after_id is not None:
+        query["_id"] = {"$gt": after_id}
+    if options.get("verifyFiles"):
+        # Every signed contract is checked against storage.
+        return query
+
+    conditions = [NO_STORED_PDF]
+    if not options.get("missingOnly"):
+        conditions.extend(_outdated_filters(versions))
+    query["$or"] = conditions
+    return query
+
+
+def _template_version_for(doc: dict, versions: dict) -> str:
+    contract_type = str(doc.get("type") or "").strip().lower()
+    return versions.get(contract_type, versions[""])
+
+
+async def _stored_pdf_missing(doc: dict) -> bool:
+    pdf_key = doc.get("pdf_key")
+    if not pdf_key and doc.get("pdf_sha256"):
+        try:
+            pdf_key = build_pdf_key(str(doc["pdf_sha256"]))
+        except ValueError:
+            return True
+    if not pdf_key:
+        # Path-only PDFs from early releases are checked by the download route.
+        return False
+    try:
+        await get_pdf_storage().astat(str(pdf_key))
+    except (FileNotFoundError, ValueError):
+        return True
+    return False
+
+
+async def needs_backfill(doc: dict, options: dict, versions: dict) -> bool:
+    if not has_stored_pdf(doc):
+        return True
+    if not options.get("missingOnly"):
+        recorded = (doc.get("renderMeta") or {}).get("templateVersion")
+        if recorded != _template_version_for(doc, versions):
+            return True
+    return bool(options.get("verifyFiles")) and await _stored_pdf_missing(doc)
+
+
+async def _in_flight(run_id: ObjectId) -> int:
+    return await render_jobs_collection.count_documents(
+        {"backfillRunId": run_id, "status": {"$in": list(JOB_ACTIVE_STATUSES)}}
+    )
+
+
+async def _job_results(run_id: ObjectId) -> dict:
+    results = {}
+    async for row in render_jobs_collection.aggregate(
+        [{"$match": {"backfillRunId": run_id}}, {"$group": {"_id": "$status", "count": {"$sum": 1}}}]
+    ):
+        results[str(row["_id"])] = row["count"]
+    return results
+
+
+async def _save_progress(run: dict, **fields) -> None:
+    await backfill_runs_collection.update_one(
+        {"_id": run["_id"]},
+        {"$set": {"checkpoint": run.get("checkpoint"), "counts": run["counts"], "updatedAt": _utcnow(), **fields}},
+    )
+
+
+async def _start_run(args: argparse.Namespace, versions: dict) -> dict:
+    if not args.restart:
+        run = await backfill_runs_collection.find_one({"status": RUN_RUNNING}, sort=[("startedAt", -1)])
+        if run is not None:
+            print(f"[backfill] Resuming run {run['_id']} after contract {run.get('checkpoint')}")
+            return run
+    else:
+        await backfill_runs_collection.update_many(
+            {"status": RUN_RUNNING},
+            {"$set": {"status": RUN_CANCELLED, "updatedAt": _utcnow()}},
+        )
+
+    now = _utcnow()
+    run = {
+        "_id": ObjectId(),
+        "status": RUN_RUNNING,
+        "options": {
+            "missingOnly": args.missing_only,
+            "verifyFiles": args.verify_files,
+            "profile": args.profile,
+            "limit": args.limit,
+        },
+        "templateVersions": versions,
+        "checkpoint": None,
+        "counts": {"scanned": 0, "queued": 0, "alreadyQueued": 0, "skipped": 0},
+        "startedAt": now,
+        "updatedAt": now,
+    }
+    await backfill_runs_collection.insert_one(run)
+    print(f"[backfill] Started run {run['_id']}")
+    return run
+
+
+async def run_backfill(args: argparse.Namespace) -> dict:
+    versions = current_template_versions()
+    run = await _start_run(args, versions)
+    options = run["options"]
+    counts = run["counts"]
+    run_id = run["_id"]
+    concurrency = max(1, args.concurrency)
+    limit = options.get("limit")
+
+    if run.get("templateVersions") != versions:
+        # Templates changed since the run started; compare against the current ones.
+        await backfill_runs_collection.update_one({"_id": run_id}, {"$set": {"templateVersions": versions}})
+
+    try:
+        while limit is None or counts["queued"] < limit:
+            query = build_candidate_filter(options, versions, run.get("checkpoint"))
+            batch = await contracts_collection.find(query).sort("_id", 1).limit(args.batch_size).to_list(None)
+            if not batch:
+                break
+
+            for doc in batch:
+                if limit is not None and counts["queued"] >= limit:
+                    break
+                counts["scanned"] += 1
+                if await needs_backfill(doc, options, versions):
+                    while await _in_flight(run_id) >= concurrency:
+                        await asyncio.sleep(POLL_SECONDS)
+                    already_queued = doc.get("backfillJobId") is not None
+                    try:
+                        job = await queue_pdf_backfill(doc, run_id=run_id, profile=options.get("profile"))
+                    except ValueError as error:
+                        print(f"[backfill] contract {doc['_id']} cannot be rendered: {error}")
+                        job = None
+                    if job is None:
+                        counts["skipped"] += 1
+                    elif already_queued and job.get("backfillRunId") != run_id:
+                        counts["alreadyQueued"] += 1
+                    else:
+                        counts["queued"] += 1
+                else:
+                    counts["skipped"] += 1
+                run["checkpoint"] = doc["_id"]
+
+            await _save_progress(run)
+            print(
+                f"[backfill] scanned {counts['scanned']}, queued {counts['queued']}, "
+                f"in flight {await _in_flight(run_id)}, checkpoint {run['checkpoint']}"
+            )
+    finally:
+        await _save_progress(run)
+
+    if not args.no_wait:
+        while (in_flight := await _in_flight(run_id)) > 0:
+            print(f"[backfill] waiting for {in_flight} render job(s)")
+            await asyncio.sleep(max(POLL_SECONDS, 5.0))
+
+    results = await _job_results(run_id)
+    await _save_progress(run, status=RUN_DONE, results=results, finishedAt=_utcnow())
+    print(f"[backfill] Run {run_id} finished: {counts}, jobs {results}")
+    return {"runId": str(run_id), "counts": counts, "jobs": results}
+
+
+def main(argv: Optional[list] = None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m app.backfill", description=__doc__.strip().splitlines()[0])
+    parser.add_argument(
+        "--concurrency",
+        type=int,
+        default=DEFAULT_CONCURRENCY,
+        help="Render jobs of this run queued or rendering at once.",
+    )
+    parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE, help="Contracts read per query.")
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=0,
+        help="Render workers to run in this process; 0 relies on the API's or dedicated workers.",
+    )
+    parser.add_argument("--missing-only", action="store_true", help="Skip contracts with an outdated template.")
+    parser.add_argument(
+        "--verify-files",
+        action="store_true",
+        help="Also check every stored PDF against storage (reads all signed contracts).",
+    )
+    parser.add_argument("--profile", default=None, help="Output profile (default: PDF_OUTPUT_PROFILE).")
+    parser.add_argument("--limit", type=int, default=None, help="Stop after queueing this many contracts.")
+    parser.add_argument("--restart", action="store_true", help="Cancel an unfinished run and start over.")
+    parser.add_argument("--no-wait", action="store_true", help="Exit once everything is queued.")
+    args = parser.parse_args(argv)
+
+    try:
+        resolve_output_profile(args.profile)
+    except ValueError as error:
+        parser.error(str(error))
+
+    # These threads only exist for the backfill's batch jobs, so none are
+    # held back for interactive ones.
+    stop_workers = start_embedded_workers(args.workers, interactive_reserved=0) if args.workers > 0 else None
+
+    async def _run() -> None:
+        try:
+            await run_backfill(args)
+        finally:
+            await close_mongo_connection()
+
+    try:
+        asyncio.run(_run())
+    except KeyboardInterrupt:
+        print("[backfill] Interrupted; run again to resume from the last checkpoint")
+        return 130
+    finally:
+        if stop_workers is not None:
+            stop_workers()
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,134 @@
+"""
+Lazy facade over the PDF engine for the API routes.
+
+Constants, the job queue helpers and the exception types are cheap and are
+re-exported directly. Anything that needs Jinja2, Pillow or WeasyPrint is
+imported on first call, so API processes that only serve dashboards never
+load the render stack.
+"""
+
+import sys
+from pathlib import Path
+from typing import Any, Mapping, Optional
+
+REPO_ROOT = Path(__file__).resolve().parents[3]
+if str(REPO_ROOT) not in sys.path:
+    sys.path.append(str(REPO_ROOT))
+
+from pdf_gen_engine.config import (  # noqa: E402
+    PDF_EMBEDDED_RENDER_WORKERS,
+    PDF_PRERENDER_ENABLED,
+    PDF_STORAGE_PATH,
+)
+from pdf_gen_engine.errors import RenderLimitError, RenderQueueFullError  # noqa: E402
+from pdf_gen_engine.services.output_profiles import resolve_output_profile  # noqa: E402
+from pdf_gen_engine.services.render_jobs import (  # noqa: E402
+    JOB_ACTIVE_STATUSES,
+    JOB_KIND_BACKFILL,
+    JOB_KIND_PRERENDER,
+    JOB_KIND_SIGN,
+    RENDER_JOB_INDEXES,
+    build_render_job,
+    serialize_render_job,
+)
+from pdf_gen_engine.storage import build_pdf_key, get_pdf_storage  # noqa: E402
+from pdf_gen_engine.utils.template_registry import RENDER_BACKEND_DIRECT, resolve_render_backend  # noqa: E402
+
+__all__ = [
+    "JOB_ACTIVE_STATUSES",
+    "JOB_KIND_BACKFILL",
+    "JOB_KIND_PRERENDER",
+    "JOB_KIND_SIGN",
+    "PDF_EMBEDDED_RENDER_WORKERS",
+    "PDF_PRERENDER_ENABLED",
+    "PDF_STORAGE_PATH",
+    "RENDER_BACKEND_DIRECT",
+    "RENDER_JOB_INDEXES",
+    "RenderLimitError",
+    "RenderQueueFullError",
+    "build_pdf_key",
+    "build_render_job",
+    "current_template_versions",
+    "get_pdf_storage",
+    "get_preview_cache",
+    "invalidate_preview",
+    "normalize_signature_image",
+    "preview_version",
+    "render_preview",
+    "render_with_report",
+    "resolve_output_profile",
+    "resolve_render_backend",
+    "serialize_render_job",
+    "shutdown_render_executor",
+    "start_embedded_workers",
+]
+
+_EXECUTOR_MODULE = "pdf_gen_engine.services.render_executor"
+_PREVIEW_MODULE = "pdf_gen_engine.services.preview"
+
+
+async def render_with_report(
+    contract_data: Mapping[str, Any],
+    output_mode: str = "path",
+    profile: Optional[str] = None,
+    priority: Optional[str] = None,
+):
+    from pdf_gen_engine.services.render_executor import render_with_report as _render_with_report
+
+    return await _render_with_report(contract_data, output_mode, profile, priority)
+
+
+async def render_preview(contract_data: Mapping[str, Any], output_mode: str = "html", profile: Optional[str] = None):
+    from pdf_gen_engine.services.render_executor import render_preview as _render_preview
+
+    return await _render_preview(contract_data, output_mode, profile)
+
+
+def get_preview_cache():
+    from pdf_gen_engine.services.preview import get_preview_cache as _get_preview_cache
+
+    return _get_preview_cache()
+
+
+def preview_version(contract_data: Mapping[str, Any], output_mode: str = "html", profile: Optional[str] = None) -> str:
+    from pdf_gen_engine.services.preview import preview_version as _preview_version
+
+    return _preview_version(contract_data, output_mode, profile)
+
+
+def invalidate_preview(contract_id: str, revision: int) -> None:
+    """Drop cached previews of a contract; a no-op until a preview was rendered."""
+    preview = sys.modules.get(_PREVIEW_MODULE)
+    if preview is not None:
+        preview.get_preview_cache().invalidate(contract_id, revision)
+
+
+def normalize_signature_image(value: Any):
+    from pdf_gen_engine.utils.signature_images import normalize_signature_image as _normalize_signature_image
+
+    return _normalize_signature_image(value)
+
+
+def current_template_versions() -> dict:
+    """Return the template source digest per contract type; "" is the generic template."""
+    from pdf_gen_engine.services.render_cache import template_version
+    from pdf_gen_engine.utils.template_registry import CONTRACT_TEMPLATE_FILES
+
+    versions = {contract_type: template_version(name) for contract_type, name in CONTRACT_TEMPLATE_FILES.items()}
+    versions[""] = template_version(None)
+    return versions
+
+
+def start_embedded_workers(count: int, interactive_reserved: Optional[int] = None):
+    from pdf_gen_engine.worker import start_embedded_workers as _start_embedded_workers
+
+    if interactive_reserved is None:
+        return _start_embedded_workers(count)
+    return _start_embedded_workers(count, interactive_reserved)
+
+
+def shutdown_render_executor(wait: bool = True) -> None:
+    """Stop the render executor if this process ever loaded it."""
+    executor = sys.modules.get(_EXECUTOR_MODULE)
+    if executor is not None:
+        executor.shutdown_render_executor(wait=wait)
@@ -36,3 +36,4 @@ users_collection = db["users"]
 clients_collection = db["clients"]
 contracts_collection = db["contracts"]
 signatures_collection = db["signatures"]
+render_jobs_collection = db["render_jobs"]
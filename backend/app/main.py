@@ -62,6 +62,9 @@ async def ensure_indexes():
     await contracts_collection.create_index("clientId")
     await contracts_collection.create_index("status")
     await contracts_collection.create_index("type")
+    # Stored PDF references, looked up by the orphaned PDF reconciler.
+    for field in ("pdf_key", "pdf_sha256", "pdf_path"):
+        await contracts_collection.create_index(field, sparse=True)
 
     # Signatures
     await signatures_collection.create_index("contractId")
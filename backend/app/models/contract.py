@@ -52,6 +52,35 @@ class ContractSignatures(BaseModel):
     client: Optional[str] = None
 
 
+# ── Size bookkeeping for a normalized signature image ─────────
+class SignatureImageMeta(BaseModel):
+    mimeType: str
+    width: int
+    height: int
+    originalBytes: int
+    normalizedBytes: int
+
+
+class ContractSignatureMeta(BaseModel):
+    creator: Optional[SignatureImageMeta] = None
+
+
+# ── Render facts recorded when the signed PDF is saved ────────
+class RenderMeta(BaseModel):
+    durationMs: float
+    pageCount: Optional[int] = None
+    sizeBytes: int
+    cacheHit: bool = False
+    stamped: bool = False
+    template: Optional[str] = None
+    templateVersion: Optional[str] = None
+    profile: Optional[str] = None
+    backend: Optional[str] = None
+    linearized: bool = False
+    stages: dict[str, float] = Field(default_factory=dict)
+    renderedAt: Optional[datetime] = None
+
+
 class HouseSaleTemplateData(BaseModel):
     agreement_place: Optional[str] = None
     agreement_date: Optional[str] = None
@@ -203,6 +232,7 @@ class ContractOut(BaseModel):
     dueDate: datetime
     clauses: Clauses
     signatures: ContractSignatures = Field(default_factory=ContractSignatures)
+    signatureMeta: Optional[ContractSignatureMeta] = None
     templateData: Optional[TemplateData] = None
     status: ContractStatus
     userId: str
@@ -213,5 +243,7 @@ class ContractOut(BaseModel):
     clientEmail: Optional[str] = None
     createdAt: datetime
     signedAt: Optional[datetime] = None
+    revision: int = 0
+    renderMeta: Optional[RenderMeta] = None
 
     model_config = {"populate_by_name": True}
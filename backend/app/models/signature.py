@@ -9,15 +9,19 @@ MongoDB document example
   "signerName":      "Jane Smith",
   "signerEmail":     "jane@acme.com",
   "signatureImage":  "data:image/png;base64,iVBOR...",
+  "signatureImageMeta": {"mimeType": "image/png", "width": 600, "height": 140,
+                         "originalBytes": 48213, "normalizedBytes": 3120},
   "signatureType":   "drawn",
   "signedAt":        "2026-02-18T14:00:00Z"
 }
 """
 
 from datetime import datetime
-from typing import Literal
+from typing import Literal, Optional
 from pydantic import BaseModel, EmailStr, Field
 
+from app.models.contract import SignatureImageMeta
+
 
 # ── Request body for signing a contract ───────────────────────
 class SignatureCreate(BaseModel):
@@ -36,6 +40,18 @@ class SignatureCreate(BaseModel):
     )
 
 
+# ── Render job status attached to a signing response ─────────
+class RenderJobStatus(BaseModel):
+    id: str = Field(..., alias="_id")
+    status: Literal["queued", "running", "done", "failed"]
+    attempts: int = 0
+    error: Optional[str] = None
+    createdAt: Optional[datetime] = None
+    updatedAt: Optional[datetime] = None
+
+    model_config = {"populate_by_name": True}
+
+
 # ── Full signature document returned by the API ──────────────
 class SignatureOut(BaseModel):
     id: str = Field(..., alias="_id")
@@ -43,7 +59,9 @@ class SignatureOut(BaseModel):
     signerName: str
     signerEmail: EmailStr
     signatureImage: str
+    signatureImageMeta: Optional[SignatureImageMeta] = None
     signatureType: Literal["drawn", "uploaded", "typed"] = "drawn"
     signedAt: datetime
+    renderJob: Optional[RenderJobStatus] = None
 
     model_config = {"populate_by_name": True}
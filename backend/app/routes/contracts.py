@@ -3,31 +3,56 @@ Routes for the **contracts** collection.
 Handles creation, retrieval, and status updates.
 """
 
+import asyncio
 from datetime import datetime, timezone
 import re
 from pathlib import Path
-import sys
-from typing import List, Optional
+from typing import List, Literal, Optional
 
-from fastapi import APIRouter, HTTPException, Query
-from fastapi.responses import FileResponse
+from fastapi import APIRouter, HTTPException, Query, Request
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import FileResponse, JSONResponse, Response
 from bson import ObjectId
 from pydantic import BaseModel
 from pymongo import ReturnDocument
 
-from app.db.mongo import contracts_collection, users_collection, clients_collection, signatures_collection
+from app.db.mongo import (
+    clients_collection,
+    contracts_collection,
+    render_jobs_collection,
+    signatures_collection,
+    users_collection,
+)
 from app.models.contract import ContractCreate, ContractOut, ContractStatus
-
-REPO_ROOT = Path(__file__).resolve().parents[3]
-if str(REPO_ROOT) not in sys.path:
-    sys.path.append(str(REPO_ROOT))
-
-from pdf_gen_engine import generate_contract_pdf
-from pdf_gen_engine.config import PDF_STORAGE_PATH
+from app.routes.signatures import build_sign_payload, has_stored_pdf, inline_legacy_signatures
+
+from app.core.pdf_engine import (
+    JOB_ACTIVE_STATUSES,
+    JOB_KIND_BACKFILL,
+    JOB_KIND_PRERENDER,
+    PDF_PRERENDER_ENABLED,
+    PDF_STORAGE_PATH,
+    RENDER_BACKEND_DIRECT,
+    RenderLimitError,
+    RenderQueueFullError,
+    build_pdf_key,
+    build_render_job,
+    get_pdf_storage,
+    get_preview_cache,
+    invalidate_preview,
+    normalize_signature_image,
+    preview_version,
+    render_preview,
+    resolve_output_profile,
+    resolve_render_backend,
+    serialize_render_job,
+)
 
 router = APIRouter(prefix="/contracts", tags=["Contracts"])
 
 DEFAULT_CURRENCY = "₹"
+# Seconds a client should wait before retrying a download whose PDF is queued.
+PDF_GENERATING_RETRY_AFTER_SECONDS = 5
 HOUSE_SALE_TYPE = "house_sale"
 WEBSITE_DEVELOPMENT_TYPE = "website_development"
 BROKER_TYPE = "broker"
@@ -146,6 +171,21 @@ def _build_pdf_payload(contract_doc: dict, signature_doc: Optional[dict] = None)
     }
 
 
+async def _normalize_signature(value: Optional[str], label: str) -> tuple[Optional[str], Optional[dict]]:
+    """Decode, trim and re-encode a submitted signature image once at ingest.
+
+    Allowlisted image URLs are downloaded here, so only inline images are
+    stored. Returns the value to store and its size metadata.
+    """
+    if value is None:
+        return None, None
+    try:
+        normalized = await asyncio.to_thread(normalize_signature_image, value)
+    except ValueError as error:
+        raise HTTPException(status_code=400, detail=f"Invalid {label}: {error}")
+    return normalized.data_uri, normalized.as_metadata()
+
+
 def _normalize_template_data(payload: ContractCreate) -> dict:
     template_data = payload.templateData
     if template_data is None:
@@ -436,35 +476,77 @@ async def _attach_sender_fields(doc: dict) -> dict:
     return doc
 
 
-async def _generate_legacy_pdf_path(contract_id: str, doc: dict) -> str:
-    """Regenerate and persist PDFs for older signed contracts missing pdf_path."""
+async def queue_pdf_backfill(doc: dict, run_id=None, profile: Optional[str] = None) -> Optional[dict]:
+    """Queue a background render of a signed contract's PDF.
+
+    The contract's ``backfillJobId`` marks the job that owns the render, so a
+    contract is queued at most once however many downloads or backfill runs
+    ask for it. Returns the active job, or None if the contract is no longer
+    signed.
+
+    Raises:
+        ValueError: If a legacy signature image URL cannot be stored inline.
+    """
+    current_job_id = doc.get("backfillJobId")
+    if current_job_id is not None:
+        current_job = await render_jobs_collection.find_one({"_id": current_job_id}, {"payload": 0})
+        if current_job and current_job.get("status") in JOB_ACTIVE_STATUSES:
+            return current_job
+
     signature_doc = await signatures_collection.find_one(
         {
             "$or": [
                 {"contractId": doc["_id"]},
-                {"contractId": contract_id},
+                {"contractId": str(doc["_id"])},
             ]
         }
     )
-    if not signature_doc:
-        raise HTTPException(status_code=404, detail="Signed PDF not available for this contract")
+    doc = await _attach_sender_fields(dict(doc))
+    await inline_legacy_signatures(doc, signature_doc)
+    job = build_render_job(
+        doc["_id"],
+        _build_pdf_payload(doc, signature_doc),
+        kind=JOB_KIND_BACKFILL,
+        profile=profile,
+        backfill_run_id=run_id,
+    )
+    job["_id"] = ObjectId()
 
-    doc = await _attach_sender_fields(doc)
+    # Swap in the new job only if nobody queued one since the document was read.
+    claimed = await contracts_collection.update_one(
+        {"_id": doc["_id"], "status": ContractStatus.signed.value, "backfillJobId": current_job_id},
+        {"$set": {"backfillJobId": job["_id"]}},
+    )
+    if claimed.matched_count == 0:
+        latest = await contracts_collection.find_one({"_id": doc["_id"]}, {"status": 1, "backfillJobId": 1})
+        if not latest or latest.get("status") != ContractStatus.signed.value or latest.get("backfillJobId") is None:
+            return None
+        return await render_jobs_collection.find_one({"_id": latest["backfillJobId"]}, {"payload": 0})
+
+    await render_jobs_collection.insert_one(job)
+    return job
 
+
+async def _pdf_generating_response(contract_id: str, doc: dict) -> JSONResponse:
+    """Queue the contract's PDF and tell the client to retry shortly."""
     try:
-        pdf_path = generate_contract_pdf(_build_pdf_payload(doc, signature_doc))
+        job = await queue_pdf_backfill(doc)
     except ValueError as error:
-        print(f"Legacy PDF validation failed for contract {contract_id}: {error}")
-        raise HTTPException(status_code=400, detail=str(error))
-    except Exception as error:
-        print(f"Legacy PDF generation failed for contract {contract_id}: {error}")
-        raise HTTPException(status_code=500, detail="Failed to generate signed contract PDF.")
-
-    await contracts_collection.update_one(
-        {"_id": doc["_id"]},
-        {"$set": {"pdf_path": pdf_path}},
+        raise HTTPException(status_code=422, detail=f"Signed PDF cannot be generated: {error}")
+    if job is None:
+        raise HTTPException(status_code=404, detail="Signed PDF not available for this contract")
+    return JSONResponse(
+        status_code=202,
+        content=jsonable_encoder(
+            {
+                "contractId": contract_id,
+                "status": "generating",
+                "detail": "The signed PDF is being generated. Please try again shortly.",
+                "renderJob": serialize_render_job(job),
+            }
+        ),
+        headers={"Retry-After": str(PDF_GENERATING_RETRY_AFTER_SECONDS)},
     )
-    return pdf_path
 
 
 # ── POST /contracts  ──────────────────────────────────────────
@@ -501,6 +583,11 @@ async def create_contract(payload: ContractCreate):
     elif contract_type == EMPLOYMENT_TYPE:
         normalized_amount = _validate_employment_data(payload, template_data)
 
+    creator_signature, creator_signature_meta = await _normalize_signature(
+        payload.creator_signature,
+        "creator signature",
+    )
+
     doc = {
         "title": payload.title,
         "type": payload.type,
@@ -511,9 +598,10 @@ async def create_contract(payload: ContractCreate):
         "clauses": payload.clauses.model_dump(),
         "templateData": template_data,
         "signatures": {
-            "creator": payload.creator_signature,
+            "creator": creator_signature,
             "client": None,
         },
+        "signatureMeta": {"creator": creator_signature_meta},
         "status": ContractStatus.draft.value,
         "userId": user_oid,
         "userName": user.get("name", ""),
@@ -523,6 +611,7 @@ async def create_contract(payload: ContractCreate):
         "clientEmail": client.get("email", ""),
         "createdAt": datetime.now(timezone.utc),
         "signedAt": None,
+        "revision": 0,
     }
 
     result = await contracts_collection.insert_one(doc)
@@ -579,9 +668,17 @@ async def get_contract(contract_id: str):
 @router.get("/{contract_id}/download")
 async def download_contract_pdf(
     contract_id: str,
+    request: Request,
     user_id: str = Query(..., description="Requesting user/client id"),
 ):
-    """Serve a previously generated signed-contract PDF file."""
+    """Serve a signed-contract PDF file.
+
+    Single byte ranges are honoured, so viewers can show the first page of a
+    linearized PDF before the rest arrives.
+
+    Signed contracts whose PDF is missing get a background render queued and
+    a ``202`` answer with ``Retry-After``; the render never runs in the request.
+    """
     contract_oid = _validate_object_id(contract_id, "contract")
     requester_oid = _validate_object_id(user_id, "requesting user")
 
@@ -592,16 +689,124 @@ async def download_contract_pdf(
     if not _is_contract_owner(doc, requester_oid, user_id):
         raise HTTPException(status_code=403, detail="You do not have access to this contract")
 
-    pdf_path_value = doc.get("pdf_path")
-    if not pdf_path_value and doc.get("status") == ContractStatus.signed.value:
-        pdf_path_value = await _generate_legacy_pdf_path(contract_id, doc)
+    if not has_stored_pdf(doc) and doc.get("status") == ContractStatus.signed.value:
+        return await _pdf_generating_response(contract_id, doc)
+
+    pdf_key = doc.get("pdf_key")
+    pdf_digest = str(doc.get("pdf_sha256") or "")
+    if not pdf_key and pdf_digest:
+        # Content-addressed PDFs stored before contracts recorded their key.
+        try:
+            pdf_key = build_pdf_key(pdf_digest)
+        except ValueError:
+            raise HTTPException(status_code=400, detail="Stored PDF digest is invalid")
 
+    if pdf_key:
+        return await _stored_pdf_response(contract_id, doc, str(pdf_key), request)
+
+    pdf_path_value = doc.get("pdf_path")
     if not pdf_path_value:
         raise HTTPException(status_code=404, detail="Signed PDF not available for this contract")
 
-    storage_root = PDF_STORAGE_PATH.resolve()
+    pdf_path = await asyncio.to_thread(_resolve_legacy_pdf_path, str(pdf_path_value))
+    if pdf_path is None:
+        return await _missing_pdf_response(contract_id, doc)
+    return FileResponse(
+        str(pdf_path),
+        media_type="application/pdf",
+        filename=f"contract_{contract_id}.pdf",
+    )
+
+
+async def _stored_pdf_response(contract_id: str, doc: dict, pdf_key: str, request: Request) -> Response:
+    """Serve a PDF from the storage backend without blocking the event loop.
+
+    ``FileResponse`` answers range requests itself; PDFs read into memory
+    from other backends get the same single-range handling here.
+    """
+    storage = get_pdf_storage()
+    try:
+        stored = await storage.astat(pdf_key)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Stored PDF key is invalid")
+    except FileNotFoundError:
+        return await _missing_pdf_response(contract_id, doc)
+
+    # Comparing the stored size is enough to catch truncation without
+    # re-hashing per request.
+    expected_size = doc.get("pdf_size")
+    if expected_size is not None and stored.size_bytes != int(expected_size):
+        print(f"Stored PDF size mismatch for contract {contract_id}: {stored.size_bytes} != {expected_size}")
+        raise HTTPException(status_code=500, detail="Stored PDF failed its integrity check")
+
+    file_name = f"contract_{contract_id}.pdf"
+    pdf_digest = doc.get("pdf_sha256")
+    headers = {"ETag": f'"{pdf_digest}"'} if pdf_digest else {}
+    if stored.path is not None:
+        return FileResponse(str(stored.path), media_type="application/pdf", filename=file_name, headers=headers)
+
+    try:
+        content = await storage.aread(pdf_key)
+    except FileNotFoundError:
+        return await _missing_pdf_response(contract_id, doc)
+    headers["Content-Disposition"] = f'attachment; filename="{file_name}"'
+    headers["Accept-Ranges"] = "bytes"
+
+    if_range = request.headers.get("if-range")
+    if if_range is None or if_range == headers.get("ETag"):
+        byte_range = _parse_byte_range(request.headers.get("range"), len(content))
+        if byte_range is not None:
+            start, end = byte_range
+            headers["Content-Range"] = f"bytes {start}-{end}/{len(content)}"
+            return Response(
+                content=content[start:end + 1], status_code=206, media_type="application/pdf", headers=headers
+            )
+    return Response(content=content, media_type="application/pdf", headers=headers)
+
+
+def _parse_byte_range(range_header: Optional[str], size: int) -> Optional[tuple[int, int]]:
+    """Return the inclusive ``(start, end)`` of a single ``bytes=`` range.
+
+    None means the whole file is served: no header, a malformed one, or
+    several ranges (which a server may answer with the full body).
+    """
+    if not range_header or not range_header.startswith("bytes=") or "," in range_header:
+        return None
+    first, _, last = range_header[len("bytes="):].strip().partition("-")
+    try:
+        if first:
+            start = int(first)
+            end = min(int(last), size - 1) if last else size - 1
+        elif last:
+            # Suffix range: the last N bytes.
+            start = max(0, size - int(last))
+            end = size - 1
+        else:
+            return None
+    except ValueError:
+        return None
+    if start >= size or end < start:
+        raise HTTPException(
+            status_code=416, detail="Requested range not satisfiable", headers={"Content-Range": f"bytes */{size}"}
+        )
+    return start, end
+
+
+async def _missing_pdf_response(contract_id: str, doc: dict) -> JSONResponse:
+    """Regenerate a signed PDF whose stored file has gone missing."""
+    if doc.get("status") != ContractStatus.signed.value:
+        raise HTTPException(status_code=404, detail="Signed PDF file is missing")
+    print(f"Stored PDF missing for signed contract {contract_id}; queueing a re-render")
+    return await _pdf_generating_response(contract_id, doc)
 
-    pdf_path = Path(str(pdf_path_value))
+
+def _resolve_legacy_pdf_path(pdf_path_value: str) -> Optional[Path]:
+    """Locate a PDF saved by path before content addressing; blocking.
+
+    Returns None when the file no longer exists.
+    """
+    storage_root = PDF_STORAGE_PATH.resolve()
+    pdf_path = Path(pdf_path_value)
     if not pdf_path.is_absolute():
         pdf_path = (storage_root / pdf_path).resolve()
     else:
@@ -613,13 +818,66 @@ async def download_contract_pdf(
         raise HTTPException(status_code=400, detail="Stored PDF path is invalid")
 
     if not pdf_path.exists():
-        raise HTTPException(status_code=404, detail="Signed PDF file is missing")
+        return None
+    return pdf_path
 
-    return FileResponse(
-        str(pdf_path),
-        media_type="application/pdf",
-        filename=f"contract_{contract_id}.pdf",
-    )
+
+# ── GET /contracts/{id}/preview  ─────────────────────────────
+@router.get("/{contract_id}/preview")
+async def preview_contract(
+    contract_id: str,
+    request: Request,
+    user_id: str = Query(..., description="Requesting user/client id"),
+    output_mode: Literal["html", "bytes"] = Query("html", description="html page or watermarked PDF bytes"),
+):
+    """Render a watermarked draft preview, cached per contract revision and template version."""
+    contract_oid = _validate_object_id(contract_id, "contract")
+    requester_oid = _validate_object_id(user_id, "requesting user")
+
+    doc = await contracts_collection.find_one({"_id": contract_oid})
+    if not doc:
+        raise HTTPException(status_code=404, detail="Contract not found")
+
+    if not _is_contract_owner(doc, requester_oid, user_id):
+        raise HTTPException(status_code=403, detail="You do not have access to this contract")
+
+    revision = int(doc.get("revision") or 0)
+    doc = await _attach_sender_fields(doc)
+    payload = _build_pdf_payload(doc)
+    # Covers the template, stylesheet, fonts and sender details as well as
+    # the revision, so a deploy never serves a stale preview.
+    try:
+        version = await asyncio.to_thread(preview_version, payload, output_mode)
+    except ValueError as error:
+        raise HTTPException(status_code=400, detail=str(error))
+    media_type = "text/html; charset=utf-8" if output_mode == "html" else "application/pdf"
+    headers = {
+        "ETag": f'"{contract_id}-{revision}-{output_mode}-{version[:32]}"',
+        "Cache-Control": "private, no-cache",
+    }
+    if request.headers.get("if-none-match") == headers["ETag"]:
+        return Response(status_code=304, headers=headers)
+
+    preview_cache = get_preview_cache()
+    content = preview_cache.get(contract_id, revision, output_mode, version)
+    if content is None:
+        try:
+            rendered = await render_preview(payload, output_mode)
+        except RenderQueueFullError:
+            raise HTTPException(status_code=503, detail="PDF generation is busy. Please try again shortly.")
+        except RenderLimitError as error:
+            print(f"Preview generation for contract {contract_id} hit a render limit: {error}")
+            raise HTTPException(status_code=503, detail="Contract preview took too long to generate. Please try again shortly.")
+        except ValueError as error:
+            raise HTTPException(status_code=400, detail=str(error))
+        except Exception as error:
+            print(f"Preview generation failed for contract {contract_id}: {error}")
+            raise HTTPException(status_code=500, detail="Failed to generate contract preview.")
+        content = preview_cache.put(contract_id, revision, output_mode, version, rendered)
+
+    if output_mode == "bytes":
+        headers["Content-Disposition"] = f'inline; filename="contract_{contract_id}_preview.pdf"'
+    return Response(content=content, media_type=media_type, headers=headers)
 
 
 # ── PATCH /contracts/{id}/status  ─────────────────────────────
@@ -671,6 +929,11 @@ async def update_contract(
     elif contract_type == BROKER_TYPE:
         normalized_amount = _validate_broker_data(payload, template_data)
 
+    creator_signature, creator_signature_meta = await _normalize_signature(
+        payload.creator_signature,
+        "creator signature",
+    )
+
     update_fields = {
         "title": payload.title,
         "type": payload.type,
@@ -680,7 +943,8 @@ async def update_contract(
         "dueDate": payload.dueDate,
         "clauses": payload.clauses.model_dump(),
         "templateData": template_data,
-        "signatures.creator": payload.creator_signature,
+        "signatures.creator": creator_signature,
+        "signatureMeta.creator": creator_signature_meta,
         "userId": user_oid,
         "userName": user.get("name", ""),
         "userEmail": user.get("email", ""),
@@ -689,15 +953,18 @@ async def update_contract(
         "clientEmail": client.get("email", ""),
     }
 
+    # Every edit bumps the revision so cached previews of the old draft are
+    # never served again.
     result = await contracts_collection.find_one_and_update(
         {"_id": oid, "status": ContractStatus.draft.value},
-        {"$set": update_fields},
+        {"$set": update_fields, "$inc": {"revision": 1}},
         return_document=ReturnDocument.AFTER,
     )
 
     if result is None:
         raise HTTPException(status_code=400, detail="Only draft contracts can be edited")
 
+    invalidate_preview(contract_id, int(existing.get("revision") or 0))
     return _serialize(result)
 
 
@@ -753,15 +1020,38 @@ async def update_contract_status(
     return _serialize(result)
 
 
+async def _queue_prerender(contract_doc: dict, profile: str) -> None:
+    """Queue a send-time pre-render so signing only has to stamp the signature.
+
+    Best effort: without a pre-render the sign job renders the contract in full.
+    """
+    try:
+        await inline_legacy_signatures(contract_doc)
+        sent_at = datetime.now(timezone.utc)
+        payload = build_sign_payload(contract_doc, None, sent_at)
+        await render_jobs_collection.insert_one(
+            build_render_job(contract_doc["_id"], payload, kind=JOB_KIND_PRERENDER, profile=profile, now=sent_at)
+        )
+    except Exception as error:
+        print(f"Failed to queue pre-render for contract {contract_doc.get('_id')}: {error}")
+
+
 # ── PUT /contracts/{id}/send  ─────────────────────────────────
 @router.put("/{contract_id}/send", response_model=ContractOut)
-async def send_contract(contract_id: str):
+async def send_contract(
+    contract_id: str,
+    profile: Optional[str] = Query(None, description="Output profile the contract will be signed with"),
+):
     """
     Mark a contract as 'sent'.
     Only drafts can be sent.
     """
 
     oid = _validate_object_id(contract_id, "contract")
+    try:
+        profile_name, _ = resolve_output_profile(profile)
+    except ValueError as error:
+        raise HTTPException(status_code=400, detail=str(error))
     creator_signature_filter = {
         "$exists": True,
         "$nin": [None, ""],
@@ -794,4 +1084,8 @@ async def send_contract(contract_id: str):
             detail=f"Cannot send — contract status is '{existing['status']}' (must be 'draft')",
         )
 
+    # Directly written contract types render faster than a pre-render is stamped.
+    if PDF_PRERENDER_ENABLED and resolve_render_backend(result.get("type")) != RENDER_BACKEND_DIRECT:
+        await _queue_prerender(result, profile_name)
+
     return _serialize(result)
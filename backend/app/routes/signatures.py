@@ -5,26 +5,39 @@ Handles contract signing.
 
 import asyncio
 from datetime import datetime, timedelta, timezone
-from pathlib import Path
-import sys
+from typing import Optional
 
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, HTTPException, Query
 from bson import ObjectId
 from pymongo import ReturnDocument
 
-from app.db.mongo import contracts_collection, signatures_collection, db
+from app.db.mongo import contracts_collection, signatures_collection, render_jobs_collection, db
 from app.models.signature import SignatureCreate, SignatureOut
 from app.models.contract import ContractStatus
 
-REPO_ROOT = Path(__file__).resolve().parents[3]
-if str(REPO_ROOT) not in sys.path:
-    sys.path.append(str(REPO_ROOT))
-
-from pdf_gen_engine import generate_contract_pdf
+from app.core.pdf_engine import (
+    JOB_KIND_SIGN,
+    PDF_EMBEDDED_RENDER_WORKERS,
+    RENDER_JOB_INDEXES,
+    build_render_job,
+    normalize_signature_image,
+    resolve_output_profile,
+    serialize_render_job,
+    shutdown_render_executor,
+    start_embedded_workers,
+)
 
 router = APIRouter(prefix="/contracts", tags=["Signatures"])
 
 PENDING_LOCK_TTL = timedelta(minutes=5)
+NO_ACTIVE_RENDER_JOB = {
+    "$or": [
+        {"renderJobId": {"$exists": False}},
+        {"renderJobId": None},
+    ]
+}
+# Contracts record the storage key of their PDF; older ones a file path.
+NO_STORED_PDF = {"pdf_key": {"$in": [None, ""]}, "pdf_path": {"$in": [None, ""]}}
 DEFAULT_CURRENCY = "₹"
 HOUSE_SALE_TYPE = "house_sale"
 WEBSITE_DEVELOPMENT_TYPE = "website_development"
@@ -34,6 +47,11 @@ EMPLOYMENT_TYPE = "employment"
 SUPPORTED_CONTRACT_TYPES = {HOUSE_SALE_TYPE, WEBSITE_DEVELOPMENT_TYPE, BROKER_TYPE, NDA_TYPE, EMPLOYMENT_TYPE}
 
 
+def has_stored_pdf(contract_doc: dict) -> bool:
+    """Return True once a signed PDF has been stored for the contract."""
+    return bool(contract_doc.get("pdf_key") or contract_doc.get("pdf_path"))
+
+
 def _build_contract_terms(contract_doc: dict) -> list[str]:
     """Create a simple printable terms list for the PDF template."""
     terms: list[str] = []
@@ -57,6 +75,86 @@ def _build_contract_terms(contract_doc: dict) -> list[str]:
     return terms or ["Both parties agree to the terms captured in this contract."]
 
 
+def build_sign_payload(
+    contract_doc: dict,
+    signature_image: str | None,
+    signed_at: datetime,
+) -> dict:
+    """Build the PDF engine payload for a contract signed at ``signed_at``.
+
+    Also used at send time to pre-render the contract, so everything except
+    the client signature and signed date must come from the stored contract:
+    a contract with neither a client name nor a client email leaves the name
+    to the template's default rather than the signer's typed name.
+    """
+    amount_value = contract_doc.get("amount")
+    contract_type = str(contract_doc.get("type") or "").strip().lower()
+    if contract_type == HOUSE_SALE_TYPE:
+        house_sale = ((contract_doc.get("templateData") or {}).get("houseSale") or {})
+        if house_sale.get("sale_price") is not None:
+            amount_value = house_sale.get("sale_price")
+    signature_fields = contract_doc.get("signatures") or {}
+
+    return {
+        "type": contract_type if contract_type in SUPPORTED_CONTRACT_TYPES else "",
+        "templateData": contract_doc.get("templateData") or {},
+        "contract_id": str(contract_doc["_id"]),
+        "title": contract_doc.get("title") or "Contract",
+        "description": contract_doc.get("description") or "",
+        "clauses": contract_doc.get("clauses") or {},
+        "creator_name": contract_doc.get("userName")
+        or contract_doc.get("userEmail")
+        or "Creator",
+        "client_name": contract_doc.get("clientName")
+        or contract_doc.get("clientEmail"),
+        "amount": amount_value if amount_value is not None else None,
+        "currency": contract_doc.get("currency") or DEFAULT_CURRENCY,
+        "due_date": contract_doc.get("dueDate"),
+        "signed_date": signed_at,
+        "contract_terms": _build_contract_terms(contract_doc),
+        "signature_client": signature_image,
+        "signature_creator": signature_fields.get("creator") or "",
+    }
+
+
+def _is_remote_image(value) -> bool:
+    return isinstance(value, str) and value.strip()[:8].lower().startswith(("http://", "https://"))
+
+
+async def inline_legacy_signatures(contract_doc: dict, signature_doc: Optional[dict] = None) -> None:
+    """Store http(s) signature images of an older contract inline, in place.
+
+    Signatures are downloaded and normalized when submitted, but contracts
+    stored before that may still reference an allowlisted image URL, which
+    renders never fetch. Each such image is downloaded once and written back
+    to the contract (and ``signature_doc``), so payloads built from the
+    documents afterwards are inline.
+
+    Raises:
+        ValueError: If an image cannot be downloaded or is not a usable image.
+    """
+    signature_fields = dict(contract_doc.get("signatures") or {})
+    updates: dict = {}
+    for field in ("creator", "client"):
+        if _is_remote_image(signature_fields.get(field)):
+            normalized = await asyncio.to_thread(normalize_signature_image, signature_fields[field])
+            signature_fields[field] = normalized.data_uri
+            updates[f"signatures.{field}"] = normalized.data_uri
+            updates[f"signatureMeta.{field}"] = normalized.as_metadata()
+    if updates:
+        await contracts_collection.update_one({"_id": contract_doc["_id"]}, {"$set": updates})
+        contract_doc["signatures"] = signature_fields
+        print(f"Stored legacy signature images of contract {contract_doc['_id']} inline")
+
+    if signature_doc is not None and _is_remote_image(signature_doc.get("signatureImage")):
+        normalized = await asyncio.to_thread(normalize_signature_image, signature_doc["signatureImage"])
+        await signatures_collection.update_one(
+            {"_id": signature_doc["_id"]},
+            {"$set": {"signatureImage": normalized.data_uri, "signatureImageMeta": normalized.as_metadata()}},
+        )
+        signature_doc["signatureImage"] = normalized.data_uri
+
+
 async def cleanup_stale_pending_contracts(now: datetime | None = None) -> int:
     """Reset stale pending contracts so they can be signed again."""
     current_time = now or datetime.now(timezone.utc)
@@ -72,13 +170,9 @@ async def cleanup_stale_pending_contracts(now: datetime | None = None) -> int:
                         {"pendingAt": None},
                     ]
                 },
-                {
-                    "$or": [
-                        {"pdf_path": {"$exists": False}},
-                        {"pdf_path": None},
-                        {"pdf_path": ""},
-                    ]
-                },
+                NO_STORED_PDF,
+                # Contracts with a queued render job are recovered by job leases.
+                NO_ACTIVE_RENDER_JOB,
             ],
         },
         {
@@ -102,17 +196,48 @@ async def _ensure_signatures_collection() -> None:
     await signatures_collection.create_index("contractId")
     await signatures_collection.create_index("signedAt")
     await contracts_collection.create_index("pendingAt")
+    for keys, options in RENDER_JOB_INDEXES:
+        await render_jobs_collection.create_index(keys, **options)
     await cleanup_stale_pending_contracts()
 
 
+_stop_embedded_render_workers = None
+
+
+@router.on_event("startup")
+async def _start_embedded_render_workers() -> None:
+    """Process queued render jobs in-process unless dedicated workers are used."""
+    global _stop_embedded_render_workers
+    if PDF_EMBEDDED_RENDER_WORKERS <= 0:
+        return
+
+    _stop_embedded_render_workers = await asyncio.to_thread(
+        start_embedded_workers,
+        PDF_EMBEDDED_RENDER_WORKERS,
+    )
+
+
+@router.on_event("shutdown")
+async def _shutdown_pdf_render_executor() -> None:
+    """Stop render workers and PDF render processes with the API process."""
+    if _stop_embedded_render_workers is not None:
+        _stop_embedded_render_workers()
+    shutdown_render_executor(wait=False)
+
+
 # ── POST /contracts/{id}/sign  ────────────────────────────────
-@router.post("/{contract_id}/sign", response_model=SignatureOut, status_code=201)
-async def sign_contract(contract_id: str, payload: SignatureCreate):
+@router.post("/{contract_id}/sign", response_model=SignatureOut, status_code=202)
+async def sign_contract(
+    contract_id: str,
+    payload: SignatureCreate,
+    profile: Optional[str] = Query(None, description="PDF output profile; defaults to PDF_OUTPUT_PROFILE"),
+):
     """
     Sign a contract.
     - Contract must exist and have status 'sent'.
-    - Generates and stores a PDF exactly once as part of signing finalization.
-    - Creates a signature record and updates contract status to 'signed'.
+    - Creates a signature record and queues the final PDF render job.
+    - A render worker stores the PDF and updates contract status to 'signed';
+      poll GET /contracts/{id}/render-status for progress.
     """
 
     # Validate contract ID
@@ -121,6 +246,28 @@ async def sign_contract(contract_id: str, payload: SignatureCreate):
     except Exception:
         raise HTTPException(status_code=400, detail="Invalid contract ID format")
 
+    try:
+        profile_name, _ = resolve_output_profile(profile)
+    except ValueError as error:
+        raise HTTPException(status_code=400, detail=str(error))
+
+    # Decode and compact the signature once, before anything is locked or stored.
+    try:
+        normalized_signature = await asyncio.to_thread(normalize_signature_image, payload.signatureImage)
+    except ValueError as error:
+        raise HTTPException(status_code=400, detail=f"Invalid signature image: {error}")
+    signature_image = normalized_signature.data_uri
+    signature_image_meta = normalized_signature.as_metadata()
+
+    # Contracts from before ingest-time normalization may still reference a
+    # creator signature by URL; store it inline before the render is queued.
+    stored_contract = await contracts_collection.find_one({"_id": oid}, {"signatures": 1})
+    if stored_contract:
+        try:
+            await inline_legacy_signatures(stored_contract)
+        except ValueError as error:
+            raise HTTPException(status_code=400, detail=f"Invalid creator signature: {error}")
+
     signed_at = datetime.now(timezone.utc)
     stale_before = signed_at - PENDING_LOCK_TTL
     await cleanup_stale_pending_contracts(signed_at)
@@ -136,16 +283,11 @@ async def sign_contract(contract_id: str, payload: SignatureCreate):
                         {
                             "status": ContractStatus.pending.value,
                             "pendingAt": {"$lte": stale_before},
+                            **NO_ACTIVE_RENDER_JOB,
                         },
                     ]
                 },
-                {
-                    "$or": [
-                        {"pdf_path": {"$exists": False}},
-                        {"pdf_path": None},
-                        {"pdf_path": ""},
-                    ]
-                },
+                NO_STORED_PDF,
             ],
         },
         {
@@ -167,7 +309,7 @@ async def sign_contract(contract_id: str, payload: SignatureCreate):
         if not str(existing_signatures.get("creator") or "").strip():
             raise HTTPException(status_code=400, detail="Creator signature is missing from this contract")
 
-        if existing.get("status") == ContractStatus.signed.value and existing.get("pdf_path"):
+        if existing.get("status") == ContractStatus.signed.value and has_stored_pdf(existing):
             raise HTTPException(status_code=400, detail="Contract is already signed")
 
         if existing.get("status") == ContractStatus.pending.value:
@@ -198,19 +340,14 @@ async def sign_contract(contract_id: str, payload: SignatureCreate):
         "contractId": oid,
         "signerName": payload.signerName,
         "signerEmail": payload.signerEmail,
-        "signatureImage": payload.signatureImage,
+        "signatureImage": signature_image,
+        "signatureImageMeta": signature_image_meta,
         "signatureType": payload.signatureType,
         "signedAt": signed_at,
     }
 
     result = await signatures_collection.insert_one(sig_doc)
 
-    amount_value = locked_contract.get("amount")
-    contract_type = str(locked_contract.get("type") or "").strip().lower()
-    if contract_type == HOUSE_SALE_TYPE:
-        house_sale = ((locked_contract.get("templateData") or {}).get("houseSale") or {})
-        if house_sale.get("sale_price") is not None:
-            amount_value = house_sale.get("sale_price")
     signature_fields = locked_contract.get("signatures") or {}
 
     if not str(signature_fields.get("creator") or "").strip():
@@ -227,108 +364,74 @@ async def sign_contract(contract_id: str, payload: SignatureCreate):
         )
         raise HTTPException(status_code=400, detail="Creator signature is missing from this contract")
 
-    contract_payload = {
-        "type": contract_type if contract_type in SUPPORTED_CONTRACT_TYPES else "",
-        "templateData": locked_contract.get("templateData") or {},
-        "contract_id": str(locked_contract["_id"]),
-        "title": locked_contract.get("title") or "Contract",
-        "description": locked_contract.get("description") or "",
-        "clauses": locked_contract.get("clauses") or {},
-        "creator_name": locked_contract.get("userName")
-        or locked_contract.get("userEmail")
-        or "Creator",
-        "client_name": locked_contract.get("clientName")
-        or locked_contract.get("clientEmail")
-        or payload.signerName,
-        "amount": amount_value if amount_value is not None else None,
-        "currency": locked_contract.get("currency") or DEFAULT_CURRENCY,
-        "due_date": locked_contract.get("dueDate"),
-        "signed_date": signed_at,
-        "contract_terms": _build_contract_terms(locked_contract),
-        "signature_client": payload.signatureImage,
-        "signature_creator": signature_fields.get("creator") or "",
-    }
-
-    try:
-        pdf_path = await asyncio.to_thread(generate_contract_pdf, contract_payload)
-    except ValueError as error:
-        print(f"PDF validation failed for signed contract {contract_id}: {error}")
-        await signatures_collection.delete_one({"_id": result.inserted_id})
-        await contracts_collection.update_one(
-            {"_id": oid},
-            {
-                "$set": {
-                    "status": ContractStatus.sent.value,
-                    "signedAt": None,
-                    "pendingAt": None,
-                }
-            },
-        )
-        raise HTTPException(
-            status_code=400,
-            detail=str(error),
-        )
-    except Exception as error:
-        print(f"PDF generation failed for signed contract {contract_id}: {error}")
-        await signatures_collection.delete_one({"_id": result.inserted_id})
-        await contracts_collection.update_one(
-            {"_id": oid},
-            {
-                "$set": {
-                    "status": ContractStatus.sent.value,
-                    "signedAt": None,
-                    "pendingAt": None,
-                }
-            },
-        )
-        raise HTTPException(
-            status_code=500,
-            detail="Failed to generate signed contract PDF.",
-        )
+    contract_payload = build_sign_payload(locked_contract, signature_image, signed_at)
 
+    # Record the render job on the contract before queueing it so a worker that
+    # claims the job immediately always finds the matching renderJobId.
+    render_job = build_render_job(
+        oid,
+        contract_payload,
+        signature_id=result.inserted_id,
+        profile=profile_name,
+        now=signed_at,
+    )
+    render_job["_id"] = ObjectId()
     try:
         update_result = await contracts_collection.update_one(
-            {"_id": oid},
-            {
-                "$set": {
-                    "status": ContractStatus.signed.value,
-                    "signedAt": signed_at,
-                    "pendingAt": None,
-                    "pdf_path": pdf_path,
-                    "signatures.client": payload.signatureImage,
-                }
-            },
+            {"_id": oid, "status": ContractStatus.pending.value},
+            {"$set": {"renderJobId": render_job["_id"]}},
         )
         if update_result.matched_count == 0:
-            raise RuntimeError("Contract record disappeared before signed update could be saved")
+            raise RuntimeError("Contract left the pending state before its render job was queued")
+        await render_jobs_collection.insert_one(render_job)
     except Exception as error:
-        print(f"Failed to persist signed contract state for {contract_id}: {error}")
-
-        try:
-            pdf_file = Path(str(pdf_path))
-            if pdf_file.exists():
-                pdf_file.unlink()
-        except Exception as cleanup_error:
-            print(f"Failed to delete generated PDF during rollback for {contract_id}: {cleanup_error}")
-
+        print(f"Failed to queue PDF render for signed contract {contract_id}: {error}")
         await signatures_collection.delete_one({"_id": result.inserted_id})
         await contracts_collection.update_one(
-            {"_id": oid},
+            {"_id": oid, "renderJobId": render_job["_id"]},
             {
                 "$set": {
                     "status": ContractStatus.sent.value,
                     "signedAt": None,
                     "pendingAt": None,
+                    "renderJobId": None,
                 }
             },
         )
-        raise HTTPException(status_code=500, detail="Failed to generate signed contract PDF.")
+        raise HTTPException(status_code=500, detail="Failed to queue signed contract PDF generation.")
 
     sig_doc["_id"] = str(result.inserted_id)
     sig_doc["contractId"] = str(sig_doc["contractId"])
+    sig_doc["renderJob"] = serialize_render_job(render_job)
     return sig_doc
 
 
+# ── GET /contracts/{id}/render-status  ───────────────────────
+@router.get("/{contract_id}/render-status")
+async def get_contract_render_status(contract_id: str):
+    """Report signing finalization progress so dashboards can poll it."""
+    try:
+        oid = ObjectId(contract_id)
+    except Exception:
+        raise HTTPException(status_code=400, detail="Invalid contract ID format")
+
+    contract = await contracts_collection.find_one({"_id": oid}, {"status": 1, "pdf_key": 1, "pdf_path": 1})
+    if not contract:
+        raise HTTPException(status_code=404, detail="Contract not found")
+
+    job = await render_jobs_collection.find_one(
+        {"contractId": oid, "kind": JOB_KIND_SIGN},
+        {"payload": 0},
+        sort=[("createdAt", -1)],
+    )
+    return {
+        "contractId": contract_id,
+        "status": contract.get("status"),
+        "pdfReady": has_stored_pdf(contract),
+        "renderJob": serialize_render_job(job) if job else None,
+    }
+
+
 # ── GET /contracts/{id}/signature  ───────────────────────────
 @router.get("/{contract_id}/signature")
 async def get_contract_signature(contract_id: str):
@@ -3895,7 +3895,11 @@ async function signContract() {
       return;
     }
 
-    showToast('Contract signed successfully!', 'success');
+    if (res.status === 202) {
+      showToast('Signature recorded. Your signed PDF is being generated.', 'success');
+    } else {
+      showToast('Contract signed successfully!', 'success');
+    }
     localStorage.removeItem('selected_contract_id');
     setTimeout(() => { window.location.href = './client-dashboard.html'; }, 1200);
   } catch (err) {
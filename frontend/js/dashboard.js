@@ -477,6 +477,45 @@ function bindCardButtons() {
   });
 }
 
+// ── Signing finalization polling ─────────────────────────────
+// Signed PDFs are generated by a background render job. While any contract
+// is still pending, poll its render status and reload once it settles.
+
+const RENDER_STATUS_POLL_MS = 3000;
+let renderStatusPollTimer = null;
+
+function scheduleRenderStatusPoll(contracts, reload) {
+  if (renderStatusPollTimer) {
+    clearTimeout(renderStatusPollTimer);
+    renderStatusPollTimer = null;
+  }
+
+  const pendingIds = contracts.filter((c) => c.status === 'pending').map((c) => c._id);
+  if (!pendingIds.length) return;
+
+  renderStatusPollTimer = setTimeout(async () => {
+    renderStatusPollTimer = null;
+    try {
+      const statuses = await Promise.all(pendingIds.map(async (id) => {
+        const res = await fetch(`${API_BASE}/contracts/${id}/render-status`);
+        return res.ok ? res.json() : null;
+      }));
+
+      const settled = statuses.filter((entry) => entry && entry.status !== 'pending');
+      if (settled.length) {
+        if (settled.some((entry) => entry.renderJob && entry.renderJob.status === 'failed')) {
+          showToast('A signed PDF could not be generated. Please sign the contract again.', 'error');
+        }
+        reload();
+        return;
+      }
+    } catch (err) {
+      console.error('Render status poll failed:', err);
+    }
+    scheduleRenderStatusPoll(contracts, reload);
+  }, RENDER_STATUS_POLL_MS);
+}
+
 // ── Data fetching ────────────────────────────────────────────
 
 async function loadUserDashboard(userId) {
@@ -502,6 +541,7 @@ async function loadUserDashboard(userId) {
     fillGrid('draftContractsGrid', drafts.map(renderUserDraftCard), 'No Draft Contracts', 'You do not have any saved drafts yet.', '📝');
 
     bindCardButtons();
+    scheduleRenderStatusPoll(contracts, () => loadUserDashboard(userId));
   } catch (err) {
     console.error('Dashboard load error:', err);
     showToast('Failed to load dashboard data.', 'error');
@@ -523,6 +563,7 @@ async function loadClientDashboard(clientId) {
     fillGrid('declinedContractsGrid', declined.map(renderClientSignedCard), 'No Declined Documents', 'You have not declined any contracts.', '❌');
 
     bindCardButtons();
+    scheduleRenderStatusPoll(contracts, () => loadClientDashboard(clientId));
   } catch (err) {
     console.error('Dashboard load error:', err);
     showToast('Failed to load dashboard data.', 'error');
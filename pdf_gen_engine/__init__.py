@@ -2,10 +2,15 @@
 
 This package provides a standalone service for rendering signed contract
 payloads into PDF files using Jinja2 templates and WeasyPrint.
+
+The public names below are imported on first access, so processes that only
+need the configuration or the job queue never load Jinja2 or WeasyPrint.
 """
 
 import os
+from importlib import import_module
 from pathlib import Path
+from typing import Any
 
 
 def _bootstrap_windows_gtk_runtime() -> None:
@@ -20,6 +25,38 @@ def _bootstrap_windows_gtk_runtime() -> None:
 
 _bootstrap_windows_gtk_runtime()
 
-from .services.pdf_service import generate_contract_pdf
-
-__all__ = ["generate_contract_pdf"]
+_EXPORTS = {
+    "RenderLimitError": ".errors",
+    "RenderMemoryError": ".errors",
+    "RenderQueueFullError": ".errors",
+    "RenderTimeoutError": ".errors",
+    "RenderReport": ".services.render_stats",
+    "generate_contract_pdf": ".services.pdf_service",
+    "generate_contract_pdfs": ".services.batch",
+    "get_pdf_storage": ".storage",
+    "get_preview_cache": ".services.preview",
+    "get_render_executor": ".services.render_executor",
+    "preview_version": ".services.preview",
+    "render": ".services.render_executor",
+    "render_preview": ".services.render_executor",
+    "render_with_report": ".services.render_executor",
+    "resolve_output_profile": ".services.output_profiles",
+    "shutdown_render_executor": ".services.render_executor",
+    "stats": ".services.render_stats",
+    "warm_up": ".services.warmup",
+}
+
+__all__ = sorted(_EXPORTS)
+
+
+def __getattr__(name: str) -> Any:
+    module_name = _EXPORTS.get(name)
+    if module_name is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(import_module(module_name, __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__() -> list[str]:
+    return sorted(set(globals()) | set(_EXPORTS))
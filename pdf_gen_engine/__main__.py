@@ -0,0 +1,151 @@
+"""Command-line entry point for the PDF engine.
+
+Render a JSON Lines file of contract payloads from repository root:
+    python -m pdf_gen_engine render --input payloads.jsonl --workers 4 --out rendered/
+
+One JSON report line is printed per document (with per-stage timings),
+followed by an aggregate summary line with engine statistics.
+
+Build the pinned font cache, for example while building an image:
+    python -m pdf_gen_engine fonts
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import sys
+from pathlib import Path
+from typing import Any, Iterator, TextIO
+
+from .config import PDF_FILE_PREFIX, PDF_OUTPUT_PROFILES, PDF_RENDER_WORKERS
+from .services.batch import BatchRenderResult, BatchRenderSummary, generate_contract_pdfs
+from .services.fonts import build_font_cache
+from .services.render_stats import stats
+from .services.url_fetcher import install_network_guard
+
+
+def _read_payloads(handle: TextIO) -> Iterator[dict[str, Any]]:
+    for line_number, line in enumerate(handle, start=1):
+        if not line.strip():
+            continue
+        try:
+            payload = json.loads(line)
+        except json.JSONDecodeError as error:
+            raise SystemExit(f"Invalid JSON on line {line_number}: {error}") from error
+        if not isinstance(payload, dict):
+            raise SystemExit(f"Line {line_number} is not a JSON object")
+        yield payload
+
+
+def _write_output(result: BatchRenderResult, out_dir: Path) -> dict[str, Any]:
+    file_name = f"{PDF_FILE_PREFIX}_{result.contract_id or result.index}.pdf"
+    output_path = out_dir / file_name
+    output_path.write_bytes(result.result)
+    return {"path": str(output_path), "size_bytes": len(result.result)}
+
+
+def _report(result: BatchRenderResult, out_dir: Path | None) -> dict[str, Any]:
+    report: dict[str, Any] = {
+        "index": result.index,
+        "contract_id": result.contract_id,
+        "ok": result.ok,
+        "render_ms": round(result.render_ms, 1),
+    }
+    if result.report is not None:
+        report["pages"] = result.report.pages
+        report["cache_hit"] = result.report.cache_hit
+        report["stages_ms"] = {stage: round(value, 1) for stage, value in result.report.stages.items()}
+    if not result.ok:
+        report["error"] = result.error
+    elif out_dir is not None:
+        report.update(_write_output(result, out_dir))
+    else:
+        report.update({"key": result.result.key, "path": result.result.path, "size_bytes": result.result.size_bytes})
+    return report
+
+
+def _render_command(args: argparse.Namespace) -> int:
+    out_dir: Path | None = None
+    if args.out:
+        out_dir = Path(args.out).resolve()
+        out_dir.mkdir(parents=True, exist_ok=True)
+
+    if args.forbid_network:
+        # Worker processes read the flag at start-up; in-process renders need
+        # the guard installed here.
+        os.environ["PDF_FORBID_NETWORK"] = "1"
+        if args.workers == 0:
+            install_network_guard()
+
+    summary = BatchRenderSummary()
+    handle = sys.stdin if args.input == "-" else open(args.input, encoding="utf-8")
+    try:
+        results = generate_contract_pdfs(
+            _read_payloads(handle),
+            output_mode="bytes" if out_dir is not None else "stored",
+            workers=args.workers,
+            max_in_flight=args.max_in_flight,
+            summary=summary,
+            profile=args.profile,
+        )
+        for result in results:
+            print(json.dumps(_report(result, out_dir)), flush=True)
+    finally:
+        if handle is not sys.stdin:
+            handle.close()
+
+    print(json.dumps({"summary": summary.as_dict(), "stats": stats()}), flush=True)
+    return 1 if summary.failures else 0
+
+
+def _fonts_command(args: argparse.Namespace) -> int:
+    print(json.dumps(build_font_cache()), flush=True)
+    return 0
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m pdf_gen_engine", description="ContractEase PDF engine tools.")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    render_parser = subparsers.add_parser("render", help="Render contract payloads from a JSON Lines file.")
+    render_parser.add_argument("--input", required=True, help="JSON Lines file of payloads, or - for stdin.")
+    render_parser.add_argument(
+        "--workers",
+        type=int,
+        default=PDF_RENDER_WORKERS,
+        help="Render worker processes (default: PDF_RENDER_WORKERS); 0 renders in-process.",
+    )
+    render_parser.add_argument(
+        "--out",
+        help="Directory for rendered PDFs. Defaults to content-addressed PDF storage (PDF_STORAGE_BACKEND).",
+    )
+    render_parser.add_argument(
+        "--max-in-flight",
+        type=int,
+        default=None,
+        help="Documents pending at once (default: 2 x workers).",
+    )
+    render_parser.add_argument(
+        "--profile",
+        choices=sorted(PDF_OUTPUT_PROFILES),
+        default=None,
+        help="Output profile (default: PDF_OUTPUT_PROFILE).",
+    )
+    render_parser.add_argument(
+        "--forbid-network",
+        action="store_true",
+        help="Fail any render that tries to open a network connection.",
+    )
+    render_parser.set_defaults(handler=_render_command)
+
+    fonts_parser = subparsers.add_parser("fonts", help="Build the pinned font cache used by render workers.")
+    fonts_parser.set_defaults(handler=_fonts_command)
+
+    args = parser.parse_args(argv)
+    return args.handler(args)
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
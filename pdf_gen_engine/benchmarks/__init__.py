@@ -0,0 +1,19 @@
+"""Benchmark suite for the PDF engine.
+
+Run from repository root:
+    python -m pdf_gen_engine.benchmarks run --output benchmarks/latest.json
+    python -m pdf_gen_engine.benchmarks compare benchmarks/latest.json benchmarks/baseline.json
+    python -m pdf_gen_engine.benchmarks ipc
+"""
+
+from .payloads import CONTRACT_TYPES, SCENARIOS, build_payload, signature_data_uri
+from .runner import compare_results, run_suite
+
+__all__ = [
+    "CONTRACT_TYPES",
+    "SCENARIOS",
+    "build_payload",
+    "compare_results",
+    "run_suite",
+    "signature_data_uri",
+]
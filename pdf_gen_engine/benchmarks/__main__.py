@@ -0,0 +1,248 @@
+"""Command-line entry point for the engine benchmarks."""
+
+from __future__ import annotations
+
+import argparse
+import json
+import sys
+from pathlib import Path
+
+from ..config import PDF_OUTPUT_PROFILES
+from .direct import DEFAULT_TOLERANCE, DIRECT_TYPES
+from .direct import format_report as format_direct_report
+from .first_page import DEFAULT_BANDWIDTH_KBPS, DEFAULT_RTT_MS, FIRST_PAGE_SCENARIOS, FIRST_PAGE_TYPES
+from .first_page import format_report as format_first_page_report
+from .imports import DEFAULT_CWD, DEFAULT_MODULE, format_report, measure_imports
+from .ipc import IPC_SCENARIOS
+from .ipc import format_report as format_ipc_report
+from .payloads import CONTRACT_TYPES, SCENARIOS
+from .priority import format_report as format_priority_report
+from .runner import compare_results, load_results, run_suite, save_results
+
+DEFAULT_THRESHOLD = 0.15
+
+
+def _print_regressions(regressions: list[dict], threshold: float) -> int:
+    if not regressions:
+        print(f"No regressions above {threshold:.0%}.")
+        return 0
+    print(f"{len(regressions)} regression(s) above {threshold:.0%}:")
+    for item in regressions:
+        print(
+            f"  {item['case']:<32} {item['metric']:<22} "
+            f"{item['baseline']} -> {item['current']} (x{item['ratio']})"
+        )
+    return 1
+
+
+def _run_command(args: argparse.Namespace) -> int:
+    results = run_suite(
+        contract_types=tuple(args.types),
+        scenarios=tuple(args.scenarios),
+        warm_iterations=args.warm_iterations,
+        throughput_documents=args.throughput_documents,
+        workers=args.workers,
+        cold=not args.skip_cold,
+        profiles=tuple(args.profiles),
+        ipc_iterations=args.ipc_iterations,
+        first_page_iterations=args.first_page_iterations,
+    )
+    if args.output:
+        save_results(results, Path(args.output))
+        print(f"Saved benchmark results to {args.output}", file=sys.stderr)
+    else:
+        print(json.dumps(results, indent=2, sort_keys=True))
+
+    if args.baseline:
+        regressions = compare_results(results, load_results(Path(args.baseline)), args.threshold)
+        return _print_regressions(regressions, args.threshold)
+    return 0
+
+
+def _compare_command(args: argparse.Namespace) -> int:
+    regressions = compare_results(load_results(Path(args.current)), load_results(Path(args.baseline)), args.threshold)
+    return _print_regressions(regressions, args.threshold)
+
+
+def _imports_command(args: argparse.Namespace) -> int:
+    report = measure_imports(args.module, Path(args.cwd), args.top)
+    if args.output:
+        Path(args.output).write_text(json.dumps(report, indent=2, sort_keys=True), encoding="utf-8")
+        print(f"Saved import report to {args.output}", file=sys.stderr)
+    print(format_report(report))
+
+    failed = False
+    if args.max_ms is not None and report["total_ms"] > args.max_ms:
+        print(f"Import time {report['total_ms']} ms exceeds the {args.max_ms} ms budget.")
+        failed = True
+    if args.forbid_render_deps:
+        loaded = [name for name, is_loaded in report["render_dependencies"].items() if is_loaded]
+        if loaded:
+            print(f"Render dependencies loaded at import: {', '.join(loaded)}")
+            failed = True
+    return 1 if failed else 0
+
+
+def _ipc_command(args: argparse.Namespace) -> int:
+    from .ipc import run_ipc
+
+    report = run_ipc(tuple(args.scenarios), args.iterations)
+    if args.output:
+        Path(args.output).write_text(json.dumps(report, indent=2, sort_keys=True), encoding="utf-8")
+        print(f"Saved IPC report to {args.output}", file=sys.stderr)
+    print(format_ipc_report(report))
+    return 0
+
+
+def _direct_command(args: argparse.Namespace) -> int:
+    from .direct import run_direct
+
+    report = run_direct(tuple(args.types), tuple(args.scenarios), args.iterations, args.tolerance)
+    if args.output:
+        Path(args.output).write_text(json.dumps(report, indent=2, sort_keys=True), encoding="utf-8")
+        print(f"Saved direct writer report to {args.output}", file=sys.stderr)
+    print(format_direct_report(report))
+    diverged = [name for name, case in report["cases"].items() if case["mismatches"]]
+    if diverged:
+        print(f"Direct layout differs from WeasyPrint for: {', '.join(diverged)}")
+        return 1
+    return 0
+
+
+def _first_page_command(args: argparse.Namespace) -> int:
+    from .first_page import run_first_page
+
+    report = run_first_page(
+        tuple(args.types), tuple(args.scenarios), args.iterations, args.profile, args.bandwidth_kbps, args.rtt_ms
+    )
+    if args.output:
+        Path(args.output).write_text(json.dumps(report, indent=2, sort_keys=True), encoding="utf-8")
+        print(f"Saved first page report to {args.output}", file=sys.stderr)
+    print(format_first_page_report(report))
+    return 0
+
+
+def _priority_command(args: argparse.Namespace) -> int:
+    from .priority import run_priority
+
+    reports = [
+        run_priority(workers, args.interactive, args.batch_documents, args.type, args.scenario, args.interval_ms)
+        for workers in args.workers
+    ]
+    if args.output:
+        Path(args.output).write_text(json.dumps({"runs": reports}, indent=2, sort_keys=True), encoding="utf-8")
+        print(f"Saved priority report to {args.output}", file=sys.stderr)
+    print("\n\n".join(format_priority_report(report) for report in reports))
+    exit_code = 0
+    for report in reports:
+        ratio = report["interactive"]["p99_ratio"]
+        if args.max_p99_ratio is not None and ratio is not None and ratio > args.max_p99_ratio:
+            print(
+                f"Interactive p99 under batch load on {report['workers']} workers is x{ratio} of idle, "
+                f"above x{args.max_p99_ratio}."
+            )
+            exit_code = 1
+    return exit_code
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m pdf_gen_engine.benchmarks", description="PDF engine benchmarks.")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    run_parser = subparsers.add_parser("run", help="Run the benchmark matrix.")
+    run_parser.add_argument("--types", nargs="+", choices=CONTRACT_TYPES, default=list(CONTRACT_TYPES))
+    run_parser.add_argument("--scenarios", nargs="+", choices=SCENARIOS, default=list(SCENARIOS))
+    run_parser.add_argument("--warm-iterations", type=int, default=5)
+    run_parser.add_argument("--throughput-documents", type=int, default=24, help="0 skips the throughput run.")
+    run_parser.add_argument("--workers", type=int, default=2, help="Render workers for the throughput run.")
+    run_parser.add_argument("--skip-cold", action="store_true", help="Skip the fresh-interpreter cold runs.")
+    run_parser.add_argument(
+        "--profiles",
+        nargs="*",
+        choices=sorted(PDF_OUTPUT_PROFILES),
+        default=list(PDF_OUTPUT_PROFILES),
+        help="Output profiles to compare; pass none to skip the comparison.",
+    )
+    run_parser.add_argument("--ipc-iterations", type=int, default=50, help="0 skips the IPC comparison.")
+    run_parser.add_argument(
+        "--first-page-iterations", type=int, default=5, help="0 skips the time-to-first-page comparison."
+    )
+    run_parser.add_argument("--output", help="Write results JSON here instead of stdout.")
+    run_parser.add_argument("--baseline", help="Compare against a previous results file.")
+    run_parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD)
+    run_parser.set_defaults(handler=_run_command)
+
+    compare_parser = subparsers.add_parser("compare", help="Compare two results files.")
+    compare_parser.add_argument("current")
+    compare_parser.add_argument("baseline")
+    compare_parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD)
+    compare_parser.set_defaults(handler=_compare_command)
+
+    imports_parser = subparsers.add_parser("imports", help="Report import time of the API process.")
+    imports_parser.add_argument("--module", default=DEFAULT_MODULE)
+    imports_parser.add_argument("--cwd", default=str(DEFAULT_CWD), help="Directory the module is imported from.")
+    imports_parser.add_argument("--top", type=int, default=20, help="Slowest modules to list.")
+    imports_parser.add_argument("--output", help="Also write the report JSON here.")
+    imports_parser.add_argument("--max-ms", type=float, help="Exit non-zero above this total import time.")
+    imports_parser.add_argument(
+        "--forbid-render-deps",
+        action="store_true",
+        help="Exit non-zero if Jinja2, Pillow, WeasyPrint or the render service were imported.",
+    )
+    imports_parser.set_defaults(handler=_imports_command)
+
+    ipc_parser = subparsers.add_parser("ipc", help="Compare pickled and shared-memory signature handoff.")
+    ipc_parser.add_argument("--scenarios", nargs="+", choices=IPC_SCENARIOS, default=list(IPC_SCENARIOS))
+    ipc_parser.add_argument("--iterations", type=int, default=50)
+    ipc_parser.add_argument("--output", help="Also write the report JSON here.")
+    ipc_parser.set_defaults(handler=_ipc_command)
+
+    direct_parser = subparsers.add_parser("direct", help="Check the direct writer against WeasyPrint.")
+    direct_parser.add_argument("--types", nargs="+", choices=DIRECT_TYPES, default=list(DIRECT_TYPES))
+    direct_parser.add_argument("--scenarios", nargs="+", choices=SCENARIOS, default=list(SCENARIOS))
+    direct_parser.add_argument("--iterations", type=int, default=10, help="0 skips the latency comparison.")
+    direct_parser.add_argument(
+        "--tolerance", type=float, default=DEFAULT_TOLERANCE, help="Allowed line position difference in CSS px."
+    )
+    direct_parser.add_argument("--output", help="Also write the report JSON here.")
+    direct_parser.set_defaults(handler=_direct_command)
+
+    first_page_parser = subparsers.add_parser(
+        "first-page", help="Compare time to first page of written and linearized PDFs."
+    )
+    first_page_parser.add_argument("--types", nargs="+", choices=CONTRACT_TYPES, default=list(FIRST_PAGE_TYPES))
+    first_page_parser.add_argument("--scenarios", nargs="+", choices=SCENARIOS, default=list(FIRST_PAGE_SCENARIOS))
+    first_page_parser.add_argument("--iterations", type=int, default=5, help="Linearization runs per case.")
+    first_page_parser.add_argument("--profile", choices=sorted(PDF_OUTPUT_PROFILES), help="Output profile to render.")
+    first_page_parser.add_argument("--bandwidth-kbps", type=float, default=DEFAULT_BANDWIDTH_KBPS)
+    first_page_parser.add_argument("--rtt-ms", type=float, default=DEFAULT_RTT_MS)
+    first_page_parser.add_argument("--output", help="Also write the report JSON here.")
+    first_page_parser.set_defaults(handler=_first_page_command)
+
+    priority_parser = subparsers.add_parser(
+        "priority", help="Measure interactive render latency while batch renders fill the executor."
+    )
+    priority_parser.add_argument(
+        "--workers",
+        type=int,
+        nargs="+",
+        default=[1, 2],
+        help="Worker counts to run; 1 covers an executor with no worker to spare for batch renders.",
+    )
+    priority_parser.add_argument("--interactive", type=int, default=20, help="Interactive renders per run.")
+    priority_parser.add_argument("--batch-documents", type=int, default=200)
+    priority_parser.add_argument(
+        "--type", choices=CONTRACT_TYPES, default="house_sale", help="Contract type of the interactive renders."
+    )
+    priority_parser.add_argument("--scenario", choices=SCENARIOS, default="base")
+    priority_parser.add_argument("--interval-ms", type=float, default=50.0, help="Pause between interactive renders.")
+    priority_parser.add_argument("--max-p99-ratio", type=float, help="Exit non-zero above this loaded/idle p99 ratio.")
+    priority_parser.add_argument("--output", help="Also write the report JSON here.")
+    priority_parser.set_defaults(handler=_priority_command)
+
+    args = parser.parse_args(argv)
+    return args.handler(args)
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,141 @@
+"""Layout equivalence and speed of the direct writer against WeasyPrint.
+
+For each directly written contract type and payload scenario the template
+is laid out by both backends and every text line is matched: same page,
+same text and a position within ``tolerance`` CSS px. Any mismatch means
+the direct writer's copy of the template geometry has drifted from what
+WeasyPrint computes, usually after a template or stylesheet change; update
+its constants and bump ``DIRECT_WRITER_VERSION``. Render latency of both
+backends is reported alongside, without the render cache.
+"""
+
+from __future__ import annotations
+
+import statistics
+import sys
+from time import perf_counter
+from typing import Any, Mapping
+
+from .payloads import SCENARIOS, build_payload
+from .runner import _percentile
+
+DIRECT_TYPES = ("nda", "employment")
+DEFAULT_TOLERANCE = 1.0
+
+
+def _weasyprint_lines(document: Any) -> list[tuple[int, float, float, str]]:
+    from weasyprint.formatting_structure.boxes import LineBox, TextBox
+
+    lines = []
+    for page_index, page in enumerate(document.pages):
+        for box in page._page_box.descendants():
+            if not isinstance(box, LineBox):
+                continue
+            text = " ".join(
+                "".join(child.text for child in box.descendants() if isinstance(child, TextBox)).split()
+            )
+            if text:
+                lines.append((page_index, box.position_x, box.position_y, text))
+    return lines
+
+
+def compare_layouts(contract_type: str, scenario: str, tolerance: float = DEFAULT_TOLERANCE) -> dict[str, Any]:
+    """Lay out one payload with both backends and list the lines that differ."""
+    from ..services.direct_writer import layout_direct_document
+    from ..services.pdf_service import _layout_document
+    from ..services.url_fetcher import intern_context_assets
+    from ..utils.pdf_utils import build_contract_template_context, render_contract_template
+    from ..utils.template_registry import resolve_template_name
+
+    payload = build_payload(contract_type, scenario)
+    context, assets = intern_context_assets(build_contract_template_context(payload))
+    rendered_html = render_contract_template(context, template_name=resolve_template_name(contract_type))
+
+    expected = sorted(_weasyprint_lines(_layout_document(rendered_html, assets, {})), key=lambda line: line[:3])
+    direct = layout_direct_document(rendered_html, assets)
+    actual = sorted(((line.page, line.x, line.y, line.text) for line in direct.lines()), key=lambda line: line[:3])
+
+    mismatches = []
+    for index in range(max(len(expected), len(actual))):
+        want = expected[index] if index < len(expected) else None
+        got = actual[index] if index < len(actual) else None
+        if (
+            want is None
+            or got is None
+            or want[0] != got[0]
+            or want[3] != got[3]
+            or abs(want[1] - got[1]) > tolerance
+            or abs(want[2] - got[2]) > tolerance
+        ):
+            mismatches.append({"line": index, "weasyprint": want, "direct": got})
+    return {
+        "pages": {"weasyprint": max((line[0] for line in expected), default=-1) + 1, "direct": len(direct.pages)},
+        "lines": len(expected),
+        "mismatches": mismatches,
+    }
+
+
+def _time_backends(contract_type: str, scenario: str, iterations: int) -> dict[str, Any]:
+    from ..services.pdf_service import _render_direct_pdf_bytes, _render_pdf_bytes, build_document_metadata
+    from ..services.url_fetcher import intern_context_assets
+    from ..utils.pdf_utils import build_contract_template_context
+    from ..utils.template_registry import resolve_template_name
+
+    payload = build_payload(contract_type, scenario)
+    context, assets = intern_context_assets(build_contract_template_context(payload))
+    template_name = resolve_template_name(contract_type)
+    metadata = build_document_metadata(payload)
+    backends = {
+        "weasyprint": lambda: _render_pdf_bytes(context, template_name, metadata, "0" * 64, assets, {}),
+        "direct": lambda: _render_direct_pdf_bytes(context, template_name, metadata, "0" * 64, assets, {}),
+    }
+
+    result: dict[str, Any] = {}
+    for backend, render in backends.items():
+        render()
+        durations = []
+        for _ in range(max(1, iterations)):
+            start = perf_counter()
+            pdf_bytes, _ = render()
+            durations.append((perf_counter() - start) * 1000)
+        result[backend] = {
+            "p50_ms": round(_percentile(durations, 50), 2),
+            "mean_ms": round(statistics.fmean(durations), 2),
+            "size_bytes": len(pdf_bytes),
+        }
+    direct_p50 = result["direct"]["p50_ms"]
+    result["speedup"] = round(result["weasyprint"]["p50_ms"] / direct_p50, 1) if direct_p50 else None
+    return result
+
+
+def run_direct(
+    contract_types: tuple[str, ...] = DIRECT_TYPES,
+    scenarios: tuple[str, ...] = SCENARIOS,
+    iterations: int = 10,
+    tolerance: float = DEFAULT_TOLERANCE,
+) -> dict[str, Any]:
+    """Compare both backends for every contract type and scenario."""
+    cases: dict[str, Any] = {}
+    for contract_type in contract_types:
+        for scenario in scenarios:
+            print(f"benchmark direct {contract_type} {scenario}", file=sys.stderr, flush=True)
+            case = compare_layouts(contract_type, scenario, tolerance)
+            if iterations:
+                case["timing"] = _time_backends(contract_type, scenario, iterations)
+            cases[f"{contract_type}/{scenario}"] = case
+    return {"iterations": iterations, "tolerance": tolerance, "cases": cases}
+
+
+def format_report(report: Mapping[str, Any]) -> str:
+    lines = [f"{'case':<28} {'pages':>7} {'lines':>6} {'diffs':>6} {'weasy ms':>9} {'direct ms':>10} {'speedup':>8}"]
+    for name, case in report["cases"].items():
+        timing = case.get("timing") or {}
+        pages = case["pages"]
+        lines.append(
+            f"{name:<28} {pages['weasyprint']:>3}/{pages['direct']:<3} {case['lines']:>6} {len(case['mismatches']):>6} "
+            f"{timing.get('weasyprint', {}).get('p50_ms', '-'):>9} {timing.get('direct', {}).get('p50_ms', '-'):>10} "
+            f"{timing.get('speedup', '-'):>8}"
+        )
+        for mismatch in case["mismatches"][:5]:
+            lines.append(f"    line {mismatch['line']}: weasyprint={mismatch['weasyprint']} direct={mismatch['direct']}")
+    return "\n".join(lines)
@@ -0,0 +1,109 @@
+"""Time to first page of signed PDFs, as written and linearized.
+
+Renders large house-sale contracts (long free text, a maximum-size client
+signature) once, linearizes each PDF (see ``services.linearize``) and
+reports how many bytes a viewer reading the download front to back needs
+before it can show page one: the whole file when the cross-reference table
+is at the end, the first-page section (``/E``) once linearized. Those byte
+counts are turned into a time to first page over a simulated link of
+``bandwidth_kbps`` with one ``rtt_ms`` round trip, next to the measured cost
+of linearizing.
+"""
+
+from __future__ import annotations
+
+import statistics
+import sys
+from time import perf_counter
+from typing import Any, Mapping
+
+from .payloads import build_payload
+from .runner import _disable_render_cache, _percentile
+
+FIRST_PAGE_TYPES = ("house_sale",)
+FIRST_PAGE_SCENARIOS = ("long_text", "max_signature")
+DEFAULT_BANDWIDTH_KBPS = 2000
+DEFAULT_RTT_MS = 100
+
+
+def _transfer_ms(size: int, bandwidth_kbps: float, rtt_ms: float) -> float:
+    return round(rtt_ms + size * 8 / bandwidth_kbps, 1)
+
+
+def measure_first_page(
+    contract_type: str,
+    scenario: str,
+    iterations: int,
+    profile: str | None = None,
+    bandwidth_kbps: float = DEFAULT_BANDWIDTH_KBPS,
+    rtt_ms: float = DEFAULT_RTT_MS,
+) -> dict[str, Any]:
+    """Compare one payload's first-page bytes as written and linearized."""
+    from ..services.linearize import linearization_available, linearize_pdf
+    from ..services.pdf_service import render_contract_pdf
+    from ..utils.pdf_update import linearized_first_page_end
+
+    pdf_bytes, report = render_contract_pdf(build_payload(contract_type, scenario), "bytes", profile=profile)
+    if report.linearized:
+        raise RuntimeError("Unset PDF_LINEARIZE_PROFILES for this benchmark; it linearizes the PDF itself")
+    written = {
+        "size_bytes": len(pdf_bytes),
+        "first_page_bytes": len(pdf_bytes),
+        "time_to_first_page_ms": _transfer_ms(len(pdf_bytes), bandwidth_kbps, rtt_ms),
+    }
+    result: dict[str, Any] = {"pages": report.pages, "written": written, "linearized": None}
+    if not linearization_available():
+        return result
+
+    durations: list[float] = []
+    linearized = pdf_bytes
+    for _ in range(max(1, iterations)):
+        start = perf_counter()
+        linearized = linearize_pdf(pdf_bytes)
+        durations.append((perf_counter() - start) * 1000)
+    first_page_bytes = linearized_first_page_end(linearized) or len(linearized)
+    result["linearized"] = {
+        "size_bytes": len(linearized),
+        "first_page_bytes": first_page_bytes,
+        "time_to_first_page_ms": _transfer_ms(first_page_bytes, bandwidth_kbps, rtt_ms),
+        "linearize_p50_ms": round(_percentile(durations, 50), 1),
+        "linearize_mean_ms": round(statistics.fmean(durations), 1),
+    }
+    return result
+
+
+def run_first_page(
+    contract_types: tuple[str, ...] = FIRST_PAGE_TYPES,
+    scenarios: tuple[str, ...] = FIRST_PAGE_SCENARIOS,
+    iterations: int = 5,
+    profile: str | None = None,
+    bandwidth_kbps: float = DEFAULT_BANDWIDTH_KBPS,
+    rtt_ms: float = DEFAULT_RTT_MS,
+) -> dict[str, Any]:
+    """Measure every case; linearized entries are None without pikepdf."""
+    _disable_render_cache()
+    cases: dict[str, Any] = {}
+    for contract_type in contract_types:
+        for scenario in scenarios:
+            key = f"{contract_type}/{scenario}"
+            print(f"benchmark first page {key}", file=sys.stderr, flush=True)
+            cases[key] = measure_first_page(contract_type, scenario, iterations, profile, bandwidth_kbps, rtt_ms)
+    return {"bandwidth_kbps": bandwidth_kbps, "rtt_ms": rtt_ms, "iterations": iterations, "cases": cases}
+
+
+def format_report(report: Mapping[str, Any]) -> str:
+    lines = [
+        f"{report['bandwidth_kbps']} kbit/s, {report['rtt_ms']} ms round trip",
+        f"{'case':<28} {'variant':<11} {'size':>9} {'first page':>11} {'TTFP ms':>9} {'linearize ms':>13}",
+    ]
+    for key, case in report["cases"].items():
+        for variant in ("written", "linearized"):
+            result = case[variant]
+            if result is None:
+                lines.append(f"{key:<28} {variant:<11} {'pikepdf is not installed':>45}")
+                continue
+            lines.append(
+                f"{key:<28} {variant:<11} {result['size_bytes']:>9} {result['first_page_bytes']:>11} "
+                f"{result['time_to_first_page_ms']:>9} {result.get('linearize_p50_ms', '-'):>13}"
+            )
+    return "\n".join(lines)
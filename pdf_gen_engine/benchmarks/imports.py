@@ -0,0 +1,111 @@
+"""Import-time report for the API process.
+
+Runs ``python -X importtime`` on a module in a fresh interpreter (by default
+``app.main`` from ``backend/``) and summarises the output: total import
+time, the slowest modules by cumulative time, which render dependencies were
+loaded and the interpreter's peak RSS. API-only replicas should import none
+of the render dependencies.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import re
+import subprocess
+import sys
+from pathlib import Path
+from typing import Any
+
+from ..config import REPO_ROOT
+
+DEFAULT_MODULE = "app.main"
+DEFAULT_CWD = REPO_ROOT / "backend"
+# Modules an API process that does not render should never import.
+RENDER_DEPENDENCIES = (
+    "weasyprint",
+    "pydyf",
+    "jinja2",
+    "PIL",
+    "pdf_gen_engine.services.pdf_service",
+    "pdf_gen_engine.services.render_executor",
+)
+
+_IMPORTTIME_LINE = re.compile(r"^import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)\s*$")
+
+_IMPORT_SCRIPT = """
+import importlib, json, sys
+importlib.import_module(sys.argv[1])
+try:
+    import resource
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    rss = rss // 1024 if sys.platform == "darwin" else rss
+except ImportError:
+    rss = None
+print(json.dumps({"peak_rss_kb": rss, "modules": sorted(sys.modules)}))
+"""
+
+
+def parse_importtime(stderr: str) -> list[dict[str, Any]]:
+    """Parse ``-X importtime`` lines into module entries (times in microseconds)."""
+    entries = []
+    for line in stderr.splitlines():
+        match = _IMPORTTIME_LINE.match(line)
+        if match is None:
+            continue
+        self_us, cumulative_us, indent, name = match.groups()
+        entries.append(
+            {
+                "module": name,
+                "self_us": int(self_us),
+                "cumulative_us": int(cumulative_us),
+                "depth": (len(indent) - 1) // 2,
+            }
+        )
+    return entries
+
+
+def measure_imports(module: str = DEFAULT_MODULE, cwd: Path = DEFAULT_CWD, top: int = 20) -> dict[str, Any]:
+    """Import ``module`` in a fresh interpreter and report where the time went.
+
+    Raises:
+        RuntimeError: If the import fails.
+    """
+    command = [sys.executable, "-X", "importtime", "-c", _IMPORT_SCRIPT, module]
+    completed = subprocess.run(command, cwd=cwd, env=dict(os.environ), capture_output=True, text=True, check=False)
+    if completed.returncode != 0:
+        raise RuntimeError(f"Importing {module} failed: {completed.stderr.strip()[-500:]}")
+
+    result = json.loads(completed.stdout.strip().splitlines()[-1])
+    entries = parse_importtime(completed.stderr)
+    loaded = set(result["modules"])
+    top_level = [entry for entry in entries if entry["depth"] == 0]
+    slowest = sorted(entries, key=lambda entry: entry["cumulative_us"], reverse=True)[:top]
+    return {
+        "module": module,
+        "total_ms": round(sum(entry["cumulative_us"] for entry in top_level) / 1000, 1),
+        "modules_imported": len(entries),
+        "peak_rss_kb": result["peak_rss_kb"],
+        "render_dependencies": {name: name in loaded for name in RENDER_DEPENDENCIES},
+        "slowest": [
+            {
+                "module": entry["module"],
+                "cumulative_ms": round(entry["cumulative_us"] / 1000, 1),
+                "self_ms": round(entry["self_us"] / 1000, 1),
+            }
+            for entry in slowest
+        ],
+    }
+
+
+def format_report(report: dict[str, Any]) -> str:
+    lines = [
+        f"{report['module']}: {report['total_ms']} ms, {report['modules_imported']} modules, "
+        f"peak RSS {report['peak_rss_kb']} KiB",
+        "render dependencies: "
+        + ", ".join(f"{name}={'loaded' if loaded else 'no'}" for name, loaded in report["render_dependencies"].items()),
+        f"{'module':<56} {'cumulative ms':>14} {'self ms':>9}",
+    ]
+    for entry in report["slowest"]:
+        lines.append(f"{entry['module']:<56} {entry['cumulative_ms']:>14} {entry['self_ms']:>9}")
+    return "\n".join(lines)
@@ -0,0 +1,122 @@
+"""Per-job IPC cost of handing render payloads to worker processes.
+
+Sends signed-contract payloads to a one-worker render executor twice: once
+with signatures pickled into the task and once through shared memory (see
+``utils.shared_assets``). For each scenario it reports the pickled task
+size and the submit-to-result latency of a probe that resolves the
+signature images in the worker the way a render does, without laying the
+document out. Every iteration uses distinct signature bytes, as separate
+contracts would, so neither side benefits from its image caches.
+"""
+
+from __future__ import annotations
+
+import base64
+import pickle
+import statistics
+import sys
+from time import perf_counter
+from typing import Any, Mapping
+
+from .payloads import GENERIC_TYPE, build_payload
+from .runner import _percentile
+
+IPC_SCENARIOS = ("base", "max_signature")
+IPC_MODES = ("pickle", "shared")
+
+
+def _signature_variant(data_uri: str, index: int) -> str:
+    # Trailing bytes after the PNG end chunk change the hash, not the image.
+    header, _, payload = data_uri.partition(",")
+    data = base64.b64decode(payload) + f"variant-{index}".encode("ascii")
+    return f"{header},{base64.b64encode(data).decode('ascii')}"
+
+
+def _ipc_payload(scenario: str, index: int) -> dict[str, Any]:
+    payload = build_payload(GENERIC_TYPE, scenario, index)
+    for key in ("signature_creator", "signature_client"):
+        payload[key] = _signature_variant(payload[key], index)
+    return payload
+
+
+def resolve_signatures(payload: Mapping[str, Any]) -> int:
+    """Resolve a payload's signature images like a render would; return their size."""
+    from ..services.url_fetcher import AssetStore, intern_context_assets
+    from ..utils.pdf_utils import normalize_signature_data
+
+    context = {key: normalize_signature_data(payload.get(key)) for key in ("signature_creator", "signature_client")}
+    _, assets = intern_context_assets(context, AssetStore())
+    return sum(len(asset.data) for asset in assets.values())
+
+
+def _task_bytes(payload: Mapping[str, Any], shared: bool) -> int:
+    """Size of the pickled task the executor sends for ``payload``."""
+    from ..services.render_executor import _run_in_worker
+    from ..utils.shared_assets import SharedAssetExporter
+
+    if not shared:
+        return len(pickle.dumps((_run_in_worker, resolve_signatures, (payload,), [])))
+    exporter = SharedAssetExporter(retain_bytes=0)
+    try:
+        sent, refs = exporter.export_payload(payload)
+        size = len(pickle.dumps((_run_in_worker, resolve_signatures, (sent,), refs)))
+        exporter.release(refs)
+    finally:
+        exporter.close()
+    return size
+
+
+def _measure_mode(mode: str, scenarios: tuple[str, ...], iterations: int) -> dict[str, Any]:
+    from ..services.render_executor import RenderExecutor
+
+    executor = RenderExecutor(workers=1, queue_size=2, max_tasks_per_child=0, shared_assets=mode == "shared")
+    executor.start()
+    results: dict[str, Any] = {}
+    try:
+        for scenario in scenarios:
+            print(f"benchmark ipc {mode} {scenario}", file=sys.stderr, flush=True)
+            executor.run(resolve_signatures, _ipc_payload(scenario, -1)).result()
+            durations: list[float] = []
+            task_bytes: list[int] = []
+            image_bytes = 0
+            for index in range(max(1, iterations)):
+                payload = _ipc_payload(scenario, index)
+                task_bytes.append(_task_bytes(payload, mode == "shared"))
+                start = perf_counter()
+                image_bytes = executor.run(resolve_signatures, payload).result()
+                durations.append((perf_counter() - start) * 1000)
+            results[scenario] = {
+                "task_bytes": round(statistics.fmean(task_bytes)),
+                "image_bytes": image_bytes,
+                "p50_ms": round(_percentile(durations, 50), 2),
+                "p95_ms": round(_percentile(durations, 95), 2),
+                "mean_ms": round(statistics.fmean(durations), 2),
+            }
+    finally:
+        executor.shutdown()
+    return results
+
+
+def run_ipc(scenarios: tuple[str, ...] = IPC_SCENARIOS, iterations: int = 50) -> dict[str, Any]:
+    """Compare pickled and shared-memory signature handoff for each scenario."""
+    by_mode = {mode: _measure_mode(mode, scenarios, iterations) for mode in IPC_MODES}
+    comparison: dict[str, Any] = {}
+    for scenario in scenarios:
+        entry = {mode: by_mode[mode][scenario] for mode in IPC_MODES}
+        pickled, shared = entry["pickle"], entry["shared"]
+        entry["task_bytes_ratio"] = round(shared["task_bytes"] / pickled["task_bytes"], 4)
+        entry["p50_ratio"] = round(shared["p50_ms"] / pickled["p50_ms"], 3) if pickled["p50_ms"] else None
+        comparison[scenario] = entry
+    return {"iterations": iterations, "scenarios": comparison}
+
+
+def format_report(report: Mapping[str, Any]) -> str:
+    lines = [f"{'scenario':<16} {'mode':<8} {'task bytes':>12} {'p50 ms':>9} {'p95 ms':>9} {'mean ms':>9}"]
+    for scenario, entry in report["scenarios"].items():
+        for mode in IPC_MODES:
+            result = entry[mode]
+            lines.append(
+                f"{scenario:<16} {mode:<8} {result['task_bytes']:>12} "
+                f"{result['p50_ms']:>9} {result['p95_ms']:>9} {result['mean_ms']:>9}"
+            )
+    return "\n".join(lines)
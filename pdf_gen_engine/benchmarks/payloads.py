@@ -0,0 +1,175 @@
+"""Synthetic contract payloads for engine benchmarks.
+
+Payloads mirror what the backend builds in ``_build_pdf_payload`` for every
+contract type, with deterministic content so runs are comparable.
+"""
+
+from __future__ import annotations
+
+import base64
+import random
+from datetime import datetime, timezone
+from functools import lru_cache
+from io import BytesIO
+from typing import Any
+
+from PIL import Image, ImageDraw
+
+# The API accepts signature fields of up to 700 000 characters.
+MAX_SIGNATURE_CHARS = 700_000
+GENERIC_TYPE = "generic"
+CONTRACT_TYPES = ("house_sale", "website_development", "broker", "nda", "employment", GENERIC_TYPE)
+SCENARIOS = ("base", "max_signature", "long_text")
+
+_LOREM = (
+    "The parties agree to perform their obligations diligently and in good faith, to keep "
+    "each other reasonably informed of material developments, and to resolve disputes "
+    "through negotiation before pursuing any other remedy available under this Agreement. "
+)
+
+
+@lru_cache(maxsize=None)
+def signature_data_uri(size: str = "small") -> str:
+    """Return a PNG signature data URI.
+
+    ``small`` is a typical drawn signature; ``max`` is an incompressible
+    image sized just under the API's signature field limit.
+    """
+    if size == "max":
+        header = "data:image/png;base64,"
+        raw_budget = (MAX_SIGNATURE_CHARS - len(header)) * 3 // 4 - 1024
+        width = 600
+        height = raw_budget // (width * 3)
+        noise = random.Random(7).randbytes(width * height * 3)
+        image = Image.frombytes("RGB", (width, height), noise)
+    else:
+        image = Image.new("RGBA", (600, 200), (255, 255, 255, 0))
+        draw = ImageDraw.Draw(image)
+        draw.line([(40, 140), (160, 60), (260, 150), (380, 70), (560, 120)], fill=(20, 20, 90, 255), width=5)
+
+    output = BytesIO()
+    image.save(output, format="PNG")
+    data_uri = "data:image/png;base64," + base64.b64encode(output.getvalue()).decode("ascii")
+    if len(data_uri) > MAX_SIGNATURE_CHARS:
+        raise RuntimeError("Synthetic signature exceeds the API limit")
+    return data_uri
+
+
+def _long_text(paragraphs: int) -> str:
+    return "\n\n".join(_LOREM * 4 for _ in range(paragraphs))
+
+
+def _template_data(contract_type: str, long_text: bool) -> dict[str, Any]:
+    details = _long_text(12) if long_text else "Plot 42, Sector 7, Pune, Maharashtra"
+    if contract_type == "house_sale":
+        return {
+            "houseSale": {
+                "agreement_place": "Pune",
+                "agreement_date": "2026-03-01",
+                "vendor_name": "Asha Kulkarni",
+                "vendor_residence": "12 MG Road, Pune",
+                "purchaser_name": "Rohan Mehta",
+                "purchaser_residence": "8 FC Road, Pune",
+                "property_details": details,
+                "sale_price": 7_500_000,
+                "earnest_money_amount": 500_000,
+                "completion_period_months": 3,
+                "witness_1_name": "Kiran Rao",
+                "witness_2_name": "Meera Shah",
+            }
+        }
+    if contract_type == "website_development":
+        return {
+            "websiteDevelopment": {
+                "agreement_place": "Bengaluru",
+                "company_name": "Acme Traders",
+                "developer_name": "Pixel Works",
+                "company_address": "1 Residency Road, Bengaluru",
+                "developer_address": "22 Indiranagar, Bengaluru",
+                "project_purpose": details,
+                "consultation_hours": 3,
+                "page_count": 40,
+                "web_page_word_count": 250,
+                "external_links_per_page": 2,
+                "masthead_graphic": "Included",
+                "photo_graphics_average": 1.5,
+                "update_period_months": 12,
+                "search_engine_publicity": True,
+                "email_response_enabled": True,
+                "image_map_enabled": False,
+            }
+        }
+    if contract_type == "broker":
+        return {
+            "brokerAgreement": {
+                "agreement_place": "Mumbai",
+                "owner_name": "Asha Kulkarni",
+                "owner_residence": "12 MG Road, Pune",
+                "broker_name": "Sai Realty",
+                "broker_residence": "4 Linking Road, Mumbai",
+                "property_details": details,
+                "total_consideration": 9_000_000,
+                "earnest_money_amount": 600_000,
+                "balance_amount": 8_400_000,
+                "completion_period_months": 3,
+                "broker_sale_period_months": 1,
+                "commission_rate": 2,
+                "witness_1_name": "Kiran Rao",
+                "witness_2_name": "Meera Shah",
+            }
+        }
+    if contract_type == "nda":
+        return {
+            "nda": {
+                "disclosingParty": "Acme Traders",
+                "receivingParty": "Pixel Works",
+                "purpose": details,
+                "confidentialInfo": "Customer lists, pricing, product roadmaps and source code.",
+                "duration": "2 years",
+                "effectiveDate": "2026-03-01",
+            }
+        }
+    if contract_type == "employment":
+        return {
+            "employment": {
+                "employerName": "Acme Traders",
+                "employeeName": "Rohan Mehta",
+                "jobTitle": "Senior Engineer",
+                "jobDescription": details,
+                "salary": 2_400_000,
+                "paymentFrequency": "Monthly",
+                "workHours": "40 hours per week",
+                "terminationClause": "Either party may terminate with 30 days written notice.",
+                "startDate": "2026-04-01",
+            }
+        }
+    return {}
+
+
+def build_payload(contract_type: str, scenario: str = "base", index: int = 0) -> dict[str, Any]:
+    """Return a render payload for a contract type and benchmark scenario."""
+    if contract_type not in CONTRACT_TYPES:
+        raise ValueError(f"Unknown contract type: {contract_type}")
+    if scenario not in SCENARIOS:
+        raise ValueError(f"Unknown benchmark scenario: {scenario}")
+
+    long_text = scenario == "long_text"
+    client_signature = signature_data_uri("max" if scenario == "max_signature" else "small")
+    description = _long_text(20) if long_text else "Standard engagement between the parties."
+    return {
+        "type": "" if contract_type == GENERIC_TYPE else contract_type,
+        "templateData": _template_data(contract_type, long_text),
+        "contract_id": f"bench-{contract_type}-{scenario}-{index}",
+        "title": f"Benchmark {contract_type.replace('_', ' ').title()} Agreement",
+        "description": description,
+        "clauses": {"payment": True, "liability": True, "confidentiality": True, "termination": True},
+        "creator_name": "Acme Traders",
+        "client_name": "Rohan Mehta",
+        "amount": 125_000 + index,
+        "currency": "₹",
+        "due_date": datetime(2026, 6, 30, tzinfo=timezone.utc),
+        "signed_date": datetime(2026, 3, 1, 10, 30, tzinfo=timezone.utc),
+        "contract_terms": [description, "Payment obligations apply as agreed by both parties."],
+        "signature_creator": signature_data_uri("small"),
+        "signature_client": client_signature,
+    }
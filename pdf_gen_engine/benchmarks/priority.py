@@ -0,0 +1,129 @@
+"""Interactive render latency while batch renders saturate the executor.
+
+Renders one payload ``interactive`` times, one render at a time, on an idle
+render executor, then again while ``batch_documents`` batch renders (a mix
+of all contract types, as a backfill would queue them) wait on the same
+executor. Reports p50/p99 latency of both runs, the batch throughput and the
+per-class queue waits from the engine statistics. With batch renders kept to
+spare workers the loaded p99 stays at the idle one; a ratio well above 1
+means batch work delays signing. Run it with one worker too: that executor
+has no worker to spare and batch renders go to its extra batch worker.
+"""
+
+from __future__ import annotations
+
+import statistics
+import sys
+import time
+from concurrent.futures import wait
+from time import perf_counter
+from typing import Any, Mapping
+
+from .payloads import CONTRACT_TYPES, build_payload
+from .runner import _disable_render_cache, _percentile
+
+
+def _latency_summary(durations: list[float]) -> dict[str, float]:
+    return {
+        "p50_ms": round(_percentile(durations, 50), 1),
+        "p99_ms": round(_percentile(durations, 99), 1),
+        "mean_ms": round(statistics.fmean(durations), 1),
+        "max_ms": round(max(durations), 1),
+    }
+
+
+def _interactive_latencies(executor: Any, payload: Mapping[str, Any], count: int, interval_ms: float) -> list[float]:
+    durations: list[float] = []
+    for _ in range(max(1, count)):
+        start = perf_counter()
+        executor.submit(payload, "bytes").result()
+        durations.append((perf_counter() - start) * 1000)
+        time.sleep(interval_ms / 1000)
+    return durations
+
+
+def run_priority(
+    workers: int = 2,
+    interactive: int = 20,
+    batch_documents: int = 200,
+    contract_type: str = "house_sale",
+    scenario: str = "base",
+    interval_ms: float = 50.0,
+) -> dict[str, Any]:
+    """Compare interactive latency on an idle executor and under a batch flood."""
+    from ..services.render_executor import RenderExecutor
+    from ..services.render_priority import RENDER_PRIORITY_BATCH
+    from ..services.render_stats import get_render_stats
+
+    _disable_render_cache()
+    executor = RenderExecutor(workers=workers, batch_queue_size=batch_documents)
+    try:
+        executor.start()
+        payload = build_payload(contract_type, scenario)
+        # Warm every worker's render caches, not just the first one's.
+        wait([executor.submit(payload, "bytes") for _ in range(max(1, workers) * 2)])
+        print("benchmark priority idle", file=sys.stderr, flush=True)
+        idle = _interactive_latencies(executor, payload, interactive, interval_ms)
+
+        get_render_stats().reset()
+        print(f"benchmark priority with {batch_documents} batch renders", file=sys.stderr, flush=True)
+        batch_start = perf_counter()
+        batch = [
+            executor.submit(
+                build_payload(CONTRACT_TYPES[index % len(CONTRACT_TYPES)], "base", index),
+                "bytes",
+                priority=RENDER_PRIORITY_BATCH,
+            )
+            for index in range(batch_documents)
+        ]
+        loaded = _interactive_latencies(executor, payload, interactive, interval_ms)
+        wait(batch)
+        batch_seconds = perf_counter() - batch_start
+        queues = get_render_stats().snapshot()["queues"]
+    finally:
+        executor.shutdown(wait=False)
+
+    idle_summary = _latency_summary(idle)
+    loaded_summary = _latency_summary(loaded)
+    idle_p99 = idle_summary["p99_ms"]
+    return {
+        "workers": workers,
+        "capacity": executor.capacity,
+        "batch_workers": executor.batch_workers,
+        "case": f"{contract_type}/{scenario}",
+        "interactive": {
+            "idle": idle_summary,
+            "loaded": loaded_summary,
+            "p99_ratio": round(loaded_summary["p99_ms"] / idle_p99, 2) if idle_p99 else None,
+        },
+        "batch": {
+            "documents": batch_documents,
+            "failures": sum(1 for future in batch if future.exception() is not None),
+            "documents_per_second": round(batch_documents / batch_seconds, 2) if batch_seconds else 0.0,
+        },
+        "queue_wait_ms": {
+            priority: {"mean": entry["wait_ms"]["mean"], "max": round(entry["wait_ms"]["max"] or 0.0, 1)}
+            for priority, entry in queues.items()
+        },
+    }
+
+
+def format_report(report: Mapping[str, Any]) -> str:
+    interactive = report["interactive"]
+    batch = report["batch"]
+    lines = [
+        f"{report['case']} on {report['workers']} workers, {report['capacity']} with the batch worker "
+        f"({report['batch_workers']} may run batch renders)",
+        f"{'interactive':<14} {'p50 ms':>8} {'p99 ms':>8} {'max ms':>8}",
+    ]
+    for run in ("idle", "loaded"):
+        summary = interactive[run]
+        lines.append(f"{run:<14} {summary['p50_ms']:>8} {summary['p99_ms']:>8} {summary['max_ms']:>8}")
+    lines.append(f"p99 loaded/idle: {interactive['p99_ratio']}")
+    lines.append(
+        f"batch: {batch['documents']} documents, {batch['failures']} failed, "
+        f"{batch['documents_per_second']} documents/s alongside"
+    )
+    for priority, wait_ms in report["queue_wait_ms"].items():
+        lines.append(f"queue wait {priority}: mean {wait_ms['mean']} ms, max {wait_ms['max']} ms")
+    return "\n".join(lines)
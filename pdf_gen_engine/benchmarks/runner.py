@@ -0,0 +1,376 @@
+"""Benchmark runner for ``generate_contract_pdf``.
+
+For every contract type and scenario it measures:
+
+- cold latency: engine import and first render in a fresh interpreter,
+  with that process's peak RSS;
+- warm latency: repeated renders in this process (p50/p95/mean);
+- output size and page count;
+- throughput: documents per second through the batch renderer;
+- output profiles: warm latency and size of every case under each profile;
+- IPC: task size and latency of handing signatures to a worker process,
+  pickled versus through shared memory (see ``ipc``);
+- first page: bytes and modeled time until a viewer can show page one of
+  large house-sale contracts, as written and linearized (see ``first_page``).
+
+The render-result cache is disabled throughout so every iteration renders,
+and outbound connections are blocked in this process: a warm render that
+tries to reach the network (``FetchStats.network_blocked``) fails the run.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+from datetime import datetime, timezone
+from importlib import metadata as importlib_metadata
+from pathlib import Path
+from time import perf_counter
+from typing import Any
+
+try:
+    import resource
+except ImportError:  # pragma: no cover - Windows
+    resource = None
+
+from ..config import PDF_OUTPUT_PROFILE, PDF_OUTPUT_PROFILES, REPO_ROOT
+from ..services.render_cache import fonts_version
+from .payloads import CONTRACT_TYPES, SCENARIOS, build_payload
+
+RESULTS_SCHEMA = 1
+# Metrics compared against a baseline; larger values are regressions.
+COMPARED_METRICS = ("cold_first_render_ms", "warm_p50_ms", "warm_p95_ms", "size_bytes", "peak_rss_kb")
+
+
+def peak_rss_kb() -> int | None:
+    """Return this process's peak resident set size in KiB."""
+    if resource is None:
+        return None
+    max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # macOS reports bytes, Linux reports KiB.
+    return max_rss // 1024 if sys.platform == "darwin" else max_rss
+
+
+def _percentile(values: list[float], percentile: float) -> float:
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(round(percentile / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def _disable_render_cache() -> None:
+    os.environ["PDF_RENDER_CACHE_ENABLED"] = "0"
+    from ..services.render_cache import configure_render_cache
+
+    configure_render_cache(False)
+
+
+_COLD_SCRIPT = """
+import json, sys, time
+start = time.perf_counter()
+import pdf_gen_engine.services.pdf_service
+import_ms = (time.perf_counter() - start) * 1000
+from pdf_gen_engine.benchmarks.runner import measure_cold
+print(json.dumps(measure_cold(sys.argv[1], sys.argv[2], import_ms)))
+"""
+
+
+def measure_cold(contract_type: str, scenario: str, import_ms: float) -> dict[str, Any]:
+    """Time the first render of one payload in this (fresh) process."""
+    _disable_render_cache()
+    from ..services.pdf_service import render_contract_pdf
+
+    payload = build_payload(contract_type, scenario)
+    start = perf_counter()
+    pdf_bytes, report = render_contract_pdf(payload, "bytes")
+    return {
+        "import_ms": round(import_ms, 1),
+        "first_render_ms": round((perf_counter() - start) * 1000, 1),
+        "size_bytes": len(pdf_bytes),
+        "pages": report.pages,
+        "peak_rss_kb": peak_rss_kb(),
+    }
+
+
+def run_cold(contract_type: str, scenario: str) -> dict[str, Any]:
+    """Run ``measure_cold`` in a fresh interpreter and return its result."""
+    command = [sys.executable, "-c", _COLD_SCRIPT, contract_type, scenario]
+    env = {**os.environ, "PDF_RENDER_CACHE_ENABLED": "0"}
+    completed = subprocess.run(command, cwd=REPO_ROOT, env=env, capture_output=True, text=True, check=False)
+    if completed.returncode != 0:
+        raise RuntimeError(f"Cold run failed for {contract_type}/{scenario}: {completed.stderr.strip()[-500:]}")
+    return json.loads(completed.stdout.strip().splitlines()[-1])
+
+
+def run_warm(contract_type: str, scenario: str, iterations: int, profile: str | None = None) -> dict[str, Any]:
+    """Render one payload repeatedly in this process after a warm-up render.
+
+    Raises:
+        RuntimeError: If a render tried to open a connection or fetch a URL.
+    """
+    from ..services.pdf_service import render_contract_pdf
+    from ..services.url_fetcher import get_asset_store, install_network_guard
+
+    install_network_guard()
+    blocked_before = get_asset_store().stats.network_blocked
+    payload = build_payload(contract_type, scenario)
+    render_contract_pdf(payload, "bytes", profile=profile)
+    durations: list[float] = []
+    stage_totals: dict[str, float] = {}
+    pdf_bytes = b""
+    report = None
+    for _ in range(max(1, iterations)):
+        start = perf_counter()
+        pdf_bytes, report = render_contract_pdf(payload, "bytes", profile=profile)
+        durations.append((perf_counter() - start) * 1000)
+        for stage, value in report.stages.items():
+            stage_totals[stage] = stage_totals.get(stage, 0.0) + value
+
+    blocked = get_asset_store().stats.network_blocked - blocked_before
+    if blocked:
+        raise RuntimeError(f"{contract_type}/{scenario} renders attempted {blocked} network access(es)")
+    return {
+        "warm_p50_ms": round(_percentile(durations, 50), 1),
+        "warm_p95_ms": round(_percentile(durations, 95), 1),
+        "warm_mean_ms": round(statistics.fmean(durations), 1),
+        "warm_stages_ms": {stage: round(total / len(durations), 1) for stage, total in stage_totals.items()},
+        "size_bytes": len(pdf_bytes),
+        "pages": report.pages if report else None,
+    }
+
+
+def run_profiles(
+    contract_types: tuple[str, ...],
+    scenarios: tuple[str, ...],
+    profiles: tuple[str, ...],
+    iterations: int,
+) -> dict[str, Any]:
+    """Render every case under each output profile to show the size/time trade-off."""
+    comparison: dict[str, Any] = {}
+    for profile in profiles:
+        cases: dict[str, Any] = {}
+        for contract_type in contract_types:
+            for scenario in scenarios:
+                key = f"{contract_type}/{scenario}"
+                print(f"benchmark profile {profile} {key}", file=sys.stderr, flush=True)
+                result = run_warm(contract_type, scenario, iterations, profile)
+                cases[key] = {metric: result[metric] for metric in ("warm_p50_ms", "warm_mean_ms", "size_bytes")}
+        comparison[profile] = {
+            "cases": cases,
+            "total_size_bytes": sum(case["size_bytes"] for case in cases.values()),
+            "mean_warm_p50_ms": round(statistics.fmean(case["warm_p50_ms"] for case in cases.values()), 1)
+            if cases
+            else None,
+        }
+    return comparison
+
+
+def run_throughput(documents: int, workers: int) -> dict[str, Any]:
+    """Render a mix of all contract types through the batch renderer."""
+    from ..services.batch import BatchRenderSummary, generate_contract_pdfs
+
+    payloads = (
+        build_payload(CONTRACT_TYPES[index % len(CONTRACT_TYPES)], "base", index)
+        for index in range(documents)
+    )
+    summary = BatchRenderSummary()
+    for _ in generate_contract_pdfs(payloads, output_mode="bytes", workers=workers, summary=summary):
+        pass
+    return {"workers": workers, **summary.as_dict()}
+
+
+def _environment() -> dict[str, Any]:
+    try:
+        weasyprint_version = importlib_metadata.version("weasyprint")
+    except importlib_metadata.PackageNotFoundError:
+        weasyprint_version = None
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=REPO_ROOT,
+            capture_output=True,
+            text=True,
+            check=False,
+        ).stdout.strip() or None
+    except OSError:
+        commit = None
+    return {
+        "created_at": datetime.now(timezone.utc).isoformat(),
+        "git_commit": commit,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "weasyprint": weasyprint_version,
+        "fonts_version": fonts_version(),
+        "fontconfig_file": os.environ.get("FONTCONFIG_FILE"),
+    }
+
+
+def run_suite(
+    contract_types: tuple[str, ...] = CONTRACT_TYPES,
+    scenarios: tuple[str, ...] = SCENARIOS,
+    warm_iterations: int = 5,
+    throughput_documents: int = 24,
+    workers: int = 2,
+    cold: bool = True,
+    profiles: tuple[str, ...] = tuple(PDF_OUTPUT_PROFILES),
+    ipc_iterations: int = 50,
+    first_page_iterations: int = 5,
+) -> dict[str, Any]:
+    """Run the full benchmark matrix and return a JSON-serializable result.
+
+    The main matrix uses the default output profile; ``profiles`` are then
+    compared on warm renders only.
+    """
+    _disable_render_cache()
+    results: dict[str, Any] = {}
+    for contract_type in contract_types:
+        for scenario in scenarios:
+            key = f"{contract_type}/{scenario}"
+            print(f"benchmark {key}", file=sys.stderr, flush=True)
+            entry: dict[str, Any] = {}
+            if cold:
+                cold_result = run_cold(contract_type, scenario)
+                entry.update(
+                    {
+                        "cold_import_ms": cold_result["import_ms"],
+                        "cold_first_render_ms": cold_result["first_render_ms"],
+                        "peak_rss_kb": cold_result["peak_rss_kb"],
+                    }
+                )
+            entry.update(run_warm(contract_type, scenario, warm_iterations))
+            results[key] = entry
+
+    profile_results = run_profiles(contract_types, scenarios, profiles, warm_iterations) if profiles else None
+    throughput = run_throughput(throughput_documents, workers) if throughput_documents > 0 else None
+    ipc = None
+    if ipc_iterations > 0:
+        from .ipc import run_ipc
+
+        ipc = run_ipc(iterations=ipc_iterations)
+    first_page = None
+    if first_page_iterations > 0:
+        from .first_page import run_first_page
+
+        first_page = run_first_page(iterations=first_page_iterations)
+    return {
+        "schema": RESULTS_SCHEMA,
+        "environment": _environment(),
+        "settings": {
+            "warm_iterations": warm_iterations,
+            "throughput_documents": throughput_documents,
+            "workers": workers,
+            "profile": PDF_OUTPUT_PROFILE,
+            "ipc_iterations": ipc_iterations,
+            "first_page_iterations": first_page_iterations,
+        },
+        "results": results,
+        "profiles": profile_results,
+        "throughput": throughput,
+        "ipc": ipc,
+        "first_page": first_page,
+        "runner_peak_rss_kb": peak_rss_kb(),
+    }
+
+
+def compare_results(current: dict[str, Any], baseline: dict[str, Any], threshold: float) -> list[dict[str, Any]]:
+    """Return metrics that grew by more than ``threshold`` relative to the baseline."""
+    regressions: list[dict[str, Any]] = []
+    for key, entry in current.get("results", {}).items():
+        baseline_entry = baseline.get("results", {}).get(key)
+        if not baseline_entry:
+            continue
+        for metric in COMPARED_METRICS:
+            value = entry.get(metric)
+            reference = baseline_entry.get(metric)
+            if not value or not reference:
+                continue
+            ratio = value / reference
+            if ratio > 1 + threshold:
+                regressions.append(
+                    {"case": key, "metric": metric, "baseline": reference, "current": value, "ratio": round(ratio, 3)}
+                )
+
+    for profile, profile_entry in (current.get("profiles") or {}).items():
+        baseline_cases = ((baseline.get("profiles") or {}).get(profile) or {}).get("cases") or {}
+        for key, entry in profile_entry.get("cases", {}).items():
+            baseline_entry = baseline_cases.get(key)
+            if not baseline_entry:
+                continue
+            for metric in ("warm_p50_ms", "size_bytes"):
+                value = entry.get(metric)
+                reference = baseline_entry.get(metric)
+                if value and reference and value / reference > 1 + threshold:
+                    regressions.append(
+                        {
+                            "case": f"{profile}:{key}",
+                            "metric": metric,
+                            "baseline": reference,
+                            "current": value,
+                            "ratio": round(value / reference, 3),
+                        }
+                    )
+
+    baseline_ipc = (baseline.get("ipc") or {}).get("scenarios") or {}
+    for scenario, entry in ((current.get("ipc") or {}).get("scenarios") or {}).items():
+        baseline_shared = (baseline_ipc.get(scenario) or {}).get("shared") or {}
+        for metric in ("task_bytes", "p50_ms"):
+            value = entry["shared"].get(metric)
+            reference = baseline_shared.get(metric)
+            if value and reference and value / reference > 1 + threshold:
+                regressions.append(
+                    {
+                        "case": f"ipc:{scenario}",
+                        "metric": metric,
+                        "baseline": reference,
+                        "current": value,
+                        "ratio": round(value / reference, 3),
+                    }
+                )
+
+    baseline_first_page = (baseline.get("first_page") or {}).get("cases") or {}
+    for key, entry in ((current.get("first_page") or {}).get("cases") or {}).items():
+        linearized = entry.get("linearized") or {}
+        baseline_linearized = (baseline_first_page.get(key) or {}).get("linearized") or {}
+        for metric in ("first_page_bytes", "linearize_p50_ms"):
+            value = linearized.get(metric)
+            reference = baseline_linearized.get(metric)
+            if value and reference and value / reference > 1 + threshold:
+                regressions.append(
+                    {
+                        "case": f"first_page:{key}",
+                        "metric": metric,
+                        "baseline": reference,
+                        "current": value,
+                        "ratio": round(value / reference, 3),
+                    }
+                )
+
+    current_throughput = (current.get("throughput") or {}).get("documents_per_second")
+    baseline_throughput = (baseline.get("throughput") or {}).get("documents_per_second")
+    if current_throughput and baseline_throughput and current_throughput < baseline_throughput / (1 + threshold):
+        regressions.append(
+            {
+                "case": "throughput",
+                "metric": "documents_per_second",
+                "baseline": baseline_throughput,
+                "current": current_throughput,
+                "ratio": round(current_throughput / baseline_throughput, 3),
+            }
+        )
+    return regressions
+
+
+def load_results(path: Path) -> dict[str, Any]:
+    with open(path, encoding="utf-8") as handle:
+        return json.load(handle)
+
+
+def save_results(results: dict[str, Any], path: Path) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, "w", encoding="utf-8") as handle:
+        json.dump(results, handle, indent=2, sort_keys=True)
+        handle.write("\n")
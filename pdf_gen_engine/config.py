@@ -6,8 +6,27 @@ environment variables when needed.
 
 from __future__ import annotations
 
+import multiprocessing
 import os
 from pathlib import Path
+from typing import Any
+
+
+def _env_flag(name: str, default: bool = False) -> bool:
+    raw_value = os.getenv(name)
+    if raw_value is None:
+        return default
+    return raw_value.strip().lower() in {"1", "true", "yes", "on"}
+
+
+def _optional_path(name: str, default: Path) -> Path | None:
+    """Resolve an optional directory setting; an empty value disables it."""
+    raw_value = os.getenv(name)
+    if raw_value is None:
+        return default.resolve()
+    if not raw_value.strip():
+        return None
+    return Path(raw_value).resolve()
 
 
 PDF_ENGINE_ROOT = Path(__file__).resolve().parent
@@ -35,3 +54,226 @@ PDF_STORAGE_PATH = Path(
 ).resolve()
 
 PDF_FILE_PREFIX = os.getenv("PDF_FILE_PREFIX", "contract")
+
+# Where signed PDFs are kept: "local" (sharded directories under
+# PDF_STORAGE_PATH), "memory" (per process, for tests and single-process
+# runs) or "s3" (any S3-compatible service; needs boto3).
+PDF_STORAGE_BACKEND = os.getenv("PDF_STORAGE_BACKEND", "local").strip().lower()
+PDF_STORAGE_S3_BUCKET = os.getenv("PDF_STORAGE_S3_BUCKET", "")
+PDF_STORAGE_S3_PREFIX = os.getenv("PDF_STORAGE_S3_PREFIX", "contracts/")
+# Point at a local stand-in such as MinIO, e.g. http://localhost:9000.
+PDF_STORAGE_S3_ENDPOINT_URL = os.getenv("PDF_STORAGE_S3_ENDPOINT_URL") or None
+PDF_STORAGE_S3_REGION = os.getenv("PDF_STORAGE_S3_REGION") or None
+
+# Root directory for on-disk engine caches (compiled templates, etc.).
+PDF_CACHE_ROOT = Path(
+    os.getenv(
+        "PDF_CACHE_ROOT",
+        REPO_ROOT / ".pdf_cache",
+    )
+).resolve()
+
+# Bundled font files declared with @font-face in pdf_styles.css. Layout only
+# uses these families, so output does not depend on the host's fonts.
+PDF_FONTS_PATH = Path(
+    os.getenv(
+        "PDF_FONTS_PATH",
+        PDF_ENGINE_ROOT / "fonts",
+    )
+).resolve()
+
+# Render processes point fontconfig at a generated fonts.conf that lists the
+# bundled fonts and pins the font cache here, so every worker reuses one cache
+# instead of scanning fonts. Set to an empty string to keep the host setup.
+PDF_FONTCONFIG_CACHE_PATH = _optional_path(
+    "PDF_FONTCONFIG_CACHE_PATH",
+    PDF_CACHE_ROOT / "fontconfig",
+)
+# Keep the host's fonts as a fallback for glyphs the bundled fonts lack.
+PDF_FONTS_SYSTEM_FALLBACK = _env_flag("PDF_FONTS_SYSTEM_FALLBACK", True)
+
+# Development mode: re-check template sources on every render and reload them
+# when they change. Production mode (the default) compiles each template once
+# per process and never stats the template files on the render path. The
+# stylesheet and bundled fonts are re-checked in both modes.
+PDF_AUTO_RELOAD = _env_flag("PDF_AUTO_RELOAD", False)
+
+# Compiled Jinja2 bytecode is persisted here so fresh worker processes skip
+# template compilation. Set to an empty string to disable the on-disk cache.
+PDF_TEMPLATE_CACHE_PATH = _optional_path(
+    "PDF_TEMPLATE_CACHE_PATH",
+    PDF_CACHE_ROOT / "templates",
+)
+
+# Render-result cache. Identical render inputs produce identical PDF bytes, so
+# results are cached in memory per process and on disk across processes.
+PDF_RENDER_CACHE_ENABLED = _env_flag("PDF_RENDER_CACHE_ENABLED", True)
+PDF_RENDER_CACHE_MEMORY_BYTES = int(os.getenv("PDF_RENDER_CACHE_MEMORY_BYTES", str(64 * 1024 * 1024)))
+PDF_RENDER_CACHE_DISK_BYTES = int(os.getenv("PDF_RENDER_CACHE_DISK_BYTES", str(512 * 1024 * 1024)))
+# Set to an empty string to keep only the in-memory tier.
+PDF_RENDER_CACHE_PATH = _optional_path(
+    "PDF_RENDER_CACHE_PATH",
+    PDF_CACHE_ROOT / "renders",
+)
+
+# In-memory store for signature images and packaged assets served to
+# WeasyPrint during layout. Renders never touch the network; allowlisted
+# http(s) signature images are downloaded once, when they are submitted.
+PDF_ASSET_CACHE_BYTES = int(os.getenv("PDF_ASSET_CACHE_BYTES", str(32 * 1024 * 1024)))
+PDF_ASSET_FETCH_TIMEOUT = float(os.getenv("PDF_ASSET_FETCH_TIMEOUT", "5"))
+PDF_ASSET_MAX_BYTES = int(os.getenv("PDF_ASSET_MAX_BYTES", str(5 * 1024 * 1024)))
+# Block every outbound socket in render worker processes.
+PDF_FORBID_NETWORK = _env_flag("PDF_FORBID_NETWORK", False)
+
+# Signature images are trimmed, downsized to fit this box and re-encoded as a
+# palette PNG when they are submitted.
+PDF_SIGNATURE_MAX_WIDTH = int(os.getenv("PDF_SIGNATURE_MAX_WIDTH", "600"))
+PDF_SIGNATURE_MAX_HEIGHT = int(os.getenv("PDF_SIGNATURE_MAX_HEIGHT", "200"))
+PDF_SIGNATURE_COLORS = int(os.getenv("PDF_SIGNATURE_COLORS", "16"))
+# Decoded images larger than this many pixels are rejected before processing.
+PDF_SIGNATURE_MAX_PIXELS = int(os.getenv("PDF_SIGNATURE_MAX_PIXELS", str(4096 * 4096)))
+
+# Emit one JSON log line per render on the "pdf_gen_engine.services.render_stats"
+# logger with per-stage timings, page count and output size.
+PDF_RENDER_STATS_LOG = _env_flag("PDF_RENDER_STATS_LOG", False)
+
+# Named WeasyPrint output option sets, selectable per render. Image options
+# apply while images are loaded during layout, font and compression options
+# when the PDF is written.
+#   archival: images embedded as submitted, complete fonts with hinting.
+#   compact:  images re-encoded and downsampled to 150 dpi, subset fonts.
+#   fast:     no image work and uncompressed streams; largest files.
+PDF_OUTPUT_PROFILES: dict[str, dict[str, Any]] = {
+    "archival": {
+        "optimize_images": False,
+        "jpeg_quality": None,
+        "dpi": None,
+        "full_fonts": True,
+        "hinting": True,
+        "uncompressed_pdf": False,
+    },
+    "compact": {
+        "optimize_images": True,
+        "jpeg_quality": 75,
+        "dpi": 150,
+        "full_fonts": False,
+        "hinting": False,
+        "uncompressed_pdf": False,
+    },
+    "fast": {
+        "optimize_images": False,
+        "jpeg_quality": None,
+        "dpi": None,
+        "full_fonts": False,
+        "hinting": False,
+        "uncompressed_pdf": True,
+    },
+}
+# Profile used when a caller does not pick one.
+PDF_OUTPUT_PROFILE = os.getenv("PDF_OUTPUT_PROFILE", "compact").strip().lower()
+# Comma-separated output profiles whose PDFs are linearized ("fast web view")
+# after writing, so a viewer fetching byte ranges can show page one before the
+# rest arrives. Needs the optional pikepdf package; without it PDFs are left
+# as written and a warning is logged once.
+PDF_LINEARIZE_PROFILES = frozenset(
+    item.strip().lower()
+    for item in os.getenv("PDF_LINEARIZE_PROFILES", "").split(",")
+    if item.strip()
+)
+
+# Draft previews are cached per contract revision in each API process.
+PDF_PREVIEW_CACHE_BYTES = int(os.getenv("PDF_PREVIEW_CACHE_BYTES", str(16 * 1024 * 1024)))
+PDF_PREVIEW_WATERMARK = os.getenv("PDF_PREVIEW_WATERMARK", "DRAFT")
+
+# Lay contracts out when they are sent so signing only stamps the client
+# signature. Pre-renders live in the render cache; with several render nodes
+# PDF_RENDER_CACHE_PATH must be shared for the sign job to find them.
+PDF_PRERENDER_ENABLED = _env_flag("PDF_PRERENDER_ENABLED", True)
+
+# Process-pool render executor. PDF_RENDER_WORKERS=0 renders one at a time in
+# a background thread of the calling process instead of a worker process.
+PDF_RENDER_WORKERS = int(os.getenv("PDF_RENDER_WORKERS", str(min(4, os.cpu_count() or 1))))
+# Maximum renders queued or running at once; further submissions are rejected.
+PDF_RENDER_QUEUE_SIZE = int(os.getenv("PDF_RENDER_QUEUE_SIZE", str(max(1, PDF_RENDER_WORKERS) * 4)))
+# Batch renders (backfills, bulk re-renders) only run on workers interactive
+# renders leave spare, and never on the last PDF_RENDER_INTERACTIVE_RESERVED
+# workers, so a sign render never waits behind a long batch render. An
+# executor with no worker to spare starts one extra worker for batch renders.
+# Render worker nodes hold the same number of job threads back from batch
+# jobs and likewise add one job thread for them when none is left. Batch
+# renders have their own queue limit so they cannot fill the interactive queue.
+PDF_RENDER_INTERACTIVE_RESERVED = int(os.getenv("PDF_RENDER_INTERACTIVE_RESERVED", "1"))
+PDF_RENDER_BATCH_QUEUE_SIZE = int(os.getenv("PDF_RENDER_BATCH_QUEUE_SIZE", str(PDF_RENDER_QUEUE_SIZE)))
+# Worker processes are replaced after this many renders to bound memory growth.
+PDF_RENDER_MAX_TASKS_PER_CHILD = int(os.getenv("PDF_RENDER_MAX_TASKS_PER_CHILD", "50"))
+# Warm render workers up (WeasyPrint import, fonts, templates and a throwaway
+# render) before they report ready. With the "forkserver" start method the
+# fork server warms up once and workers are forked from it already warm;
+# "spawn" starts each worker cold and warms it in its initializer.
+PDF_RENDER_PREWARM = _env_flag("PDF_RENDER_PREWARM", True)
+PDF_RENDER_START_METHOD = os.getenv(
+    "PDF_RENDER_START_METHOD",
+    "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn",
+).strip().lower()
+# Seconds RenderExecutor.start() waits for every worker to report ready.
+PDF_RENDER_READY_TIMEOUT = float(os.getenv("PDF_RENDER_READY_TIMEOUT", "120"))
+
+# Resource limits for renders in worker processes (PDF_RENDER_WORKERS > 0);
+# 0 disables a limit. A render that runs past the timeout fails with
+# RenderTimeoutError. If it is stuck in native code and keeps the CPU busy
+# for the grace period beyond that, the kernel stops its process.
+PDF_RENDER_TIMEOUT_SECONDS = float(os.getenv("PDF_RENDER_TIMEOUT_SECONDS", "60"))
+PDF_RENDER_TIMEOUT_GRACE_SECONDS = int(os.getenv("PDF_RENDER_TIMEOUT_GRACE_SECONDS", "30"))
+# Address-space limit per worker process; allocations past it fail the render
+# with RenderMemoryError instead of exhausting the node.
+PDF_RENDER_MEMORY_LIMIT_MB = int(os.getenv("PDF_RENDER_MEMORY_LIMIT_MB", "0"))
+# Worker processes are replaced once their resident memory passes this after a
+# render; renders already queued on them still finish.
+PDF_RENDER_MAX_RSS_MB = int(os.getenv("PDF_RENDER_MAX_RSS_MB", "1024"))
+# Trace Python allocations in worker processes and keep tracemalloc snapshots
+# of the heaviest renders (peak above PDF_RENDER_TRACEMALLOC_MIN_MB) under
+# PDF_CACHE_ROOT/tracemalloc. Tracing slows renders down; use it to diagnose.
+PDF_RENDER_TRACEMALLOC = _env_flag("PDF_RENDER_TRACEMALLOC", False)
+PDF_RENDER_TRACEMALLOC_MIN_MB = float(os.getenv("PDF_RENDER_TRACEMALLOC_MIN_MB", "100"))
+PDF_RENDER_TRACEMALLOC_KEEP = int(os.getenv("PDF_RENDER_TRACEMALLOC_KEEP", "10"))
+PDF_RENDER_TRACEMALLOC_PATH = Path(
+    os.getenv(
+        "PDF_RENDER_TRACEMALLOC_PATH",
+        PDF_CACHE_ROOT / "tracemalloc",
+    )
+).resolve()
+# Hand signature images of at least PDF_SHARED_ASSET_MIN_BYTES (as data URIs)
+# to render worker processes through shared memory instead of pickling them.
+# Up to PDF_SHARED_ASSET_RETAIN_BYTES of released images stay mapped for reuse.
+PDF_SHARED_ASSETS = _env_flag("PDF_SHARED_ASSETS", True)
+PDF_SHARED_ASSET_MIN_BYTES = int(os.getenv("PDF_SHARED_ASSET_MIN_BYTES", "16384"))
+PDF_SHARED_ASSET_RETAIN_BYTES = int(os.getenv("PDF_SHARED_ASSET_RETAIN_BYTES", str(8 * 1024 * 1024)))
+# Comma-separated contract types written directly with pydyf instead of
+# WeasyPrint (see services.direct_writer). Only fixed-layout, text-only
+# templates are supported; set to an empty string to render everything with
+# WeasyPrint.
+PDF_DIRECT_RENDER_TYPES = frozenset(
+    item.strip().lower()
+    for item in os.getenv("PDF_DIRECT_RENDER_TYPES", "nda,employment").split(",")
+    if item.strip()
+)
+
+# MongoDB target for the durable render job queue. Defaults mirror the backend
+# settings so API nodes and standalone render workers share one database.
+PDF_JOBS_MONGO_URI = os.getenv("MONGO_URI", "mongodb://localhost:27017")
+PDF_JOBS_DATABASE_NAME = (
+    os.getenv("DATABASE_NAME")
+    or os.getenv("MONGODB_DB_NAME")
+    or os.getenv("DB_NAME")
+    or "ContractEase"
+)
+# Seconds a claimed job stays leased to a worker without a heartbeat.
+PDF_RENDER_JOB_LEASE_SECONDS = int(os.getenv("PDF_RENDER_JOB_LEASE_SECONDS", "120"))
+PDF_RENDER_JOB_MAX_ATTEMPTS = int(os.getenv("PDF_RENDER_JOB_MAX_ATTEMPTS", "3"))
+PDF_RENDER_JOB_POLL_SECONDS = float(os.getenv("PDF_RENDER_JOB_POLL_SECONDS", "1.0"))
+# Render worker threads started inside each API process. Set to 0 when render
+# workers run separately via `python -m pdf_gen_engine.worker`. The default
+# leaves one thread beyond the interactive reserve for batch jobs.
+PDF_EMBEDDED_RENDER_WORKERS = int(
+    os.getenv("PDF_EMBEDDED_RENDER_WORKERS", str(max(0, PDF_RENDER_INTERACTIVE_RESERVED) + 1))
+)
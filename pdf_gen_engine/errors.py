@@ -0,0 +1,33 @@
+"""Exception types shared by the engine and its callers.
+
+Kept free of heavy imports so API code can catch them without loading the
+render stack.
+"""
+
+
+class RenderQueueFullError(RuntimeError):
+    """Raised when the render queue is at capacity."""
+
+
+class RenderLimitError(RuntimeError):
+    """Raised when a render is stopped for exceeding a resource limit.
+
+    The limits bound pathological payloads, but a render can also trip them
+    on a loaded node, so callers may retry it a bounded number of times.
+    ``code`` names the limit for job records and statistics.
+    """
+
+    code = "render_limit"
+    retryable = True
+
+
+class RenderTimeoutError(RenderLimitError):
+    """Raised when a render runs longer than ``PDF_RENDER_TIMEOUT_SECONDS``."""
+
+    code = "render_timeout"
+
+
+class RenderMemoryError(RenderLimitError):
+    """Raised when a render runs out of the memory allowed to its process."""
+
+    code = "render_memory"
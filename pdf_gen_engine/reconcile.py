@@ -0,0 +1,327 @@
+"""Reconcile stored PDFs with the contracts that reference them.
+
+Sign and backfill renders store the PDF before the contract update that
+points at it. Deleting the file when that update fails is best-effort, and a
+crash in between leaves it behind; ``contract_<uuid>.pdf`` files from
+``build_pdf_output_path`` and temporary files of interrupted writes are never
+referenced at all. The reconciler walks the PDF storage incrementally
+(``os.scandir`` for local storage) and checks each batch of files against the
+``contracts`` collection with ``$in`` queries on ``pdf_key``, ``pdf_sha256``
+and legacy ``pdf_path`` values, so neither the listing nor the references are
+held in memory.
+
+Unreferenced files older than ``--min-age-hours`` are orphans: reported, or
+removed with ``--delete``. Younger ones may belong to a render that has not
+updated its contract yet. A second pass streams the contracts and reports
+references whose file is missing; ``python -m app.backfill --verify-files``
+renders those again.
+
+One JSON line is printed per orphan and dangling reference, followed by a
+summary line.
+
+Run from repository root:
+    python -m pdf_gen_engine.reconcile
+    python -m pdf_gen_engine.reconcile --delete --min-age-hours 24
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import re
+import time
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Any, Iterable, Iterator
+
+from pymongo import ASCENDING, MongoClient
+
+from .config import PDF_JOBS_DATABASE_NAME, PDF_JOBS_MONGO_URI, PDF_STORAGE_PATH
+from .storage import PdfStorage, StoredObject, build_pdf_key, get_pdf_storage
+from .storage.base import PDF_KEY_SUFFIX
+
+CONTRACTS_COLLECTION = "contracts"
+# Contract fields that reference a stored PDF; indexed for the $in lookups.
+PDF_REFERENCE_FIELDS = ("pdf_key", "pdf_sha256", "pdf_path")
+DEFAULT_BATCH_SIZE = 500
+DEFAULT_MIN_AGE_HOURS = 24.0
+
+_DIGEST_KEY = re.compile(r"([0-9a-f]{64})" + re.escape(PDF_KEY_SUFFIX))
+# Temporary file of a local write: ".<key>.<uuid hex>.tmp".
+_TEMP_FILE = re.compile(r"\..+\.[0-9a-f]{32}\.tmp")
+
+
+@dataclass
+class ReconcileSummary:
+    """Counts of one reconciliation run."""
+
+    scanned: int = 0
+    scanned_bytes: int = 0
+    # Files that are neither PDFs nor temporary files of a write.
+    ignored: int = 0
+    referenced: int = 0
+    too_recent: int = 0
+    orphans: int = 0
+    orphan_bytes: int = 0
+    deleted: int = 0
+    deleted_bytes: int = 0
+    delete_errors: int = 0
+    contracts_checked: int = 0
+    dangling: int = 0
+
+    def as_dict(self) -> dict[str, Any]:
+        return asdict(self)
+
+
+def ensure_reference_indexes(contracts: Any) -> None:
+    for field in PDF_REFERENCE_FIELDS:
+        contracts.create_index([(field, ASCENDING)], sparse=True)
+
+
+def _batched(items: Iterable[StoredObject], size: int) -> Iterator[list[StoredObject]]:
+    batch: list[StoredObject] = []
+    for item in items:
+        batch.append(item)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def _path_candidates(stored: StoredObject, root: Path) -> set[str]:
+    """Return the ``pdf_path`` values a contract may have stored for a local file."""
+    if stored.path is None:
+        return set()
+    candidates = {str(stored.path), str(stored.path.resolve()), stored.path.name}
+    try:
+        candidates.add(str(stored.path.relative_to(root)))
+    except ValueError:
+        pass
+    return candidates
+
+
+def find_referenced(contracts: Any, batch: list[StoredObject], root: Path = PDF_STORAGE_PATH) -> set[str]:
+    """Return the keys of the objects in ``batch`` that some contract references."""
+    keys = {stored.key for stored in batch}
+    digests: dict[str, str] = {}
+    paths: dict[str, str] = {}
+    for stored in batch:
+        match = _DIGEST_KEY.fullmatch(stored.key)
+        if match:
+            digests[match.group(1)] = stored.key
+        for candidate in _path_candidates(stored, root):
+            paths[candidate] = stored.key
+
+    query = {
+        "$or": [
+            {"pdf_key": {"$in": sorted(keys)}},
+            {"pdf_sha256": {"$in": sorted(digests)}},
+            {"pdf_path": {"$in": sorted(paths)}},
+        ]
+    }
+    referenced: set[str] = set()
+    for contract in contracts.find(query, {field: 1 for field in PDF_REFERENCE_FIELDS}):
+        pdf_key = str(contract.get("pdf_key") or "")
+        if pdf_key in keys:
+            referenced.add(pdf_key)
+        digest = str(contract.get("pdf_sha256") or "")
+        if digest in digests:
+            referenced.add(digests[digest])
+        pdf_path = str(contract.get("pdf_path") or "")
+        if pdf_path in paths:
+            referenced.add(paths[pdf_path])
+    return referenced
+
+
+def _is_candidate(stored: StoredObject) -> bool:
+    return stored.key.endswith(PDF_KEY_SUFFIX) or bool(_TEMP_FILE.fullmatch(stored.key))
+
+
+def _is_old_enough(stored: StoredObject, cutoff: float) -> bool:
+    # Backends without modification times (memory storage) cannot be raced.
+    return stored.modified is None or stored.modified <= cutoff
+
+
+def _delete_orphan(storage: PdfStorage, stored: StoredObject, cutoff: float) -> bool:
+    """Remove an orphan unless it was written or reused since it was listed.
+
+    Local files are removed at the path they were found at, which also covers
+    temporary files and files at the legacy top level.
+    """
+    try:
+        # A render that deduplicates onto an existing object refreshes its
+        # modification time before referencing it.
+        if stored.path is None:
+            current = storage.stat(stored.key)
+            if current.modified is not None and current.modified > cutoff:
+                return False
+            storage.delete(stored.key)
+            return True
+        if stored.path.stat().st_mtime > cutoff:
+            return False
+        stored.path.unlink()
+    except FileNotFoundError:
+        return False
+    return True
+
+
+def find_orphans(
+    contracts: Any,
+    storage: PdfStorage,
+    summary: ReconcileSummary,
+    min_age_hours: float = DEFAULT_MIN_AGE_HOURS,
+    batch_size: int = DEFAULT_BATCH_SIZE,
+    delete: bool = False,
+) -> Iterator[dict[str, Any]]:
+    """Yield a report per unreferenced stored file, deleting it with ``delete``."""
+    now = time.time()
+    cutoff = now - min_age_hours * 3600
+    root = getattr(storage, "root", PDF_STORAGE_PATH)
+    for batch in _batched(storage.iter_objects(), max(1, batch_size)):
+        summary.scanned += len(batch)
+        summary.scanned_bytes += sum(stored.size_bytes for stored in batch)
+        candidates = [stored for stored in batch if _is_candidate(stored)]
+        summary.ignored += len(batch) - len(candidates)
+        old_enough = [stored for stored in candidates if _is_old_enough(stored, cutoff)]
+        summary.too_recent += len(candidates) - len(old_enough)
+        candidates = old_enough
+        pdfs = [stored for stored in candidates if not _TEMP_FILE.fullmatch(stored.key)]
+        referenced = find_referenced(contracts, pdfs, root) if pdfs else set()
+
+        for stored in candidates:
+            if stored.key in referenced:
+                summary.referenced += 1
+                continue
+            summary.orphans += 1
+            summary.orphan_bytes += stored.size_bytes
+            report: dict[str, Any] = {
+                "event": "orphan",
+                "key": stored.key,
+                "path": str(stored.path) if stored.path is not None else None,
+                "size_bytes": stored.size_bytes,
+                "age_hours": round((now - stored.modified) / 3600, 1) if stored.modified is not None else None,
+                "temporary": bool(_TEMP_FILE.fullmatch(stored.key)),
+            }
+            if delete:
+                try:
+                    deleted = _delete_orphan(storage, stored, cutoff)
+                except OSError as error:
+                    summary.delete_errors += 1
+                    report["error"] = str(error)
+                    deleted = False
+                if deleted:
+                    summary.deleted += 1
+                    summary.deleted_bytes += stored.size_bytes
+                report["deleted"] = deleted
+            yield report
+
+
+def _legacy_path_exists(pdf_path_value: str, root: Path = PDF_STORAGE_PATH) -> bool:
+    """Whether a pre-content-addressing ``pdf_path`` still points at a file under the storage root."""
+    storage_root = root.resolve()
+    pdf_path = Path(pdf_path_value)
+    pdf_path = (pdf_path if pdf_path.is_absolute() else storage_root / pdf_path).resolve()
+    try:
+        pdf_path.relative_to(storage_root)
+    except ValueError:
+        return False
+    return pdf_path.is_file()
+
+
+def find_dangling(
+    contracts: Any,
+    storage: PdfStorage,
+    summary: ReconcileSummary,
+    batch_size: int = DEFAULT_BATCH_SIZE,
+) -> Iterator[dict[str, Any]]:
+    """Yield a report per contract whose stored PDF is missing."""
+    root = getattr(storage, "root", PDF_STORAGE_PATH)
+    query = {"$or": [{field: {"$nin": [None, ""]}} for field in PDF_REFERENCE_FIELDS]}
+    projection = {"status": 1, **{field: 1 for field in PDF_REFERENCE_FIELDS}}
+    for contract in contracts.find(query, projection).batch_size(max(1, batch_size)):
+        summary.contracts_checked += 1
+        pdf_key = contract.get("pdf_key")
+        digest = contract.get("pdf_sha256")
+        if pdf_key or digest:
+            field, reference = ("pdf_key", pdf_key) if pdf_key else ("pdf_sha256", digest)
+            try:
+                exists = storage.exists(str(pdf_key or build_pdf_key(str(digest))))
+            except ValueError:
+                exists = False
+        else:
+            field, reference = "pdf_path", contract.get("pdf_path")
+            exists = _legacy_path_exists(str(reference), root)
+        if exists:
+            continue
+        summary.dangling += 1
+        yield {
+            "event": "dangling",
+            "contract_id": str(contract["_id"]),
+            "status": contract.get("status"),
+            "field": field,
+            "reference": str(reference),
+        }
+
+
+def reconcile(
+    database: Any,
+    storage: PdfStorage | None = None,
+    min_age_hours: float = DEFAULT_MIN_AGE_HOURS,
+    batch_size: int = DEFAULT_BATCH_SIZE,
+    delete: bool = False,
+    dangling: bool = True,
+) -> Iterator[dict[str, Any]]:
+    """Yield orphan and dangling reference reports, then a summary.
+
+    Args:
+        database: A synchronous pymongo database with the ``contracts``
+            collection.
+        storage: PDF storage to walk; defaults to the configured backend.
+        min_age_hours: Unreferenced files modified more recently are left
+            alone.
+        batch_size: Stored files checked per ``$in`` query, and contracts
+            fetched per cursor batch.
+        delete: Remove orphans instead of only reporting them.
+        dangling: Also check every referenced PDF exists.
+    """
+    storage = storage or get_pdf_storage()
+    contracts = database[CONTRACTS_COLLECTION]
+    ensure_reference_indexes(contracts)
+    summary = ReconcileSummary()
+    yield from find_orphans(contracts, storage, summary, min_age_hours, batch_size, delete)
+    if dangling:
+        yield from find_dangling(contracts, storage, summary, batch_size)
+    yield {"event": "summary", "delete": delete, "min_age_hours": min_age_hours, **summary.as_dict()}
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(
+        prog="python -m pdf_gen_engine.reconcile",
+        description="Find stored PDFs no contract references, and contract references to missing PDFs.",
+    )
+    parser.add_argument("--delete", action="store_true", help="Delete orphaned files instead of only reporting them.")
+    parser.add_argument(
+        "--min-age-hours",
+        type=float,
+        default=DEFAULT_MIN_AGE_HOURS,
+        help="Leave unreferenced files modified more recently than this alone.",
+    )
+    parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE, help="Stored files checked per query.")
+    parser.add_argument(
+        "--skip-dangling",
+        action="store_true",
+        help="Do not check contract references for missing files.",
+    )
+    args = parser.parse_args(argv)
+
+    database = MongoClient(PDF_JOBS_MONGO_URI)[PDF_JOBS_DATABASE_NAME]
+    summary: dict[str, Any] = {}
+    for report in reconcile(database, None, args.min_age_hours, args.batch_size, args.delete, not args.skip_dangling):
+        summary = report
+        print(json.dumps(report), flush=True)
+    return 1 if summary.get("delete_errors") else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -1,8 +1,31 @@
 """PDF service package.
 
-Exports the core contract PDF generator.
+Exports the core contract PDF generator, the batch renderer and the async
+render executor. The exports are imported on first access.
 """
 
-from .pdf_service import generate_contract_pdf
+from importlib import import_module
+from typing import Any
 
-__all__ = ["generate_contract_pdf"]
+_EXPORTS = {
+    "RenderQueueFullError": "..errors",
+    "generate_contract_pdf": ".pdf_service",
+    "generate_contract_pdfs": ".batch",
+    "get_render_executor": ".render_executor",
+    "render": ".render_executor",
+}
+
+__all__ = sorted(_EXPORTS)
+
+
+def __getattr__(name: str) -> Any:
+    module_name = _EXPORTS.get(name)
+    if module_name is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(import_module(module_name, __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__() -> list[str]:
+    return sorted(set(globals()) | set(_EXPORTS))
@@ -0,0 +1,161 @@
+"""Batch rendering of many contract PDFs.
+
+Used for offline re-renders after template changes and for capacity testing
+of the engine on its own. Documents are rendered in parallel on a dedicated
+render executor; each worker process compiles templates once and reuses the
+parsed stylesheet, font configuration and render cache across documents.
+"""
+
+from __future__ import annotations
+
+from concurrent.futures import FIRST_COMPLETED, Future, wait
+from dataclasses import dataclass, field
+from time import perf_counter
+from typing import Any, Iterable, Iterator, Mapping
+
+from ..config import PDF_RENDER_MAX_TASKS_PER_CHILD, PDF_RENDER_WORKERS
+from ..utils.pdf_utils import StoredPdf
+from .pdf_service import PdfOutputMode
+from .render_executor import RenderExecutor
+from .render_priority import RENDER_PRIORITY_BATCH
+from .render_stats import RenderReport
+
+
+@dataclass(frozen=True)
+class BatchRenderResult:
+    """Outcome of one document in a batch."""
+
+    index: int
+    contract_id: str | None
+    result: str | bytes | StoredPdf | None
+    render_ms: float
+    error: str | None = None
+    report: RenderReport | None = None
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+
+@dataclass
+class BatchRenderSummary:
+    """Aggregate throughput of a batch, updated as results are produced."""
+
+    documents: int = 0
+    failures: int = 0
+    render_ms_total: float = 0.0
+    wall_seconds: float = 0.0
+    render_ms: list[float] = field(default_factory=list, repr=False)
+
+    @property
+    def documents_per_second(self) -> float:
+        return self.documents / self.wall_seconds if self.wall_seconds else 0.0
+
+    @property
+    def mean_render_ms(self) -> float:
+        return self.render_ms_total / len(self.render_ms) if self.render_ms else 0.0
+
+    def percentile_ms(self, percentile: float) -> float:
+        if not self.render_ms:
+            return 0.0
+        ordered = sorted(self.render_ms)
+        index = min(len(ordered) - 1, int(round(percentile / 100 * (len(ordered) - 1))))
+        return ordered[index]
+
+    def as_dict(self) -> dict[str, Any]:
+        return {
+            "documents": self.documents,
+            "failures": self.failures,
+            "wall_seconds": round(self.wall_seconds, 3),
+            "documents_per_second": round(self.documents_per_second, 2),
+            "mean_render_ms": round(self.mean_render_ms, 1),
+            "p50_render_ms": round(self.percentile_ms(50), 1),
+            "p95_render_ms": round(self.percentile_ms(95), 1),
+        }
+
+
+def _contract_id(contract_data: Mapping[str, Any]) -> str | None:
+    contract_id = contract_data.get("contract_id") or contract_data.get("id")
+    return str(contract_id) if contract_id else None
+
+
+def generate_contract_pdfs(
+    payloads: Iterable[Mapping[str, Any]],
+    output_mode: PdfOutputMode = "path",
+    workers: int = PDF_RENDER_WORKERS,
+    max_in_flight: int | None = None,
+    summary: BatchRenderSummary | None = None,
+    profile: str | None = None,
+    priority: str = RENDER_PRIORITY_BATCH,
+) -> Iterator[BatchRenderResult]:
+    """Render many contract PDFs in parallel, yielding results as they finish.
+
+    Payloads are consumed lazily and at most ``max_in_flight`` documents are
+    pending at once, so arbitrarily long inputs render in bounded memory. A
+    failing document is reported in its result and does not stop the batch.
+
+    Args:
+        payloads: Contract payloads accepted by ``generate_contract_pdf``.
+        output_mode: Output mode passed to ``generate_contract_pdf``.
+        workers: Render worker processes; 0 renders in a background thread.
+        max_in_flight: Pending document limit; defaults to twice ``workers``.
+        summary: Optional summary updated with aggregate throughput.
+        profile: Output profile for every document; defaults to
+            ``PDF_OUTPUT_PROFILE``.
+        priority: Priority class the documents are queued and counted under
+            in the engine statistics. The batch has its own workers, so no
+            worker is held back for interactive renders.
+
+    Yields:
+        A ``BatchRenderResult`` per payload, in completion order.
+    """
+    summary = summary if summary is not None else BatchRenderSummary()
+    in_flight_limit = max(1, max_in_flight or max(1, workers) * 2)
+    # Queue slots are released from a done-callback that may run just after a
+    # waiter wakes up, so leave headroom above the in-flight window.
+    executor = RenderExecutor(
+        workers=workers,
+        queue_size=in_flight_limit * 2,
+        max_tasks_per_child=PDF_RENDER_MAX_TASKS_PER_CHILD,
+        interactive_reserved=0,
+        batch_queue_size=in_flight_limit * 2,
+    )
+    pending: dict[Future, tuple[int, str | None]] = {}
+    payload_iter = enumerate(payloads)
+    exhausted = False
+    batch_start = perf_counter()
+
+    def _refill() -> None:
+        nonlocal exhausted
+        while not exhausted and len(pending) < in_flight_limit:
+            try:
+                index, contract_data = next(payload_iter)
+            except StopIteration:
+                exhausted = True
+                return
+            future = executor.submit_with_report(contract_data, output_mode, profile=profile, priority=priority)
+            pending[future] = (index, _contract_id(contract_data))
+
+    try:
+        _refill()
+        while pending:
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                index, contract_id = pending.pop(future)
+                try:
+                    result, report = future.result()
+                    batch_result = BatchRenderResult(index, contract_id, result, report.total_ms, report=report)
+                    summary.render_ms.append(report.total_ms)
+                    summary.render_ms_total += report.total_ms
+                except Exception as error:
+                    batch_result = BatchRenderResult(index, contract_id, None, 0.0, error=str(error) or type(error).__name__)
+                    summary.failures += 1
+                summary.documents += 1
+                summary.wall_seconds = perf_counter() - batch_start
+                yield batch_result
+            _refill()
+    finally:
+        for future in pending:
+            future.cancel()
+        executor.shutdown(wait=not pending)
+        summary.wall_seconds = perf_counter() - batch_start
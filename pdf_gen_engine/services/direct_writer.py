@@ -0,0 +1,1076 @@
+"""Direct PDF writer for fixed-layout contract types.
+
+The NDA and employment templates are a title, numbered sections of plain
+paragraphs and a two-column signature grid. For contract types in
+``PDF_DIRECT_RENDER_TYPES`` the engine still renders the Jinja template, but
+instead of handing the HTML to WeasyPrint it reads that fixed structure back
+and writes the PDF itself with ``pydyf``. Text is measured and wrapped with
+the bundled DejaVu fonts (including their kerning pairs), paginated the way
+WeasyPrint paginates these templates (orphans and widows of 2, headings kept
+with their paragraph, the signature section never split) and embedded as
+font subsets.
+
+The geometry below is what WeasyPrint computes for these templates' inline
+styles on top of ``pdf_styles.css``; ``python -m pdf_gen_engine.benchmarks
+direct`` compares the two layouts line by line. A template with anything
+outside the supported structure raises ``DirectLayoutError`` and the caller
+renders it with WeasyPrint instead.
+"""
+
+from __future__ import annotations
+
+import zlib
+from dataclasses import dataclass, field
+from datetime import datetime
+from functools import lru_cache
+from hashlib import sha256
+from html.parser import HTMLParser
+from io import BytesIO
+from pathlib import Path
+from time import perf_counter
+from typing import Any, Iterator, Mapping
+
+import pydyf
+from PIL import Image
+
+from ..config import PDF_FONTS_PATH, PDF_SIGNATURE_MAX_PIXELS
+from .render_cache import LRUByteCache
+from .render_limits import mark_allocation_peak
+from .url_fetcher import Asset
+
+# Part of the render cache key; bump when the output of this writer changes.
+DIRECT_WRITER_VERSION = 2
+PRODUCER = "ContractEase direct writer"
+
+# Lengths are CSS px (1/96 in) measured from the top-left page corner, as in
+# WeasyPrint; the page content stream maps them to PDF points.
+PX_TO_PT = 0.75
+PAGE_WIDTH = 210 / 25.4 * 96
+PAGE_HEIGHT = 297 / 25.4 * 96
+PAGE_MARGIN_X = 18 / 25.4 * 96
+PAGE_MARGIN_Y = 24 / 25.4 * 96
+BODY_MARGIN = 24.0
+CONTENT_LEFT = PAGE_MARGIN_X + BODY_MARGIN
+CONTENT_WIDTH = PAGE_WIDTH - 2 * CONTENT_LEFT
+FIRST_PAGE_TOP = PAGE_MARGIN_Y + BODY_MARGIN
+PAGE_TOP = PAGE_MARGIN_Y
+PAGE_BOTTOM = PAGE_HEIGHT - PAGE_MARGIN_Y
+
+# Collapsed vertical margins between the template's blocks.
+TITLE_GAP = 12.0
+HEADER_PADDING = 10.0
+HEADER_RULE = 2.0
+HEADER_GAP = 18.0
+SECTION_GAP = 20.0
+SIGNATURE_SECTION_GAP = 32.0
+HEADING_GAP = 12.0
+PARAGRAPH_GAP = 10.0
+
+# Signature grid: a fixed table of two 50% cells with 16px border spacing.
+# The cells' padding and borders come on top of the 50%, so like WeasyPrint
+# the table ends up wider than the page body.
+CELL_SPACING = 16.0
+CELL_PADDING = 12.0
+CELL_BORDER = 1.0
+CELL_RADIUS = 6.0
+CELL_CONTENT_WIDTH = CONTENT_WIDTH / 2
+CELL_WIDTH = CELL_CONTENT_WIDTH + 2 * (CELL_PADDING + CELL_BORDER)
+SIGNATURE_MAX_WIDTH = 180.0
+SIGNATURE_MAX_HEIGHT = 80.0
+SIGNATURE_MARGIN = 8.0
+NAME_RULE = 1.0
+NAME_PADDING = 6.0
+PLACEHOLDER_PADDING = 8.0
+ORPHANS = WIDOWS = 2
+
+FONT_FILES = {
+    "serif": "DejaVuSerif.ttf",
+    "serif-bold": "DejaVuSerif-Bold.ttf",
+    "sans": "DejaVuSans.ttf",
+    "sans-bold": "DejaVuSans-Bold.ttf",
+}
+# Every subset carries printable ASCII, so most documents share one cached
+# subset per font instead of subsetting for each render.
+BASE_CODEPOINTS = frozenset(range(0x20, 0x7F))
+WORD_CACHE_SIZE = 50_000
+
+Color = tuple[float, float, float]
+BLACK: Color = (0.0, 0.0, 0.0)
+HEADER_RULE_COLOR: Color = (0x11 / 255, 0x18 / 255, 0x27 / 255)
+DATE_COLOR: Color = (0x4B / 255, 0x55 / 255, 0x63 / 255)
+CELL_BORDER_COLOR: Color = (0xD1 / 255, 0xD5 / 255, 0xDB / 255)
+RULE_COLOR: Color = (0x9C / 255, 0xA3 / 255, 0xAF / 255)
+
+
+class DirectLayoutError(ValueError):
+    """Raised when a rendered template does not fit the direct writer's layout."""
+
+
+@dataclass(frozen=True)
+class TextStyle:
+    font: str
+    size: float
+    color: Color = BLACK
+    uppercase: bool = False
+    letter_spacing: float = 0.0
+
+    @property
+    def line_height(self) -> float:
+        return self.size * 1.5
+
+
+TITLE_STYLE = TextStyle("serif-bold", 20 * 4 / 3, letter_spacing=0.3)
+DATE_STYLE = TextStyle("serif", 10 * 4 / 3, DATE_COLOR)
+HEADING_STYLE = TextStyle("sans-bold", 10 * 4 / 3, uppercase=True)
+BODY_STYLE = TextStyle("serif", 14.0)
+LABEL_STYLE = TextStyle("sans-bold", 9.5 * 4 / 3, uppercase=True)
+PLACEHOLDER_STYLE = TextStyle("serif", 10 * 4 / 3)
+
+
+class _FontMetrics:
+    """Advance widths, kerning pairs and descriptor values of one font file."""
+
+    def __init__(self, path: Path) -> None:
+        from fontTools.ttLib import TTFont
+
+        font = TTFont(str(path))
+        self.path = path
+        self.units_per_em = font["head"].unitsPerEm
+        self.ascent = font["hhea"].ascent / self.units_per_em
+        self.descent = -font["hhea"].descent / self.units_per_em
+        self.postscript_name = font["name"].getDebugName(6) or path.stem
+        head = font["head"]
+        self.bbox = [round(value * 1000 / self.units_per_em) for value in (head.xMin, head.yMin, head.xMax, head.yMax)]
+        os2 = font["OS/2"]
+        self.cap_height = round(getattr(os2, "sCapHeight", font["hhea"].ascent) * 1000 / self.units_per_em)
+        self.italic_angle = font["post"].italicAngle
+
+        glyph_ids = font.getReverseGlyphMap()
+        metrics = font["hmtx"].metrics
+        self.glyphs = {chr(codepoint): glyph_ids[name] for codepoint, name in font.getBestCmap().items()}
+        self.advances = {glyph_ids[name]: advance for name, (advance, _) in metrics.items()}
+        self.kerning: dict[tuple[int, int], int] = {}
+        if "kern" in font:
+            for table in font["kern"].kernTables:
+                for (left, right), value in getattr(table, "kernTable", {}).items():
+                    if left in glyph_ids and right in glyph_ids:
+                        self.kerning[(glyph_ids[left], glyph_ids[right])] = value
+        # Contract text repeats the same words, so their widths are kept.
+        self._word_units: dict[str, int] = {}
+
+    def glyph(self, char: str) -> int:
+        glyph_id = self.glyphs.get(char)
+        if glyph_id is None:
+            raise DirectLayoutError(f"{self.path.name} has no glyph for {char!r}")
+        return glyph_id
+
+    def units(self, text: str) -> int:
+        """Kerned advance width of ``text`` in font units."""
+        units = self._word_units.get(text)
+        if units is not None:
+            return units
+        glyphs, advances, kerning = self.glyphs, self.advances, self.kerning
+        units = 0
+        previous = None
+        for char in text:
+            glyph_id = glyphs.get(char)
+            if glyph_id is None:
+                self.glyph(char)
+            units += advances.get(glyph_id, 0)
+            if previous is not None:
+                units += kerning.get((previous, glyph_id), 0)
+            previous = glyph_id
+        if len(self._word_units) < WORD_CACHE_SIZE:
+            self._word_units[text] = units
+        return units
+
+    def pair(self, left: str, right: str) -> int:
+        return self.kerning.get((self.glyph(left), self.glyph(right)), 0)
+
+
+@lru_cache(maxsize=None)
+def _font_metrics(font: str) -> _FontMetrics:
+    return _FontMetrics(PDF_FONTS_PATH / FONT_FILES[font])
+
+
+@dataclass(frozen=True)
+class _FontSubset:
+    """An embeddable font program with the glyph ids it assigns to code points."""
+
+    base_font: str
+    data: bytes
+    length: int
+    # Two-byte glyph codes of the subset's characters, as hex for content streams.
+    codes: dict[str, bytes]
+    # Serialized ``/W`` array and ToUnicode CMap, identical for every render.
+    widths: bytes
+    to_unicode: bytes
+    # Encoded TJ fragments of words already drawn with this subset.
+    fragments: dict[str, bytes] = field(default_factory=dict, compare=False)
+
+
+@lru_cache(maxsize=32)
+def _font_subset(font: str, codepoints: frozenset[int], full: bool, hinting: bool) -> _FontSubset:
+    metrics = _font_metrics(font)
+    data = metrics.path.read_bytes()
+    if full:
+        glyphs = {ord(char): glyph_id for char, glyph_id in metrics.glyphs.items()}
+        advances = metrics.advances
+        units_per_em = metrics.units_per_em
+        base_font = metrics.postscript_name
+    else:
+        from fontTools import subset
+        from fontTools.ttLib import TTFont
+
+        options = subset.Options()
+        options.hinting = hinting
+        options.notdef_outline = True
+        options.layout_features = []
+        options.name_IDs = []
+        options.drop_tables += ["GSUB", "GPOS", "GDEF", "kern", "FFTM"]
+        # Keep the original head.modified so subsets are byte-identical across runs.
+        font_file = TTFont(BytesIO(data), recalcTimestamp=False)
+        subsetter = subset.Subsetter(options)
+        subsetter.populate(unicodes=codepoints)
+        subsetter.subset(font_file)
+        output = BytesIO()
+        font_file.save(output)
+        data = output.getvalue()
+
+        glyph_ids = font_file.getReverseGlyphMap()
+        glyphs = {codepoint: glyph_ids[name] for codepoint, name in font_file.getBestCmap().items()}
+        advances = {glyph_ids[name]: advance for name, (advance, _) in font_file["hmtx"].metrics.items()}
+        units_per_em = font_file["head"].unitsPerEm
+        digest = sha256(repr(sorted(glyphs.items())).encode("ascii")).digest()
+        tag = "".join(chr(ord("A") + byte % 26) for byte in digest[:6])
+        base_font = f"{tag}+{metrics.postscript_name}"
+
+    mapped = sorted((glyphs[codepoint], codepoint) for codepoint in codepoints if codepoint in glyphs)
+    used = sorted({glyph_id for glyph_id, _ in mapped})
+    widths = b" ".join(b"%d [%d]" % (glyph_id, round(advances.get(glyph_id, 0) * 1000 / units_per_em)) for glyph_id in used)
+    codes = {chr(codepoint): b"%04x" % glyph_id for glyph_id, codepoint in mapped}
+    return _FontSubset(base_font, zlib.compress(data), len(data), codes, b"[" + widths + b"]", _to_unicode_cmap(mapped))
+
+
+# Positioned drawing operations; see ``_draw_page``.
+@dataclass(frozen=True)
+class _Text:
+    x: float
+    baseline: float
+    style: TextStyle
+    text: str
+
+
+@dataclass(frozen=True)
+class _Rect:
+    x: float
+    y: float
+    width: float
+    height: float
+    color: Color
+
+
+@dataclass(frozen=True)
+class _Rule:
+    x: float
+    y: float
+    width: float
+    color: Color
+    dashed: bool = False
+
+
+@dataclass(frozen=True)
+class _Box:
+    x: float
+    y: float
+    width: float
+    height: float
+    radius: float
+    color: Color
+
+
+@dataclass(frozen=True)
+class _Image:
+    x: float
+    y: float
+    width: float
+    height: float
+    ref: str
+    asset: Asset
+
+
+@dataclass(frozen=True)
+class DirectLine:
+    """A laid-out line of text, for comparison with WeasyPrint's line boxes."""
+
+    page: int
+    x: float
+    y: float
+    text: str
+
+
+@dataclass
+class _Item:
+    """A block placed as a whole; ``ops`` are relative to its top."""
+
+    height: float
+    ops: list[Any]
+    gap: float = 0.0
+    # False where a page break before the item is not allowed.
+    breakable: bool = True
+    bookmark: tuple[int, str] | None = None
+
+
+@dataclass
+class DirectPage:
+    ops: list[Any] = field(default_factory=list)
+    bookmarks: list[tuple[int, str, float]] = field(default_factory=list)
+
+
+@dataclass
+class DirectDocument:
+    title: str
+    lang: str | None
+    pages: list[DirectPage]
+
+    def lines(self) -> Iterator[DirectLine]:
+        for index, page in enumerate(self.pages):
+            for op in page.ops:
+                if isinstance(op, _Text):
+                    metrics = _font_metrics(op.style.font)
+                    content_height = (metrics.ascent + metrics.descent) * op.style.size
+                    top = op.baseline - metrics.ascent * op.style.size - (op.style.line_height - content_height) / 2
+                    yield DirectLine(index, op.x, top, op.text)
+
+
+@dataclass
+class _Node:
+    tag: str
+    attrs: dict[str, str]
+    children: list[Any] = field(default_factory=list)
+
+    @property
+    def classes(self) -> set[str]:
+        return set((self.attrs.get("class") or "").split())
+
+    def elements(self) -> list["_Node"]:
+        for child in self.children:
+            if isinstance(child, str) and child.strip():
+                raise DirectLayoutError(f"Unexpected text inside <{self.tag}>")
+        return [child for child in self.children if isinstance(child, _Node)]
+
+    def text(self) -> str:
+        parts = []
+        for child in self.children:
+            if isinstance(child, _Node):
+                raise DirectLayoutError(f"Unsupported <{child.tag}> inside <{self.tag}>")
+            parts.append(child)
+        return " ".join("".join(parts).split())
+
+
+class _TreeBuilder(HTMLParser):
+    VOID_TAGS = {"meta", "img", "br", "link", "hr"}
+
+    def __init__(self) -> None:
+        super().__init__(convert_charrefs=True)
+        self.root = _Node("#document", {})
+        self._stack = [self.root]
+
+    def handle_starttag(self, tag: str, attrs: list[tuple[str, str | None]]) -> None:
+        node = _Node(tag, {name: value or "" for name, value in attrs})
+        self._stack[-1].children.append(node)
+        if tag not in self.VOID_TAGS:
+            self._stack.append(node)
+
+    def handle_startendtag(self, tag: str, attrs: list[tuple[str, str | None]]) -> None:
+        self._stack[-1].children.append(_Node(tag, {name: value or "" for name, value in attrs}))
+
+    def handle_endtag(self, tag: str) -> None:
+        for index in range(len(self._stack) - 1, 0, -1):
+            if self._stack[index].tag == tag:
+                del self._stack[index:]
+                return
+
+    def handle_data(self, data: str) -> None:
+        self._stack[-1].children.append(data)
+
+
+def _parse(rendered_html: str) -> _Node:
+    builder = _TreeBuilder()
+    builder.feed(rendered_html)
+    builder.close()
+    return builder.root
+
+
+def _find(node: _Node, tag: str) -> _Node | None:
+    for child in node.children:
+        if isinstance(child, _Node):
+            if child.tag == tag:
+                return child
+            found = _find(child, tag)
+            if found is not None:
+                return found
+    return None
+
+
+def _wrap(text: str, style: TextStyle, width: float) -> list[str]:
+    """Break text into lines at spaces; a word wider than the line overflows."""
+    if style.uppercase:
+        text = text.upper()
+    metrics = _font_metrics(style.font)
+    scale = style.size / metrics.units_per_em
+    space = metrics.units(" ")
+    lines: list[str] = []
+    current = ""
+    current_units = 0
+    for word in text.split():
+        word_units = metrics.units(word)
+        if current:
+            # Widths add up word by word; only the pairs around the space join them.
+            joined = current_units + metrics.pair(current[-1], " ") + space + metrics.pair(" ", word[0]) + word_units
+            if joined * scale + style.letter_spacing * (len(current) + 1 + len(word)) <= width:
+                current = f"{current} {word}"
+                current_units = joined
+                continue
+            lines.append(current)
+        current, current_units = word, word_units
+    if current:
+        lines.append(current)
+    return lines
+
+
+def _text_ops(lines: list[str], style: TextStyle, x: float, top: float) -> list[_Text]:
+    metrics = _font_metrics(style.font)
+    content_height = (metrics.ascent + metrics.descent) * style.size
+    baseline = top + (style.line_height - content_height) / 2 + metrics.ascent * style.size
+    return [_Text(x, baseline + index * style.line_height, style, line) for index, line in enumerate(lines)]
+
+
+def _paragraph_items(text: str, style: TextStyle, gap: float, glued: bool) -> list[_Item]:
+    """One item per line, glued where a break would leave orphans or widows."""
+    lines = _wrap(text, style, CONTENT_WIDTH)
+    items = []
+    for index, line in enumerate(lines):
+        breakable = ORPHANS <= index <= len(lines) - WIDOWS if index else not glued
+        items.append(
+            _Item(
+                style.line_height,
+                _text_ops([line], style, CONTENT_LEFT, 0.0),
+                gap=gap if index == 0 else 0.0,
+                breakable=breakable,
+            )
+        )
+    return items
+
+
+def _signature_image(node: _Node, assets: Mapping[str, Asset]) -> tuple[str, Asset, int, int]:
+    ref = node.attrs.get("src") or ""
+    asset = assets.get(ref)
+    if asset is None:
+        raise DirectLayoutError("Signature image is not a resolved render asset")
+    width, height = _image_size(asset)
+    return ref, asset, width, height
+
+
+def _image_size(asset: Asset) -> tuple[int, int]:
+    try:
+        with Image.open(BytesIO(asset.data)) as image:
+            return image.size
+    except (OSError, Image.DecompressionBombError) as error:
+        raise DirectLayoutError(f"Unreadable signature image: {error}") from error
+
+
+def _signature_cell(cell: _Node, x: float, assets: Mapping[str, Asset]) -> tuple[float, list[Any]]:
+    """Lay out one signature block; returns its border-box height and ops."""
+    content_x = x + CELL_BORDER + CELL_PADDING
+    y = CELL_BORDER + CELL_PADDING
+    ops: list[Any] = []
+    for index, child in enumerate(cell.elements()):
+        classes = child.classes
+        if child.tag == "p" and "signature-label" in classes:
+            lines = _wrap(child.text(), LABEL_STYLE, CELL_CONTENT_WIDTH)
+            ops += _text_ops(lines, LABEL_STYLE, content_x, y)
+            y += len(lines) * LABEL_STYLE.line_height + PARAGRAPH_GAP
+        elif child.tag == "img" and "signature-image" in classes:
+            ref, asset, width, height = _signature_image(child, assets)
+            scale = min(1.0, SIGNATURE_MAX_WIDTH / width, SIGNATURE_MAX_HEIGHT / height)
+            draw_width, draw_height = width * scale, height * scale
+            ops.append(_Image(content_x, y, draw_width, draw_height, ref, asset))
+            y += draw_height + SIGNATURE_MARGIN
+        elif child.tag == "p" and "signature-placeholder" in classes:
+            ops.append(_Rule(content_x, y, CELL_CONTENT_WIDTH, RULE_COLOR, dashed=True))
+            y += NAME_RULE + PLACEHOLDER_PADDING
+            lines = _wrap(child.text(), PLACEHOLDER_STYLE, CELL_CONTENT_WIDTH)
+            ops += _text_ops(lines, PLACEHOLDER_STYLE, content_x, y)
+            y += len(lines) * PLACEHOLDER_STYLE.line_height + PARAGRAPH_GAP
+        elif child.tag == "p" and "signature-name" in classes:
+            ops.append(_Rule(content_x, y, CELL_CONTENT_WIDTH, RULE_COLOR))
+            y += NAME_RULE + NAME_PADDING
+            lines = _wrap(child.text(), BODY_STYLE, CELL_CONTENT_WIDTH)
+            ops += _text_ops(lines, BODY_STYLE, content_x, y)
+            y += len(lines) * BODY_STYLE.line_height + PARAGRAPH_GAP
+        else:
+            raise DirectLayoutError(f"Unsupported signature block content <{child.tag}>")
+    return y + CELL_PADDING + CELL_BORDER, ops
+
+
+def _signature_grid(grid: _Node, assets: Mapping[str, Asset]) -> tuple[float, list[Any]]:
+    cells = grid.elements()
+    if len(cells) != 2 or any(cell.tag != "div" or "signature-block" not in cell.classes for cell in cells):
+        raise DirectLayoutError("Signature grid must hold two signature blocks")
+    heights = []
+    ops: list[Any] = []
+    for index, cell in enumerate(cells):
+        x = CONTENT_LEFT + CELL_SPACING + index * (CELL_WIDTH + CELL_SPACING)
+        height, cell_ops = _signature_cell(cell, x, assets)
+        heights.append(height)
+        ops += cell_ops
+    row_height = max(heights)
+    for index in range(len(cells)):
+        x = CONTENT_LEFT + CELL_SPACING + index * (CELL_WIDTH + CELL_SPACING)
+        ops.insert(0, _Box(x, 0.0, CELL_WIDTH, row_height, CELL_RADIUS, CELL_BORDER_COLOR))
+    return row_height, ops
+
+
+def _header_item(header: _Node) -> _Item:
+    ops: list[Any] = []
+    y = 0.0
+    title = ""
+    for child in header.elements():
+        if child.tag == "h1":
+            title = child.text()
+            lines = _wrap(title, TITLE_STYLE, CONTENT_WIDTH)
+            ops += _text_ops(lines, TITLE_STYLE, CONTENT_LEFT, y)
+            y += len(lines) * TITLE_STYLE.line_height + TITLE_GAP
+        elif child.tag == "p" and "document-date" in child.classes:
+            lines = _wrap(child.text(), DATE_STYLE, CONTENT_WIDTH)
+            ops += _text_ops(lines, DATE_STYLE, CONTENT_LEFT, y)
+            y += len(lines) * DATE_STYLE.line_height + PARAGRAPH_GAP
+        else:
+            raise DirectLayoutError(f"Unsupported header content <{child.tag}>")
+    if not title:
+        raise DirectLayoutError("Document header has no title")
+    # The title's bottom margin only applies when something follows it.
+    y += HEADER_PADDING - (TITLE_GAP if ops and ops[-1].style is TITLE_STYLE else 0.0)
+    ops.append(_Rect(CONTENT_LEFT, y, CONTENT_WIDTH, HEADER_RULE, HEADER_RULE_COLOR))
+    return _Item(y + HEADER_RULE, ops, bookmark=(1, title))
+
+
+def _section_items(section: _Node, gap: float, assets: Mapping[str, Asset]) -> list[_Item]:
+    signature_section = "signature-section" in section.classes
+    items: list[_Item] = []
+    glued = False
+    for child in section.elements():
+        if child.tag == "h3":
+            text = child.text()
+            lines = _wrap(text, HEADING_STYLE, CONTENT_WIDTH)
+            items.append(
+                _Item(
+                    len(lines) * HEADING_STYLE.line_height,
+                    _text_ops(lines, HEADING_STYLE, CONTENT_LEFT, 0.0),
+                    gap=gap,
+                    breakable=not glued,
+                    bookmark=(3, text),
+                )
+            )
+            gap, glued = HEADING_GAP, True
+        elif child.tag == "p":
+            paragraph = _paragraph_items(child.text(), BODY_STYLE, gap, glued)
+            items += paragraph
+            if paragraph:
+                gap, glued = PARAGRAPH_GAP, False
+        elif child.tag == "div" and "signature-grid" in child.classes and signature_section:
+            height, ops = _signature_grid(child, assets)
+            items.append(_Item(height, ops, gap=gap, breakable=not glued))
+            gap, glued = 0.0, False
+        else:
+            raise DirectLayoutError(f"Unsupported section content <{child.tag}>")
+
+    if signature_section and items:
+        # page-break-inside: avoid keeps the whole section together.
+        for item in items[1:]:
+            item.breakable = False
+    return items
+
+
+def _paginate(items: list[_Item]) -> list[DirectPage]:
+    chunks: list[list[_Item]] = []
+    for item in items:
+        if item.breakable or not chunks:
+            chunks.append([item])
+        else:
+            chunks[-1].append(item)
+
+    pages = [DirectPage()]
+    y = FIRST_PAGE_TOP
+    for chunk in chunks:
+        height = sum(item.gap + item.height for item in chunk) - chunk[0].gap
+        if y + chunk[0].gap + height > PAGE_BOTTOM and pages[-1].ops:
+            pages.append(DirectPage())
+            y = PAGE_TOP
+        elif pages[-1].ops:
+            y += chunk[0].gap
+        for index, item in enumerate(chunk):
+            if index:
+                y += item.gap
+            page = pages[-1]
+            page.ops += [_offset(op, y) for op in item.ops]
+            if item.bookmark is not None:
+                page.bookmarks.append((item.bookmark[0], item.bookmark[1], y))
+            y += item.height
+    return pages
+
+
+def _offset(op: Any, dy: float) -> Any:
+    if isinstance(op, _Text):
+        return _Text(op.x, op.baseline + dy, op.style, op.text)
+    return type(op)(**{**op.__dict__, "y": op.y + dy})
+
+
+def layout_direct_document(rendered_html: str, assets: Mapping[str, Asset]) -> DirectDocument:
+    """Lay out a rendered fixed-layout template.
+
+    Raises:
+        DirectLayoutError: If the HTML has anything the writer does not lay
+            out exactly like WeasyPrint.
+    """
+    root = _parse(rendered_html)
+    html_node = _find(root, "html")
+    main = _find(root, "main")
+    if main is None or "contract-document" not in main.classes:
+        raise DirectLayoutError("Template has no contract document")
+    title_node = _find(root, "title")
+
+    items: list[_Item] = []
+    gap = 0.0
+    for child in main.elements():
+        if child.tag == "header" and "document-header" in child.classes and not items:
+            items.append(_header_item(child))
+            gap = HEADER_GAP
+        elif child.tag == "section" and "contract-section" in child.classes:
+            if "signature-section" in child.classes:
+                gap = max(gap, SIGNATURE_SECTION_GAP)
+            items += _section_items(child, gap, assets)
+            gap = SECTION_GAP
+        else:
+            raise DirectLayoutError(f"Unsupported document content <{child.tag}>")
+    if not items:
+        raise DirectLayoutError("Template has no content")
+
+    return DirectDocument(
+        title=title_node.text() if title_node is not None else "",
+        lang=(html_node.attrs.get("lang") or None) if html_node is not None else None,
+        pages=_paginate(items),
+    )
+
+
+# Encoded signature images by asset reference and width, shared across renders.
+_IMAGE_CACHE = LRUByteCache(8 * 1024 * 1024, sizeof=lambda value: len(value[2]) + len(value[3] or b""))
+
+
+def _encoded_image(ref: str, asset: Asset, max_width: int | None) -> tuple[int, int, bytes, bytes | None]:
+    """Return the size, compressed RGB and compressed alpha of an image."""
+    key = f"{ref}:{max_width}"
+    encoded = _IMAGE_CACHE.get(key)
+    if encoded is not None:
+        return encoded
+    try:
+        with Image.open(BytesIO(asset.data)) as image:
+            if image.width * image.height > PDF_SIGNATURE_MAX_PIXELS:
+                raise DirectLayoutError("Signature image dimensions are too large")
+            rgba = image.convert("RGBA")
+    except (OSError, Image.DecompressionBombError) as error:
+        raise DirectLayoutError(f"Unreadable signature image: {error}") from error
+    if max_width and rgba.width > max_width:
+        rgba = rgba.resize((max_width, max(1, round(rgba.height * max_width / rgba.width))), Image.LANCZOS)
+    alpha = rgba.getchannel("A")
+    mask = None if alpha.getextrema() == (255, 255) else zlib.compress(alpha.tobytes())
+    encoded = (rgba.width, rgba.height, zlib.compress(rgba.convert("RGB").tobytes()), mask)
+    _IMAGE_CACHE.put(key, encoded)
+    return encoded
+
+
+def _pdf_date(w3c_datetime: str | None) -> str | None:
+    if not w3c_datetime:
+        return None
+    return datetime.strptime(w3c_datetime, "%Y-%m-%dT%H:%M:%SZ").strftime("D:%Y%m%d%H%M%SZ")
+
+
+class _PdfBuilder:
+    def __init__(self, output_options: Mapping[str, Any]) -> None:
+        self.pdf = pydyf.PDF()
+        self.full_fonts = bool(output_options.get("full_fonts"))
+        self.hinting = bool(output_options.get("hinting"))
+        self.compress = not output_options.get("uncompressed_pdf")
+        self.dpi = output_options.get("dpi")
+        self.font_names: dict[str, str] = {}
+        self.images: dict[tuple[str, int | None], Any] = {}
+
+    def font_codepoints(self, pages: list[DirectPage]) -> dict[str, frozenset[int]]:
+        used: dict[str, set[int]] = {}
+        for page in pages:
+            for op in page.ops:
+                if isinstance(op, _Text):
+                    used.setdefault(op.style.font, set()).update(map(ord, op.text))
+        return {font: frozenset(codepoints | BASE_CODEPOINTS) for font, codepoints in used.items()}
+
+    def add_fonts(self, pages: list[DirectPage]) -> dict[str, tuple[_FontSubset, pydyf.Dictionary]]:
+        subsets = {}
+        for index, (font, codepoints) in enumerate(sorted(self.font_codepoints(pages).items())):
+            subset = _font_subset(font, codepoints, self.full_fonts, self.hinting)
+            metrics = _font_metrics(font)
+            font_file = pydyf.Stream([subset.data], {"Filter": "/FlateDecode", "Length1": subset.length})
+            self.pdf.add_object(font_file)
+            descriptor = pydyf.Dictionary(
+                {
+                    "Type": "/FontDescriptor",
+                    "FontName": "/" + subset.base_font,
+                    "Flags": 32,
+                    "FontBBox": pydyf.Array(metrics.bbox),
+                    "ItalicAngle": metrics.italic_angle,
+                    "Ascent": round(metrics.ascent * 1000),
+                    "Descent": -round(metrics.descent * 1000),
+                    "CapHeight": metrics.cap_height,
+                    "StemV": 80,
+                    "FontFile2": font_file.reference,
+                }
+            )
+            self.pdf.add_object(descriptor)
+            cid_font = pydyf.Dictionary(
+                {
+                    "Type": "/Font",
+                    "Subtype": "/CIDFontType2",
+                    "BaseFont": "/" + subset.base_font,
+                    "CIDSystemInfo": pydyf.Dictionary(
+                        {"Registry": pydyf.String("Adobe"), "Ordering": pydyf.String("Identity"), "Supplement": 0}
+                    ),
+                    "FontDescriptor": descriptor.reference,
+                    "W": subset.widths,
+                    "CIDToGIDMap": "/Identity",
+                }
+            )
+            self.pdf.add_object(cid_font)
+            to_unicode = pydyf.Stream([subset.to_unicode], compress=self.compress)
+            self.pdf.add_object(to_unicode)
+            type0 = pydyf.Dictionary(
+                {
+                    "Type": "/Font",
+                    "Subtype": "/Type0",
+                    "BaseFont": "/" + subset.base_font,
+                    "Encoding": "/Identity-H",
+                    "DescendantFonts": pydyf.Array([cid_font.reference]),
+                    "ToUnicode": to_unicode.reference,
+                }
+            )
+            self.pdf.add_object(type0)
+            self.font_names[font] = f"F{index}"
+            subsets[font] = (subset, type0)
+        return subsets
+
+    def add_image(self, op: _Image) -> tuple[str, pydyf.Stream]:
+        max_width = max(1, round(op.width / 96 * self.dpi)) if self.dpi else None
+        key = (op.ref, max_width)
+        if key not in self.images:
+            width, height, rgb, alpha = _encoded_image(op.ref, op.asset, max_width)
+            extra = {
+                "Type": "/XObject",
+                "Subtype": "/Image",
+                "Width": width,
+                "Height": height,
+                "ColorSpace": "/DeviceRGB",
+                "BitsPerComponent": 8,
+                "Interpolate": "true",
+                "Filter": "/FlateDecode",
+            }
+            if alpha is not None:
+                mask = pydyf.Stream(
+                    [alpha],
+                    {
+                        "Type": "/XObject",
+                        "Subtype": "/Image",
+                        "Width": width,
+                        "Height": height,
+                        "ColorSpace": "/DeviceGray",
+                        "BitsPerComponent": 8,
+                        "Filter": "/FlateDecode",
+                    },
+                )
+                self.pdf.add_object(mask)
+                extra["SMask"] = mask.reference
+            image = pydyf.Stream([rgb], extra)
+            self.pdf.add_object(image)
+            self.images[key] = (f"Im{len(self.images)}", image)
+        return self.images[key]
+
+
+def _to_unicode_cmap(entries: list[tuple[int, int]]) -> bytes:
+    """Map glyph ids back to code points so text can be copied and searched."""
+    lines = [
+        b"/CIDInit /ProcSet findresource begin",
+        b"12 dict begin",
+        b"begincmap",
+        b"/CIDSystemInfo << /Registry (Adobe) /Ordering (UCS) /Supplement 0 >> def",
+        b"/CMapName /Adobe-Identity-UCS def",
+        b"/CMapType 2 def",
+        b"1 begincodespacerange",
+        b"<0000> <ffff>",
+        b"endcodespacerange",
+    ]
+    for start in range(0, len(entries), 100):
+        block = entries[start : start + 100]
+        lines.append(b"%d beginbfchar" % len(block))
+        for glyph_id, codepoint in block:
+            lines.append(b"<%04x> <%s>" % (glyph_id, chr(codepoint).encode("utf-16-be").hex().encode("ascii")))
+        lines.append(b"endbfchar")
+    lines += [b"endcmap", b"CMapName currentdict /CMap defineresource pop", b"end", b"end"]
+    return b"\n".join(lines)
+
+
+def _kern(metrics: _FontMetrics, left: str, right: str) -> bytes:
+    adjustment = metrics.kerning.get((metrics.glyphs[left], metrics.glyphs[right]))
+    return b"> %d <" % round(-adjustment * 1000 / metrics.units_per_em) if adjustment else b""
+
+
+def _fragment(metrics: _FontMetrics, subset: _FontSubset, word: str) -> bytes:
+    fragment = subset.fragments.get(word)
+    if fragment is None:
+        codes = subset.codes
+        parts = [codes[word[0]]]
+        for left, right in zip(word, word[1:]):
+            parts.append(_kern(metrics, left, right))
+            parts.append(codes[right])
+        fragment = b"".join(parts)
+        if len(subset.fragments) < WORD_CACHE_SIZE:
+            subset.fragments[word] = fragment
+    return fragment
+
+
+def _show_text(stream: pydyf.Stream, op: _Text, font_name: str, subset: _FontSubset) -> None:
+    # One preformatted operator line per text run; pydyf's per-operator
+    # serialization dominates the write time of text-only documents.
+    stream.stream.append(_text_operators(op, font_name, subset))
+
+
+def _text_operators(op: _Text, font_name: str, subset: _FontSubset) -> bytes:
+    """Return the operators drawing ``op`` in a y-down coordinate system."""
+    metrics = _font_metrics(op.style.font)
+    # Kerning is applied as TJ adjustments between runs of glyph codes.
+    words = op.text.split(" ")
+    parts = [b"<", _fragment(metrics, subset, words[0])]
+    for previous, word in zip(words, words[1:]):
+        parts += (
+            _kern(metrics, previous[-1], " "),
+            subset.codes[" "],
+            _kern(metrics, " ", word[0]),
+            _fragment(metrics, subset, word),
+        )
+    parts.append(b">")
+
+    style = op.style
+    spacing = b"%g Tc " % _number(style.letter_spacing) if style.letter_spacing else b""
+    return b"BT %g %g %g rg /%s %g Tf %s1 0 0 -1 %g %g Tm [%s] TJ ET" % (
+        *(_number(channel) for channel in style.color),
+        font_name.encode("ascii"),
+        _number(style.size),
+        spacing,
+        _number(op.x),
+        _number(op.baseline),
+        b"".join(parts),
+    )
+
+
+def _number(value: float) -> float:
+    return round(value, 3)
+
+
+def _rounded_box(stream: pydyf.Stream, op: _Box) -> None:
+    # Stroke centred on the 1px border, with circular corners.
+    inset = CELL_BORDER / 2
+    x0, y0 = op.x + inset, op.y + inset
+    x1, y1 = op.x + op.width - inset, op.y + op.height - inset
+    radius = max(0.0, op.radius - inset)
+    control = radius * 0.5523
+    stream.move_to(_number(x0 + radius), _number(y0))
+    stream.line_to(_number(x1 - radius), _number(y0))
+    stream.curve_to(_number(x1 - radius + control), _number(y0), _number(x1), _number(y0 + radius - control), _number(x1), _number(y0 + radius))
+    stream.line_to(_number(x1), _number(y1 - radius))
+    stream.curve_to(_number(x1), _number(y1 - radius + control), _number(x1 - radius + control), _number(y1), _number(x1 - radius), _number(y1))
+    stream.line_to(_number(x0 + radius), _number(y1))
+    stream.curve_to(_number(x0 + radius - control), _number(y1), _number(x0), _number(y1 - radius + control), _number(x0), _number(y1 - radius))
+    stream.line_to(_number(x0), _number(y0 + radius))
+    stream.curve_to(_number(x0), _number(y0 + radius - control), _number(x0 + radius - control), _number(y0), _number(x0 + radius), _number(y0))
+    stream.close()
+
+
+def _draw_page(builder: _PdfBuilder, page: DirectPage, subsets: Mapping[str, Any]) -> tuple[pydyf.Stream, dict[str, Any]]:
+    stream = pydyf.Stream(compress=builder.compress)
+    # Draw in CSS px with the origin at the top-left corner, like WeasyPrint.
+    stream.transform(PX_TO_PT, 0, 0, -PX_TO_PT, 0, _number(PAGE_HEIGHT * PX_TO_PT))
+    images: dict[str, Any] = {}
+    for op in page.ops:
+        if isinstance(op, _Text):
+            font_name = builder.font_names[op.style.font]
+            _show_text(stream, op, font_name, subsets[op.style.font][0])
+        elif isinstance(op, _Rect):
+            stream.set_color_rgb(*op.color)
+            stream.rectangle(_number(op.x), _number(op.y), _number(op.width), _number(op.height))
+            stream.fill()
+        elif isinstance(op, _Rule):
+            stream.push_state()
+            stream.set_color_rgb(*op.color, stroke=True)
+            stream.set_line_width(NAME_RULE)
+            if op.dashed:
+                stream.set_dash([3 * NAME_RULE], 0)
+            y = _number(op.y + NAME_RULE / 2)
+            stream.move_to(_number(op.x), y)
+            stream.line_to(_number(op.x + op.width), y)
+            stream.stroke()
+            stream.pop_state()
+        elif isinstance(op, _Box):
+            stream.push_state()
+            stream.set_color_rgb(*op.color, stroke=True)
+            stream.set_line_width(CELL_BORDER)
+            _rounded_box(stream, op)
+            stream.stroke()
+            stream.pop_state()
+        elif isinstance(op, _Image):
+            name, image = builder.add_image(op)
+            images[name] = image
+            stream.push_state()
+            # Images are drawn upright in the flipped coordinate system.
+            stream.transform(_number(op.width), 0, 0, _number(-op.height), _number(op.x), _number(op.y + op.height))
+            stream.draw_x_object(name)
+            stream.pop_state()
+    return stream, images
+
+
+def _add_outlines(pdf: pydyf.PDF, document: DirectDocument, page_refs: list[Any]) -> None:
+    entries = [
+        (level, title, page_index, top)
+        for page_index, page in enumerate(document.pages)
+        for level, title, top in page.bookmarks
+    ]
+    if not entries:
+        return
+    outlines = pydyf.Dictionary({"Type": "/Outlines"})
+    pdf.add_object(outlines)
+    # Section headings nest under the title that precedes them.
+    roots: list[tuple[pydyf.Dictionary, list[pydyf.Dictionary]]] = []
+    for level, title, page_index, top in entries:
+        item = pydyf.Dictionary(
+            {
+                "Title": pydyf.String(title),
+                "Dest": pydyf.Array(
+                    [page_refs[page_index], "/XYZ", _number(CONTENT_LEFT * PX_TO_PT), _number((PAGE_HEIGHT - top) * PX_TO_PT), 0]
+                ),
+            }
+        )
+        pdf.add_object(item)
+        if level > 1 and roots:
+            item["Parent"] = roots[-1][0].reference
+            roots[-1][1].append(item)
+        else:
+            item["Parent"] = outlines.reference
+            roots.append((item, []))
+
+    def _link(parent: pydyf.Dictionary, children: list[pydyf.Dictionary]) -> None:
+        if not children:
+            return
+        parent["First"] = children[0].reference
+        parent["Last"] = children[-1].reference
+        parent["Count"] = len(children)
+        for previous, following in zip(children, children[1:]):
+            previous["Next"] = following.reference
+            following["Prev"] = previous.reference
+
+    _link(outlines, [root for root, _ in roots])
+    for root, children in roots:
+        _link(root, children)
+    outlines["Count"] = len(entries)
+    pdf.catalog["Outlines"] = outlines.reference
+
+
+def write_direct_document(
+    document: DirectDocument,
+    metadata: Mapping[str, str | None],
+    identifier: bytes,
+    output_options: Mapping[str, Any] | None = None,
+) -> bytes:
+    """Serialize a laid-out document with pinned metadata and identifier.
+
+    ``output_options`` are the WeasyPrint options of an output profile;
+    ``full_fonts``, ``hinting``, ``dpi`` and ``uncompressed_pdf`` apply.
+    Signatures are always embedded losslessly.
+    """
+    builder = _PdfBuilder(output_options or {})
+    pdf = builder.pdf
+    subsets = builder.add_fonts(document.pages)
+    font_resources = pydyf.Dictionary({builder.font_names[font]: type0.reference for font, (_, type0) in subsets.items()})
+
+    page_refs = []
+    for page in document.pages:
+        stream, images = _draw_page(builder, page, subsets)
+        pdf.add_object(stream)
+        resources = pydyf.Dictionary({"Font": font_resources})
+        if images:
+            resources["XObject"] = pydyf.Dictionary({name: image.reference for name, image in images.items()})
+        page_object = pydyf.Dictionary(
+            {
+                "Type": "/Page",
+                "Parent": pdf.pages.reference,
+                "MediaBox": pydyf.Array([0, 0, _number(PAGE_WIDTH * PX_TO_PT), _number(PAGE_HEIGHT * PX_TO_PT)]),
+                "Contents": stream.reference,
+                "Resources": resources,
+            }
+        )
+        pdf.add_page(page_object)
+        page_refs.append(page_object.reference)
+
+    _add_outlines(pdf, document, page_refs)
+    if document.title:
+        pdf.info["Title"] = pydyf.String(document.title)
+    pdf.info["Producer"] = pydyf.String(PRODUCER)
+    for key, value in (("CreationDate", metadata.get("created")), ("ModDate", metadata.get("modified"))):
+        pdf_date = _pdf_date(value)
+        if pdf_date:
+            pdf.info[key] = pydyf.String(pdf_date)
+    if document.lang:
+        pdf.catalog["Lang"] = pydyf.String(document.lang)
+
+    output = BytesIO()
+    pdf.write(output, version=b"1.7", identifier=identifier, compress=builder.compress)
+    return output.getvalue()
+
+
+def render_direct_pdf(
+    rendered_html: str,
+    assets: Mapping[str, Asset],
+    metadata: Mapping[str, str | None],
+    render_key: str,
+    stages: dict[str, float],
+    output_options: Mapping[str, Any] | None = None,
+) -> tuple[bytes, int]:
+    """Lay out and write a fixed-layout contract without WeasyPrint.
+
+    Returns:
+        The PDF bytes and its page count.
+
+    Raises:
+        DirectLayoutError: If the template does not fit the fixed layout.
+    """
+    stage_start = perf_counter()
+    document = layout_direct_document(rendered_html, assets)
+    stages["layout_ms"] = (perf_counter() - stage_start) * 1000
+    mark_allocation_peak()
+
+    stage_start = perf_counter()
+    pdf_bytes = write_direct_document(document, metadata, render_key[:32].encode("ascii"), output_options)
+    stages["write_ms"] = (perf_counter() - stage_start) * 1000
+    return pdf_bytes, len(document.pages)
+
+
+def warm_direct_writer() -> None:
+    """Load font metrics and the base font subsets ahead of the first render."""
+    for font in FONT_FILES:
+        _font_metrics(font)
+        _font_subset(font, BASE_CODEPOINTS, False, False)
@@ -0,0 +1,144 @@
+"""Bundled fonts and the pinned fontconfig setup of render processes.
+
+The stylesheet declares the fonts in ``PDF_FONTS_PATH`` with ``@font-face``
+so layout never depends on which fonts a host happens to have. Render
+processes also point fontconfig at a generated ``fonts.conf`` that lists the
+bundled directory and pins the font cache under ``PDF_FONTCONFIG_CACHE_PATH``:
+the cache is built once (by ``build_font_cache`` or the first process) and
+every later worker loads it instead of scanning font directories.
+"""
+
+from __future__ import annotations
+
+import logging
+import os
+import shutil
+import subprocess
+import threading
+from functools import lru_cache
+from pathlib import Path
+from time import perf_counter
+from typing import Any
+from xml.sax.saxutils import escape
+
+from ..config import PDF_AUTO_RELOAD, PDF_FONTCONFIG_CACHE_PATH, PDF_FONTS_PATH, PDF_FONTS_SYSTEM_FALLBACK
+
+LOGGER = logging.getLogger(__name__)
+
+FONT_SUFFIXES = (".otf", ".ttf", ".woff", ".woff2")
+FONTCONFIG_FILE_NAME = "fonts.conf"
+SYSTEM_FONTCONFIG_FILE = "/etc/fonts/fonts.conf"
+
+_CONFIGURED_FILE: Path | None = None
+_CONFIGURE_LOCK = threading.Lock()
+
+
+def _scan_fonts(fonts_path: Path) -> tuple[Path, ...]:
+    if not fonts_path.is_dir():
+        return ()
+    return tuple(sorted(path for path in fonts_path.iterdir() if path.suffix.lower() in FONT_SUFFIXES))
+
+
+_cached_scan = lru_cache(maxsize=4)(_scan_fonts)
+
+
+def bundled_fonts(fonts_path: Path = PDF_FONTS_PATH) -> tuple[Path, ...]:
+    """Return the bundled font files, listed once per process outside auto-reload."""
+    return _scan_fonts(fonts_path) if PDF_AUTO_RELOAD else _cached_scan(fonts_path)
+
+
+def build_fontconfig_file(
+    cache_path: Path,
+    fonts_path: Path = PDF_FONTS_PATH,
+    system_fallback: bool = PDF_FONTS_SYSTEM_FALLBACK,
+) -> Path:
+    """Write ``fonts.conf`` for the bundled fonts into ``cache_path``.
+
+    The cache directory is listed before the host configuration is included,
+    so fontconfig writes and reads its cache there.
+    """
+    lines = [
+        '<?xml version="1.0"?>',
+        '<!DOCTYPE fontconfig SYSTEM "urn:fontconfig:fonts.dtd">',
+        "<fontconfig>",
+        f"  <dir>{escape(str(fonts_path))}</dir>",
+        f"  <cachedir>{escape(str(cache_path))}</cachedir>",
+    ]
+    if system_fallback:
+        lines.append(f'  <include ignore_missing="yes">{SYSTEM_FONTCONFIG_FILE}</include>')
+    lines.append("</fontconfig>")
+    content = "\n".join(lines) + "\n"
+
+    config_path = cache_path / FONTCONFIG_FILE_NAME
+    try:
+        if config_path.read_text(encoding="utf-8") == content:
+            return config_path
+    except OSError:
+        pass
+
+    cache_path.mkdir(parents=True, exist_ok=True)
+    temp_path = cache_path / f".{FONTCONFIG_FILE_NAME}.{os.getpid()}.tmp"
+    temp_path.write_text(content, encoding="utf-8")
+    os.replace(temp_path, config_path)
+    return config_path
+
+
+def configure_fontconfig() -> Path | None:
+    """Point this process's fontconfig at the bundled fonts and pinned cache.
+
+    Must run before fontconfig initializes, that is before WeasyPrint is
+    imported. A ``FONTCONFIG_FILE`` set by the operator is left alone.
+
+    Returns:
+        The fontconfig file in use, or None when the host setup is kept.
+    """
+    global _CONFIGURED_FILE
+    if PDF_FONTCONFIG_CACHE_PATH is None:
+        return None
+    with _CONFIGURE_LOCK:
+        if _CONFIGURED_FILE is not None:
+            return _CONFIGURED_FILE
+
+        config_path = PDF_FONTCONFIG_CACHE_PATH / FONTCONFIG_FILE_NAME
+        current = os.environ.get("FONTCONFIG_FILE")
+        if current and Path(current) != config_path:
+            return None
+        try:
+            build_fontconfig_file(PDF_FONTCONFIG_CACHE_PATH)
+        except OSError as error:
+            LOGGER.warning("Pinned font cache disabled, cannot write %s: %s", config_path, error)
+            return None
+
+        # Inherited by render processes started from this one.
+        os.environ["FONTCONFIG_FILE"] = str(config_path)
+        _CONFIGURED_FILE = config_path
+        return config_path
+
+
+def build_font_cache() -> dict[str, Any]:
+    """Build the pinned font cache ahead of the first render.
+
+    Uses ``fc-cache`` when it is installed; otherwise loads WeasyPrint and
+    the stylesheet, which makes fontconfig write the cache itself.
+    """
+    started = perf_counter()
+    config_path = configure_fontconfig()
+    fc_cache = shutil.which("fc-cache")
+    if config_path is not None and fc_cache is not None:
+        completed = subprocess.run([fc_cache], capture_output=True, text=True, check=False)
+        if completed.returncode != 0:
+            raise RuntimeError(f"fc-cache failed: {completed.stderr.strip()[-500:]}")
+        method = "fc-cache"
+    else:
+        from .render_assets import get_stylesheet_cache
+
+        get_stylesheet_cache().get()
+        method = "weasyprint"
+
+    return {
+        "fontconfig_file": str(config_path) if config_path is not None else None,
+        "cache_path": str(PDF_FONTCONFIG_CACHE_PATH) if config_path is not None else None,
+        "fonts": [path.name for path in bundled_fonts()],
+        "method": method,
+        "duration_ms": round((perf_counter() - started) * 1000, 1),
+    }
@@ -0,0 +1,74 @@
+"""Linearization ("fast web view") of finished PDFs.
+
+WeasyPrint and the direct writer put the cross-reference table at the end of
+the file, so a viewer cannot show anything until the whole PDF has arrived.
+Linearizing rewrites the file with the first page's objects, a hint table
+and a first-page cross-reference at the front; viewers that fetch byte ranges
+render page one from the first few kilobytes. Enabled per output profile
+with ``PDF_LINEARIZE_PROFILES``; needs the optional pikepdf package (qpdf).
+"""
+
+from __future__ import annotations
+
+import logging
+from io import BytesIO
+
+from ..config import PDF_LINEARIZE_PROFILES
+
+LOGGER = logging.getLogger(__name__)
+
+_WARNED_UNAVAILABLE = False
+
+
+def linearization_available() -> bool:
+    try:
+        import pikepdf  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def should_linearize(profile_name: str) -> bool:
+    """Return whether PDFs of an output profile are linearized in this process."""
+    global _WARNED_UNAVAILABLE
+    if profile_name not in PDF_LINEARIZE_PROFILES:
+        return False
+    if linearization_available():
+        return True
+    if not _WARNED_UNAVAILABLE:
+        _WARNED_UNAVAILABLE = True
+        LOGGER.warning(
+            "PDF_LINEARIZE_PROFILES is set but pikepdf is not installed; PDFs are not linearized. "
+            "Install it with: pip install pikepdf"
+        )
+    return False
+
+
+def linearize_pdf(pdf_bytes: bytes) -> bytes:
+    """Rewrite a PDF linearized, keeping its content, metadata and identifier.
+
+    The second half of the file identifier is derived from the content, so
+    linearizing the same input always gives the same bytes.
+
+    Raises:
+        RuntimeError: If pikepdf is not installed.
+        ValueError: If the PDF cannot be read.
+    """
+    try:
+        import pikepdf
+    except ImportError as error:
+        raise RuntimeError("Linearizing PDFs needs pikepdf. Install it with: pip install pikepdf") from error
+
+    output = BytesIO()
+    try:
+        with pikepdf.open(BytesIO(pdf_bytes)) as pdf:
+            pdf.save(
+                output,
+                linearize=True,
+                deterministic_id=True,
+                fix_metadata_version=False,
+                object_stream_mode=pikepdf.ObjectStreamMode.preserve,
+            )
+    except pikepdf.PdfError as error:
+        raise ValueError(f"Cannot linearize PDF: {error}") from error
+    return output.getvalue()
@@ -0,0 +1,28 @@
+"""Lookup of the configured PDF output profiles.
+
+Kept apart from ``pdf_service`` so API code can validate a requested profile
+without importing the render stack.
+"""
+
+from __future__ import annotations
+
+from typing import Any
+
+from ..config import PDF_OUTPUT_PROFILE, PDF_OUTPUT_PROFILES
+
+
+def resolve_output_profile(profile: str | None = None) -> tuple[str, dict[str, Any]]:
+    """Return the name and WeasyPrint options of an output profile.
+
+    ``None`` selects ``PDF_OUTPUT_PROFILE``.
+
+    Raises:
+        ValueError: If ``profile`` is not one of ``PDF_OUTPUT_PROFILES``.
+    """
+    name = (profile or PDF_OUTPUT_PROFILE).strip().lower()
+    options = PDF_OUTPUT_PROFILES.get(name)
+    if options is None:
+        raise ValueError(
+            f"Unknown PDF output profile '{name}'; expected one of: {', '.join(PDF_OUTPUT_PROFILES)}"
+        )
+    return name, dict(options)
@@ -6,59 +6,320 @@ and reuse it without coupling PDF logic to FastAPI endpoints.
 
 from __future__ import annotations
 
-from typing import Any, Literal, Mapping
+import logging
+from datetime import date, datetime, timezone
+from time import perf_counter
+from typing import Any, Literal, Mapping, Sequence
 
-from ..config import PDF_STYLE_PATH
+from ..config import PDF_STYLE_PATH, PDF_TEMPLATE_PATH
 from ..utils.pdf_utils import (
+    StoredPdf,
     build_contract_template_context,
-    build_pdf_output_path,
-    ensure_pdf_storage_dir,
     render_contract_template,
+    store_pdf_bytes,
 )
+from ..utils.template_registry import (
+    RENDER_BACKEND_DIRECT,
+    RENDER_BACKEND_WEASYPRINT,
+    resolve_render_backend,
+    resolve_template_name,
+)
+from .linearize import linearize_pdf, should_linearize
+from .output_profiles import resolve_output_profile
+from .render_assets import get_stylesheet_cache, load_weasyprint
+from .render_cache import build_render_key, get_render_cache, template_version
+from .render_limits import mark_allocation_peak
+from .render_stats import RenderReport, contract_type_label, get_render_stats
+from .url_fetcher import Asset, AssetUrlFetcher, get_asset_store, intern_context_assets
+
+PdfOutputMode = Literal["path", "bytes", "stored"]
+LOGGER = logging.getLogger(__name__)
+# Templates the direct writer rejected; warned about once per process.
+_DIRECT_FALLBACK_TEMPLATES: set[str] = set()
+
+
+def _to_w3c_datetime(value: Any) -> str | None:
+    """Format a payload date as a W3C datetime for PDF metadata."""
+    if isinstance(value, datetime):
+        parsed = value
+    elif isinstance(value, date):
+        parsed = datetime(value.year, value.month, value.day)
+    else:
+        value_text = str(value or "").strip()
+        if not value_text:
+            return None
+        try:
+            parsed = datetime.fromisoformat(value_text.replace("Z", "+00:00"))
+        except ValueError:
+            return None
 
-PdfOutputMode = Literal["path", "bytes"]
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return parsed.astimezone(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
+
+
+def build_document_metadata(contract_data: Mapping[str, Any]) -> dict[str, str | None]:
+    """Pin document dates to the payload so identical contracts render identically.
+
+    Without this the creation date would depend on when the render ran.
+    """
+    signed_at = _to_w3c_datetime(contract_data.get("signed_date"))
+    return {"created": signed_at, "modified": signed_at}
 
 
 def generate_contract_pdf(
     contract_data: Mapping[str, Any],
     output_mode: PdfOutputMode = "path",
-) -> str | bytes:
+    profile: str | None = None,
+) -> str | bytes | StoredPdf:
     """Generate a contract PDF from dictionary payload data.
 
+    Saved PDFs are content-addressed: the storage key is named after the
+    sha256 and identical documents are stored once. Rendering is deterministic, so
+    repeated renders of the same input are served from the render cache.
+    The render is recorded in this process's engine statistics.
+
     Args:
         contract_data: Contract fields used in template rendering.
-        output_mode: "path" to save and return file path, "bytes" to return binary.
+        output_mode: "path" to save and return the file path (the storage key
+            for backends without local files), "bytes" to return binary,
+            "stored" to save and return a ``StoredPdf`` record with the key,
+            digest and size.
+        profile: Output profile name from ``PDF_OUTPUT_PROFILES``; defaults
+            to ``PDF_OUTPUT_PROFILE``.
+
+    Returns:
+        A string file path for "path", PDF bytes for "bytes", otherwise a
+        ``StoredPdf``.
+    """
+    render_stats = get_render_stats()
+    try:
+        result, report = render_contract_pdf(contract_data, output_mode, profile=profile)
+    except Exception as error:
+        render_stats.record_failure(contract_type_label(contract_data), error)
+        raise
+    render_stats.record(report)
+    return result
+
+
+def render_contract_pdf(
+    contract_data: Mapping[str, Any],
+    output_mode: PdfOutputMode = "path",
+    prerender: Mapping[str, Any] | None = None,
+    profile: str | None = None,
+) -> tuple[str | bytes | StoredPdf, RenderReport]:
+    """Render like ``generate_contract_pdf`` and return the result with its report.
+
+    With a ``prerender`` record from ``prerender_contract_pdf`` the client
+    signature and signed date are stamped onto the send-time render instead
+    of laying the document out again; a stale or missing pre-render falls
+    back to a full render.
+
+    Profiles in ``PDF_LINEARIZE_PROFILES`` are linearized for fast web view
+    once written, so cached and stored PDFs are already linearized.
+
+    Contract types in ``PDF_DIRECT_RENDER_TYPES`` are written directly with
+    pydyf (see ``direct_writer``) and fall back to WeasyPrint if their
+    template does not fit the fixed layout; they are never pre-rendered.
+
+    Nothing is recorded in the engine statistics; callers that run this on
+    another process record the report where it is received.
+    """
+    profile_name, output_options = resolve_output_profile(profile)
+    stages: dict[str, float] = {}
+    stage_start = perf_counter()
+    context, assets = intern_context_assets(build_contract_template_context(contract_data))
+    template_name = resolve_template_name(contract_data.get("type"))
+    backend = resolve_render_backend(contract_data.get("type"))
+    metadata = build_document_metadata(contract_data)
+    stages["context_ms"] = (perf_counter() - stage_start) * 1000
+
+    report = RenderReport(
+        contract_type=contract_type_label(contract_data),
+        template=template_name or PDF_TEMPLATE_PATH.name,
+        template_version=template_version(template_name),
+        profile=profile_name,
+        backend=backend,
+        linearized=should_linearize(profile_name),
+        stages=stages,
+    )
+
+    stage_start = perf_counter()
+    key_options: dict[str, Any] = {"output": output_options}
+    if backend == RENDER_BACKEND_DIRECT:
+        from .direct_writer import DIRECT_WRITER_VERSION
+
+        key_options["writer"] = DIRECT_WRITER_VERSION
+    if report.linearized:
+        key_options["linearize"] = True
+    render_key = build_render_key(context, template_name, metadata, key_options)
+    render_cache = get_render_cache()
+    cached = render_cache.lookup(render_key)
+    stages["cache_lookup_ms"] = (perf_counter() - stage_start) * 1000
+    report.cache_hit = cached is not None
+    pdf_bytes = None
+    if cached is not None:
+        pdf_bytes, report.pages = cached
+
+    if pdf_bytes is None and prerender and backend != RENDER_BACKEND_DIRECT:
+        from .prerender import stamp_prerendered_pdf
+
+        stage_start = perf_counter()
+        pdf_bytes = stamp_prerendered_pdf(context, assets, template_name, metadata, prerender, output_options)
+        stages["stamp_ms"] = (perf_counter() - stage_start) * 1000
+        if pdf_bytes is not None:
+            report.stamped = True
+            report.pages = prerender.get("pages")
+
+    if pdf_bytes is None and backend == RENDER_BACKEND_DIRECT:
+        rendered = _render_direct_pdf_bytes(context, template_name, metadata, render_key, assets, stages, output_options)
+        if rendered is not None:
+            pdf_bytes, report.pages = rendered
+        else:
+            report.backend = RENDER_BACKEND_WEASYPRINT
+
+    if pdf_bytes is None:
+        pdf_bytes, report.pages = _render_pdf_bytes(
+            context,
+            template_name,
+            metadata,
+            render_key,
+            assets,
+            stages,
+            output_options=output_options,
+        )
+
+    if not report.cache_hit:
+        if report.linearized:
+            pdf_bytes, report.linearized = _linearize(pdf_bytes, stages)
+        render_cache.put(render_key, pdf_bytes, report.pages)
+    report.size_bytes = len(pdf_bytes)
+
+    if output_mode == "bytes":
+        LOGGER.debug("PDF render stages: %s", stages)
+        return pdf_bytes, report
+
+    stage_start = perf_counter()
+    stored_pdf = store_pdf_bytes(pdf_bytes)
+    stages["store_ms"] = (perf_counter() - stage_start) * 1000
+    LOGGER.debug("PDF render stages: %s", stages)
+    return (stored_pdf if output_mode == "stored" else stored_pdf.path or stored_pdf.key), report
+
+
+def _linearize(pdf_bytes: bytes, stages: dict[str, float]) -> tuple[bytes, bool]:
+    """Linearize a freshly written PDF; a PDF qpdf cannot read is kept as written.
+
+    Returns:
+        The PDF bytes and whether they are linearized.
+    """
+    stage_start = perf_counter()
+    try:
+        pdf_bytes, linearized = linearize_pdf(pdf_bytes), True
+    except ValueError as error:
+        LOGGER.warning("Serving an unlinearized PDF: %s", error)
+        linearized = False
+    stages["linearize_ms"] = (perf_counter() - stage_start) * 1000
+    return pdf_bytes, linearized
+
+
+def _render_pdf_bytes(
+    context: Mapping[str, Any],
+    template_name: str | None,
+    metadata: Mapping[str, str | None],
+    render_key: str,
+    assets: Mapping[str, Asset],
+    stages: dict[str, float],
+    extra_stylesheets: Sequence[Any] = (),
+    output_options: Mapping[str, Any] | None = None,
+) -> tuple[bytes, int]:
+    """Run the template and WeasyPrint stages for a cache miss.
+
+    ``extra_stylesheets`` are applied after the shared contract stylesheet;
+    ``output_options`` are the WeasyPrint options of an output profile.
 
     Returns:
-        A string file path when output_mode is "path", otherwise PDF bytes.
+        The PDF bytes and its page count.
     """
-    contract_type = str(contract_data.get("type") or "").strip().lower()
-    context = build_contract_template_context(contract_data)
-    template_map = {
-        "house_sale": "house_sale.html",
-        "website_development": "website_development.html",
-        "broker": "broker.html",
-        "nda": "nda.html",
-        "employment": "employment.html",
-    }
-    template_name = template_map.get(contract_type)
+    stage_start = perf_counter()
     rendered_html = render_contract_template(context, template_name=template_name)
+    stages["template_ms"] = (perf_counter() - stage_start) * 1000
+
+    document = _layout_document(rendered_html, assets, stages, extra_stylesheets, output_options)
+    return _write_document(document, metadata, render_key, stages, output_options), len(document.pages)
 
+
+def _render_direct_pdf_bytes(
+    context: Mapping[str, Any],
+    template_name: str | None,
+    metadata: Mapping[str, str | None],
+    render_key: str,
+    assets: Mapping[str, Asset],
+    stages: dict[str, float],
+    output_options: Mapping[str, Any] | None = None,
+) -> tuple[bytes, int] | None:
+    """Write a fixed-layout contract without WeasyPrint.
+
+    Returns:
+        The PDF bytes and its page count, or None when the template does not
+        fit the direct writer and WeasyPrint has to render it.
+    """
+    from .direct_writer import DirectLayoutError, render_direct_pdf
+
+    stage_start = perf_counter()
+    rendered_html = render_contract_template(context, template_name=template_name)
+    stages["template_ms"] = (perf_counter() - stage_start) * 1000
     try:
-        from weasyprint import CSS, HTML
-    except Exception as error:  # pragma: no cover - depends on host OS libs
-        raise RuntimeError(
-            "WeasyPrint is installed but native libraries are missing. "
-            "Install GTK/Pango/Cairo runtime dependencies for this OS before generating PDFs."
-        ) from error
+        return render_direct_pdf(rendered_html, assets, metadata, render_key, stages, output_options)
+    except DirectLayoutError as error:
+        if template_name not in _DIRECT_FALLBACK_TEMPLATES:
+            _DIRECT_FALLBACK_TEMPLATES.add(template_name)
+            LOGGER.warning("Rendering %s with WeasyPrint, the direct writer cannot lay it out: %s", template_name, error)
+        return None
 
-    stylesheets = [CSS(filename=str(PDF_STYLE_PATH))]
-    html = HTML(string=rendered_html, base_url=str(PDF_STYLE_PATH.parent))
 
-    if output_mode == "bytes":
-        return html.write_pdf(stylesheets=stylesheets)
+def _layout_document(
+    rendered_html: str,
+    assets: Mapping[str, Asset],
+    stages: dict[str, float],
+    extra_stylesheets: Sequence[Any] = (),
+    output_options: Mapping[str, Any] | None = None,
+) -> Any:
+    """Lay out rendered contract HTML into a WeasyPrint document."""
+    stage_start = perf_counter()
+    weasyprint = load_weasyprint()
+    stylesheets, font_config = get_stylesheet_cache().get()
+    stages["stylesheet_ms"] = (perf_counter() - stage_start) * 1000
+
+    stage_start = perf_counter()
+    html = weasyprint.HTML(
+        string=rendered_html,
+        base_url=str(PDF_STYLE_PATH.parent),
+        url_fetcher=AssetUrlFetcher(get_asset_store(), assets),
+    )
+    document = html.render(
+        stylesheets=[*stylesheets, *extra_stylesheets],
+        font_config=font_config,
+        **(output_options or {}),
+    )
+    stages["layout_ms"] = (perf_counter() - stage_start) * 1000
+    # The laid-out document is the largest thing a render holds.
+    mark_allocation_peak()
+    return document
+
 
-    output_dir = ensure_pdf_storage_dir()
-    output_path = build_pdf_output_path(contract_data, output_dir)
-    html.write_pdf(target=str(output_path), stylesheets=stylesheets)
-    return str(output_path)
+def _write_document(
+    document: Any,
+    metadata: Mapping[str, str | None],
+    render_key: str,
+    stages: dict[str, float],
+    output_options: Mapping[str, Any] | None = None,
+) -> bytes:
+    """Serialize a laid-out document with pinned metadata and identifier."""
+    stage_start = perf_counter()
+    document.metadata.created = metadata.get("created")
+    document.metadata.modified = metadata.get("modified")
+    # The file identifier is normally left out; derive it from the render key
+    # so it is stable across renders of the same input.
+    pdf_bytes = document.write_pdf(pdf_identifier=render_key[:32].encode("ascii"), **(output_options or {}))
+    stages["write_ms"] = (perf_counter() - stage_start) * 1000
+    return pdf_bytes
@@ -0,0 +1,434 @@
+"""Send-time pre-rendering and sign-time signature stamping.
+
+Once a contract is sent, everything in its document except the client
+signature and the signed date is fixed. The engine lays the document out at
+send time with transparent placeholder images in the client's signature slot
+and in the ``date-slot`` span around the signed date, and keeps the PDF in
+the render cache. The pre-render stylesheet gives the signature slot the
+largest box the template allows the image, so the layout does not depend on
+the eventual image; full renders are unaffected.
+
+At sign time each placeholder image object is replaced, through an
+incremental PDF update, by a form: one draws the signature contained in its
+slot at the bottom left, the other the signed date on the slot's baseline
+with the bundled font the template uses there. The document dates are
+rewritten too. No layout runs on that path. Whenever the inputs no longer
+match the pre-render, callers fall back to a full render.
+"""
+
+from __future__ import annotations
+
+import html
+import logging
+import re
+import zlib
+from datetime import datetime, timezone
+from functools import lru_cache
+from io import BytesIO
+from time import perf_counter
+from typing import Any, Iterable, Mapping
+
+import pydyf
+from PIL import Image
+
+from ..config import PDF_SIGNATURE_MAX_PIXELS
+from ..utils.pdf_update import (
+    append_incremental_update,
+    iter_stream_objects,
+    read_object,
+    read_trailer,
+    serialize_stream,
+    xref_entries,
+)
+from ..utils.pdf_utils import build_contract_template_context, render_contract_template
+from ..utils.template_registry import RENDER_BACKEND_DIRECT, resolve_render_backend, resolve_template_name
+from .direct_writer import BASE_CODEPOINTS, TextStyle, _font_metrics, _font_subset, _Text, _text_operators
+from .pdf_service import _layout_document, _write_document, build_document_metadata, resolve_output_profile
+from .render_assets import load_weasyprint
+from .render_cache import build_render_key, get_render_cache
+from .url_fetcher import Asset, intern_context_assets
+
+LOGGER = logging.getLogger(__name__)
+
+PRERENDER_SCHEMA = 2
+SLOT_CLASS = "signature-slot"
+DATE_SLOT_CLASS = "date-slot"
+DATE_PLACEHOLDER_CLASS = "date-slot-placeholder"
+# Context keys holding the client signature; both are replaced by the stamp.
+SIGNATURE_SLOT_KEYS = ("signature_client", "client_signature")
+# Odd dimensions make the placeholder image objects easy to find in the output.
+PLACEHOLDER_SIZE = (97, 3)
+DATE_PLACEHOLDER_SIZE = (89, 5)
+# Any signed date that differs from the real one reveals date-dependent fields.
+_DATE_PROBE = datetime(2001, 2, 3, 4, 5, 6, tzinfo=timezone.utc)
+_DATE_SLOT_RE = re.compile(r'<span class="%s">([^<]*)</span>' % DATE_SLOT_CLASS)
+# ``@font-face`` families of pdf_styles.css, by direct writer font name.
+_FONT_FAMILIES = {"ContractEase Serif": "serif", "ContractEase Sans": "sans"}
+
+
+class PrerenderError(ValueError):
+    """Raised when a contract cannot be pre-rendered for stamping."""
+
+
+@lru_cache(maxsize=2)
+def _placeholder_data_uri(size: tuple[int, int] = PLACEHOLDER_SIZE) -> str:
+    import base64
+
+    output = BytesIO()
+    Image.new("RGBA", size, (255, 255, 255, 0)).save(output, format="PNG")
+    return "data:image/png;base64," + base64.b64encode(output.getvalue()).decode("ascii")
+
+
+@lru_cache(maxsize=1)
+def _prerender_stylesheet() -> Any:
+    # The signature slot takes the template's max-width and max-height, and
+    # each placeholder is stretched over its box so its unit square is the
+    # box. The date placeholder's bottom edge sits on the text baseline.
+    return load_weasyprint().CSS(
+        string=(
+            f".{SLOT_CLASS} {{ width: 100vw !important; height: 100vh !important; object-fit: fill !important; }}"
+            f".{DATE_PLACEHOLDER_CLASS} {{ width: 1em; height: 0.5em; margin: 0; vertical-align: baseline; "
+            "object-fit: fill; }"
+        )
+    )
+
+
+def _date_slot_html(rendered_html: str) -> str:
+    placeholder = (
+        f'<span class="{DATE_SLOT_CLASS}"><img class="{DATE_PLACEHOLDER_CLASS}" '
+        f'src="{_placeholder_data_uri(DATE_PLACEHOLDER_SIZE)}" alt=""></span>'
+    )
+    return _DATE_SLOT_RE.sub(lambda _: placeholder, rendered_html)
+
+
+def prerender_key(
+    context: Mapping[str, Any],
+    template_name: str | None,
+    date_keys: Iterable[str],
+    output_options: Mapping[str, Any],
+) -> str:
+    """Hash everything a pre-render depends on except the stamped fields."""
+    excluded = set(SIGNATURE_SLOT_KEYS).union(date_keys)
+    stable_context = {key: value for key, value in context.items() if key not in excluded}
+    options = {"prerender": PRERENDER_SCHEMA, "output": dict(output_options)}
+    return build_render_key(stable_context, template_name, options=options)
+
+
+def _find_slots(document: Any, css_class: str) -> list[Any]:
+    from weasyprint.formatting_structure import boxes
+
+    slots = []
+    for page in document.pages:
+        for box in page._page_box.descendants():
+            element = getattr(box, "element", None)
+            if not isinstance(box, boxes.ReplacedBox) or element is None:
+                continue
+            if css_class in (element.get("class") or "").split():
+                if not box.width or not box.height:
+                    raise PrerenderError(f"Slot {css_class} has no size")
+                slots.append(box)
+    return slots
+
+
+def _date_slot_style(box: Any) -> dict[str, Any]:
+    """Return how the signed date is drawn in its slot; see ``_date_objects``."""
+    style = box.style
+    families = list(style["font_family"] or ())
+    font = _FONT_FAMILIES.get(families[0] if families else "")
+    if font is None or style["font_style"] != "normal":
+        raise PrerenderError("Signed date does not use a bundled font")
+    if style["font_weight"] >= 600:
+        font += "-bold"
+    letter_spacing = style["letter_spacing"]
+    return {
+        "width": round(box.width, 3),
+        "height": round(box.height, 3),
+        "font": font,
+        "size": float(style["font_size"]),
+        "color": [round(float(channel), 4) for channel in tuple(style["color"])[:3]],
+        "letterSpacing": 0.0 if letter_spacing == "normal" else float(letter_spacing),
+    }
+
+
+def _find_placeholders(pdf_bytes: bytes, size: tuple[int, int]) -> list[int]:
+    width_re = re.compile(rb"/Width\s+%d\b" % size[0])
+    height_re = re.compile(rb"/Height\s+%d\b" % size[1])
+    return [
+        number
+        for number, dictionary in iter_stream_objects(pdf_bytes, xref_entries(pdf_bytes, read_trailer(pdf_bytes)))
+        if b"/Image" in dictionary
+        and b"/SMask" in dictionary
+        and width_re.search(dictionary) is not None
+        and height_re.search(dictionary) is not None
+    ]
+
+
+def prerender_contract_pdf(contract_data: Mapping[str, Any], profile: str | None = None) -> dict[str, Any]:
+    """Render a sent contract with a reserved client signature slot.
+
+    The PDF is stored in the render cache; the returned record describes
+    where to stamp it and is passed back to ``render_contract_pdf`` at sign
+    time. Only a sign render with the same output ``profile`` can use it.
+
+    Raises:
+        PrerenderError: If the template has no usable signature slot, the
+            contract type is written directly or the render cache is
+            disabled.
+    """
+    if resolve_render_backend(contract_data.get("type")) == RENDER_BACKEND_DIRECT:
+        raise PrerenderError("Directly written contract types are not pre-rendered")
+    render_cache = get_render_cache()
+    if not render_cache.enabled:
+        raise PrerenderError("Pre-rendering requires the render cache")
+
+    profile_name, output_options = resolve_output_profile(profile)
+    started = perf_counter()
+    stages: dict[str, float] = {}
+    payload = {**contract_data, "signature_client": _placeholder_data_uri()}
+    raw_context = build_contract_template_context(payload)
+    probe_context = build_contract_template_context({**payload, "signed_date": _DATE_PROBE})
+    date_keys = sorted(key for key, value in raw_context.items() if probe_context.get(key) != value)
+    context, assets = intern_context_assets(raw_context)
+    template_name = resolve_template_name(payload.get("type"))
+    key = prerender_key(context, template_name, date_keys, output_options)
+
+    rendered_html = render_contract_template(context, template_name=template_name)
+    probe_html = render_contract_template(
+        {**context, **{date_key: probe_context.get(date_key) for date_key in date_keys}},
+        template_name=template_name,
+    )
+    # A signed date shown in the template's date slot is stamped at sign time.
+    slot_texts = [html.unescape(text) for text in _DATE_SLOT_RE.findall(rendered_html)]
+    slot_keys = [date_key for date_key in date_keys if slot_texts == [str(context.get(date_key))]]
+    date_slot_key = slot_keys[0] if slot_keys else None
+    if date_slot_key is not None:
+        rendered_html, probe_html = _date_slot_html(rendered_html), _date_slot_html(probe_html)
+    # Date-dependent fields outside the slot pin the pre-render to its date
+    # when the document actually shows them.
+    date_values = {} if probe_html == rendered_html else {date_key: context[date_key] for date_key in date_keys}
+
+    document = _layout_document(rendered_html, assets, stages, [_prerender_stylesheet()], output_options)
+    signature_slots = _find_slots(document, SLOT_CLASS)
+    if len(signature_slots) != 1:
+        raise PrerenderError(f"Template has {len(signature_slots)} client signature slots; expected 1")
+    date_slot = None
+    if date_slot_key is not None:
+        date_slots = _find_slots(document, DATE_PLACEHOLDER_CLASS)
+        if len(date_slots) != 1:
+            raise PrerenderError(f"Template has {len(date_slots)} signed date slots; expected 1")
+        date_slot = {"key": date_slot_key, **_date_slot_style(date_slots[0])}
+    pdf_bytes = _write_document(document, build_document_metadata(payload), key, stages, output_options)
+
+    placeholders = _find_placeholders(pdf_bytes, PLACEHOLDER_SIZE)
+    if len(placeholders) != 1:
+        raise PrerenderError("Signature placeholder image not found in the pre-rendered PDF")
+    if date_slot is not None:
+        date_placeholders = _find_placeholders(pdf_bytes, DATE_PLACEHOLDER_SIZE)
+        if len(date_placeholders) != 1:
+            raise PrerenderError("Signed date placeholder image not found in the pre-rendered PDF")
+        date_slot["placeholderObject"] = date_placeholders[0]
+
+    render_cache.put(key, pdf_bytes, len(document.pages))
+    return {
+        "schema": PRERENDER_SCHEMA,
+        "key": key,
+        "template": template_name,
+        "profile": profile_name,
+        "placeholderObject": placeholders[0],
+        "slotWidth": round(signature_slots[0].width, 3),
+        "slotHeight": round(signature_slots[0].height, 3),
+        "dateKeys": date_keys,
+        "dateValues": date_values,
+        "dateSlot": date_slot,
+        "pages": len(document.pages),
+        "sizeBytes": len(pdf_bytes),
+        "durationMs": round((perf_counter() - started) * 1000, 1),
+    }
+
+
+def _pdf_date(w3c_datetime: str) -> str:
+    parsed = datetime.strptime(w3c_datetime, "%Y-%m-%dT%H:%M:%SZ")
+    return parsed.strftime("D:%Y%m%d%H%M%SZ")
+
+
+def _set_info_date(info: bytes, key: str, w3c_datetime: str | None) -> bytes:
+    pattern = re.compile(rb"/" + key.encode("ascii") + rb"\s*(?:\((?:\\.|[^\\)])*\)|<[0-9A-Fa-f]*>)")
+    info = pattern.sub(b"", info)
+    if not w3c_datetime:
+        return info
+    entry = b"/" + key.encode("ascii") + b" " + pydyf.String(_pdf_date(w3c_datetime)).data
+    end = info.rindex(b">>")
+    return info[:end] + entry + info[end:]
+
+
+def _contain_scale(image_ratio: float, slot_ratio: float) -> tuple[float, float]:
+    """Return the image size, as a fraction of the slot, under ``object-fit: contain``."""
+    if image_ratio >= slot_ratio:
+        return 1.0, slot_ratio / image_ratio
+    return image_ratio / slot_ratio, 1.0
+
+
+def _date_objects(
+    slot: Mapping[str, Any],
+    text: str,
+    first_number: int,
+    output_options: Mapping[str, Any],
+) -> dict[int, bytes]:
+    """Serialize a form drawing ``text`` in the date slot, and its font.
+
+    The form replaces the date placeholder, whose unit square is the slot box
+    with its bottom edge on the baseline. The font is a subset of the bundled
+    font the template uses there, added to the document as new objects.
+    """
+    text = " ".join(text.split())
+    font = str(slot["font"])
+    metrics = _font_metrics(font)
+    size = float(slot["size"])
+    style = TextStyle(font, size, tuple(slot["color"]), letter_spacing=float(slot.get("letterSpacing") or 0))
+    text_width = metrics.units(text) / metrics.units_per_em * size + style.letter_spacing * len(text)
+    subset = _font_subset(
+        font,
+        frozenset(BASE_CODEPOINTS | {ord(char) for char in text}),
+        bool(output_options.get("full_fonts")),
+        bool(output_options.get("hinting")),
+    )
+    font_file, descriptor, cid_font, to_unicode, type0 = range(first_number, first_number + 5)
+    width, height = float(slot["width"]), float(slot["height"])
+    # Back to CSS px, y down from the baseline, where the text operators draw.
+    content = b"q %.6f 0 0 %.6f 0 0 cm %s Q" % (1 / width, -1 / height, _text_operators(_Text(0.0, 0.0, style, text), "Date", subset))
+    bbox = (-size / width, -size / height, (text_width + size) / width, 2 * size / height)
+    return {
+        int(slot["placeholderObject"]): serialize_stream(
+            b"/Type /XObject/Subtype /Form/BBox [%.6f %.6f %.6f %.6f]/Resources <</Font <</Date %d 0 R>>>>"
+            % (*bbox, type0),
+            content,
+        ),
+        font_file: serialize_stream(b"/Filter /FlateDecode/Length1 %d" % subset.length, subset.data),
+        descriptor: b"<</Type /FontDescriptor/FontName /%s/Flags 32/FontBBox [%s]/ItalicAngle %d"
+        b"/Ascent %d/Descent %d/CapHeight %d/StemV 80/FontFile2 %d 0 R>>"
+        % (
+            subset.base_font.encode("ascii"),
+            b" ".join(b"%d" % value for value in metrics.bbox),
+            metrics.italic_angle,
+            round(metrics.ascent * 1000),
+            -round(metrics.descent * 1000),
+            metrics.cap_height,
+            font_file,
+        ),
+        cid_font: b"<</Type /Font/Subtype /CIDFontType2/BaseFont /%s"
+        b"/CIDSystemInfo <</Registry (Adobe)/Ordering (Identity)/Supplement 0>>"
+        b"/FontDescriptor %d 0 R/W %s/CIDToGIDMap /Identity>>"
+        % (subset.base_font.encode("ascii"), descriptor, subset.widths),
+        to_unicode: serialize_stream(b"", subset.to_unicode),
+        type0: b"<</Type /Font/Subtype /Type0/BaseFont /%s/Encoding /Identity-H"
+        b"/DescendantFonts [%d 0 R]/ToUnicode %d 0 R>>" % (subset.base_font.encode("ascii"), cid_font, to_unicode),
+    }
+
+
+def _stamp(
+    base_pdf: bytes,
+    image_data: bytes,
+    record: Mapping[str, Any],
+    metadata: Mapping[str, str | None],
+    output_options: Mapping[str, Any],
+    date_text: str | None = None,
+) -> bytes:
+    trailer = read_trailer(base_pdf)
+    entries = xref_entries(base_pdf, trailer)
+    placeholder = int(record["placeholderObject"])
+    if entries.get(placeholder, (0,))[0] != 1:
+        raise ValueError("Placeholder object is missing from the pre-rendered PDF")
+
+    with Image.open(BytesIO(image_data)) as image:
+        if image.width * image.height > PDF_SIGNATURE_MAX_PIXELS:
+            raise ValueError("Signature image dimensions are too large")
+        rgba = image.convert("RGBA")
+    slot_width, slot_height = float(record["slotWidth"]), float(record["slotHeight"])
+    scale_x, scale_y = _contain_scale(rgba.width / rgba.height, slot_width / slot_height)
+    dpi = output_options.get("dpi")
+    if dpi:
+        # Downsample like WeasyPrint does for the profile: CSS px are 1/96 in.
+        max_width = max(1, round(slot_width * scale_x / 96 * dpi))
+        if rgba.width > max_width:
+            ratio = max_width / rgba.width
+            rgba = rgba.resize((max_width, max(1, round(rgba.height * ratio))), Image.LANCZOS)
+    width, height = rgba.size
+    image_number, mask_number = trailer.size, trailer.size + 1
+
+    objects = {
+        mask_number: serialize_stream(
+            b"/Type /XObject/Subtype /Image/Width %d/Height %d/ColorSpace /DeviceGray"
+            b"/BitsPerComponent 8/Filter /FlateDecode" % (width, height),
+            zlib.compress(rgba.getchannel("A").tobytes()),
+        ),
+        image_number: serialize_stream(
+            b"/Type /XObject/Subtype /Image/Width %d/Height %d/ColorSpace /DeviceRGB"
+            b"/BitsPerComponent 8/Interpolate true/SMask %d 0 R/Filter /FlateDecode" % (width, height, mask_number),
+            zlib.compress(rgba.convert("RGB").tobytes()),
+        ),
+        # The page draws the placeholder in its unit square, so a form with a
+        # unit bounding box inherits the slot's position and size.
+        placeholder: serialize_stream(
+            b"/Type /XObject/Subtype /Form/BBox [0 0 1 1]/Resources <</XObject <</Signature %d 0 R>>>>"
+            % image_number,
+            b"q %.6f 0 0 %.6f 0 0 cm /Signature Do Q" % (scale_x, scale_y),
+        ),
+    }
+    date_slot = record.get("dateSlot")
+    if date_slot and date_text is not None:
+        if entries.get(int(date_slot["placeholderObject"]), (0,))[0] != 1:
+            raise ValueError("Date placeholder object is missing from the pre-rendered PDF")
+        objects.update(_date_objects(date_slot, date_text, trailer.size + 2, output_options))
+    if trailer.info_number is not None:
+        info = read_object(base_pdf, entries, trailer.info_number)
+        info = _set_info_date(info, "CreationDate", metadata.get("created"))
+        info = _set_info_date(info, "ModDate", metadata.get("modified"))
+        objects[trailer.info_number] = info
+    return append_incremental_update(base_pdf, trailer, objects)
+
+
+def stamp_prerendered_pdf(
+    context: Mapping[str, Any],
+    assets: Mapping[str, Asset],
+    template_name: str | None,
+    metadata: Mapping[str, str | None],
+    record: Mapping[str, Any],
+    output_options: Mapping[str, Any],
+) -> bytes | None:
+    """Stamp the client signature and signed date onto a cached pre-render.
+
+    Args:
+        context: The interned template context of the signed contract.
+        assets: Assets referenced by ``context``.
+        template_name: Template resolved for the contract.
+        metadata: Document dates of the signed contract.
+        record: The record returned by ``prerender_contract_pdf``.
+        output_options: WeasyPrint options of the requested output profile.
+
+    Returns:
+        The signed PDF, or None when the pre-render is stale, evicted or
+        cannot be stamped and a full render is needed.
+    """
+    if record.get("schema") != PRERENDER_SCHEMA or record.get("template") != template_name:
+        return None
+    if prerender_key(context, template_name, record.get("dateKeys") or (), output_options) != record.get("key"):
+        LOGGER.info("Pre-render is stale; rendering the signed contract in full")
+        return None
+    for date_key, value in (record.get("dateValues") or {}).items():
+        if context.get(date_key) != value:
+            return None
+    date_slot = record.get("dateSlot")
+    date_text = str(context.get(date_slot["key"]) or "") if date_slot else None
+
+    signature = assets.get(str(context.get("signature_client") or ""))
+    if signature is None:
+        return None
+    base_pdf = get_render_cache().get(str(record["key"]))
+    if base_pdf is None:
+        return None
+
+    try:
+        return _stamp(base_pdf, signature.data, record, metadata, output_options, date_text)
+    except (OSError, ValueError, zlib.error, Image.DecompressionBombError) as error:
+        LOGGER.warning("Signature stamping failed, rendering in full: %s", error)
+        return None
@@ -0,0 +1,195 @@
+"""Draft previews of contracts that have not been signed yet.
+
+Previews go through the same context builder and templates as the final PDF.
+HTML previews skip WeasyPrint entirely and inline the print stylesheet so the
+browser shows the document as it will be laid out; PDF previews run the full
+render with a watermark. Both carry the watermark so a preview is never
+mistaken for the signed document.
+
+Results are cached per contract revision in the API process, together with
+their ``preview_version``: a digest of the template context, template,
+stylesheet, fonts and engine version. A revision only changes when the draft
+is edited, and the version also changes after a template, stylesheet or font
+deploy or a change to sender details, so stale entries are never returned.
+"""
+
+from __future__ import annotations
+
+import re
+from functools import lru_cache
+from typing import Any, Literal, Mapping
+
+from ..config import PDF_PREVIEW_CACHE_BYTES, PDF_PREVIEW_WATERMARK, PDF_STYLE_PATH
+from ..utils.pdf_utils import build_contract_template_context, render_contract_template
+from ..utils.template_registry import resolve_template_name
+from .pdf_service import _render_pdf_bytes, build_document_metadata, resolve_output_profile
+from .render_assets import load_weasyprint
+from .render_cache import LRUByteCache, build_render_key, stylesheet_version
+from .url_fetcher import intern_context_assets
+
+PreviewMode = Literal["html", "bytes"]
+PREVIEW_MODES = ("html", "bytes")
+# The API does not serve the bundled font files; browsers use the fallbacks.
+_FONT_FACE_RULE = re.compile(r"@font-face\s*\{[^}]*\}\s*")
+
+
+def _css_string(value: str) -> str:
+    escaped = value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", " ")
+    return f'"{escaped}"'
+
+
+def build_watermark_css(text: str = PDF_PREVIEW_WATERMARK) -> str:
+    """Return CSS that stamps ``text`` diagonally across every page."""
+    return (
+        "body::after {\n"
+        f"  content: {_css_string(text)};\n"
+        "  position: fixed;\n"
+        "  top: 42%;\n"
+        "  left: 0;\n"
+        "  right: 0;\n"
+        "  text-align: center;\n"
+        '  font-family: "Arial", sans-serif;\n'
+        "  font-size: 96pt;\n"
+        "  font-weight: 700;\n"
+        "  letter-spacing: 12px;\n"
+        "  color: rgba(220, 38, 38, 0.14);\n"
+        "  transform: rotate(-30deg);\n"
+        "  pointer-events: none;\n"
+        "  z-index: 1000;\n"
+        "}\n"
+    )
+
+
+@lru_cache(maxsize=4)
+def _print_stylesheet_text(version: str) -> str:
+    # Keyed by content version so edits are picked up in auto-reload mode.
+    return _FONT_FACE_RULE.sub("", PDF_STYLE_PATH.read_text(encoding="utf-8"))
+
+
+@lru_cache(maxsize=1)
+def _watermark_stylesheet() -> Any:
+    return load_weasyprint().CSS(string=build_watermark_css())
+
+
+def _inject_styles(html: str, css: str) -> str:
+    style_block = f"<style>\n{css}</style>\n"
+    head_end = html.lower().rfind("</head>")
+    if head_end == -1:
+        return style_block + html
+    return html[:head_end] + style_block + html[head_end:]
+
+
+def preview_version(
+    contract_data: Mapping[str, Any],
+    output_mode: PreviewMode = "html",
+    profile: str | None = None,
+) -> str:
+    """Return a digest of everything a preview of ``contract_data`` depends on.
+
+    Used as the preview cache version and in the preview ETag. Document
+    metadata is left out: a draft has no signing date, so it would change on
+    every request.
+    """
+    options: dict[str, Any] = {"preview": PDF_PREVIEW_WATERMARK, "mode": output_mode}
+    if output_mode == "bytes":
+        options["output"] = resolve_output_profile(profile)[1]
+    template_name = resolve_template_name(contract_data.get("type"))
+    return build_render_key(build_contract_template_context(contract_data), template_name, None, options)
+
+
+def render_contract_preview(
+    contract_data: Mapping[str, Any],
+    output_mode: PreviewMode = "html",
+    profile: str | None = None,
+) -> str | bytes:
+    """Render a watermarked draft preview of a contract.
+
+    Args:
+        contract_data: Contract fields, as passed to ``generate_contract_pdf``.
+        output_mode: "html" for a self-contained HTML page, "bytes" for a PDF.
+        profile: Output profile of PDF previews; ignored for HTML.
+
+    Returns:
+        The HTML text or the PDF bytes.
+    """
+    if output_mode not in PREVIEW_MODES:
+        raise ValueError(f"Unsupported preview mode: {output_mode}")
+
+    template_name = resolve_template_name(contract_data.get("type"))
+    if output_mode == "html":
+        context = build_contract_template_context(contract_data)
+        rendered_html = render_contract_template(context, template_name=template_name)
+        print_css = _print_stylesheet_text(stylesheet_version())
+        return _inject_styles(rendered_html, print_css + "\n" + build_watermark_css())
+
+    _, output_options = resolve_output_profile(profile)
+    context, assets = intern_context_assets(build_contract_template_context(contract_data))
+    metadata = build_document_metadata(contract_data)
+    render_key = build_render_key(
+        context,
+        template_name,
+        metadata,
+        {"preview": PDF_PREVIEW_WATERMARK, "output": output_options},
+    )
+    pdf_bytes, _ = _render_pdf_bytes(
+        context,
+        template_name,
+        metadata,
+        render_key,
+        assets,
+        {},
+        extra_stylesheets=[_watermark_stylesheet()],
+        output_options=output_options,
+    )
+    return pdf_bytes
+
+
+class PreviewCache:
+    """In-memory previews keyed by contract id, revision and mode.
+
+    Each entry holds one ``preview_version``; a lookup with another version
+    misses, and the next ``put`` replaces the entry.
+    """
+
+    def __init__(self, max_bytes: int = PDF_PREVIEW_CACHE_BYTES) -> None:
+        self._entries = LRUByteCache(max_bytes, sizeof=lambda entry: len(entry[1]))
+
+    @staticmethod
+    def key(contract_id: str, revision: int, output_mode: PreviewMode) -> str:
+        return f"{contract_id}:{revision}:{output_mode}"
+
+    def get(self, contract_id: str, revision: int, output_mode: PreviewMode, version: str) -> bytes | None:
+        entry = self._entries.get(self.key(contract_id, revision, output_mode))
+        if entry is None or entry[0] != version:
+            return None
+        return entry[1]
+
+    def put(
+        self,
+        contract_id: str,
+        revision: int,
+        output_mode: PreviewMode,
+        version: str,
+        content: str | bytes,
+    ) -> bytes:
+        """Cache a preview and return it as bytes."""
+        if isinstance(content, str):
+            content = content.encode("utf-8")
+        self._entries.put(self.key(contract_id, revision, output_mode), (version, content))
+        return content
+
+    def invalidate(self, contract_id: str, revision: int) -> None:
+        """Drop the previews of one revision after the draft has changed."""
+        for output_mode in PREVIEW_MODES:
+            self._entries.pop(self.key(contract_id, revision, output_mode))
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+
+_PREVIEW_CACHE = PreviewCache()
+
+
+def get_preview_cache() -> PreviewCache:
+    """Return the process-wide preview cache."""
+    return _PREVIEW_CACHE
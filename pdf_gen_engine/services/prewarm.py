@@ -0,0 +1,10 @@
+"""Warm the engine on import.
+
+The render executor lists this module in the fork server's preload list, so
+the fork server warms up once and every render worker forked from it starts
+warm. Importing it anywhere else warms the importing process.
+"""
+
+from .warmup import warm_up_quietly
+
+warm_up_quietly()
@@ -0,0 +1,109 @@
+"""Shared WeasyPrint resources reused across PDF renders.
+
+Parsing ``pdf_styles.css`` and loading its bundled ``@font-face`` fonts is
+identical for every contract, so the engine keeps one parsed stylesheet and
+one ``FontConfiguration`` per process and only rebuilds them when the stylesheet
+or a bundled font changes.
+"""
+
+from __future__ import annotations
+
+import logging
+import os
+import threading
+from pathlib import Path
+from types import ModuleType
+from typing import Any
+
+from ..config import PDF_STYLE_PATH
+from .fonts import bundled_fonts, configure_fontconfig
+
+LOGGER = logging.getLogger(__name__)
+
+
+def load_weasyprint() -> ModuleType:
+    """Import WeasyPrint lazily so the engine can be imported without GTK libs."""
+    # fontconfig reads its configuration once, when WeasyPrint loads it.
+    configure_fontconfig()
+    try:
+        import weasyprint
+    except Exception as error:  # pragma: no cover - depends on host OS libs
+        raise RuntimeError(
+            "WeasyPrint is installed but native libraries are missing. "
+            "Install GTK/Pango/Cairo runtime dependencies for this OS before generating PDFs."
+        ) from error
+    return weasyprint
+
+
+def _file_signature(path: Path) -> tuple[int, int]:
+    stat_result = os.stat(path)
+    return stat_result.st_mtime_ns, stat_result.st_size
+
+
+def _style_signature(style_path: Path) -> tuple[tuple[int, int], ...]:
+    return tuple(_file_signature(path) for path in (style_path, *bundled_fonts()))
+
+
+class StylesheetCache:
+    """Parsed stylesheet and font configuration shared by every render.
+
+    The stylesheet and bundled fonts are stat-ed on access, in production
+    too, and both the stylesheet and font configuration are rebuilt when one
+    of them changes. The render cache key covers the same files, so cached
+    and fresh renders always use the stylesheet the key names.
+    """
+
+    def __init__(self, style_path: Path = PDF_STYLE_PATH) -> None:
+        self.style_path = style_path
+        self.builds = 0
+        self._lock = threading.Lock()
+        # ``(signature, stylesheet, font_config)``, replaced as one tuple so a
+        # render never pairs a stylesheet with another build's fonts.
+        self._entry: tuple[tuple[tuple[int, int], ...], Any, Any] | None = None
+
+    def _is_stale(self, entry: tuple[tuple[tuple[int, int], ...], Any, Any] | None) -> bool:
+        if entry is None:
+            return True
+        try:
+            return _style_signature(self.style_path) != entry[0]
+        except OSError:
+            return False
+
+    def _build(self) -> tuple[tuple[tuple[int, int], ...], Any, Any]:
+        weasyprint = load_weasyprint()
+        from weasyprint.text.fonts import FontConfiguration
+
+        from .url_fetcher import AssetUrlFetcher, get_asset_store
+
+        signature = _style_signature(self.style_path)
+        font_config = FontConfiguration()
+        stylesheet = weasyprint.CSS(
+            filename=str(self.style_path),
+            font_config=font_config,
+            url_fetcher=AssetUrlFetcher(get_asset_store()),
+        )
+
+        self.builds += 1
+        LOGGER.debug("Parsed PDF stylesheet %s (build #%d)", self.style_path, self.builds)
+        return signature, stylesheet, font_config
+
+    def get(self) -> tuple[list[Any], Any]:
+        """Return ``(stylesheets, font_config)`` for a render, rebuilding if stale."""
+        with self._lock:
+            entry = self._entry
+            if self._is_stale(entry):
+                entry = self._entry = self._build()
+        _, stylesheet, font_config = entry
+        return [stylesheet], font_config
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entry = None
+
+
+_STYLESHEET_CACHE = StylesheetCache()
+
+
+def get_stylesheet_cache() -> StylesheetCache:
+    """Return the process-wide stylesheet cache."""
+    return _STYLESHEET_CACHE
@@ -0,0 +1,412 @@
+"""Render-result cache for contract PDFs.
+
+Rendering is deterministic: the same template context, template source,
+stylesheet and WeasyPrint version always produce the same bytes (document
+dates and the PDF identifier are pinned to values derived from the payload).
+That makes the rendered PDF cacheable under a hash of those inputs, so
+signing retries, legacy regeneration and repeat downloads skip WeasyPrint.
+
+Two tiers are used: a per-process in-memory LRU bounded by total bytes and a
+shared on-disk directory with size-based LRU eviction. Each entry keeps the
+document's page count next to its bytes, so a cache hit reports it too.
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+import os
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from datetime import date, datetime
+from decimal import Decimal
+from hashlib import sha256
+from importlib import metadata as importlib_metadata
+from pathlib import Path
+from typing import Any, Callable, Mapping
+from uuid import uuid4
+
+from ..config import (
+    PDF_AUTO_RELOAD,
+    PDF_RENDER_CACHE_DISK_BYTES,
+    PDF_RENDER_CACHE_ENABLED,
+    PDF_RENDER_CACHE_MEMORY_BYTES,
+    PDF_RENDER_CACHE_PATH,
+    PDF_STYLE_PATH,
+    PDF_TEMPLATE_PATH,
+)
+from .fonts import bundled_fonts
+
+LOGGER = logging.getLogger(__name__)
+
+# Bump when the render pipeline changes in a way that alters output bytes, or
+# when entries need data older ones lack (2: page counts).
+RENDER_CACHE_SCHEMA = 2
+
+
+def _json_default(value: Any) -> Any:
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, Decimal):
+        return str(value)
+    if isinstance(value, (set, frozenset)):
+        return sorted(value, key=str)
+    if isinstance(value, bytes):
+        return sha256(value).hexdigest()
+    return str(value)
+
+
+def canonical_json(value: Any) -> str:
+    """Serialize a template context into a stable JSON string."""
+    return json.dumps(
+        value,
+        sort_keys=True,
+        separators=(",", ":"),
+        ensure_ascii=False,
+        default=_json_default,
+    )
+
+
+_DIGESTS: dict[Path, tuple[tuple[int, int], str]] = {}
+_DIGESTS_LOCK = threading.Lock()
+
+
+def file_version(path: Path, auto_reload: bool = PDF_AUTO_RELOAD) -> str:
+    """Return the sha256 of a source file, hashed once per process.
+
+    With ``auto_reload`` the file is stat-ed on every call and re-hashed when
+    it changes, mirroring the template registry's development mode.
+    """
+    cached = _DIGESTS.get(path)
+    if cached is not None and not auto_reload:
+        return cached[1]
+
+    try:
+        stat_result = os.stat(path)
+    except OSError:
+        return "missing"
+    signature = (stat_result.st_mtime_ns, stat_result.st_size)
+    if cached is not None and cached[0] == signature:
+        return cached[1]
+
+    digest = sha256(path.read_bytes()).hexdigest()
+    with _DIGESTS_LOCK:
+        _DIGESTS[path] = (signature, digest)
+    return digest
+
+
+def stylesheet_version() -> str:
+    """Return the digest of ``pdf_styles.css``.
+
+    The file is stat-ed on every call, like the stylesheet cache, so a
+    deployed stylesheet changes the key of the renders that use it.
+    """
+    return file_version(PDF_STYLE_PATH, auto_reload=True)
+
+
+def fonts_version() -> str:
+    """Return one digest over the bundled font files, stat-ed on every call."""
+    digest = sha256()
+    for path in bundled_fonts():
+        digest.update(f"{path.name}:{file_version(path, auto_reload=True)}\n".encode("utf-8"))
+    return digest.hexdigest()
+
+
+def template_version(template_name: str | None) -> str:
+    """Return the source digest of a contract template (``None`` for the generic one)."""
+    return file_version(PDF_TEMPLATE_PATH.parent / (template_name or PDF_TEMPLATE_PATH.name))
+
+
+_ENGINE_VERSION: str | None = None
+
+
+def _engine_version() -> str:
+    global _ENGINE_VERSION
+    if _ENGINE_VERSION is None:
+        try:
+            _ENGINE_VERSION = importlib_metadata.version("weasyprint")
+        except importlib_metadata.PackageNotFoundError:
+            _ENGINE_VERSION = "unknown"
+    return _ENGINE_VERSION
+
+
+def build_render_key(
+    context: Mapping[str, Any],
+    template_name: str | None,
+    metadata: Mapping[str, Any] | None = None,
+    options: Mapping[str, Any] | None = None,
+) -> str:
+    """Return the cache key for a render.
+
+    The key covers the normalized template context, the template,
+    stylesheet and bundled font sources, pinned document metadata, render
+    options and the WeasyPrint version.
+    """
+    key_material = {
+        "schema": RENDER_CACHE_SCHEMA,
+        "engine": _engine_version(),
+        "template": template_name or PDF_TEMPLATE_PATH.name,
+        "template_version": template_version(template_name),
+        "stylesheet_version": stylesheet_version(),
+        "fonts_version": fonts_version(),
+        "metadata": dict(metadata or {}),
+        "options": dict(options or {}),
+        "context": context,
+    }
+    return sha256(canonical_json(key_material).encode("utf-8")).hexdigest()
+
+
+class LRUByteCache:
+    """Thread-safe in-memory LRU bounded by the total size of its values.
+
+    Values are ``bytes`` by default; pass ``sizeof`` to store other objects.
+    """
+
+    def __init__(self, max_bytes: int, sizeof: Callable[[Any], int] = len) -> None:
+        self.max_bytes = max(0, max_bytes)
+        self.current_bytes = 0
+        self._sizeof = sizeof
+        self._entries: OrderedDict[str, Any] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: str) -> Any:
+        with self._lock:
+            value = self._entries.get(key)
+            if value is not None:
+                self._entries.move_to_end(key)
+            return value
+
+    def put(self, key: str, value: Any) -> None:
+        size = self._sizeof(value)
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self.current_bytes -= self._sizeof(previous)
+            self._entries[key] = value
+            self.current_bytes += size
+            while self.current_bytes > self.max_bytes and self._entries:
+                _, evicted = self._entries.popitem(last=False)
+                self.current_bytes -= self._sizeof(evicted)
+
+    def pop(self, key: str) -> Any:
+        with self._lock:
+            value = self._entries.pop(key, None)
+            if value is not None:
+                self.current_bytes -= self._sizeof(value)
+            return value
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self.current_bytes = 0
+
+
+class DiskRenderCache:
+    """Directory of cached renders with size-based LRU eviction.
+
+    Entries are ``<key>.pdf`` files written atomically, with the page count
+    in a ``<key>.pages`` sidecar written first. Reads refresh the file's
+    mtime, and once the directory grows past ``max_bytes`` the least
+    recently used files are removed. The directory may be shared by several
+    worker processes.
+    """
+
+    def __init__(self, directory: Path, max_bytes: int) -> None:
+        self.directory = directory
+        self.max_bytes = max(0, max_bytes)
+        self._lock = threading.Lock()
+        self._approx_bytes: int | None = None
+
+    def _entry_path(self, key: str) -> Path:
+        return self.directory / f"{key}.pdf"
+
+    @staticmethod
+    def _pages_path(entry_path: Path) -> Path:
+        return entry_path.with_suffix(".pages")
+
+    def get(self, key: str) -> tuple[bytes, int | None] | None:
+        """Return ``(content, pages)``; ``pages`` is None for entries without a sidecar."""
+        entry_path = self._entry_path(key)
+        try:
+            content = entry_path.read_bytes()
+        except FileNotFoundError:
+            return None
+        except OSError as error:
+            LOGGER.warning("Failed to read cached render %s: %s", entry_path, error)
+            return None
+        try:
+            pages: int | None = int(self._pages_path(entry_path).read_text(encoding="ascii"))
+        except (OSError, ValueError):
+            pages = None
+        try:
+            os.utime(entry_path)
+        except OSError:
+            pass
+        return content, pages
+
+    def put(self, key: str, value: bytes, pages: int | None = None) -> None:
+        if len(value) > self.max_bytes:
+            return
+        entry_path = self._entry_path(key)
+        temp_path = entry_path.with_name(f".{entry_path.name}.{uuid4().hex}.tmp")
+        try:
+            self.directory.mkdir(parents=True, exist_ok=True)
+            if pages is not None:
+                # Renders of one key are identical, so a concurrent writer
+                # can only replace the sidecar with the same count.
+                self._pages_path(entry_path).write_text(str(pages), encoding="ascii")
+            with open(temp_path, "wb") as handle:
+                handle.write(value)
+            os.replace(temp_path, entry_path)
+        except OSError as error:
+            LOGGER.warning("Failed to write cached render %s: %s", entry_path, error)
+            return
+        finally:
+            if temp_path.exists():
+                temp_path.unlink()
+
+        with self._lock:
+            if self._approx_bytes is None:
+                self._approx_bytes = self._scan_total()
+            else:
+                self._approx_bytes += len(value)
+            if self._approx_bytes > self.max_bytes:
+                self._approx_bytes = self._evict()
+
+    def _entries(self) -> list[tuple[float, int, Path]]:
+        entries: list[tuple[float, int, Path]] = []
+        try:
+            with os.scandir(self.directory) as iterator:
+                for entry in iterator:
+                    if not entry.name.endswith(".pdf") or not entry.is_file():
+                        continue
+                    try:
+                        stat_result = entry.stat()
+                    except OSError:
+                        continue
+                    entries.append((stat_result.st_mtime, stat_result.st_size, Path(entry.path)))
+        except FileNotFoundError:
+            pass
+        return entries
+
+    def _scan_total(self) -> int:
+        return sum(size for _, size, _ in self._entries())
+
+    def _evict(self) -> int:
+        """Delete least recently used entries until under budget; returns the new total."""
+        entries = sorted(self._entries())
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in entries:
+            if total <= self.max_bytes:
+                break
+            try:
+                path.unlink()
+            except FileNotFoundError:
+                pass
+            except OSError as error:
+                LOGGER.warning("Failed to evict cached render %s: %s", path, error)
+                continue
+            self._pages_path(path).unlink(missing_ok=True)
+            total -= size
+        return total
+
+    def clear(self) -> None:
+        with self._lock:
+            for _, _, path in self._entries():
+                try:
+                    path.unlink()
+                    self._pages_path(path).unlink(missing_ok=True)
+                except OSError:
+                    pass
+            self._approx_bytes = 0
+
+
+@dataclass
+class RenderCacheStats:
+    memory_hits: int = 0
+    disk_hits: int = 0
+    misses: int = 0
+    stores: int = 0
+
+
+class RenderCache:
+    """Two-tier cache of rendered PDF bytes and page counts keyed by ``build_render_key``.
+
+    Args:
+        memory_bytes: Budget of the in-process tier; 0 disables it.
+        disk_path: Directory of the shared tier; None disables it.
+        disk_bytes: Budget of the shared tier.
+        enabled: Master switch; a disabled cache never hits or stores.
+    """
+
+    def __init__(
+        self,
+        memory_bytes: int = PDF_RENDER_CACHE_MEMORY_BYTES,
+        disk_path: Path | None = PDF_RENDER_CACHE_PATH,
+        disk_bytes: int = PDF_RENDER_CACHE_DISK_BYTES,
+        enabled: bool = PDF_RENDER_CACHE_ENABLED,
+    ) -> None:
+        self.enabled = enabled
+        # Memory entries are ``(content, pages)`` tuples.
+        self.memory = LRUByteCache(memory_bytes, sizeof=lambda entry: len(entry[0])) if memory_bytes > 0 else None
+        self.disk = DiskRenderCache(disk_path, disk_bytes) if disk_path is not None and disk_bytes > 0 else None
+        self.stats = RenderCacheStats()
+
+    def lookup(self, key: str) -> tuple[bytes, int | None] | None:
+        """Return the cached ``(content, pages)``; ``pages`` may be None for older entries."""
+        if not self.enabled:
+            return None
+        if self.memory is not None:
+            entry = self.memory.get(key)
+            if entry is not None:
+                self.stats.memory_hits += 1
+                return entry
+        if self.disk is not None:
+            entry = self.disk.get(key)
+            if entry is not None:
+                self.stats.disk_hits += 1
+                if self.memory is not None:
+                    self.memory.put(key, entry)
+                return entry
+        self.stats.misses += 1
+        return None
+
+    def get(self, key: str) -> bytes | None:
+        entry = self.lookup(key)
+        return entry[0] if entry is not None else None
+
+    def put(self, key: str, content: bytes, pages: int | None = None) -> None:
+        if not self.enabled:
+            return
+        if self.memory is not None:
+            self.memory.put(key, (content, pages))
+        if self.disk is not None:
+            self.disk.put(key, content, pages)
+        self.stats.stores += 1
+
+    def clear(self) -> None:
+        if self.memory is not None:
+            self.memory.clear()
+        if self.disk is not None:
+            self.disk.clear()
+        self.stats = RenderCacheStats()
+
+
+_RENDER_CACHE = RenderCache()
+
+
+def get_render_cache() -> RenderCache:
+    """Return the process-wide render cache."""
+    return _RENDER_CACHE
+
+
+def configure_render_cache(enabled: bool) -> RenderCache:
+    """Enable or disable the process-wide render cache at runtime."""
+    _RENDER_CACHE.enabled = enabled
+    return _RENDER_CACHE
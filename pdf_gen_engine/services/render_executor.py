@@ -0,0 +1,741 @@
+"""Process-pool executor for CPU-bound PDF rendering.
+
+WeasyPrint layout is pure Python and holds the GIL, so rendering in a thread
+of the API process slows every other request. The executor runs renders in a
+pool of worker processes with a bounded queue and recycles workers after a
+fixed number of tasks. Route handlers use the async ``render`` facade.
+
+Workers are warmed up (see ``warmup``) before they take renders. By default
+they are forked from a fork server that warmed up once, so they start with
+WeasyPrint, fonts and templates already loaded and share those pages
+copy-on-write. ``RenderExecutor.start`` waits until every worker has
+reported ready.
+
+Each task runs under the limits in ``render_limits``: a render that runs too
+long or out of memory fails with a ``RenderLimitError``, and the pool is
+replaced once a worker's resident memory passes ``PDF_RENDER_MAX_RSS_MB``.
+When the CPU-time backstop kills a worker stuck in native code, the pool
+breaks and every task in it fails with ``BrokenExecutor``. The task that has
+run past ``PDF_RENDER_TIMEOUT_SECONDS`` fails with ``RenderTimeoutError``.
+The others go back to the front of their queue and run on the new pool.
+
+Large signature images in a task's payload are not pickled: the executor
+exports them to shared memory (see ``utils.shared_assets``) and the task
+carries short references its worker reads the image bytes through.
+
+Tasks carry a priority class (see ``render_priority``). The executor keeps
+them in its own per-class queues and only hands a task to the pool when a
+worker is free: queued interactive tasks always go first, and batch tasks
+never take the last ``PDF_RENDER_INTERACTIVE_RESERVED`` workers, so however
+many batch renders are queued, an interactive render finds a worker that is
+not busy with one. An executor with no worker process beyond the reserved
+ones gets one extra worker, started on the first batch render, and at most
+one batch render runs at a time. In-process mode (``PDF_RENDER_WORKERS=0``) renders on a single
+thread, since renders share one font configuration and parsed stylesheet
+(see ``render_assets``); queued interactive renders still go first, but one
+may wait for a running batch render.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import multiprocessing
+import os
+import threading
+from collections import deque
+from concurrent.futures import (
+    BrokenExecutor,
+    Executor,
+    Future,
+    InvalidStateError,
+    ProcessPoolExecutor,
+    ThreadPoolExecutor,
+)
+from dataclasses import dataclass, field
+from time import perf_counter
+from typing import Any, Callable, Mapping
+
+from ..config import (
+    PDF_FORBID_NETWORK,
+    PDF_RENDER_BATCH_QUEUE_SIZE,
+    PDF_RENDER_INTERACTIVE_RESERVED,
+    PDF_RENDER_MAX_RSS_MB,
+    PDF_RENDER_MAX_TASKS_PER_CHILD,
+    PDF_RENDER_PREWARM,
+    PDF_RENDER_QUEUE_SIZE,
+    PDF_RENDER_READY_TIMEOUT,
+    PDF_RENDER_START_METHOD,
+    PDF_RENDER_TIMEOUT_SECONDS,
+    PDF_RENDER_WORKERS,
+    PDF_SHARED_ASSETS,
+)
+from ..errors import RenderMemoryError, RenderQueueFullError, RenderTimeoutError
+from ..utils.pdf_utils import StoredPdf
+from ..utils.shared_assets import SharedAssetExporter, SharedAssetRef, accept_shared_assets, shared_memory_available
+from .pdf_service import PdfOutputMode, render_contract_pdf
+from .preview import PreviewMode, render_contract_preview
+from .render_limits import MB, WorkerUsage, apply_memory_limit, run_with_limits
+from .render_priority import (
+    RENDER_PRIORITIES,
+    RENDER_PRIORITY_BATCH,
+    RENDER_PRIORITY_INTERACTIVE,
+    resolve_render_priority,
+)
+from .render_stats import RenderReport, contract_type_label, get_render_stats
+from .warmup import warm_up_quietly
+
+LOGGER = logging.getLogger(__name__)
+
+PREWARM_MODULE = "pdf_gen_engine.services.prewarm"
+SUPPORTED_START_METHODS = ("forkserver", "spawn")
+# Times a task that was not the cause of a broken pool is run again.
+BROKEN_POOL_RETRIES = 1
+
+
+def _chain_future(source: Future, transform: Callable[[Any], Any]) -> Future:
+    """Return a future resolved with ``transform(source.result())``.
+
+    Cancelling the returned future cancels ``source``.
+    """
+    target: Future = Future()
+
+    def _cancel_source(done: Future) -> None:
+        if done.cancelled():
+            source.cancel()
+
+    def _copy_outcome(done: Future) -> None:
+        if target.done():
+            return
+        if done.cancelled():
+            target.cancel()
+            return
+        error = done.exception()
+        if error is not None:
+            target.set_exception(error)
+        else:
+            target.set_result(transform(done.result()))
+
+    target.add_done_callback(_cancel_source)
+    source.add_done_callback(_copy_outcome)
+    return target
+
+
+def _init_render_worker(ready_queue: Any = None) -> None:
+    """Warm a worker process up, then report it ready to the parent.
+
+    Workers forked from a warmed fork server find the work already done.
+    """
+    from ..utils.template_registry import get_template_registry
+    from .url_fetcher import install_network_guard
+
+    if PDF_FORBID_NETWORK:
+        install_network_guard()
+    apply_memory_limit()
+    report = warm_up_quietly() if PDF_RENDER_PREWARM else None
+    if report is None:
+        get_template_registry().warm()
+    if ready_queue is not None:
+        ready_queue.put((os.getpid(), report))
+
+
+def _run_in_worker(
+    fn: Callable[..., Any],
+    args: tuple[Any, ...],
+    shared_refs: list[SharedAssetRef],
+) -> tuple[Any, WorkerUsage]:
+    """Run a task on a worker process with its shared images accepted."""
+    with accept_shared_assets(shared_refs):
+        return run_with_limits(fn, args)
+
+
+def _noop() -> None:
+    return None
+
+
+def _identity(value: Any) -> Any:
+    return value
+
+
+def _first_item(outcome: tuple[Any, WorkerUsage]) -> Any:
+    return outcome[0]
+
+
+@dataclass
+class _QueuedTask:
+    """A task waiting in the executor's queue for a free worker."""
+
+    priority: str
+    task: tuple[Any, ...]
+    transform: Callable[[Any], Any]
+    shared_refs: list[SharedAssetRef] = field(default_factory=list)
+    future: Future = field(default_factory=Future)
+    queued_at: float = field(default_factory=perf_counter)
+    # When the task was handed to the pool; the pool only gets a task when a
+    # worker is free, so it started running then.
+    started_at: float = 0.0
+    retries: int = 0
+
+
+def _process_context(start_method: str) -> Any:
+    if start_method not in SUPPORTED_START_METHODS:
+        LOGGER.warning("Unsupported PDF render start method %r; using spawn", start_method)
+        start_method = "spawn"
+    context = multiprocessing.get_context(start_method)
+    if start_method == "forkserver" and PDF_RENDER_PREWARM:
+        # Only takes effect if the fork server has not been started yet.
+        context.set_forkserver_preload([PREWARM_MODULE])
+    return context
+
+
+class RenderExecutor:
+    """Bounded render executor backed by a process pool.
+
+    Args:
+        workers: Number of worker processes; 0 renders one at a time in a
+            single background thread of the current process.
+        queue_size: Maximum number of interactive renders queued or running
+            at once.
+        max_tasks_per_child: Renders a worker process handles before it is
+            replaced; 0 disables recycling.
+        start_method: "forkserver" (fork warm workers from a warmed server)
+            or "spawn".
+        max_rss_mb: Resident memory, in MB, past which a worker process gets
+            the pool replaced after its render; 0 disables the check.
+        shared_assets: Hand large payload signatures to worker processes
+            through shared memory instead of pickling them.
+        interactive_reserved: Workers batch renders never occupy. When no
+            worker is left for them, one extra worker is added that runs at
+            most one batch render at a time. Ignored in-process.
+        batch_queue_size: Maximum number of batch renders queued or running
+            at once.
+    """
+
+    def __init__(
+        self,
+        workers: int = PDF_RENDER_WORKERS,
+        queue_size: int = PDF_RENDER_QUEUE_SIZE,
+        max_tasks_per_child: int = PDF_RENDER_MAX_TASKS_PER_CHILD,
+        start_method: str = PDF_RENDER_START_METHOD,
+        max_rss_mb: int = PDF_RENDER_MAX_RSS_MB,
+        shared_assets: bool = PDF_SHARED_ASSETS,
+        interactive_reserved: int = PDF_RENDER_INTERACTIVE_RESERVED,
+        batch_queue_size: int = PDF_RENDER_BATCH_QUEUE_SIZE,
+    ) -> None:
+        self.workers = max(0, workers)
+        self.queue_size = max(1, queue_size)
+        self.max_tasks_per_child = max_tasks_per_child if max_tasks_per_child > 0 else None
+        self.start_method = start_method
+        self.max_rss_bytes = max_rss_mb * MB if max_rss_mb > 0 else None
+        self.recycles = 0
+        self.shared_assets = (
+            SharedAssetExporter() if shared_assets and self.workers and shared_memory_available() else None
+        )
+        # Tasks handed to the pool at once; one per worker process. In-process
+        # renders run one at a time on a single thread.
+        self.capacity = max(1, self.workers)
+        self.batch_workers = self.capacity - max(0, interactive_reserved)
+        if self.workers == 0:
+            self.batch_workers = self.capacity
+        elif self.batch_workers <= 0:
+            # A dedicated worker for batch renders; the pool only starts it
+            # when a batch render arrives.
+            self.capacity += 1
+            self.batch_workers = 1
+        self._slots = {
+            RENDER_PRIORITY_INTERACTIVE: threading.BoundedSemaphore(self.queue_size),
+            RENDER_PRIORITY_BATCH: threading.BoundedSemaphore(max(1, batch_queue_size)),
+        }
+        self._queued: dict[str, deque[_QueuedTask]] = {priority: deque() for priority in RENDER_PRIORITIES}
+        self._running = {priority: 0 for priority in RENDER_PRIORITIES}
+        self._queue_condition = threading.Condition()
+        self._lock = threading.Lock()
+        self._pool: Executor | None = None
+        self._ready_queue: Any = None
+        self._ready_condition = threading.Condition()
+        self._ready_workers: dict[int, dict[str, float] | None] = {}
+        self._started = False
+
+    def _get_pool(self) -> Executor:
+        if self._pool is None:
+            with self._lock:
+                if self._pool is None:
+                    if self.workers == 0:
+                        self._pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix="pdf-render")
+                    else:
+                        context = _process_context(self.start_method)
+                        self._ready_queue = context.SimpleQueue()
+                        threading.Thread(
+                            target=self._collect_ready,
+                            args=(self._ready_queue,),
+                            name="pdf-render-ready",
+                            daemon=True,
+                        ).start()
+                        self._pool = ProcessPoolExecutor(
+                            max_workers=self.capacity,
+                            mp_context=context,
+                            initializer=_init_render_worker,
+                            initargs=(self._ready_queue,),
+                            max_tasks_per_child=self.max_tasks_per_child,
+                        )
+                    LOGGER.info(
+                        "Started PDF render executor (workers=%d, queue_size=%d)",
+                        self.workers,
+                        self.queue_size,
+                    )
+        return self._pool
+
+    def _discard_pool(self, pool: Executor, recycle: bool = False) -> bool:
+        """Drop a pool so the next submission starts fresh workers.
+
+        A broken pool has its pending renders cancelled; a recycled pool
+        finishes them before its workers exit.
+
+        Returns:
+            False if ``pool`` had already been replaced.
+        """
+        with self._lock:
+            if self._pool is not pool:
+                return False
+            self._pool = None
+            self._started = False
+            ready_queue, self._ready_queue = self._ready_queue, None
+            if recycle:
+                self.recycles += 1
+        with self._ready_condition:
+            self._ready_workers.clear()
+        if not recycle:
+            LOGGER.warning("PDF render pool is broken; restarting workers on next render")
+        pool.shutdown(wait=False, cancel_futures=not recycle)
+        if ready_queue is not None:
+            ready_queue.put(None)
+        return True
+
+    def _check_worker(self, pool: Executor, done: Future) -> None:
+        """Replace the pool when a task ran out of memory or left its worker too large."""
+        error = done.exception()
+        if isinstance(error, RenderMemoryError):
+            if self._discard_pool(pool, recycle=True):
+                LOGGER.warning("PDF render ran out of memory; replacing render workers")
+            return
+        if error is not None or self.max_rss_bytes is None:
+            return
+        usage: WorkerUsage = done.result()[1]
+        if usage.rss_bytes is not None and usage.rss_bytes > self.max_rss_bytes:
+            if self._discard_pool(pool, recycle=True):
+                LOGGER.warning(
+                    "PDF render worker %d uses %d MB (limit %d MB); replacing render workers",
+                    usage.pid,
+                    usage.rss_bytes // MB,
+                    self.max_rss_bytes // MB,
+                )
+
+    def _collect_ready(self, ready_queue: Any) -> None:
+        """Record ready reports from worker processes until the pool stops."""
+        while True:
+            try:
+                message = ready_queue.get()
+            except (EOFError, OSError):
+                return
+            if message is None:
+                return
+            pid, report = message
+            with self._ready_condition:
+                self._ready_workers[pid] = report
+                self._ready_condition.notify_all()
+            if report is None:
+                LOGGER.info("PDF render worker %d ready (not warmed up)", pid)
+            else:
+                LOGGER.info("PDF render worker %d ready; warm-up took %.0f ms", pid, report.get("total_ms", 0.0))
+
+    @property
+    def ready_workers(self) -> int:
+        """Number of worker processes that have reported ready."""
+        with self._ready_condition:
+            return len(self._ready_workers)
+
+    def start(self, timeout: float | None = PDF_RENDER_READY_TIMEOUT) -> int:
+        """Start the workers and wait until each has warmed up and reported ready.
+
+        Safe to call from several threads; later calls only wait.
+
+        Returns:
+            The number of workers ready when the call returns.
+        """
+        pool = self._get_pool()
+        with self._lock:
+            first_call = not self._started
+            self._started = True
+
+        if self.workers == 0:
+            if first_call and PDF_RENDER_PREWARM:
+                # Renders share the calling process, so keep its GC as is.
+                pool.submit(warm_up_quietly, True, False).result(timeout)
+            return 1
+
+        if first_call:
+            # Worker processes are spawned on demand; one no-op per worker
+            # starts them all.
+            for _ in range(self.workers):
+                pool.submit(_noop)
+        with self._ready_condition:
+            self._ready_condition.wait_for(lambda: len(self._ready_workers) >= self.workers, timeout)
+            ready = len(self._ready_workers)
+        if ready < self.workers:
+            LOGGER.warning("Only %d of %d PDF render workers reported ready", ready, self.workers)
+        return ready
+
+    def submit(
+        self,
+        contract_data: Mapping[str, Any],
+        output_mode: PdfOutputMode = "path",
+        profile: str | None = None,
+        priority: str | None = None,
+    ) -> Future:
+        """Queue a render and return its future.
+
+        Raises:
+            RenderQueueFullError: When the priority class's queue is full.
+        """
+        future = self.submit_with_report(contract_data, output_mode, profile=profile, priority=priority)
+        return _chain_future(future, lambda outcome: outcome[0])
+
+    def submit_with_report(
+        self,
+        contract_data: Mapping[str, Any],
+        output_mode: PdfOutputMode = "path",
+        prerender: Mapping[str, Any] | None = None,
+        profile: str | None = None,
+        priority: str | None = None,
+    ) -> Future:
+        """Queue a render whose future resolves to ``(result, RenderReport)``.
+
+        The report is recorded in this process's engine statistics when the
+        render finishes, whichever worker process ran it. ``prerender`` is a
+        send-time pre-render record the render may stamp instead of laying
+        the document out again; ``profile`` names the output profile and
+        ``priority`` the priority class (interactive by default).
+
+        Raises:
+            RenderQueueFullError: When the priority class's queue is full.
+        """
+        contract_type = contract_type_label(contract_data)
+        future = self.run(
+            render_contract_pdf,
+            dict(contract_data),
+            output_mode,
+            dict(prerender) if prerender else None,
+            profile,
+            priority=priority,
+        )
+
+        def _record(done: Future) -> None:
+            if done.cancelled():
+                return
+            error = done.exception()
+            if error is not None:
+                get_render_stats().record_failure(contract_type, error)
+            else:
+                get_render_stats().record(done.result()[1])
+
+        future.add_done_callback(_record)
+        return future
+
+    def run(self, fn: Callable[..., Any], *args: Any, priority: str | None = None) -> Future:
+        """Queue a picklable callable on the render workers.
+
+        On worker processes the call runs under the render time and memory
+        limits, so its future may fail with a ``RenderLimitError``. The task
+        waits in the executor's queue for its priority class until a worker
+        may take it; cancelling its future meanwhile drops it.
+
+        Raises:
+            RenderQueueFullError: When the priority class's queue is full.
+            ValueError: If ``priority`` is not a known priority class.
+        """
+        priority = resolve_render_priority(priority)
+        if not self._slots[priority].acquire(blocking=False):
+            raise RenderQueueFullError(f"PDF render queue is full ({priority} renders)")
+
+        shared_refs: list[SharedAssetRef] = []
+        if self.workers == 0:
+            task = (fn, *args)
+        else:
+            if self.shared_assets is not None and args and isinstance(args[0], Mapping):
+                try:
+                    payload, shared_refs = self.shared_assets.export_payload(args[0])
+                except BaseException:
+                    self._slots[priority].release()
+                    raise
+                args = (payload, *args[1:])
+            task = (_run_in_worker, fn, args, shared_refs)
+
+        queued = _QueuedTask(priority, task, _identity if self.workers == 0 else _first_item, shared_refs)
+        with self._queue_condition:
+            self._queued[priority].append(queued)
+            get_render_stats().record_queue(priority, queued=1)
+        queued.future.add_done_callback(lambda done: self._drop_cancelled(queued))
+        self._dispatch()
+        return queued.future
+
+    def _release(self, queued: _QueuedTask) -> None:
+        self._slots[queued.priority].release()
+        if queued.shared_refs:
+            self.shared_assets.release(queued.shared_refs)
+
+    def _drop_cancelled(self, queued: _QueuedTask) -> None:
+        """Remove a task whose future was cancelled before a worker took it."""
+        if not queued.future.cancelled():
+            return
+        with self._queue_condition:
+            try:
+                self._queued[queued.priority].remove(queued)
+            except ValueError:
+                # Already handed to the pool, which releases it when done.
+                return
+            get_render_stats().record_queue(queued.priority, queued=-1)
+            self._queue_condition.notify_all()
+        self._release(queued)
+
+    def _next_task(self) -> _QueuedTask | None:
+        """Pop the task the next free worker should run, if a worker is free.
+
+        Called with ``_queue_condition`` held.
+        """
+        if sum(self._running.values()) >= self.capacity:
+            return None
+        interactive = self._queued[RENDER_PRIORITY_INTERACTIVE]
+        if interactive:
+            return interactive.popleft()
+        batch = self._queued[RENDER_PRIORITY_BATCH]
+        if batch and self._running[RENDER_PRIORITY_BATCH] < self.batch_workers:
+            return batch.popleft()
+        return None
+
+    def _dispatch(self) -> None:
+        """Hand queued tasks to the pool while workers are free."""
+        while True:
+            with self._queue_condition:
+                queued = self._next_task()
+                if queued is None:
+                    return
+                self._running[queued.priority] += 1
+                wait_ms = (perf_counter() - queued.queued_at) * 1000
+                get_render_stats().record_queue(queued.priority, queued=-1, running=1, wait_ms=wait_ms)
+                if not any(self._queued.values()):
+                    self._queue_condition.notify_all()
+            self._submit_to_pool(queued)
+
+    def _submit_to_pool(self, queued: _QueuedTask) -> None:
+        pool = self._get_pool()
+        try:
+            try:
+                source = pool.submit(*queued.task)
+            except BrokenExecutor:
+                self._discard_pool(pool)
+                pool = self._get_pool()
+                source = pool.submit(*queued.task)
+        except BaseException as error:
+            # Dispatch may run on a pool thread, so fail the task's future
+            # rather than raising.
+            self._finish(queued)
+            try:
+                queued.future.set_exception(error)
+            except InvalidStateError:
+                pass
+            return
+
+        def _cancel_source(target: Future) -> None:
+            if target.cancelled():
+                source.cancel()
+
+        def _on_done(done: Future) -> None:
+            error = None if done.cancelled() else done.exception()
+            if isinstance(error, BrokenExecutor):
+                self._discard_pool(pool)
+                error = self._broken_pool_error(queued, error)
+                if error is None:
+                    self._dispatch()
+                    return
+            elif not done.cancelled() and self.workers:
+                self._check_worker(pool, done)
+            self._finish(queued)
+            self._resolve(queued, done, error)
+            self._dispatch()
+
+        queued.started_at = perf_counter()
+        queued.future.add_done_callback(_cancel_source)
+        source.add_done_callback(_on_done)
+
+    @staticmethod
+    def _resolve(queued: _QueuedTask, done: Future, error: BaseException | None) -> None:
+        """Copy a pool future's outcome to the task's future."""
+        if queued.future.done():
+            return
+        try:
+            if done.cancelled():
+                queued.future.cancel()
+            elif error is not None:
+                queued.future.set_exception(error)
+            else:
+                queued.future.set_result(queued.transform(done.result()))
+        except InvalidStateError:
+            pass
+
+    def _broken_pool_error(self, queued: _QueuedTask, error: BaseException) -> BaseException | None:
+        """Decide what a task caught in a broken pool fails with.
+
+        The CPU-time backstop only fires once a render has run past its
+        time limit, so a task running that long is the one that was killed
+        and fails with ``RenderTimeoutError``. Any other task goes back to
+        the front of its queue, keeping its queue slot and shared images,
+        and None is returned.
+        """
+        elapsed = perf_counter() - queued.started_at
+        if self.workers and PDF_RENDER_TIMEOUT_SECONDS > 0 and elapsed >= PDF_RENDER_TIMEOUT_SECONDS:
+            timeout_error = RenderTimeoutError(
+                f"PDF render exceeded the {PDF_RENDER_TIMEOUT_SECONDS:g} s time limit; its worker was stopped"
+            )
+            timeout_error.__cause__ = error
+            return timeout_error
+        if queued.retries >= BROKEN_POOL_RETRIES or queued.future.done():
+            return error
+        queued.retries += 1
+        with self._queue_condition:
+            self._running[queued.priority] -= 1
+            self._queued[queued.priority].appendleft(queued)
+            get_render_stats().record_queue(queued.priority, queued=1, running=-1)
+        LOGGER.warning("Running a %s render again after its render pool broke", queued.priority)
+        return None
+
+    def _finish(self, queued: _QueuedTask) -> None:
+        with self._queue_condition:
+            self._running[queued.priority] -= 1
+            get_render_stats().record_queue(queued.priority, running=-1)
+        self._release(queued)
+
+    async def render(
+        self,
+        contract_data: Mapping[str, Any],
+        output_mode: PdfOutputMode = "path",
+        profile: str | None = None,
+        priority: str | None = None,
+    ) -> str | bytes | StoredPdf:
+        """Render a contract PDF without blocking the event loop."""
+        return await asyncio.wrap_future(self.submit(contract_data, output_mode, profile, priority))
+
+    async def render_with_report(
+        self,
+        contract_data: Mapping[str, Any],
+        output_mode: PdfOutputMode = "path",
+        profile: str | None = None,
+        priority: str | None = None,
+    ) -> tuple[str | bytes | StoredPdf, RenderReport]:
+        """Like ``render`` but also return the render's ``RenderReport``."""
+        return await asyncio.wrap_future(
+            self.submit_with_report(contract_data, output_mode, profile=profile, priority=priority)
+        )
+
+    async def render_preview(
+        self,
+        contract_data: Mapping[str, Any],
+        output_mode: PreviewMode = "html",
+        profile: str | None = None,
+    ) -> str | bytes:
+        """Render a draft preview; HTML previews skip the worker processes."""
+        if output_mode == "html":
+            return await asyncio.to_thread(render_contract_preview, contract_data, output_mode)
+        return await asyncio.wrap_future(self.run(render_contract_preview, contract_data, output_mode, profile))
+
+    def shutdown(self, wait: bool = True) -> None:
+        """Stop the workers; with ``wait`` queued tasks run first, otherwise they are cancelled."""
+        with self._queue_condition:
+            if wait:
+                self._queue_condition.wait_for(lambda: not any(self._queued.values()))
+            queued = [task for tasks in self._queued.values() for task in tasks]
+        for task in queued:
+            task.future.cancel()
+
+        with self._lock:
+            pool, self._pool = self._pool, None
+            ready_queue, self._ready_queue = self._ready_queue, None
+            self._started = False
+        if pool is not None:
+            pool.shutdown(wait=wait, cancel_futures=not wait)
+        if ready_queue is not None:
+            ready_queue.put(None)
+        with self._ready_condition:
+            self._ready_workers.clear()
+        if self.shared_assets is not None:
+            self.shared_assets.close()
+
+
+_EXECUTOR: RenderExecutor | None = None
+_EXECUTOR_LOCK = threading.Lock()
+
+
+def get_render_executor() -> RenderExecutor:
+    """Return the process-wide render executor, creating it on first use."""
+    global _EXECUTOR
+    if _EXECUTOR is None:
+        with _EXECUTOR_LOCK:
+            if _EXECUTOR is None:
+                _EXECUTOR = RenderExecutor()
+    return _EXECUTOR
+
+
+async def render(
+    contract_data: Mapping[str, Any],
+    output_mode: PdfOutputMode = "path",
+    profile: str | None = None,
+    priority: str | None = None,
+) -> str | bytes | StoredPdf:
+    """Render a contract PDF on the shared executor.
+
+    Args:
+        contract_data: Contract fields used in template rendering.
+        output_mode: Output mode accepted by ``generate_contract_pdf``.
+        profile: Output profile name; defaults to ``PDF_OUTPUT_PROFILE``.
+        priority: "interactive" (default) or "batch"; batch renders only
+            use workers interactive renders leave spare.
+
+    Raises:
+        RenderQueueFullError: When the priority class's queue is at capacity.
+    """
+    return await get_render_executor().render(contract_data, output_mode, profile, priority)
+
+
+async def render_with_report(
+    contract_data: Mapping[str, Any],
+    output_mode: PdfOutputMode = "path",
+    profile: str | None = None,
+    priority: str | None = None,
+) -> tuple[str | bytes | StoredPdf, RenderReport]:
+    """Render on the shared executor and return the result with its report.
+
+    Raises:
+        RenderQueueFullError: When the priority class's queue is at capacity.
+    """
+    return await get_render_executor().render_with_report(contract_data, output_mode, profile, priority)
+
+
+async def render_preview(
+    contract_data: Mapping[str, Any],
+    output_mode: PreviewMode = "html",
+    profile: str | None = None,
+) -> str | bytes:
+    """Render a watermarked draft preview on the shared executor.
+
+    Raises:
+        RenderQueueFullError: When a PDF preview finds the queue at capacity.
+    """
+    return await get_render_executor().render_preview(contract_data, output_mode, profile)
+
+
+def shutdown_render_executor(wait: bool = True) -> None:
+    """Stop the shared executor's workers, if it was started."""
+    global _EXECUTOR
+    with _EXECUTOR_LOCK:
+        executor, _EXECUTOR = _EXECUTOR, None
+    if executor is not None:
+        executor.shutdown(wait=wait)
@@ -0,0 +1,257 @@
+"""Durable render job queue stored in the ``render_jobs`` collection.
+
+API nodes enqueue a job document when a contract is signed, and a pre-render
+job when it is sent; the backfill queues re-renders of signed contracts. Render workers claim jobs with a time-limited lease,
+extend the lease while rendering and acknowledge the job when the contract
+has been finalized. A worker that crashes simply stops renewing its lease,
+so another worker reclaims the job once the lease expires.
+
+Jobs carry the rank of their priority class (see ``render_priority``): sign
+and pre-render jobs are interactive, backfill jobs are batch. Claims take
+interactive jobs first, and a worker can leave batch jobs to others.
+
+The queue works with a synchronous ``pymongo`` collection; API nodes insert
+job documents built by ``build_render_job`` through their own async driver.
+"""
+
+from __future__ import annotations
+
+from datetime import datetime, timedelta, timezone
+from typing import Any, Mapping
+
+from pymongo import ASCENDING, ReturnDocument
+
+from ..config import PDF_RENDER_JOB_LEASE_SECONDS, PDF_RENDER_JOB_MAX_ATTEMPTS
+from .render_priority import (
+    RENDER_PRIORITY_BATCH,
+    RENDER_PRIORITY_INTERACTIVE,
+    RENDER_PRIORITY_RANKS,
+    render_priority_for_rank,
+    resolve_render_priority,
+)
+
+RENDER_JOBS_COLLECTION = "render_jobs"
+
+JOB_QUEUED = "queued"
+JOB_RUNNING = "running"
+JOB_DONE = "done"
+JOB_FAILED = "failed"
+
+JOB_KIND_SIGN = "sign"
+# Send-time layout of a contract, stamped with the signature at sign time.
+JOB_KIND_PRERENDER = "prerender"
+# Re-render of an already signed contract whose PDF is missing or outdated.
+JOB_KIND_BACKFILL = "backfill"
+JOB_ACTIVE_STATUSES = (JOB_QUEUED, JOB_RUNNING)
+JOB_KIND_PRIORITIES = {
+    JOB_KIND_SIGN: RENDER_PRIORITY_INTERACTIVE,
+    JOB_KIND_PRERENDER: RENDER_PRIORITY_INTERACTIVE,
+    JOB_KIND_BACKFILL: RENDER_PRIORITY_BATCH,
+}
+
+RETRY_BACKOFF_SECONDS = 5
+
+# (keys, options) pairs shared by the async API startup hook and workers.
+RENDER_JOB_INDEXES: list[tuple[list[tuple[str, int]], dict[str, Any]]] = [
+    ([("status", ASCENDING), ("availableAt", ASCENDING)], {}),
+    ([("status", ASCENDING), ("priority", ASCENDING), ("availableAt", ASCENDING)], {}),
+    ([("status", ASCENDING), ("leaseExpiresAt", ASCENDING)], {}),
+    ([("contractId", ASCENDING), ("createdAt", ASCENDING)], {}),
+    (
+        [("backfillRunId", ASCENDING), ("status", ASCENDING)],
+        {"partialFilterExpression": {"backfillRunId": {"$exists": True}}},
+    ),
+]
+
+
+def _utcnow() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+def build_render_job(
+    contract_id: Any,
+    payload: Mapping[str, Any],
+    kind: str = JOB_KIND_SIGN,
+    signature_id: Any = None,
+    profile: str | None = None,
+    max_attempts: int = PDF_RENDER_JOB_MAX_ATTEMPTS,
+    now: datetime | None = None,
+    backfill_run_id: Any = None,
+    priority: str | None = None,
+) -> dict[str, Any]:
+    """Build a new queued render job document.
+
+    ``profile`` is the output profile the worker renders with; ``None`` uses
+    the worker's ``PDF_OUTPUT_PROFILE``. ``backfill_run_id`` tags jobs queued
+    by a backfill run so it can track them. ``priority`` overrides the
+    priority class of the job's kind.
+
+    Raises:
+        ValueError: If ``priority`` is not a known priority class.
+    """
+    created_at = now or _utcnow()
+    priority = resolve_render_priority(priority or JOB_KIND_PRIORITIES.get(kind))
+    job = {
+        "kind": kind,
+        "priority": RENDER_PRIORITY_RANKS[priority],
+        "contractId": contract_id,
+        "signatureId": signature_id,
+        "payload": dict(payload),
+        "profile": profile,
+        "status": JOB_QUEUED,
+        "attempts": 0,
+        "maxAttempts": max_attempts,
+        "availableAt": created_at,
+        "leaseOwner": None,
+        "leaseExpiresAt": None,
+        "error": None,
+        "errorCode": None,
+        "result": None,
+        "createdAt": created_at,
+        "updatedAt": created_at,
+    }
+    if backfill_run_id is not None:
+        job["backfillRunId"] = backfill_run_id
+    return job
+
+
+def render_job_priority(job: Mapping[str, Any]) -> str:
+    """Return a job's priority class; jobs queued before priorities use their kind's."""
+    if job.get("priority") is None:
+        return JOB_KIND_PRIORITIES.get(job.get("kind"), RENDER_PRIORITY_INTERACTIVE)
+    return render_priority_for_rank(job["priority"])
+
+
+def serialize_render_job(job: Mapping[str, Any]) -> dict[str, Any]:
+    """Return the client-visible status fields of a job document."""
+    return {
+        "_id": str(job["_id"]),
+        "status": job.get("status"),
+        "attempts": job.get("attempts", 0),
+        "error": job.get("error"),
+        "errorCode": job.get("errorCode"),
+        "createdAt": job.get("createdAt"),
+        "updatedAt": job.get("updatedAt"),
+    }
+
+
+class RenderJobQueue:
+    """Claim/lease/ack operations over a ``render_jobs`` collection.
+
+    Args:
+        collection: A synchronous pymongo collection.
+        lease_seconds: How long a claim stays valid without a heartbeat.
+    """
+
+    def __init__(self, collection: Any, lease_seconds: int = PDF_RENDER_JOB_LEASE_SECONDS) -> None:
+        self.collection = collection
+        self.lease = timedelta(seconds=lease_seconds)
+
+    def ensure_indexes(self) -> None:
+        for keys, options in RENDER_JOB_INDEXES:
+            self.collection.create_index(keys, **options)
+
+    def claim(self, worker_id: str, include_batch: bool = True) -> dict[str, Any] | None:
+        """Lease the next available job, including jobs whose lease expired.
+
+        Interactive jobs are claimed before batch jobs, each oldest first;
+        with ``include_batch=False`` only interactive jobs are claimed.
+        """
+        now = _utcnow()
+        batch_filter = {} if include_batch else {"priority": {"$ne": RENDER_PRIORITY_RANKS[RENDER_PRIORITY_BATCH]}}
+        return self.collection.find_one_and_update(
+            {
+                "$or": [
+                    {"status": JOB_QUEUED, "availableAt": {"$lte": now}, **batch_filter},
+                    {"status": JOB_RUNNING, "leaseExpiresAt": {"$lte": now}, **batch_filter},
+                ]
+            },
+            {
+                "$set": {
+                    "status": JOB_RUNNING,
+                    "leaseOwner": worker_id,
+                    "leaseExpiresAt": now + self.lease,
+                    "startedAt": now,
+                    "updatedAt": now,
+                },
+                "$inc": {"attempts": 1},
+            },
+            sort=[("priority", ASCENDING), ("availableAt", ASCENDING)],
+            return_document=ReturnDocument.AFTER,
+        )
+
+    def extend_lease(self, job_id: Any, worker_id: str) -> bool:
+        """Renew a lease; returns False if the job was reclaimed by another worker."""
+        now = _utcnow()
+        result = self.collection.update_one(
+            {"_id": job_id, "status": JOB_RUNNING, "leaseOwner": worker_id},
+            {"$set": {"leaseExpiresAt": now + self.lease, "updatedAt": now}},
+        )
+        return result.matched_count == 1
+
+    def ack(self, job_id: Any, worker_id: str, result: Mapping[str, Any] | None = None) -> bool:
+        """Mark a leased job as done."""
+        now = _utcnow()
+        update_result = self.collection.update_one(
+            {"_id": job_id, "status": JOB_RUNNING, "leaseOwner": worker_id},
+            {
+                "$set": {
+                    "status": JOB_DONE,
+                    "result": dict(result or {}),
+                    "error": None,
+                    "errorCode": None,
+                    "leaseOwner": None,
+                    "leaseExpiresAt": None,
+                    "finishedAt": now,
+                    "updatedAt": now,
+                }
+            },
+        )
+        return update_result.matched_count == 1
+
+    def fail(
+        self,
+        job: Mapping[str, Any],
+        worker_id: str,
+        error: str,
+        retryable: bool,
+        error_code: str | None = None,
+    ) -> str:
+        """Release a leased job after an error.
+
+        Retryable errors put the job back in the queue with a backoff until
+        ``maxAttempts`` is reached; everything else fails the job permanently.
+        ``error_code`` is a stable name for the error, such as the ``code`` of
+        a ``RenderLimitError``.
+
+        Returns:
+            The job's new status.
+        """
+        now = _utcnow()
+        attempts = int(job.get("attempts") or 0)
+        max_attempts = int(job.get("maxAttempts") or PDF_RENDER_JOB_MAX_ATTEMPTS)
+
+        if retryable and attempts < max_attempts:
+            status = JOB_QUEUED
+            update = {
+                "status": JOB_QUEUED,
+                "availableAt": now + timedelta(seconds=RETRY_BACKOFF_SECONDS * attempts * attempts),
+            }
+        else:
+            status = JOB_FAILED
+            update = {"status": JOB_FAILED, "finishedAt": now}
+
+        self.collection.update_one(
+            {"_id": job["_id"], "status": JOB_RUNNING, "leaseOwner": worker_id},
+            {
+                "$set": {
+                    **update,
+                    "error": error,
+                    "errorCode": error_code,
+                    "leaseOwner": None,
+                    "leaseExpiresAt": None,
+                    "updatedAt": now,
+                }
+            },
+        )
+        return status
@@ -0,0 +1,259 @@
+"""Time and memory limits for renders in worker processes.
+
+A pathological payload (a huge free-text field, a very large image) can make
+WeasyPrint allocate gigabytes or lay out for minutes. Render executor tasks
+run through ``run_with_limits`` in their worker process, which
+
+* raises ``RenderTimeoutError`` from a ``SIGALRM`` timer once a render runs
+  past ``PDF_RENDER_TIMEOUT_SECONDS``; a soft ``RLIMIT_CPU`` set for the same
+  render lets the kernel stop the process if it is stuck in native code,
+* turns ``MemoryError`` (for example from the ``RLIMIT_AS`` set by
+  ``apply_memory_limit``) into ``RenderMemoryError``,
+* reports the process's resident memory with each result, so the executor
+  can replace workers that grew past ``PDF_RENDER_MAX_RSS_MB``, and
+* with ``PDF_RENDER_TRACEMALLOC`` keeps tracemalloc snapshots of the
+  heaviest renders for later inspection.
+
+The limits rely on POSIX signals and resource limits. Renders in a thread
+(``PDF_RENDER_WORKERS=0``) or on platforms without them run unbounded.
+"""
+
+from __future__ import annotations
+
+import logging
+import os
+import signal
+import sys
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager, nullcontext
+from dataclasses import dataclass
+from pathlib import Path
+from time import perf_counter
+from typing import Any, Callable, Iterator, Mapping
+
+from ..config import (
+    PDF_RENDER_MEMORY_LIMIT_MB,
+    PDF_RENDER_TIMEOUT_GRACE_SECONDS,
+    PDF_RENDER_TIMEOUT_SECONDS,
+    PDF_RENDER_TRACEMALLOC,
+    PDF_RENDER_TRACEMALLOC_KEEP,
+    PDF_RENDER_TRACEMALLOC_MIN_MB,
+    PDF_RENDER_TRACEMALLOC_PATH,
+)
+from ..errors import RenderMemoryError, RenderTimeoutError
+from .render_stats import contract_type_label
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+LOGGER = logging.getLogger(__name__)
+
+MB = 1024 * 1024
+TRACEMALLOC_FRAMES = 25
+
+
+@dataclass(frozen=True)
+class WorkerUsage:
+    """Resource use a worker process reports with each task result."""
+
+    pid: int
+    rss_bytes: int | None
+    duration_ms: float
+
+
+def current_rss_bytes() -> int | None:
+    """Return the resident memory of this process, if the platform exposes it."""
+    try:
+        with open("/proc/self/statm", encoding="ascii") as statm:
+            return int(statm.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        pass
+    if resource is None:
+        return None
+    # Peak rather than current RSS; kilobytes on Linux, bytes on macOS.
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+def apply_memory_limit(limit_mb: int = PDF_RENDER_MEMORY_LIMIT_MB) -> None:
+    """Cap this process's address space so runaway renders get MemoryError."""
+    if limit_mb <= 0 or resource is None:
+        return
+    limit = limit_mb * MB
+    _, hard = resource.getrlimit(resource.RLIMIT_AS)
+    if hard != resource.RLIM_INFINITY:
+        limit = min(limit, hard)
+    resource.setrlimit(resource.RLIMIT_AS, (limit, hard))
+    LOGGER.debug("PDF render process %d limited to %d MB of address space", os.getpid(), limit // MB)
+
+
+def _set_cpu_backstop(seconds: float) -> tuple[int, int] | None:
+    """Let the kernel stop this process after ``seconds`` more CPU time.
+
+    Only the soft limit is lowered, so it can be lifted again afterwards.
+    Returns the previous limits, or None if none were set.
+    """
+    if resource is None or seconds <= 0:
+        return None
+    previous = resource.getrlimit(resource.RLIMIT_CPU)
+    usage = resource.getrusage(resource.RUSAGE_SELF)
+    limit = int(usage.ru_utime + usage.ru_stime + seconds) + 1
+    hard = previous[1]
+    if hard != resource.RLIM_INFINITY and limit > hard:
+        return None
+    resource.setrlimit(resource.RLIMIT_CPU, (limit, hard))
+    return previous
+
+
+@contextmanager
+def render_deadline(
+    seconds: float = PDF_RENDER_TIMEOUT_SECONDS,
+    grace_seconds: int = PDF_RENDER_TIMEOUT_GRACE_SECONDS,
+) -> Iterator[None]:
+    """Raise ``RenderTimeoutError`` in the block once it runs for ``seconds``.
+
+    Only takes effect on the main thread of a process with ``SIGALRM``; the
+    alarm fires between Python bytecodes, which covers WeasyPrint layout.
+    ``grace_seconds`` of extra CPU time later, ``SIGXCPU`` stops the process.
+    """
+    if (
+        seconds <= 0
+        or not hasattr(signal, "setitimer")
+        or threading.current_thread() is not threading.main_thread()
+    ):
+        yield
+        return
+
+    def _on_alarm(signum: int, frame: Any) -> None:
+        raise RenderTimeoutError(f"PDF render exceeded the {seconds:g} s time limit")
+
+    previous_handler = signal.signal(signal.SIGALRM, _on_alarm)
+    previous_cpu_limit = _set_cpu_backstop(seconds + grace_seconds) if grace_seconds > 0 else None
+    signal.setitimer(signal.ITIMER_REAL, seconds)
+    try:
+        yield
+    finally:
+        signal.setitimer(signal.ITIMER_REAL, 0)
+        signal.signal(signal.SIGALRM, previous_handler)
+        if previous_cpu_limit is not None:
+            resource.setrlimit(resource.RLIMIT_CPU, previous_cpu_limit)
+
+
+class AllocationTracer:
+    """Keeps tracemalloc snapshots of the heaviest renders in a directory.
+
+    A render whose traced peak, above what was allocated when it started,
+    reaches ``min_mb`` is saved as
+    ``<peak MB>-<label>-<pid>-<time>.snapshot``; only the ``keep`` heaviest
+    files are kept. Load one with ``tracemalloc.Snapshot.load``.
+    """
+
+    def __init__(
+        self,
+        directory: Path = PDF_RENDER_TRACEMALLOC_PATH,
+        min_mb: float = PDF_RENDER_TRACEMALLOC_MIN_MB,
+        keep: int = PDF_RENDER_TRACEMALLOC_KEEP,
+    ) -> None:
+        self.directory = directory
+        self.min_bytes = int(min_mb * MB)
+        self.keep = max(1, keep)
+        self._snapshot: tracemalloc.Snapshot | None = None
+        self._snapshot_bytes = 0
+        self._baseline = 0
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(TRACEMALLOC_FRAMES)
+
+    def mark(self) -> None:
+        """Snapshot live allocations if this is the largest point of the render so far.
+
+        Called where a render holds the most memory (after layout) and when
+        it fails, since a snapshot taken after the render misses its peak.
+        """
+        current = tracemalloc.get_traced_memory()[0] - self._baseline
+        if current < max(self.min_bytes, self._snapshot_bytes):
+            return
+        try:
+            self._snapshot = tracemalloc.take_snapshot()
+            self._snapshot_bytes = current
+        except MemoryError:
+            pass
+
+    @contextmanager
+    def trace(self, label: str) -> Iterator[None]:
+        self._snapshot = None
+        self._snapshot_bytes = 0
+        tracemalloc.reset_peak()
+        self._baseline = tracemalloc.get_traced_memory()[0]
+        try:
+            yield
+        except BaseException:
+            self.mark()
+            raise
+        finally:
+            peak = tracemalloc.get_traced_memory()[1] - self._baseline
+            if peak >= self.min_bytes:
+                if self._snapshot is None:
+                    self.mark()
+                self._save(label, peak)
+            self._snapshot = None
+
+    def _save(self, label: str, peak: int) -> None:
+        if self._snapshot is None:
+            return
+        try:
+            self.directory.mkdir(parents=True, exist_ok=True)
+            path = self.directory / f"{peak / MB:09.1f}MB-{label}-{os.getpid()}-{int(time.time())}.snapshot"
+            self._snapshot.dump(str(path))
+            for stale in sorted(self.directory.glob("*.snapshot"))[: -self.keep]:
+                stale.unlink(missing_ok=True)
+        except OSError as error:
+            LOGGER.warning("Failed to save tracemalloc snapshot: %s", error)
+            return
+        top = self._snapshot.statistics("lineno")[:3]
+        LOGGER.warning(
+            "Heavy PDF render (%s): traced peak %.1f MB, snapshot %s; top allocations: %s",
+            label,
+            peak / MB,
+            path.name,
+            "; ".join(str(stat) for stat in top),
+        )
+
+
+_TRACER: AllocationTracer | None = None
+
+
+def get_allocation_tracer() -> AllocationTracer | None:
+    """Return this process's allocation tracer when ``PDF_RENDER_TRACEMALLOC`` is on."""
+    global _TRACER
+    if _TRACER is None and PDF_RENDER_TRACEMALLOC:
+        _TRACER = AllocationTracer()
+    return _TRACER
+
+
+def mark_allocation_peak() -> None:
+    """Let the allocation tracer snapshot the current point of a render."""
+    if _TRACER is not None:
+        _TRACER.mark()
+
+
+def run_with_limits(fn: Callable[..., Any], args: tuple[Any, ...]) -> tuple[Any, WorkerUsage]:
+    """Run a render task under the process limits and report resource use.
+
+    Raises:
+        RenderTimeoutError: The task ran longer than ``PDF_RENDER_TIMEOUT_SECONDS``.
+        RenderMemoryError: The task ran out of memory.
+    """
+    payload = args[0] if args and isinstance(args[0], Mapping) else None
+    label = contract_type_label(payload) if payload is not None else fn.__name__
+    tracer = get_allocation_tracer()
+    started = perf_counter()
+    try:
+        with render_deadline(), (tracer.trace(label) if tracer is not None else nullcontext()):
+            result = fn(*args)
+    except MemoryError as error:
+        raise RenderMemoryError(f"PDF render ran out of memory ({label})") from error
+    return result, WorkerUsage(os.getpid(), current_rss_bytes(), (perf_counter() - started) * 1000)
@@ -0,0 +1,35 @@
+"""Priority classes of render work.
+
+Interactive renders (a client signing, a draft preview) are dispatched ahead
+of batch renders (backfills, re-renders after template changes, bulk
+exports), which only run on workers interactive work leaves spare. Kept
+apart from the executor so the job queue and API code can use the classes
+without importing the render stack.
+"""
+
+from __future__ import annotations
+
+RENDER_PRIORITY_INTERACTIVE = "interactive"
+RENDER_PRIORITY_BATCH = "batch"
+# Dispatch order; render jobs store the rank so claims can sort on it.
+RENDER_PRIORITIES = (RENDER_PRIORITY_INTERACTIVE, RENDER_PRIORITY_BATCH)
+RENDER_PRIORITY_RANKS = {priority: rank for rank, priority in enumerate(RENDER_PRIORITIES)}
+
+
+def resolve_render_priority(priority: str | None = None) -> str:
+    """Return a priority class name; ``None`` selects interactive.
+
+    Raises:
+        ValueError: If ``priority`` is not one of ``RENDER_PRIORITIES``.
+    """
+    name = (priority or RENDER_PRIORITY_INTERACTIVE).strip().lower()
+    if name not in RENDER_PRIORITY_RANKS:
+        raise ValueError(f"Unknown render priority '{name}'; expected one of: {', '.join(RENDER_PRIORITIES)}")
+    return name
+
+
+def render_priority_for_rank(rank: int | None) -> str:
+    """Return the class of a job's stored rank; jobs queued before ranks existed are interactive."""
+    if rank is None or not 0 <= int(rank) < len(RENDER_PRIORITIES):
+        return RENDER_PRIORITY_INTERACTIVE
+    return RENDER_PRIORITIES[int(rank)]
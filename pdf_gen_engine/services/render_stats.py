@@ -0,0 +1,284 @@
+"""Per-stage render timings and process-wide engine statistics.
+
+Every render produces a ``RenderReport`` with the time spent in each stage
+(context building, cache lookup, Jinja, stylesheet, WeasyPrint layout,
+``write_pdf`` and storage), the page count and the output size. Reports are
+aggregated per contract type into histograms and exposed as a snapshot via
+``pdf_gen_engine.stats()``. Renders on the process pool are recorded in the
+process that submitted them, so the snapshot covers all of its workers.
+
+The snapshot also has, per priority class (see ``render_priority``), the
+renders queued and running on the executors and how long renders waited for
+a worker, and how long render jobs waited in the job queue to be claimed.
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+import threading
+from bisect import bisect_left
+from dataclasses import asdict, dataclass, field
+from typing import Any
+
+from ..config import PDF_RENDER_STATS_LOG
+from ..errors import RenderLimitError
+
+LOGGER = logging.getLogger(__name__)
+
+# Upper bounds (inclusive) of the render-duration histogram buckets.
+DURATION_BUCKETS_MS = (50, 100, 250, 500, 1000, 2500, 5000, 10000)
+PAGE_BUCKETS = (1, 2, 3, 5, 10, 20)
+SIZE_BUCKETS_BYTES = (25_000, 50_000, 100_000, 250_000, 500_000, 1_000_000, 5_000_000)
+WAIT_BUCKETS_MS = (1, 5, 10, 50, 100, 250, 500, 1000, 2500, 5000, 10000, 30000, 60000)
+
+RENDER_STAGES = (
+    "context_ms",
+    "cache_lookup_ms",
+    "template_ms",
+    "stylesheet_ms",
+    "layout_ms",
+    "write_ms",
+    "stamp_ms",
+    "store_ms",
+)
+
+
+@dataclass
+class RenderReport:
+    """Timings and output facts for a single render."""
+
+    contract_type: str
+    template: str
+    # sha256 of the template source, so outdated renders can be found.
+    template_version: str | None = None
+    profile: str | None = None
+    # "weasyprint" or "direct" (see services.direct_writer).
+    backend: str = "weasyprint"
+    linearized: bool = False
+    cache_hit: bool = False
+    stamped: bool = False
+    pages: int | None = None
+    size_bytes: int = 0
+    stages: dict[str, float] = field(default_factory=dict)
+
+    @property
+    def total_ms(self) -> float:
+        return sum(self.stages.values())
+
+    def as_metadata(self) -> dict[str, Any]:
+        """Return the fields stored on a contract as ``renderMeta``."""
+        return {
+            "durationMs": round(self.total_ms, 1),
+            "pageCount": self.pages,
+            "sizeBytes": self.size_bytes,
+            "cacheHit": self.cache_hit,
+            "stamped": self.stamped,
+            "template": self.template,
+            "templateVersion": self.template_version,
+            "profile": self.profile,
+            "backend": self.backend,
+            "linearized": self.linearized,
+            "stages": {stage: round(value, 1) for stage, value in self.stages.items()},
+        }
+
+
+class Histogram:
+    """Fixed-bucket histogram with count, sum, min and max."""
+
+    def __init__(self, bounds: tuple[float, ...]) -> None:
+        self.bounds = bounds
+        self.buckets = [0] * (len(bounds) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.minimum: float | None = None
+        self.maximum: float | None = None
+
+    def observe(self, value: float) -> None:
+        self.buckets[bisect_left(self.bounds, value)] += 1
+        self.count += 1
+        self.total += value
+        self.minimum = value if self.minimum is None else min(self.minimum, value)
+        self.maximum = value if self.maximum is None else max(self.maximum, value)
+
+    def snapshot(self) -> dict[str, Any]:
+        labels = [f"le_{bound}" for bound in self.bounds] + ["inf"]
+        return {
+            "count": self.count,
+            "sum": round(self.total, 1),
+            "mean": round(self.total / self.count, 1) if self.count else 0.0,
+            "min": self.minimum,
+            "max": self.maximum,
+            "buckets": dict(zip(labels, self.buckets)),
+        }
+
+
+class _TypeStats:
+    def __init__(self) -> None:
+        self.renders = 0
+        self.failures = 0
+        # Failures from time and memory limits, by RenderLimitError code.
+        self.limit_failures: dict[str, int] = {}
+        self.cache_hits = 0
+        self.stamped = 0
+        self.duration_ms = Histogram(DURATION_BUCKETS_MS)
+        self.pages = Histogram(PAGE_BUCKETS)
+        self.size_bytes = Histogram(SIZE_BUCKETS_BYTES)
+        self.stage_ms = {stage: Histogram(DURATION_BUCKETS_MS) for stage in RENDER_STAGES}
+
+    def snapshot(self) -> dict[str, Any]:
+        return {
+            "renders": self.renders,
+            "failures": self.failures,
+            "limit_failures": dict(self.limit_failures),
+            "cache_hits": self.cache_hits,
+            "stamped": self.stamped,
+            "duration_ms": self.duration_ms.snapshot(),
+            "pages": self.pages.snapshot(),
+            "size_bytes": self.size_bytes.snapshot(),
+            "stages_ms": {
+                stage: histogram.snapshot()
+                for stage, histogram in self.stage_ms.items()
+                if histogram.count
+            },
+        }
+
+
+class _QueueStats:
+    def __init__(self, queued: int = 0, running: int = 0) -> None:
+        # Gauges: renders waiting for a worker and renders on one right now.
+        self.queued = queued
+        self.running = running
+        self.max_queued = queued
+        self.dispatched = 0
+        self.wait_ms = Histogram(WAIT_BUCKETS_MS)
+        self.job_wait_ms = Histogram(WAIT_BUCKETS_MS)
+
+    def snapshot(self) -> dict[str, Any]:
+        return {
+            "queued": self.queued,
+            "running": self.running,
+            "max_queued": self.max_queued,
+            "dispatched": self.dispatched,
+            "wait_ms": self.wait_ms.snapshot(),
+            "job_wait_ms": self.job_wait_ms.snapshot(),
+        }
+
+
+class RenderStats:
+    """Thread-safe aggregation of render reports keyed by contract type."""
+
+    def __init__(self, log_reports: bool = PDF_RENDER_STATS_LOG) -> None:
+        self.log_reports = log_reports
+        self._lock = threading.Lock()
+        self._types: dict[str, _TypeStats] = {}
+        self._queues: dict[str, _QueueStats] = {}
+
+    def _type_stats(self, contract_type: str) -> _TypeStats:
+        type_stats = self._types.get(contract_type)
+        if type_stats is None:
+            type_stats = self._types.setdefault(contract_type, _TypeStats())
+        return type_stats
+
+    def _queue_stats(self, priority: str) -> _QueueStats:
+        queue_stats = self._queues.get(priority)
+        if queue_stats is None:
+            queue_stats = self._queues.setdefault(priority, _QueueStats())
+        return queue_stats
+
+    def record_queue(self, priority: str, queued: int = 0, running: int = 0, wait_ms: float | None = None) -> None:
+        """Apply an executor's change to a priority class's queue.
+
+        ``queued`` and ``running`` are deltas; ``wait_ms`` is given when a
+        render was handed to a worker, with the time it spent queued.
+        """
+        with self._lock:
+            queue_stats = self._queue_stats(priority)
+            queue_stats.queued += queued
+            queue_stats.running += running
+            queue_stats.max_queued = max(queue_stats.max_queued, queue_stats.queued)
+            if wait_ms is not None:
+                queue_stats.dispatched += 1
+                queue_stats.wait_ms.observe(wait_ms)
+
+    def record_job_wait(self, priority: str, wait_ms: float) -> None:
+        """Record how long a render job was available before a worker claimed it."""
+        with self._lock:
+            self._queue_stats(priority).job_wait_ms.observe(wait_ms)
+
+    def record(self, report: RenderReport) -> None:
+        with self._lock:
+            type_stats = self._type_stats(report.contract_type)
+            type_stats.renders += 1
+            type_stats.cache_hits += int(report.cache_hit)
+            type_stats.stamped += int(report.stamped)
+            type_stats.duration_ms.observe(report.total_ms)
+            type_stats.size_bytes.observe(report.size_bytes)
+            if report.pages is not None:
+                type_stats.pages.observe(report.pages)
+            for stage, value in report.stages.items():
+                histogram = type_stats.stage_ms.get(stage)
+                if histogram is not None:
+                    histogram.observe(value)
+
+        if self.log_reports:
+            LOGGER.info(json.dumps({"event": "pdf_render", **asdict(report), "total_ms": round(report.total_ms, 1)}))
+
+    def record_failure(self, contract_type: str, error: BaseException) -> None:
+        with self._lock:
+            type_stats = self._type_stats(contract_type)
+            type_stats.failures += 1
+            if isinstance(error, RenderLimitError):
+                type_stats.limit_failures[error.code] = type_stats.limit_failures.get(error.code, 0) + 1
+        if self.log_reports:
+            LOGGER.info(
+                json.dumps(
+                    {
+                        "event": "pdf_render_failed",
+                        "contract_type": contract_type,
+                        "error": type(error).__name__,
+                    }
+                )
+            )
+
+    def snapshot(self) -> dict[str, Any]:
+        with self._lock:
+            by_type = {name: type_stats.snapshot() for name, type_stats in sorted(self._types.items())}
+            queues = {name: queue_stats.snapshot() for name, queue_stats in sorted(self._queues.items())}
+        return {
+            "renders": sum(item["renders"] for item in by_type.values()),
+            "failures": sum(item["failures"] for item in by_type.values()),
+            "by_type": by_type,
+            "queues": queues,
+        }
+
+    def reset(self) -> None:
+        with self._lock:
+            self._types.clear()
+            # Renders still queued or running are counted out later.
+            self._queues = {
+                name: _QueueStats(queue_stats.queued, queue_stats.running)
+                for name, queue_stats in self._queues.items()
+            }
+
+
+def contract_type_label(contract_data: Any) -> str:
+    """Return the stats bucket for a payload; untyped contracts are 'generic'."""
+    try:
+        contract_type = str(contract_data.get("type") or "").strip().lower()
+    except AttributeError:
+        contract_type = ""
+    return contract_type or "generic"
+
+
+_RENDER_STATS = RenderStats()
+
+
+def get_render_stats() -> RenderStats:
+    """Return the process-wide render statistics."""
+    return _RENDER_STATS
+
+
+def stats() -> dict[str, Any]:
+    """Return a snapshot of render statistics for this process."""
+    return _RENDER_STATS.snapshot()
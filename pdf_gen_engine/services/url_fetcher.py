@@ -0,0 +1,247 @@
+"""In-memory URL fetcher used by WeasyPrint during layout.
+
+Signature images arrive as large base64 data URIs; allowlisted http(s)
+signatures are downloaded when they are submitted, not here. Before layout,
+the engine swaps them for short ``asset:<sha256>`` references backed by a
+size-bounded in-memory store, so each distinct image is decoded once per
+process and the template context stays small. During layout the fetcher only
+serves ``asset:``, ``data:`` and packaged ``file:`` resources; any other URL
+is refused, so a render never opens a socket.
+"""
+
+from __future__ import annotations
+
+import base64
+import mimetypes
+import socket
+from dataclasses import dataclass
+from hashlib import sha256
+from pathlib import Path
+from typing import Any, Mapping
+from urllib.parse import unquote_to_bytes, urlparse
+from urllib.request import url2pathname
+
+from ..config import (
+    PDF_ASSET_CACHE_BYTES,
+    PDF_AUTO_RELOAD,
+    PDF_FONTS_PATH,
+    PDF_STYLE_PATH,
+    PDF_TEMPLATE_PATH,
+)
+from ..utils.shared_assets import SHARED_ASSET_SCHEME, SharedAssetRef, read_shared_asset
+from .render_cache import LRUByteCache
+
+ASSET_SCHEME = "asset:"
+# Context keys that carry signature image sources in every contract template.
+SIGNATURE_CONTEXT_KEYS = ("signature_creator", "signature_client", "creator_signature", "client_signature")
+
+
+class NetworkAccessError(RuntimeError):
+    """Raised when rendering tries to reach the network."""
+
+
+class UnresolvedAssetError(ValueError):
+    """Raised when a signature is still a remote URL at render time.
+
+    Rendering it would drop the image from the PDF, so the render fails
+    instead of producing an unsigned copy. Retrying cannot help, so render
+    jobs fail permanently; the backend stores such images inline before it
+    queues a render.
+    """
+
+
+@dataclass(frozen=True)
+class Asset:
+    data: bytes
+    mime_type: str | None
+
+
+@dataclass
+class FetchStats:
+    hits: int = 0
+    misses: int = 0
+    bytes_served: int = 0
+    shared_reads: int = 0
+    network_blocked: int = 0
+
+
+def _decode_data_uri(uri: str) -> Asset:
+    header, separator, payload = uri[5:].partition(",")
+    if not separator:
+        raise ValueError("Malformed data URI")
+    header_parts = [part.strip() for part in header.split(";")]
+    mime_type = header_parts[0].lower() or "text/plain"
+    if any(part.lower() == "base64" for part in header_parts[1:]):
+        data = base64.b64decode("".join(payload.split()))
+    else:
+        data = unquote_to_bytes(payload)
+    return Asset(data, mime_type)
+
+
+class AssetStore:
+    """Size-bounded, content-addressed store of render assets.
+
+    Args:
+        max_bytes: Total size of cached asset bytes.
+        static_roots: Directories ``file:`` URLs may be served from.
+    """
+
+    def __init__(
+        self,
+        max_bytes: int = PDF_ASSET_CACHE_BYTES,
+        static_roots: tuple[Path, ...] = (PDF_TEMPLATE_PATH.parent, PDF_STYLE_PATH.parent, PDF_FONTS_PATH),
+    ) -> None:
+        self.static_roots = tuple(root.resolve() for root in static_roots)
+        self.stats = FetchStats()
+        self._cache = LRUByteCache(max_bytes, sizeof=lambda asset: len(asset.data))
+
+    def get(self, ref: str) -> Asset | None:
+        asset = self._cache.get(ref)
+        if asset is None:
+            self.stats.misses += 1
+        else:
+            self.stats.hits += 1
+        return asset
+
+    def intern_data_uri(self, uri: str) -> tuple[str, Asset]:
+        """Return an ``asset:`` reference for a data URI, decoding it at most once."""
+        ref = ASSET_SCHEME + sha256(uri.encode("utf-8")).hexdigest()
+        asset = self.get(ref)
+        if asset is None:
+            asset = _decode_data_uri(uri)
+            self._cache.put(ref, asset)
+        return ref, asset
+
+    def intern_shared(self, value: str) -> tuple[str, Asset]:
+        """Return the ``asset:`` reference for an image exported to shared memory.
+
+        The reference matches the one ``intern_data_uri`` gives the original
+        data URI, so an image already in the store is not read again.
+        """
+        shared_ref = SharedAssetRef.parse(value)
+        if shared_ref is None:
+            raise ValueError("Malformed shared asset reference")
+        ref = ASSET_SCHEME + shared_ref.digest
+        asset = self.get(ref)
+        if asset is None:
+            asset = Asset(read_shared_asset(shared_ref), shared_ref.mime_type)
+            self._cache.put(ref, asset)
+            self.stats.shared_reads += 1
+        return ref, asset
+
+    def load_file(self, url: str) -> Asset:
+        """Serve a packaged template or stylesheet asset from memory."""
+        path = Path(url2pathname(urlparse(url).path)).resolve()
+        if not any(path.is_relative_to(root) for root in self.static_roots):
+            raise ValueError(f"File URL outside packaged assets: {url}")
+
+        file_key = f"file:{path}"
+        asset = None if PDF_AUTO_RELOAD else self.get(file_key)
+        if asset is None:
+            asset = Asset(path.read_bytes(), mimetypes.guess_type(path.name)[0])
+            self._cache.put(file_key, asset)
+        return asset
+
+    def clear(self) -> None:
+        self._cache.clear()
+        self.stats = FetchStats()
+
+
+class AssetUrlFetcher:
+    """WeasyPrint ``url_fetcher`` that serves assets without network access.
+
+    Args:
+        store: Shared asset store.
+        pinned: Assets referenced by the current render, kept alive for its
+            duration even if the store evicts them.
+    """
+
+    def __init__(self, store: AssetStore, pinned: Mapping[str, Asset] | None = None) -> None:
+        self.store = store
+        self.pinned = dict(pinned or {})
+
+    def __call__(self, url: str, timeout: int = 10, ssl_context: Any = None) -> dict[str, Any]:
+        scheme = url.split(":", 1)[0].lower()
+        if scheme == "asset":
+            asset = self.pinned.get(url) or self.store.get(url)
+            if asset is None:
+                raise ValueError(f"Unknown render asset {url}")
+        elif scheme == "data":
+            asset = self.store.intern_data_uri(url)[1]
+        elif scheme == "file":
+            asset = self.store.load_file(url)
+        else:
+            self.store.stats.network_blocked += 1
+            raise NetworkAccessError(f"Render attempted to fetch {scheme} URL; network access is disabled")
+
+        self.store.stats.bytes_served += len(asset.data)
+        return {"string": asset.data, "mime_type": asset.mime_type, "redirected_url": url}
+
+
+def intern_context_assets(
+    context: Mapping[str, Any],
+    store: AssetStore | None = None,
+) -> tuple[dict[str, Any], dict[str, Asset]]:
+    """Replace signature image sources in a template context with asset references.
+
+    ``shm:`` sources, which only survive signature validation when the
+    executor exported them for this task, are read from shared memory.
+
+    Returns:
+        The rewritten context and the assets it references.
+
+    Raises:
+        UnresolvedAssetError: If a signature is an http(s) URL, which ingest
+            should have downloaded and stored inline.
+    """
+    store = store or get_asset_store()
+    interned = dict(context)
+    pinned: dict[str, Asset] = {}
+    for key in SIGNATURE_CONTEXT_KEYS:
+        value = interned.get(key)
+        if not isinstance(value, str) or not value:
+            continue
+        lower_value = value[:8].lower()
+        if lower_value.startswith("data:"):
+            ref, asset = store.intern_data_uri(value)
+        elif lower_value.startswith(SHARED_ASSET_SCHEME):
+            ref, asset = store.intern_shared(value)
+        elif lower_value.startswith(("http://", "https://")):
+            raise UnresolvedAssetError(f"Signature image {key} is a remote URL; it must be stored inline at ingest")
+        else:
+            continue
+        interned[key] = ref
+        pinned[ref] = asset
+    return interned, pinned
+
+
+def install_network_guard() -> None:
+    """Make every outbound socket connection in this process fail.
+
+    Meant for dedicated render worker processes and benchmarks; any attempt
+    is counted in ``FetchStats.network_blocked`` and raises
+    ``NetworkAccessError``.
+    """
+    if getattr(socket.socket.connect, "_pdf_network_guard", False):
+        return
+
+    def _guard(original: Any) -> Any:
+        def _blocked(self: socket.socket, *args: Any, **kwargs: Any) -> Any:
+            if self.family == getattr(socket, "AF_UNIX", None):
+                return original(self, *args, **kwargs)
+            get_asset_store().stats.network_blocked += 1
+            raise NetworkAccessError("Network access is disabled in this render process")
+
+        _blocked._pdf_network_guard = True  # type: ignore[attr-defined]
+        return _blocked
+
+    socket.socket.connect = _guard(socket.socket.connect)  # type: ignore[method-assign]
+    socket.socket.connect_ex = _guard(socket.socket.connect_ex)  # type: ignore[method-assign]
+
+
+_ASSET_STORE = AssetStore()
+
+
+def get_asset_store() -> AssetStore:
+    """Return the process-wide asset store."""
+    return _ASSET_STORE
@@ -0,0 +1,125 @@
+"""Process warm-up for PDF render workers.
+
+The first render in a fresh process pays for importing WeasyPrint, scanning
+fonts with fontconfig, compiling templates and the first pass through the
+layout code, plus loading the direct writer's fonts when contract types are
+written directly. ``warm_up`` does all of that ahead of time with a throwaway
+document and then freezes the garbage collector's view of the heap, so
+processes forked afterwards share the warmed pages copy-on-write instead of
+each paying the cost again.
+"""
+
+from __future__ import annotations
+
+import base64
+import gc
+import logging
+import threading
+from io import BytesIO
+from time import perf_counter
+
+from ..config import PDF_DIRECT_RENDER_TYPES
+from ..utils.pdf_utils import build_contract_template_context
+from ..utils.template_registry import get_template_registry
+from .pdf_service import _render_pdf_bytes, resolve_output_profile
+from .render_assets import get_stylesheet_cache, load_weasyprint
+from .url_fetcher import intern_context_assets
+
+LOGGER = logging.getLogger(__name__)
+
+_WARM_REPORT: dict[str, float] | None = None
+_WARM_LOCK = threading.Lock()
+
+
+def _warm_up_payload() -> dict[str, object]:
+    from PIL import Image
+
+    # A small image exercises the same decoding path as real signatures.
+    output = BytesIO()
+    Image.new("RGBA", (24, 8), (17, 24, 39, 255)).save(output, format="PNG")
+    signature = "data:image/png;base64," + base64.b64encode(output.getvalue()).decode("ascii")
+    return {
+        "title": "Warm-up",
+        "description": "Throwaway document rendered when a worker process starts.",
+        "contract_terms": ["Warm-up term."],
+        "creator_name": "Creator",
+        "client_name": "Client",
+        "amount": 1,
+        "signature_creator": signature,
+        "signature_client": signature,
+    }
+
+
+def warm_up(render: bool = True, freeze: bool = True) -> dict[str, float]:
+    """Load everything a render needs; runs once per process.
+
+    Args:
+        render: Also lay out and write a throwaway document.
+        freeze: Move every object alive after warm-up to the permanent
+            generation with ``gc.freeze()`` so collections in forked
+            children do not touch (and copy) the shared pages.
+
+    Returns:
+        Milliseconds spent per warm-up step.
+    """
+    global _WARM_REPORT
+    with _WARM_LOCK:
+        if _WARM_REPORT is not None:
+            return dict(_WARM_REPORT)
+
+        steps: dict[str, float] = {}
+        started = perf_counter()
+        step_start = started
+        load_weasyprint()
+        steps["import_ms"] = (perf_counter() - step_start) * 1000
+
+        step_start = perf_counter()
+        get_stylesheet_cache().get()
+        steps["fonts_ms"] = (perf_counter() - step_start) * 1000
+
+        step_start = perf_counter()
+        get_template_registry().warm()
+        steps["templates_ms"] = (perf_counter() - step_start) * 1000
+
+        if PDF_DIRECT_RENDER_TYPES:
+            from .direct_writer import warm_direct_writer
+
+            step_start = perf_counter()
+            warm_direct_writer()
+            steps["direct_fonts_ms"] = (perf_counter() - step_start) * 1000
+
+        if render:
+            step_start = perf_counter()
+            context, assets = intern_context_assets(build_contract_template_context(_warm_up_payload()))
+            _, output_options = resolve_output_profile()
+            _render_pdf_bytes(context, None, {}, "0" * 64, assets, {}, output_options=output_options)
+            steps["render_ms"] = (perf_counter() - step_start) * 1000
+
+        if freeze:
+            step_start = perf_counter()
+            gc.collect()
+            gc.freeze()
+            steps["freeze_ms"] = (perf_counter() - step_start) * 1000
+
+        steps["total_ms"] = (perf_counter() - started) * 1000
+        _WARM_REPORT = {step: round(value, 1) for step, value in steps.items()}
+        LOGGER.info("PDF engine warmed up in %.0f ms: %s", steps["total_ms"], _WARM_REPORT)
+        return dict(_WARM_REPORT)
+
+
+def warm_up_quietly(render: bool = True, freeze: bool = True) -> dict[str, float] | None:
+    """Like ``warm_up`` but log failures instead of raising them.
+
+    A failed warm-up must not take a worker (or the fork server) down; the
+    first real render then reports the underlying error.
+    """
+    try:
+        return warm_up(render=render, freeze=freeze)
+    except Exception as error:
+        LOGGER.warning("PDF engine warm-up failed: %s", error)
+        return None
+
+
+def is_warm() -> bool:
+    """Return True once ``warm_up`` has completed in this process."""
+    return _WARM_REPORT is not None
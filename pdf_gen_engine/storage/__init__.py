@@ -0,0 +1,70 @@
+"""Pluggable storage for signed contract PDFs.
+
+``get_pdf_storage`` returns the process-wide backend selected by
+``PDF_STORAGE_BACKEND``; contracts record the storage key of their PDF.
+"""
+
+from __future__ import annotations
+
+import threading
+
+from ..config import PDF_STORAGE_BACKEND
+from .base import PdfStorage, StoredObject, build_pdf_key, validate_key
+from .local import ShardedLocalStorage, shard_path
+from .memory import MemoryStorage
+from .s3 import S3Storage
+
+STORAGE_BACKENDS = {
+    "local": ShardedLocalStorage,
+    "memory": MemoryStorage,
+    "s3": S3Storage,
+}
+
+_STORAGE: PdfStorage | None = None
+_STORAGE_LOCK = threading.Lock()
+
+
+def create_pdf_storage(backend: str = PDF_STORAGE_BACKEND) -> PdfStorage:
+    """Build a storage backend from the engine settings.
+
+    Raises:
+        ValueError: If ``backend`` is not one of ``STORAGE_BACKENDS``.
+    """
+    storage_class = STORAGE_BACKENDS.get(backend)
+    if storage_class is None:
+        raise ValueError(f"Unknown PDF storage backend '{backend}'; expected one of: {', '.join(STORAGE_BACKENDS)}")
+    return storage_class()
+
+
+def get_pdf_storage() -> PdfStorage:
+    """Return the process-wide PDF storage, creating it on first use."""
+    global _STORAGE
+    if _STORAGE is None:
+        with _STORAGE_LOCK:
+            if _STORAGE is None:
+                _STORAGE = create_pdf_storage()
+    return _STORAGE
+
+
+def configure_pdf_storage(storage: PdfStorage) -> PdfStorage:
+    """Replace the process-wide PDF storage, for example in tests."""
+    global _STORAGE
+    with _STORAGE_LOCK:
+        _STORAGE = storage
+    return storage
+
+
+__all__ = [
+    "MemoryStorage",
+    "PdfStorage",
+    "S3Storage",
+    "STORAGE_BACKENDS",
+    "ShardedLocalStorage",
+    "StoredObject",
+    "build_pdf_key",
+    "configure_pdf_storage",
+    "create_pdf_storage",
+    "get_pdf_storage",
+    "shard_path",
+    "validate_key",
+]
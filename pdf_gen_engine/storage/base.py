@@ -0,0 +1,97 @@
+"""Storage interface shared by the PDF storage backends.
+
+Signed PDFs are addressed by a storage key (``<sha256>.pdf``) rather than a
+filesystem path, so contracts keep working when the backend or its layout
+changes. Backends implement the blocking calls; the async variants run them
+off the event loop.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import re
+from abc import ABC, abstractmethod
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Iterator
+
+PDF_KEY_SUFFIX = ".pdf"
+_KEY_PATTERN = re.compile(r"[A-Za-z0-9][A-Za-z0-9._-]{0,254}")
+_DIGEST_PATTERN = re.compile(r"[0-9a-f]{64}")
+
+
+def build_pdf_key(digest: str) -> str:
+    """Return the storage key of a PDF with the given sha256 digest."""
+    if not _DIGEST_PATTERN.fullmatch(digest or ""):
+        raise ValueError("PDF digest must be a lowercase hex sha256")
+    return digest + PDF_KEY_SUFFIX
+
+
+def validate_key(key: str) -> str:
+    """Reject keys that could escape the storage root or bucket prefix."""
+    if not _KEY_PATTERN.fullmatch(key or "") or ".." in key:
+        raise ValueError(f"Invalid storage key: {key!r}")
+    return key
+
+
+@dataclass(frozen=True)
+class StoredObject:
+    """Size and location of a stored object."""
+
+    key: str
+    size_bytes: int
+    # Set by backends that keep objects as local files, so they can be
+    # served with sendfile instead of being read into memory.
+    path: Path | None = None
+    # Last modification as a Unix timestamp, where the backend reports one.
+    modified: float | None = None
+
+
+class PdfStorage(ABC):
+    """Base class of the PDF storage backends.
+
+    Missing objects raise ``FileNotFoundError`` from every backend. A backend
+    that does not implement every abstract method fails when instantiated,
+    not halfway through a render.
+    """
+
+    name = "base"
+
+    @abstractmethod
+    def write(self, key: str, data: bytes) -> bool:
+        """Store ``data`` atomically; readers never see a partial object.
+
+        Returns:
+            False when an object of the same size already exists under
+            ``key`` (keys are content addressed) and nothing was written.
+        """
+
+    @abstractmethod
+    def read(self, key: str) -> bytes:
+        """Return the object's bytes."""
+
+    @abstractmethod
+    def stat(self, key: str) -> StoredObject:
+        """Return the object's size and location."""
+
+    @abstractmethod
+    def exists(self, key: str) -> bool:
+        """Return whether an object is stored under ``key``."""
+
+    @abstractmethod
+    def delete(self, key: str) -> None:
+        """Remove an object; missing objects are ignored."""
+
+    @abstractmethod
+    def iter_objects(self) -> Iterator[StoredObject]:
+        """Yield every stored object, listing the backend incrementally.
+
+        Files that are not valid keys, such as leftovers of an interrupted
+        write, are included under their own name.
+        """
+
+    async def aread(self, key: str) -> bytes:
+        return await asyncio.to_thread(self.read, key)
+
+    async def astat(self, key: str) -> StoredObject:
+        return await asyncio.to_thread(self.stat, key)
@@ -0,0 +1,116 @@
+"""Hash-sharded local filesystem storage.
+
+A flat directory with millions of files makes every lookup, listing and
+backup slow. Objects are spread over two levels of 256 directories picked
+from the sha256 of the key (``ab/cd/<key>``), which keeps each directory
+small. Files written by earlier releases directly under the root are still
+found there.
+"""
+
+from __future__ import annotations
+
+import os
+import re
+from hashlib import sha256
+from pathlib import Path
+from typing import Iterator
+from uuid import uuid4
+
+from ..config import PDF_STORAGE_PATH
+from .base import PdfStorage, StoredObject, validate_key
+
+SHARD_LEVELS = 2
+SHARD_WIDTH = 2
+_SHARD_NAME = re.compile(r"[0-9a-f]{%d}" % SHARD_WIDTH)
+
+
+def shard_path(root: Path, key: str) -> Path:
+    """Return the sharded location of ``key`` under ``root``."""
+    digest = sha256(validate_key(key).encode("utf-8")).hexdigest()
+    parts = [digest[level * SHARD_WIDTH:(level + 1) * SHARD_WIDTH] for level in range(SHARD_LEVELS)]
+    return root.joinpath(*parts, key)
+
+
+class ShardedLocalStorage(PdfStorage):
+    """Stores objects as files under ``root``, sharded by key hash."""
+
+    name = "local"
+
+    def __init__(self, root: Path = PDF_STORAGE_PATH) -> None:
+        self.root = root
+
+    def path_for(self, key: str) -> Path:
+        return shard_path(self.root, key)
+
+    def _existing_path(self, key: str) -> Path:
+        path = self.path_for(key)
+        if path.exists():
+            return path
+        legacy_path = self.root / key
+        if legacy_path.exists():
+            return legacy_path
+        raise FileNotFoundError(key)
+
+    def write(self, key: str, data: bytes) -> bool:
+        path = self.path_for(key)
+        try:
+            if path.stat().st_size == len(data):
+                # Mark the file as in use so the reconciler's age check skips it.
+                os.utime(path)
+                return False
+        except FileNotFoundError:
+            pass
+
+        path.parent.mkdir(parents=True, exist_ok=True)
+        temp_path = path.with_name(f".{path.name}.{uuid4().hex}.tmp")
+        try:
+            with open(temp_path, "wb") as handle:
+                handle.write(data)
+                handle.flush()
+                os.fsync(handle.fileno())
+            os.replace(temp_path, path)
+        finally:
+            if temp_path.exists():
+                temp_path.unlink()
+        return True
+
+    def read(self, key: str) -> bytes:
+        return self._existing_path(key).read_bytes()
+
+    def stat(self, key: str) -> StoredObject:
+        path = self._existing_path(key)
+        return StoredObject(key, path.stat().st_size, path)
+
+    def exists(self, key: str) -> bool:
+        return self.path_for(key).exists() or (self.root / key).exists()
+
+    def delete(self, key: str) -> None:
+        for path in (self.path_for(key), self.root / key):
+            try:
+                path.unlink()
+            except FileNotFoundError:
+                pass
+
+    def iter_objects(self) -> Iterator[StoredObject]:
+        """Yield files under the root and its shard directories.
+
+        Directories are read with ``os.scandir`` one at a time, so no listing
+        of the whole tree is held in memory.
+        """
+        yield from self._scan(self.root, SHARD_LEVELS)
+
+    def _scan(self, directory: Path | str, depth: int) -> Iterator[StoredObject]:
+        try:
+            with os.scandir(directory) as entries:
+                for entry in entries:
+                    if entry.is_dir(follow_symlinks=False):
+                        if depth > 0 and _SHARD_NAME.fullmatch(entry.name):
+                            yield from self._scan(entry.path, depth - 1)
+                    elif entry.is_file(follow_symlinks=False):
+                        try:
+                            stat = entry.stat(follow_symlinks=False)
+                        except FileNotFoundError:
+                            continue
+                        yield StoredObject(entry.name, stat.st_size, Path(entry.path), stat.st_mtime)
+        except FileNotFoundError:
+            return
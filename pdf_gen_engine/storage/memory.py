@@ -0,0 +1,66 @@
+"""In-memory storage for tests and single-process runs.
+
+Objects live in the current process only, so render worker processes cannot
+share them; use it with ``PDF_RENDER_WORKERS=0``.
+"""
+
+from __future__ import annotations
+
+import threading
+from typing import Iterator
+
+from .base import PdfStorage, StoredObject, validate_key
+
+
+class MemoryStorage(PdfStorage):
+    """Keeps objects in a dict guarded by a lock."""
+
+    name = "memory"
+
+    def __init__(self) -> None:
+        self._objects: dict[str, bytes] = {}
+        self._lock = threading.Lock()
+
+    def write(self, key: str, data: bytes) -> bool:
+        validate_key(key)
+        with self._lock:
+            existing = self._objects.get(key)
+            if existing is not None and len(existing) == len(data):
+                return False
+            self._objects[key] = bytes(data)
+        return True
+
+    def read(self, key: str) -> bytes:
+        with self._lock:
+            data = self._objects.get(key)
+        if data is None:
+            raise FileNotFoundError(key)
+        return data
+
+    def stat(self, key: str) -> StoredObject:
+        return StoredObject(key, len(self.read(key)))
+
+    def exists(self, key: str) -> bool:
+        with self._lock:
+            return key in self._objects
+
+    def delete(self, key: str) -> None:
+        with self._lock:
+            self._objects.pop(key, None)
+
+    def iter_objects(self) -> Iterator[StoredObject]:
+        with self._lock:
+            sizes = [(key, len(data)) for key, data in self._objects.items()]
+        for key, size in sizes:
+            yield StoredObject(key, size)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._objects.clear()
+
+    # Dict lookups do not block, so skip the thread hop.
+    async def aread(self, key: str) -> bytes:
+        return self.read(key)
+
+    async def astat(self, key: str) -> StoredObject:
+        return self.stat(key)
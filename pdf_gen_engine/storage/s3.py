@@ -0,0 +1,147 @@
+"""S3-compatible object storage.
+
+Works with AWS S3 and with local stand-ins such as MinIO through
+``PDF_STORAGE_S3_ENDPOINT_URL``. Credentials come from the usual boto3
+sources (environment, shared config, instance role). A single ``PutObject``
+is atomic, so readers never see a partial upload.
+"""
+
+from __future__ import annotations
+
+import threading
+from typing import Any, Iterator
+
+from ..config import (
+    PDF_STORAGE_S3_BUCKET,
+    PDF_STORAGE_S3_ENDPOINT_URL,
+    PDF_STORAGE_S3_PREFIX,
+    PDF_STORAGE_S3_REGION,
+)
+from .base import PdfStorage, StoredObject, validate_key
+
+_MISSING_ERROR_CODES = {"404", "NoSuchKey", "NotFound"}
+
+
+def _is_missing(error: Exception) -> bool:
+    response = getattr(error, "response", None) or {}
+    return str(response.get("Error", {}).get("Code")) in _MISSING_ERROR_CODES
+
+
+class S3Storage(PdfStorage):
+    """Stores objects as ``<prefix><key>`` in one bucket.
+
+    Args:
+        client: A boto3 S3 client; created from the settings on first use
+            when omitted.
+    """
+
+    name = "s3"
+
+    def __init__(
+        self,
+        bucket: str = PDF_STORAGE_S3_BUCKET,
+        prefix: str = PDF_STORAGE_S3_PREFIX,
+        endpoint_url: str | None = PDF_STORAGE_S3_ENDPOINT_URL,
+        region: str | None = PDF_STORAGE_S3_REGION,
+        client: Any = None,
+    ) -> None:
+        if not bucket:
+            raise ValueError("PDF_STORAGE_S3_BUCKET must be set for the s3 storage backend")
+        self.bucket = bucket
+        self.prefix = prefix
+        self.endpoint_url = endpoint_url
+        self.region = region
+        self._client = client
+        self._lock = threading.Lock()
+
+    @property
+    def client(self) -> Any:
+        if self._client is None:
+            with self._lock:
+                if self._client is None:
+                    try:
+                        import boto3
+                    except ImportError as error:
+                        raise RuntimeError(
+                            "The s3 storage backend needs boto3. Install it with: pip install boto3"
+                        ) from error
+                    self._client = boto3.client("s3", endpoint_url=self.endpoint_url, region_name=self.region)
+        return self._client
+
+    def _object_key(self, key: str) -> str:
+        return self.prefix + validate_key(key)
+
+    def _head(self, key: str) -> dict[str, Any]:
+        try:
+            return self.client.head_object(Bucket=self.bucket, Key=self._object_key(key))
+        except Exception as error:
+            if _is_missing(error):
+                raise FileNotFoundError(key) from error
+            raise
+
+    def _touch(self, key: str) -> None:
+        try:
+            self.client.copy_object(
+                Bucket=self.bucket,
+                Key=self._object_key(key),
+                CopySource={"Bucket": self.bucket, "Key": self._object_key(key)},
+                MetadataDirective="REPLACE",
+                ContentType="application/pdf",
+            )
+        except Exception as error:
+            if _is_missing(error):
+                raise FileNotFoundError(key) from error
+            raise
+
+    def write(self, key: str, data: bytes) -> bool:
+        try:
+            if int(self._head(key)["ContentLength"]) == len(data):
+                # Copy the object onto itself to refresh LastModified, so the
+                # reconciler's age check skips an object that is in use again.
+                self._touch(key)
+                return False
+        except FileNotFoundError:
+            pass
+        self.client.put_object(
+            Bucket=self.bucket,
+            Key=self._object_key(key),
+            Body=data,
+            ContentType="application/pdf",
+        )
+        return True
+
+    def read(self, key: str) -> bytes:
+        try:
+            response = self.client.get_object(Bucket=self.bucket, Key=self._object_key(key))
+        except Exception as error:
+            if _is_missing(error):
+                raise FileNotFoundError(key) from error
+            raise
+        return response["Body"].read()
+
+    def stat(self, key: str) -> StoredObject:
+        head = self._head(key)
+        modified = head.get("LastModified")
+        return StoredObject(key, int(head["ContentLength"]), modified=modified.timestamp() if modified else None)
+
+    def exists(self, key: str) -> bool:
+        try:
+            self._head(key)
+        except FileNotFoundError:
+            return False
+        return True
+
+    def delete(self, key: str) -> None:
+        # DeleteObject succeeds for missing keys.
+        self.client.delete_object(Bucket=self.bucket, Key=self._object_key(key))
+
+    def iter_objects(self) -> Iterator[StoredObject]:
+        """Yield objects under the prefix, one ``ListObjectsV2`` page at a time."""
+        paginator = self.client.get_paginator("list_objects_v2")
+        for page in paginator.paginate(Bucket=self.bucket, Prefix=self.prefix):
+            for item in page.get("Contents", []):
+                key = item["Key"][len(self.prefix):]
+                if not key or "/" in key:
+                    continue
+                modified = item.get("LastModified")
+                yield StoredObject(key, int(item["Size"]), modified=modified.timestamp() if modified else None)
@@ -1,19 +1,40 @@
-"""Utility helpers for the PDF generation engine."""
-
-from .pdf_utils import (
-    build_contract_template_context,
-    build_pdf_output_path,
-    compute_pdf_sha256,
-    ensure_pdf_storage_dir,
-    normalize_signature_data,
-    render_contract_template,
-)
-
-__all__ = [
-    "build_contract_template_context",
-    "build_pdf_output_path",
-    "compute_pdf_sha256",
-    "ensure_pdf_storage_dir",
-    "normalize_signature_data",
-    "render_contract_template",
-]
+"""Utility helpers for the PDF generation engine.
+
+The helpers are imported on first access so the package stays cheap to
+import.
+"""
+
+from importlib import import_module
+from typing import Any
+
+_EXPORTS = {
+    "NormalizedSignature": ".signature_images",
+    "StoredPdf": ".pdf_utils",
+    "build_content_addressed_path": ".pdf_utils",
+    "build_contract_template_context": ".pdf_utils",
+    "build_pdf_output_path": ".pdf_utils",
+    "compute_pdf_sha256": ".pdf_utils",
+    "ensure_pdf_storage_dir": ".pdf_utils",
+    "get_template_registry": ".template_registry",
+    "normalize_signature_data": ".pdf_utils",
+    "normalize_signature_image": ".signature_images",
+    "render_contract_template": ".pdf_utils",
+    "resolve_render_backend": ".template_registry",
+    "resolve_template_name": ".template_registry",
+    "store_pdf_bytes": ".pdf_utils",
+}
+
+__all__ = sorted(_EXPORTS)
+
+
+def __getattr__(name: str) -> Any:
+    module_name = _EXPORTS.get(name)
+    if module_name is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(import_module(module_name, __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__() -> list[str]:
+    return sorted(set(globals()) | set(_EXPORTS))
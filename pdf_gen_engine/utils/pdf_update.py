@@ -0,0 +1,284 @@
+"""Minimal reader and incremental-update writer for engine-generated PDFs.
+
+Only what is needed to patch a freshly written WeasyPrint/pydyf document is
+supported: a single cross-reference section (classic table or compressed
+cross-reference stream), object streams, and appending replacement objects
+as an incremental update. Existing bytes are never rewritten, so patching a
+document costs a few string searches plus the size of the new objects.
+"""
+
+from __future__ import annotations
+
+import re
+import zlib
+from dataclasses import dataclass
+from typing import Iterator, Mapping
+
+_STARTXREF_RE = re.compile(rb"startxref\s+(\d+)\s+%%EOF\s*$")
+_OBJECT_HEADER_RE = re.compile(rb"\s*(\d+)\s+(\d+)\s+obj\b")
+_REFERENCE_RE = r"/{key}\s+(\d+\s+\d+\s+R)"
+_LINEARIZATION_RE = re.compile(rb"\d+\s+\d+\s+obj\s*(<<[^>]*/Linearized\b[^>]*>>)")
+
+
+@dataclass(frozen=True)
+class PdfTrailer:
+    """Trailer facts of the last cross-reference section."""
+
+    startxref: int
+    size: int
+    root: bytes
+    info: bytes | None
+    identifier: bytes | None
+    uses_xref_stream: bool
+    dictionary: bytes
+
+    @property
+    def info_number(self) -> int | None:
+        return int(self.info.split()[0]) if self.info else None
+
+
+def _dict_reference(dictionary: bytes, key: str) -> bytes | None:
+    match = re.search(_REFERENCE_RE.format(key=key).encode("ascii"), dictionary)
+    return match.group(1) if match else None
+
+
+def _dict_int(dictionary: bytes, key: str) -> int | None:
+    match = re.search(rb"/" + key.encode("ascii") + rb"\s+(\d+)", dictionary)
+    return int(match.group(1)) if match else None
+
+
+def _dict_array(dictionary: bytes, key: str) -> bytes | None:
+    match = re.search(rb"/" + key.encode("ascii") + rb"\s*(\[[^\]]*\])", dictionary)
+    return match.group(1) if match else None
+
+
+def _object_dictionary(pdf: bytes, offset: int) -> tuple[int, bytes, int | None]:
+    """Return ``(number, dictionary, stream_start)`` of the object at ``offset``."""
+    header = _OBJECT_HEADER_RE.match(pdf, offset)
+    if header is None:
+        raise ValueError(f"No PDF object at offset {offset}")
+    body_start = header.end()
+    end = pdf.find(b"endobj", body_start)
+    stream = pdf.find(b"stream", body_start, end if end != -1 else None)
+    if stream == -1:
+        return int(header.group(1)), pdf[body_start:end].strip(), None
+    stream_start = stream + len(b"stream")
+    if pdf[stream_start:stream_start + 2] == b"\r\n":
+        stream_start += 2
+    elif pdf[stream_start:stream_start + 1] == b"\n":
+        stream_start += 1
+    return int(header.group(1)), pdf[body_start:stream].strip(), stream_start
+
+
+def _stream_data(pdf: bytes, offset: int) -> tuple[bytes, bytes]:
+    _, dictionary, stream_start = _object_dictionary(pdf, offset)
+    if stream_start is None:
+        raise ValueError(f"PDF object at offset {offset} is not a stream")
+    length = _dict_int(dictionary, "Length")
+    if length is None:
+        raise ValueError("Stream length must be a direct integer")
+    data = pdf[stream_start:stream_start + length]
+    if b"/DecodeParms" in dictionary:
+        raise ValueError("Predictor-encoded streams are not supported")
+    if b"/FlateDecode" in dictionary:
+        data = zlib.decompress(data)
+    return dictionary, data
+
+
+def read_trailer(pdf: bytes) -> PdfTrailer:
+    """Parse the trailer of a PDF with a single cross-reference section.
+
+    Raises:
+        ValueError: If the file is not in a supported shape.
+    """
+    match = _STARTXREF_RE.search(pdf[-64:])
+    if match is None:
+        raise ValueError("PDF has no startxref marker")
+    startxref = int(match.group(1))
+
+    if pdf.startswith(b"xref", startxref):
+        trailer_start = pdf.find(b"trailer", startxref)
+        trailer_end = pdf.find(b"startxref", trailer_start)
+        if trailer_start == -1 or trailer_end == -1:
+            raise ValueError("PDF trailer is missing")
+        dictionary = pdf[trailer_start + len(b"trailer"):trailer_end].strip()
+        uses_xref_stream = False
+    else:
+        _, dictionary, _ = _object_dictionary(pdf, startxref)
+        if b"/XRef" not in dictionary:
+            raise ValueError("startxref does not point at a cross-reference section")
+        uses_xref_stream = True
+
+    if b"/Prev" in dictionary:
+        raise ValueError("PDF has already been incrementally updated")
+    size = _dict_int(dictionary, "Size")
+    root = _dict_reference(dictionary, "Root")
+    if size is None or root is None:
+        raise ValueError("PDF trailer lacks /Size or /Root")
+    return PdfTrailer(
+        startxref=startxref,
+        size=size,
+        root=root,
+        info=_dict_reference(dictionary, "Info"),
+        identifier=_dict_array(dictionary, "ID"),
+        uses_xref_stream=uses_xref_stream,
+        dictionary=dictionary,
+    )
+
+
+def linearized_first_page_end(pdf: bytes) -> int | None:
+    """Return the offset where a linearized PDF's first page ends (``/E``).
+
+    Returns None for documents that are not linearized, or no longer are
+    because bytes were appended after linearization.
+    """
+    match = _LINEARIZATION_RE.search(pdf, 0, 1024)
+    if match is None:
+        return None
+    dictionary = match.group(1)
+    if _dict_int(dictionary, "L") != len(pdf):
+        return None
+    return _dict_int(dictionary, "E")
+
+
+def xref_entries(pdf: bytes, trailer: PdfTrailer) -> dict[int, tuple[int, int, int]]:
+    """Return ``{number: (type, field2, field3)}`` for in-use objects.
+
+    Type 1 entries carry ``(offset, generation)``; type 2 entries carry the
+    containing object stream number and the index inside it.
+    """
+    entries: dict[int, tuple[int, int, int]] = {}
+    if not trailer.uses_xref_stream:
+        section_end = pdf.find(b"trailer", trailer.startxref)
+        tokens = pdf[trailer.startxref + len(b"xref"):section_end].split()
+        position = 0
+        while position + 1 < len(tokens):
+            first, count = int(tokens[position]), int(tokens[position + 1])
+            position += 2
+            for index in range(count):
+                offset, generation, flag = tokens[position:position + 3]
+                position += 3
+                if flag == b"n":
+                    entries[first + index] = (1, int(offset), int(generation))
+        return entries
+
+    dictionary, data = _stream_data(pdf, trailer.startxref)
+    widths_text = _dict_array(dictionary, "W")
+    if widths_text is None:
+        raise ValueError("Cross-reference stream lacks /W")
+    widths = [int(value) for value in widths_text.strip(b"[]").split()]
+    index_text = _dict_array(dictionary, "Index")
+    index_values = (
+        [int(value) for value in index_text.strip(b"[]").split()]
+        if index_text
+        else [0, trailer.size]
+    )
+    row_size = sum(widths)
+    position = 0
+    for first, count in zip(index_values[::2], index_values[1::2]):
+        for number in range(first, first + count):
+            row = data[position:position + row_size]
+            position += row_size
+            fields = []
+            cursor = 0
+            for position_in_row, width in enumerate(widths):
+                if width:
+                    fields.append(int.from_bytes(row[cursor:cursor + width], "big"))
+                else:
+                    # An omitted type field defaults to 1, other fields to 0.
+                    fields.append(1 if position_in_row == 0 else 0)
+                cursor += width
+            if fields[0] in (1, 2):
+                entries[number] = (fields[0], fields[1], fields[2])
+    return entries
+
+
+def read_object(pdf: bytes, entries: Mapping[int, tuple[int, int, int]], number: int) -> bytes:
+    """Return the serialized body of a non-stream object (or a stream's dictionary)."""
+    entry = entries.get(number)
+    if entry is None:
+        raise ValueError(f"PDF object {number} is not in use")
+    kind, field2, field3 = entry
+    if kind == 1:
+        return _object_dictionary(pdf, field2)[1]
+
+    container = entries.get(field2)
+    if container is None or container[0] != 1:
+        raise ValueError(f"Object stream {field2} is missing")
+    dictionary, data = _stream_data(pdf, container[1])
+    first = _dict_int(dictionary, "First")
+    if first is None:
+        raise ValueError("Object stream lacks /First")
+    header = [int(value) for value in data[:first].split()]
+    offsets = header[1::2]
+    if field3 >= len(offsets):
+        raise ValueError(f"Object {number} is not in its object stream")
+    start = first + offsets[field3]
+    end = first + offsets[field3 + 1] if field3 + 1 < len(offsets) else len(data)
+    return data[start:end].strip()
+
+
+def iter_stream_objects(pdf: bytes, entries: Mapping[int, tuple[int, int, int]]) -> Iterator[tuple[int, bytes]]:
+    """Yield ``(number, dictionary)`` for every top-level stream object."""
+    for number, (kind, offset, _) in entries.items():
+        if kind != 1:
+            continue
+        _, dictionary, stream_start = _object_dictionary(pdf, offset)
+        if stream_start is not None:
+            yield number, dictionary
+
+
+def serialize_stream(dictionary_entries: bytes, data: bytes) -> bytes:
+    """Serialize a stream object body from its dictionary entries and data."""
+    return b"<<" + dictionary_entries + b"/Length %d>>\nstream\n" % len(data) + data + b"\nendstream"
+
+
+def append_incremental_update(pdf: bytes, trailer: PdfTrailer, objects: Mapping[int, bytes]) -> bytes:
+    """Append new or replacement objects to ``pdf`` as an incremental update.
+
+    Args:
+        pdf: The original document.
+        trailer: Its parsed trailer.
+        objects: Serialized object bodies keyed by object number; numbers at
+            or above ``trailer.size`` add new objects.
+
+    Returns:
+        The updated document. The cross-reference section uses the same form
+        as the original one.
+    """
+    output = bytearray(pdf)
+    if not output.endswith(b"\n"):
+        output += b"\n"
+
+    offsets: dict[int, int] = {}
+    for number in sorted(objects):
+        offsets[number] = len(output)
+        output += b"%d 0 obj\n" % number + objects[number] + b"\nendobj\n"
+
+    size = max(trailer.size, max(offsets, default=0) + 1)
+    trailer_entries = b"/Root " + trailer.root
+    if trailer.info:
+        trailer_entries += b"/Info " + trailer.info
+    if trailer.identifier:
+        trailer_entries += b"/ID " + trailer.identifier
+    trailer_entries += b"/Prev %d" % trailer.startxref
+
+    if trailer.uses_xref_stream:
+        xref_number = size
+        size += 1
+        xref_offset = len(output)
+        offsets[xref_number] = xref_offset
+        numbers = sorted(offsets)
+        rows = b"".join(b"\x01" + offsets[number].to_bytes(4, "big") + b"\x00\x00" for number in numbers)
+        index = b" ".join(b"%d 1" % number for number in numbers)
+        dictionary_entries = b"/Type /XRef/Size %d/W [1 4 2]/Index [%s]" % (size, index) + trailer_entries
+        output += b"%d 0 obj\n" % xref_number + serialize_stream(dictionary_entries, rows) + b"\nendobj\n"
+    else:
+        xref_offset = len(output)
+        output += b"xref\n0 1\n0000000000 65535 f \n"
+        for number in sorted(offsets):
+            output += b"%d 1\n%010d 00000 n \n" % (number, offsets[number])
+        output += b"trailer\n<</Size %d" % size + trailer_entries + b">>\n"
+
+    output += b"startxref\n%d\n%%%%EOF\n" % xref_offset
+    return bytes(output)
@@ -8,7 +8,8 @@ from __future__ import annotations
 
 import logging
 import os
-from datetime import date, datetime
+from dataclasses import dataclass
+from datetime import date, datetime, timezone
 from hashlib import sha256
 from pathlib import Path
 import re
@@ -16,9 +17,10 @@ from typing import Any, Mapping
 from urllib.parse import urlparse
 from uuid import uuid4
 
-from jinja2 import Environment, FileSystemLoader, select_autoescape
-
 from ..config import PDF_FILE_PREFIX, PDF_STORAGE_PATH, PDF_TEMPLATE_PATH
+from ..storage import PdfStorage, ShardedLocalStorage, build_pdf_key, get_pdf_storage, shard_path
+from .shared_assets import SHARED_ASSET_SCHEME, is_accepted_shared_ref
+from .template_registry import get_template_registry
 
 SUPPORTED_CURRENCIES = {"₹", "$", "€"}
 DEFAULT_CURRENCY = "₹"
@@ -67,7 +69,7 @@ def _to_display_date(value: Any) -> str:
         return f"{dt.day} {month_name} {dt.year}"
 
     if value is None:
-        return render_long_date(datetime.now(datetime.UTC))
+        return render_long_date(datetime.now(timezone.utc))
 
     if isinstance(value, datetime):
         return render_long_date(value)
@@ -77,7 +79,7 @@ def _to_display_date(value: Any) -> str:
 
     value_text = str(value).strip()
     if not value_text:
-        return render_long_date(datetime.now(datetime.UTC))
+        return render_long_date(datetime.now(timezone.utc))
 
     try:
         parsed = datetime.fromisoformat(value_text.replace("Z", "+00:00"))
@@ -93,6 +95,7 @@ def validate_signature_src(signature_value: Any) -> str:
     - data:image/*;base64,...
     - http(s) image URLs
     - raw base64 image payloads (auto-prefixed as PNG)
+    - shm: references the render executor exported for the current task
 
     Any other scheme/value is rejected and returns an empty string.
     """
@@ -119,6 +122,13 @@ def validate_signature_src(signature_value: Any) -> str:
             raise ValueError("Unsupported signature image MIME type")
         return value_text
 
+    if lower_text.startswith(SHARED_ASSET_SCHEME):
+        # Only references handed to this render task by the executor count.
+        if is_accepted_shared_ref(value_text):
+            return value_text
+        LOGGER.warning("Rejected unregistered shared signature reference")
+        return ""
+
     parsed = urlparse(value_text)
     if parsed.scheme in {"http", "https"}:
         trusted_hosts = _trusted_signature_hosts()
@@ -635,13 +645,13 @@ def render_contract_template(
     template_path: Path = PDF_TEMPLATE_PATH,
     template_name: str | None = None,
 ) -> str:
-    """Render the Jinja2 contract template with a provided context map."""
-    env = Environment(
-        loader=FileSystemLoader(str(template_path.parent)),
-        autoescape=select_autoescape(enabled_extensions=("html", "xml")),
-    )
+    """Render the Jinja2 contract template with a provided context map.
+
+    Templates are compiled once per process by the shared template registry.
+    """
+    registry = get_template_registry(template_path.parent)
     selected_template = template_name or template_path.name
-    template = env.get_template(selected_template)
+    template = registry.get_template(selected_template)
     return template.render(**dict(context))
 
 
@@ -665,3 +675,41 @@ def build_pdf_output_path(
 def compute_pdf_sha256(pdf_content: bytes) -> str:
     """Return a SHA256 digest for generated PDF bytes."""
     return sha256(pdf_content).hexdigest()
+
+
+@dataclass(frozen=True)
+class StoredPdf:
+    """A PDF saved in content-addressed storage."""
+
+    key: str
+    sha256: str
+    size_bytes: int
+    deduplicated: bool = False
+    # Local file of the PDF when the storage backend keeps files.
+    path: str | None = None
+
+
+def build_content_addressed_path(digest: str, storage_path: Path = PDF_STORAGE_PATH) -> Path:
+    """Return the sharded local path for a PDF with the given sha256 digest."""
+    return shard_path(storage_path, build_pdf_key(digest))
+
+
+def store_pdf_bytes(pdf_content: bytes, storage: PdfStorage | None = None) -> StoredPdf:
+    """Save PDF bytes under their sha256 digest.
+
+    Identical documents are written once: if an object with the same digest
+    and size already exists it is reused. Backends write atomically so
+    readers never see partial content.
+    """
+    storage = storage or get_pdf_storage()
+    digest = compute_pdf_sha256(pdf_content)
+    key = build_pdf_key(digest)
+    written = storage.write(key, pdf_content)
+    local_path = storage.path_for(key) if isinstance(storage, ShardedLocalStorage) else None
+    return StoredPdf(
+        key,
+        digest,
+        len(pdf_content),
+        deduplicated=not written,
+        path=str(local_path) if local_path is not None else None,
+    )
@@ -0,0 +1,248 @@
+"""Shared-memory handoff of signature images to render worker processes.
+
+Payloads carry signatures as base64 data URIs of up to 700 KB each, and a
+render task is pickled through the executor's pipe to reach its worker. The
+submitting process instead decodes each large signature once into a shared
+memory segment named after its content hash and sends a short ``shm:``
+reference; the worker maps the segment and reads the image bytes without
+unpickling or base64-decoding them.
+
+Segments are reference-counted by the tasks that use them. A few recently
+released ones are kept, so a creator signature that recurs across contracts
+is exported once. Workers only honour references their task was handed by
+the executor, never ``shm:`` strings that arrive inside a payload.
+"""
+
+from __future__ import annotations
+
+import base64
+import os
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+from dataclasses import dataclass
+from hashlib import sha256
+from typing import Any, Iterable, Iterator, Mapping
+
+try:
+    from multiprocessing.shared_memory import SharedMemory
+except ImportError:  # pragma: no cover - platforms without shared memory
+    SharedMemory = None
+
+from ..config import PDF_SHARED_ASSET_MIN_BYTES, PDF_SHARED_ASSET_RETAIN_BYTES
+
+SHARED_ASSET_SCHEME = "shm:"
+# Payload fields holding signature image sources.
+PAYLOAD_SIGNATURE_KEYS = ("signature_creator", "signature_client")
+SEGMENT_PREFIX = "ce"
+
+
+@dataclass(frozen=True)
+class SharedAssetRef:
+    """Location of a decoded signature image in shared memory.
+
+    ``digest`` is the sha256 of the original data URI, so the worker files
+    the image under the same ``asset:`` reference an in-process render uses.
+    """
+
+    segment: str
+    digest: str
+    size: int
+    mime_type: str
+
+    def __str__(self) -> str:
+        return f"{SHARED_ASSET_SCHEME}{self.segment}:{self.digest}:{self.size}:{self.mime_type}"
+
+    @classmethod
+    def parse(cls, value: str) -> "SharedAssetRef | None":
+        if not value.startswith(SHARED_ASSET_SCHEME):
+            return None
+        parts = value[len(SHARED_ASSET_SCHEME):].split(":", 3)
+        if len(parts) != 4 or not parts[2].isdigit():
+            return None
+        return cls(parts[0], parts[1], int(parts[2]), parts[3])
+
+
+@dataclass
+class SharedAssetStats:
+    exported: int = 0
+    reused: int = 0
+    released: int = 0
+    bytes_exported: int = 0
+
+
+class _Segment:
+    def __init__(self, memory: Any, ref: SharedAssetRef) -> None:
+        self.memory = memory
+        self.ref = ref
+        self.users = 0
+
+
+def shared_memory_available() -> bool:
+    return SharedMemory is not None
+
+
+def _decode_signature(uri: str) -> tuple[bytes, str]:
+    header, _, payload = uri[5:].partition(",")
+    mime_type = header.split(";", 1)[0].strip().lower() or "application/octet-stream"
+    return base64.b64decode("".join(payload.split())), mime_type
+
+
+class SharedAssetExporter:
+    """Moves large payload signatures into shared memory for one process.
+
+    Args:
+        min_bytes: Data URIs shorter than this are pickled as usual; copying
+            them is cheaper than a segment.
+        retain_bytes: Size of released segments kept for reuse.
+    """
+
+    def __init__(
+        self,
+        min_bytes: int = PDF_SHARED_ASSET_MIN_BYTES,
+        retain_bytes: int = PDF_SHARED_ASSET_RETAIN_BYTES,
+    ) -> None:
+        self.min_bytes = min_bytes
+        self.retain_bytes = max(0, retain_bytes)
+        self.stats = SharedAssetStats()
+        self._lock = threading.Lock()
+        self._segments: dict[str, _Segment] = {}
+        self._idle: OrderedDict[str, None] = OrderedDict()
+        self._idle_bytes = 0
+
+    def export_payload(self, payload: Mapping[str, Any]) -> tuple[Mapping[str, Any], list[SharedAssetRef]]:
+        """Return the payload with large signatures replaced by ``shm:`` references.
+
+        Call ``release`` with the returned references once the task is done.
+        """
+        from .pdf_utils import validate_signature_src
+
+        exported: list[SharedAssetRef] = []
+        replaced: dict[str, Any] | None = None
+        for key in PAYLOAD_SIGNATURE_KEYS:
+            value = payload.get(key)
+            if not isinstance(value, str) or len(value) < self.min_bytes or not value[:5].lower() == "data:":
+                continue
+            try:
+                # Invalid signatures stay in the payload so the render reports them.
+                if validate_signature_src(value) != value:
+                    continue
+                ref = self._acquire(value)
+            except (ValueError, OSError):
+                continue
+            if replaced is None:
+                replaced = dict(payload)
+            replaced[key] = str(ref)
+            exported.append(ref)
+        return (replaced if replaced is not None else payload), exported
+
+    def _acquire(self, uri: str) -> SharedAssetRef:
+        digest = sha256(uri.encode("utf-8")).hexdigest()
+        with self._lock:
+            segment = self._segments.get(digest)
+            if segment is not None:
+                self._take(segment)
+                self.stats.reused += 1
+                return segment.ref
+
+        data, mime_type = _decode_signature(uri)
+        name = f"{SEGMENT_PREFIX}{os.getpid():x}_{digest[:16]}"
+        with self._lock:
+            segment = self._segments.get(digest)
+            if segment is None:
+                memory = SharedMemory(name=name, create=True, size=max(1, len(data)))
+                memory.buf[: len(data)] = data
+                segment = _Segment(memory, SharedAssetRef(name, digest, len(data), mime_type))
+                self._segments[digest] = segment
+                self.stats.exported += 1
+                self.stats.bytes_exported += len(data)
+            else:
+                self.stats.reused += 1
+            self._take(segment)
+            return segment.ref
+
+    def _take(self, segment: _Segment) -> None:
+        if segment.users == 0 and segment.ref.digest in self._idle:
+            del self._idle[segment.ref.digest]
+            self._idle_bytes -= segment.ref.size
+        segment.users += 1
+
+    def release(self, refs: Iterable[SharedAssetRef]) -> None:
+        """Drop a finished task's hold on its segments."""
+        with self._lock:
+            for ref in refs:
+                segment = self._segments.get(ref.digest)
+                if segment is None or segment.users == 0:
+                    continue
+                segment.users -= 1
+                if segment.users == 0:
+                    self._idle[ref.digest] = None
+                    self._idle_bytes += ref.size
+            while self._idle and self._idle_bytes > self.retain_bytes:
+                digest, _ = self._idle.popitem(last=False)
+                segment = self._segments.pop(digest)
+                self._idle_bytes -= segment.ref.size
+                self._unlink(segment)
+
+    def _unlink(self, segment: _Segment) -> None:
+        self.stats.released += 1
+        segment.memory.close()
+        try:
+            segment.memory.unlink()
+        except FileNotFoundError:
+            pass
+
+    @property
+    def segments(self) -> int:
+        with self._lock:
+            return len(self._segments)
+
+    def close(self) -> None:
+        """Unlink every segment; queued tasks that still use one fail to read it."""
+        with self._lock:
+            segments = list(self._segments.values())
+            self._segments.clear()
+            self._idle.clear()
+            self._idle_bytes = 0
+        for segment in segments:
+            segment.users = 0
+            self._unlink(segment)
+
+
+# References handed to the task running in this worker process.
+_ACCEPTED: set[str] = set()
+
+
+@contextmanager
+def accept_shared_assets(refs: Iterable[SharedAssetRef]) -> Iterator[None]:
+    """Let the current task's payload use ``refs`` as signature sources."""
+    accepted = {str(ref) for ref in refs}
+    _ACCEPTED.update(accepted)
+    try:
+        yield
+    finally:
+        _ACCEPTED.difference_update(accepted)
+
+
+def is_accepted_shared_ref(value: str) -> bool:
+    return value in _ACCEPTED
+
+
+def read_shared_asset(ref: SharedAssetRef) -> bytes:
+    """Copy an image out of its shared memory segment.
+
+    Raises:
+        ValueError: If the segment is gone or smaller than recorded.
+    """
+    if SharedMemory is None:
+        raise ValueError("Shared memory is not available on this platform")
+    try:
+        memory = SharedMemory(name=ref.segment)
+    except FileNotFoundError as error:
+        raise ValueError(f"Shared signature image {ref.segment} is no longer available") from error
+    try:
+        if memory.size < ref.size:
+            raise ValueError(f"Shared signature image {ref.segment} is truncated")
+        return bytes(memory.buf[: ref.size])
+    finally:
+        memory.close()
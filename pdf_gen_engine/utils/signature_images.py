@@ -0,0 +1,166 @@
+"""Ingest-time normalization of signature images.
+
+Signature pads and uploads produce large, mostly empty images. They are
+decoded once when a signature is submitted, validated, trimmed to the inked
+area, downsized to a fixed maximum and re-encoded as a small palette PNG, so
+the database and every later PDF render only ever see the compact version.
+Allowlisted http(s) signature URLs are downloaded here too, following
+redirects only between allowlisted hosts: renders never open a socket, so
+the image has to be stored inline.
+"""
+
+from __future__ import annotations
+
+import base64
+import binascii
+from dataclasses import dataclass
+from io import BytesIO
+from typing import Any
+from urllib.request import HTTPRedirectHandler, build_opener
+
+from PIL import Image, ImageChops, UnidentifiedImageError
+
+from ..config import (
+    PDF_ASSET_FETCH_TIMEOUT,
+    PDF_ASSET_MAX_BYTES,
+    PDF_SIGNATURE_COLORS,
+    PDF_SIGNATURE_MAX_HEIGHT,
+    PDF_SIGNATURE_MAX_PIXELS,
+    PDF_SIGNATURE_MAX_WIDTH,
+)
+from .pdf_utils import validate_signature_src
+
+# Pixels lighter than this (0-255 luminance) count as paper, not ink.
+INK_THRESHOLD = 245
+ALPHA_THRESHOLD = 16
+TRIM_PADDING = 4
+
+
+@dataclass(frozen=True)
+class NormalizedSignature:
+    """A re-encoded signature image and its size bookkeeping."""
+
+    data_uri: str
+    mime_type: str
+    width: int
+    height: int
+    original_bytes: int
+    normalized_bytes: int
+
+    def as_metadata(self) -> dict[str, Any]:
+        return {
+            "mimeType": self.mime_type,
+            "width": self.width,
+            "height": self.height,
+            "originalBytes": self.original_bytes,
+            "normalizedBytes": self.normalized_bytes,
+        }
+
+
+def _decode_base64_image(data_uri: str) -> bytes:
+    payload = data_uri.split(",", 1)[1]
+    try:
+        return base64.b64decode("".join(payload.split()), validate=True)
+    except (binascii.Error, ValueError) as error:
+        raise ValueError("Signature image is not valid base64") from error
+
+
+class _AllowlistRedirectHandler(HTTPRedirectHandler):
+    """Follows a redirect only to another allowlisted signature image host."""
+
+    def redirect_request(self, req: Any, fp: Any, code: int, msg: str, headers: Any, newurl: str) -> Any:
+        try:
+            allowed = validate_signature_src(newurl).lower().startswith(("http://", "https://"))
+        except ValueError:
+            allowed = False
+        if not allowed:
+            raise ValueError("Signature image URL redirects to a host that is not allowed")
+        return super().redirect_request(req, fp, code, msg, headers, newurl)
+
+
+_OPENER = build_opener(_AllowlistRedirectHandler)
+
+
+def _download_image(url: str) -> bytes:
+    try:
+        with _OPENER.open(url, timeout=PDF_ASSET_FETCH_TIMEOUT) as response:
+            data = response.read(PDF_ASSET_MAX_BYTES + 1)
+    except OSError as error:
+        raise ValueError(f"Signature image could not be downloaded: {error}") from error
+    if len(data) > PDF_ASSET_MAX_BYTES:
+        raise ValueError("Signature image is too large")
+    return data
+
+
+def _open_image(raw_bytes: bytes) -> Image.Image:
+    try:
+        image = Image.open(BytesIO(raw_bytes))
+        if image.width * image.height > PDF_SIGNATURE_MAX_PIXELS:
+            raise ValueError("Signature image dimensions are too large")
+        image.seek(0)
+        image.load()
+    except (UnidentifiedImageError, OSError, Image.DecompressionBombError) as error:
+        raise ValueError("Signature image could not be decoded") from error
+    return image
+
+
+def _trim_to_ink(image: Image.Image) -> Image.Image:
+    """Crop transparent or near-white margins around the strokes."""
+    alpha_mask = image.getchannel("A").point(lambda value: 255 if value > ALPHA_THRESHOLD else 0)
+    ink_mask = image.convert("L").point(lambda value: 255 if value < INK_THRESHOLD else 0)
+    bbox = ImageChops.multiply(alpha_mask, ink_mask).getbbox()
+    if bbox is None:
+        raise ValueError("Signature image is blank")
+
+    left, top, right, bottom = bbox
+    return image.crop(
+        (
+            max(0, left - TRIM_PADDING),
+            max(0, top - TRIM_PADDING),
+            min(image.width, right + TRIM_PADDING),
+            min(image.height, bottom + TRIM_PADDING),
+        )
+    )
+
+
+def normalize_signature_image(signature_value: Any) -> NormalizedSignature:
+    """Validate and compact a submitted signature image.
+
+    Args:
+        signature_value: A data URI, raw base64 payload or allowlisted http(s)
+            URL, which is downloaded once here.
+
+    Returns:
+        The normalized signature.
+
+    Raises:
+        ValueError: If the value is not a usable signature image or cannot be
+            downloaded.
+    """
+    signature_src = validate_signature_src(signature_value)
+    if not signature_src:
+        raise ValueError("Signature image is missing or uses an unsupported format")
+    if signature_src.lower().startswith("data:"):
+        raw_bytes = _decode_base64_image(signature_src)
+    elif signature_src.lower().startswith(("http://", "https://")):
+        raw_bytes = _download_image(signature_src)
+    else:
+        raise ValueError("Signature image is missing or uses an unsupported format")
+
+    image = _open_image(raw_bytes).convert("RGBA")
+    image = _trim_to_ink(image)
+    image.thumbnail((PDF_SIGNATURE_MAX_WIDTH, PDF_SIGNATURE_MAX_HEIGHT), Image.Resampling.LANCZOS)
+    palette_image = image.quantize(colors=PDF_SIGNATURE_COLORS, method=Image.Quantize.FASTOCTREE)
+
+    output = BytesIO()
+    palette_image.save(output, format="PNG", optimize=True)
+    png_bytes = output.getvalue()
+
+    return NormalizedSignature(
+        data_uri="data:image/png;base64," + base64.b64encode(png_bytes).decode("ascii"),
+        mime_type="image/png",
+        width=palette_image.width,
+        height=palette_image.height,
+        original_bytes=len(raw_bytes),
+        normalized_bytes=len(png_bytes),
+    )
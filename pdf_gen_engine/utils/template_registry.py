@@ -0,0 +1,148 @@
+"""Process-wide registry of compiled contract templates.
+
+Building a Jinja2 environment per render re-parses and re-compiles the
+template every time. The registry keeps one environment per template
+directory, compiles each contract template once and optionally persists the
+compiled bytecode on disk so new worker processes start warm.
+"""
+
+from __future__ import annotations
+
+import logging
+import threading
+from pathlib import Path
+from typing import TYPE_CHECKING
+
+from ..config import PDF_AUTO_RELOAD, PDF_DIRECT_RENDER_TYPES, PDF_TEMPLATE_CACHE_PATH, PDF_TEMPLATE_PATH
+
+if TYPE_CHECKING:
+    from jinja2 import BytecodeCache, Environment, Template
+
+LOGGER = logging.getLogger(__name__)
+
+DEFAULT_TEMPLATE_NAME = PDF_TEMPLATE_PATH.name
+CONTRACT_TEMPLATE_FILES = {
+    "house_sale": "house_sale.html",
+    "website_development": "website_development.html",
+    "broker": "broker.html",
+    "nda": "nda.html",
+    "employment": "employment.html",
+}
+CONTRACT_TEMPLATE_NAMES = (DEFAULT_TEMPLATE_NAME, *CONTRACT_TEMPLATE_FILES.values())
+RENDER_BACKEND_WEASYPRINT = "weasyprint"
+RENDER_BACKEND_DIRECT = "direct"
+
+
+def resolve_template_name(contract_type: str | None) -> str | None:
+    """Return the template file for a contract type, or None for the generic template."""
+    normalized_type = str(contract_type or "").strip().lower()
+    return CONTRACT_TEMPLATE_FILES.get(normalized_type)
+
+
+def resolve_render_backend(contract_type: str | None) -> str:
+    """Return the backend that renders a contract type: "direct" or "weasyprint"."""
+    normalized_type = str(contract_type or "").strip().lower()
+    if normalized_type in CONTRACT_TEMPLATE_FILES and normalized_type in PDF_DIRECT_RENDER_TYPES:
+        return RENDER_BACKEND_DIRECT
+    return RENDER_BACKEND_WEASYPRINT
+
+
+def _build_bytecode_cache(cache_path: Path | None) -> BytecodeCache | None:
+    if cache_path is None:
+        return None
+
+    try:
+        cache_path.mkdir(parents=True, exist_ok=True)
+    except OSError as error:
+        LOGGER.warning("Template bytecode cache disabled, cannot create %s: %s", cache_path, error)
+        return None
+
+    from jinja2 import FileSystemBytecodeCache
+
+    return FileSystemBytecodeCache(str(cache_path), pattern="contractease-%s.cache")
+
+
+class TemplateRegistry:
+    """Compiled template store for a single template directory.
+
+    In production mode (``auto_reload=False``) templates are compiled once and
+    served from memory without any filesystem checks. In development mode the
+    Jinja2 loader checks template mtimes and recompiles changed files.
+    """
+
+    def __init__(
+        self,
+        template_dir: Path,
+        auto_reload: bool = PDF_AUTO_RELOAD,
+        bytecode_cache_path: Path | None = PDF_TEMPLATE_CACHE_PATH,
+    ) -> None:
+        self.template_dir = template_dir
+        self.auto_reload = auto_reload
+        self.bytecode_cache_path = bytecode_cache_path
+        self._lock = threading.Lock()
+        self._environment: Environment | None = None
+        self._templates: dict[str, Template] = {}
+
+    @property
+    def environment(self) -> Environment:
+        if self._environment is None:
+            with self._lock:
+                if self._environment is None:
+                    # Imported here so importing the engine does not load Jinja2.
+                    from jinja2 import Environment, FileSystemLoader, select_autoescape
+
+                    self._environment = Environment(
+                        loader=FileSystemLoader(str(self.template_dir)),
+                        autoescape=select_autoescape(enabled_extensions=("html", "xml")),
+                        auto_reload=self.auto_reload,
+                        bytecode_cache=_build_bytecode_cache(self.bytecode_cache_path),
+                        cache_size=-1,
+                    )
+        return self._environment
+
+    def get_template(self, template_name: str) -> Template:
+        """Return a compiled template, compiling it on first use."""
+        if self.auto_reload:
+            return self.environment.get_template(template_name)
+
+        template = self._templates.get(template_name)
+        if template is None:
+            template = self.environment.get_template(template_name)
+            with self._lock:
+                template = self._templates.setdefault(template_name, template)
+        return template
+
+    def warm(self, template_names: tuple[str, ...] = CONTRACT_TEMPLATE_NAMES) -> list[str]:
+        """Compile the given templates ahead of the first render.
+
+        Returns:
+            Names of the templates that were compiled successfully.
+        """
+        warmed: list[str] = []
+        for template_name in template_names:
+            try:
+                self.get_template(template_name)
+            except Exception as error:
+                LOGGER.warning("Failed to precompile template %s: %s", template_name, error)
+                continue
+            warmed.append(template_name)
+        return warmed
+
+    def clear(self) -> None:
+        """Drop compiled templates so they are rebuilt on next access."""
+        with self._lock:
+            self._templates.clear()
+            self._environment = None
+
+
+_REGISTRIES: dict[Path, TemplateRegistry] = {}
+_REGISTRIES_LOCK = threading.Lock()
+
+
+def get_template_registry(template_dir: Path = PDF_TEMPLATE_PATH.parent) -> TemplateRegistry:
+    """Return the shared registry for a template directory."""
+    registry = _REGISTRIES.get(template_dir)
+    if registry is None:
+        with _REGISTRIES_LOCK:
+            registry = _REGISTRIES.setdefault(template_dir, TemplateRegistry(template_dir))
+    return registry
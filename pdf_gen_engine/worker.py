@@ -0,0 +1,497 @@
+"""Render worker for the durable PDF job queue.
+
+Workers claim jobs from the ``render_jobs`` collection, render them through the
+process-pool executor and finalize the contract. They can run on separate
+nodes from the API.
+
+Interactive jobs (signing) are claimed before batch jobs (backfills), and the
+worker threads of a process hold ``PDF_RENDER_INTERACTIVE_RESERVED`` threads
+back from batch jobs, so a large backfill never leaves a sign job unclaimed.
+
+Run from repository root:
+    python -m pdf_gen_engine.worker --concurrency 4
+"""
+
+from __future__ import annotations
+
+import argparse
+import logging
+import os
+import socket
+import threading
+from concurrent.futures import Future, TimeoutError as FutureTimeoutError
+from datetime import datetime, timezone
+from typing import Any, Callable, Mapping
+
+from jinja2 import TemplateError
+from pymongo import MongoClient
+
+from .config import (
+    PDF_JOBS_DATABASE_NAME,
+    PDF_JOBS_MONGO_URI,
+    PDF_RENDER_INTERACTIVE_RESERVED,
+    PDF_RENDER_JOB_LEASE_SECONDS,
+    PDF_RENDER_JOB_POLL_SECONDS,
+    PDF_RENDER_WORKERS,
+)
+from .errors import RenderLimitError
+from .services.prerender import prerender_contract_pdf
+from .services.render_executor import RenderExecutor, get_render_executor, shutdown_render_executor
+from .services.render_jobs import (
+    JOB_FAILED,
+    JOB_KIND_BACKFILL,
+    JOB_KIND_PRERENDER,
+    JOB_KIND_SIGN,
+    RENDER_JOBS_COLLECTION,
+    RenderJobQueue,
+    render_job_priority,
+)
+from .services.render_priority import RENDER_PRIORITY_BATCH
+from .services.render_stats import RenderReport, get_render_stats
+from .storage import get_pdf_storage
+from .utils.pdf_utils import StoredPdf
+
+LOGGER = logging.getLogger(__name__)
+
+CONTRACT_SENT = "sent"
+CONTRACT_PENDING = "pending"
+CONTRACT_SIGNED = "signed"
+
+# Failures that recur on every attempt: invalid payloads, template errors and
+# code errors a payload trips. Jobs failing with one are not retried.
+PERMANENT_RENDER_ERRORS: tuple[type[Exception], ...] = (
+    ValueError,
+    TypeError,
+    LookupError,
+    AttributeError,
+    TemplateError,
+)
+
+
+class LeaseLostError(RuntimeError):
+    """Raised when another worker reclaimed the job being rendered."""
+
+
+def _utcnow() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+def _default_worker_id(index: int = 0) -> str:
+    return f"{socket.gethostname()}:{os.getpid()}:{index}"
+
+
+def _delete_unreferenced_pdf(contracts: Any, stored_pdf: StoredPdf) -> None:
+    """Remove a rendered PDF unless some contract already points at it."""
+    try:
+        if contracts.count_documents({"pdf_sha256": stored_pdf.sha256}, limit=1):
+            return
+        get_pdf_storage().delete(stored_pdf.key)
+    except Exception as error:
+        LOGGER.warning("Failed to delete unreferenced PDF %s: %s", stored_pdf.key, error)
+
+
+def batch_job_slots(
+    concurrency: int,
+    interactive_reserved: int = PDF_RENDER_INTERACTIVE_RESERVED,
+) -> tuple[int, threading.Semaphore]:
+    """Return a process's job thread count and the semaphore bounding its batch jobs.
+
+    Only threads beyond ``interactive_reserved`` take batch jobs, so a sign
+    job never waits behind a backfill render. Like the render executor, a
+    process with no thread to spare runs one extra thread for batch jobs.
+    """
+    slots = concurrency - max(0, interactive_reserved)
+    if slots > 0:
+        return concurrency, threading.Semaphore(slots)
+    LOGGER.info(
+        "%d render job thread(s) with %d reserved for interactive jobs; starting one extra thread for batch jobs",
+        concurrency,
+        interactive_reserved,
+    )
+    return concurrency + 1, threading.Semaphore(1)
+
+
+class RenderWorker:
+    """Processes render jobs from one database.
+
+    Args:
+        database: A synchronous pymongo database.
+        worker_id: Lease owner name; must be unique per worker thread.
+        executor: Render executor; defaults to the process-wide executor.
+        batch_slots: Semaphore shared by the process's workers that bounds
+            how many of them hold batch jobs at once (see ``batch_job_slots``);
+            ``None`` lets this worker claim batch jobs whenever it is free.
+    """
+
+    def __init__(
+        self,
+        database: Any,
+        worker_id: str | None = None,
+        executor: RenderExecutor | None = None,
+        poll_seconds: float = PDF_RENDER_JOB_POLL_SECONDS,
+        batch_slots: threading.Semaphore | None = None,
+    ) -> None:
+        self.jobs = RenderJobQueue(database[RENDER_JOBS_COLLECTION])
+        self.contracts = database["contracts"]
+        self.signatures = database["signatures"]
+        self.worker_id = worker_id or _default_worker_id()
+        self.executor = executor or get_render_executor()
+        self.poll_seconds = poll_seconds
+        self.batch_slots = batch_slots
+        self.heartbeat_seconds = max(1.0, PDF_RENDER_JOB_LEASE_SECONDS / 3)
+
+    def run_once(self) -> bool:
+        """Claim and process a single job; returns False when the queue is empty.
+
+        Batch jobs are only claimed while a batch slot is free.
+        """
+        holds_batch_slot = self.batch_slots is not None and self.batch_slots.acquire(blocking=False)
+        try:
+            job = self.jobs.claim(self.worker_id, include_batch=self.batch_slots is None or holds_batch_slot)
+            if job is None:
+                return False
+            priority = render_job_priority(job)
+            if holds_batch_slot and priority != RENDER_PRIORITY_BATCH:
+                self.batch_slots.release()
+                holds_batch_slot = False
+            if int(job.get("attempts") or 0) == 1 and job.get("availableAt") and job.get("startedAt"):
+                wait_ms = (job["startedAt"] - job["availableAt"]).total_seconds() * 1000
+                get_render_stats().record_job_wait(priority, max(0.0, wait_ms))
+            self.process(job)
+            return True
+        finally:
+            if holds_batch_slot:
+                self.batch_slots.release()
+
+    def run_forever(self, stop_event: threading.Event) -> None:
+        # Claim jobs only once the render processes have warmed up.
+        self.executor.start()
+        LOGGER.info("Render worker %s ready", self.worker_id)
+        while not stop_event.is_set():
+            try:
+                processed = self.run_once()
+            except Exception as error:
+                LOGGER.exception("Render worker %s failed to poll jobs: %s", self.worker_id, error)
+                processed = False
+            if not processed:
+                stop_event.wait(self.poll_seconds)
+
+    def process(self, job: Mapping[str, Any]) -> None:
+        kind = job.get("kind")
+        if kind == JOB_KIND_SIGN:
+            self._process_sign(job)
+        elif kind == JOB_KIND_PRERENDER:
+            self._process_prerender(job)
+        elif kind == JOB_KIND_BACKFILL:
+            self._process_backfill(job)
+        else:
+            self.jobs.fail(job, self.worker_id, f"Unsupported render job kind: {kind}", retryable=False)
+
+    def _process_sign(self, job: Mapping[str, Any]) -> None:
+        job_id = job["_id"]
+        contract = self.contracts.find_one(
+            {"_id": job["contractId"]},
+            {"status": 1, "renderJobId": 1, "prerender": 1},
+        )
+        if contract and contract.get("status") == CONTRACT_SIGNED and contract.get("renderJobId") == job_id:
+            # A previous attempt finalized the contract but crashed before acking.
+            self.jobs.ack(job_id, self.worker_id, {"recovered": True})
+            return
+
+        if not contract or contract.get("status") != CONTRACT_PENDING or contract.get("renderJobId") != job_id:
+            self.jobs.fail(job, self.worker_id, "Contract is no longer awaiting this render job", retryable=False)
+            return
+
+        if int(job.get("attempts") or 0) > int(job.get("maxAttempts") or 1):
+            self._rollback_sign(job)
+            self.jobs.fail(job, self.worker_id, "Render job exceeded its retry limit", retryable=False)
+            return
+
+        try:
+            future = self.executor.submit_with_report(
+                job.get("payload") or {},
+                "stored",
+                contract.get("prerender"),
+                profile=job.get("profile"),
+                priority=render_job_priority(job),
+            )
+            stored_pdf, report = self._wait_with_heartbeat(job, future)
+        except LeaseLostError:
+            LOGGER.warning("Render job %s was reclaimed by another worker", job_id)
+            return
+        except RenderLimitError as error:
+            # The contract stays pending while the job is retried; once the
+            # attempts run out the client can sign again.
+            LOGGER.warning("Render job %s hit a render limit: %s", job_id, error)
+            if self._fail_limited(job, error) == JOB_FAILED:
+                self._rollback_sign(job)
+            return
+        except PERMANENT_RENDER_ERRORS as error:
+            LOGGER.warning(
+                "Render job %s failed permanently: %s", job_id, error, exc_info=not isinstance(error, ValueError)
+            )
+            self._rollback_sign(job)
+            self.jobs.fail(job, self.worker_id, str(error), retryable=False)
+            return
+        except Exception as error:
+            LOGGER.exception("PDF generation failed for render job %s: %s", job_id, error)
+            status = self.jobs.fail(job, self.worker_id, "Failed to generate signed contract PDF.", retryable=True)
+            if status == JOB_FAILED:
+                self._rollback_sign(job)
+            return
+
+        if not self._finalize_sign(job, stored_pdf, report):
+            _delete_unreferenced_pdf(self.contracts, stored_pdf)
+            self.jobs.fail(job, self.worker_id, "Contract is no longer awaiting this render job", retryable=False)
+            return
+
+        self.jobs.ack(job_id, self.worker_id, {"pdf_key": stored_pdf.key, "pdf_sha256": stored_pdf.sha256})
+
+    def _process_prerender(self, job: Mapping[str, Any]) -> None:
+        """Lay out a sent contract ahead of signing; failures only cost the shortcut."""
+        job_id = job["_id"]
+        contract = self.contracts.find_one({"_id": job["contractId"]}, {"status": 1})
+        if not contract or contract.get("status") != CONTRACT_SENT:
+            self.jobs.ack(job_id, self.worker_id, {"skipped": True})
+            return
+
+        try:
+            future = self.executor.run(
+                prerender_contract_pdf,
+                dict(job.get("payload") or {}),
+                job.get("profile"),
+                priority=render_job_priority(job),
+            )
+            record = self._wait_with_heartbeat(job, future)
+        except LeaseLostError:
+            LOGGER.warning("Pre-render job %s was reclaimed by another worker", job_id)
+            return
+        except RenderLimitError as error:
+            LOGGER.warning("Pre-render job %s hit a render limit: %s", job_id, error)
+            self._fail_limited(job, error)
+            return
+        except PERMANENT_RENDER_ERRORS as error:
+            LOGGER.info(
+                "Contract %s cannot be pre-rendered: %s",
+                job["contractId"],
+                error,
+                exc_info=not isinstance(error, ValueError),
+            )
+            self.jobs.fail(job, self.worker_id, str(error), retryable=False)
+            return
+        except Exception as error:
+            LOGGER.exception("Pre-render job %s failed: %s", job_id, error)
+            self.jobs.fail(job, self.worker_id, "Failed to pre-render contract PDF.", retryable=True)
+            return
+
+        self.contracts.update_one(
+            {"_id": job["contractId"], "status": CONTRACT_SENT},
+            {"$set": {"prerender": {**record, "renderedAt": _utcnow()}}},
+        )
+        self.jobs.ack(job_id, self.worker_id, {"prerenderKey": record["key"]})
+
+    def _process_backfill(self, job: Mapping[str, Any]) -> None:
+        """Re-render a signed contract whose PDF is missing or outdated."""
+        job_id = job["_id"]
+        contract = self.contracts.find_one({"_id": job["contractId"]}, {"status": 1, "backfillJobId": 1})
+        if not contract or contract.get("status") != CONTRACT_SIGNED or contract.get("backfillJobId") != job_id:
+            self.jobs.ack(job_id, self.worker_id, {"skipped": True})
+            return
+
+        try:
+            future = self.executor.submit_with_report(
+                job.get("payload") or {},
+                "stored",
+                profile=job.get("profile"),
+                priority=render_job_priority(job),
+            )
+            stored_pdf, report = self._wait_with_heartbeat(job, future)
+        except LeaseLostError:
+            LOGGER.warning("Backfill job %s was reclaimed by another worker", job_id)
+            return
+        except RenderLimitError as error:
+            LOGGER.warning("Backfill job %s hit a render limit: %s", job_id, error)
+            if self._fail_limited(job, error) == JOB_FAILED:
+                self._release_backfill(job)
+            return
+        except PERMANENT_RENDER_ERRORS as error:
+            LOGGER.warning(
+                "Backfill job %s failed permanently: %s", job_id, error, exc_info=not isinstance(error, ValueError)
+            )
+            self.jobs.fail(job, self.worker_id, str(error), retryable=False)
+            self._release_backfill(job)
+            return
+        except Exception as error:
+            LOGGER.exception("Backfill job %s failed: %s", job_id, error)
+            status = self.jobs.fail(job, self.worker_id, "Failed to generate signed contract PDF.", retryable=True)
+            if status == JOB_FAILED:
+                self._release_backfill(job)
+            return
+
+        result = self.contracts.update_one(
+            {"_id": job["contractId"], "status": CONTRACT_SIGNED, "backfillJobId": job_id},
+            {
+                "$set": {
+                    "pdf_key": stored_pdf.key,
+                    "pdf_sha256": stored_pdf.sha256,
+                    "pdf_size": stored_pdf.size_bytes,
+                    "renderMeta": {**report.as_metadata(), "renderedAt": _utcnow()},
+                    "backfillJobId": None,
+                    "backfilledAt": _utcnow(),
+                }
+            },
+        )
+        if result.matched_count != 1:
+            _delete_unreferenced_pdf(self.contracts, stored_pdf)
+            self.jobs.ack(job_id, self.worker_id, {"skipped": True})
+            return
+        self.jobs.ack(job_id, self.worker_id, {"pdf_key": stored_pdf.key, "pdf_sha256": stored_pdf.sha256})
+
+    def _fail_limited(self, job: Mapping[str, Any], error: RenderLimitError) -> str:
+        """Fail a job whose render was stopped by a time or memory limit."""
+        return self.jobs.fail(job, self.worker_id, str(error), retryable=error.retryable, error_code=error.code)
+
+    def _release_backfill(self, job: Mapping[str, Any]) -> None:
+        """Let a later download or backfill run queue the contract again."""
+        self.contracts.update_one(
+            {"_id": job["contractId"], "backfillJobId": job["_id"]},
+            {"$set": {"backfillJobId": None}},
+        )
+
+    def _wait_with_heartbeat(self, job: Mapping[str, Any], future: Future) -> Any:
+        while True:
+            try:
+                return future.result(timeout=self.heartbeat_seconds)
+            except FutureTimeoutError:
+                if not self.jobs.extend_lease(job["_id"], self.worker_id):
+                    future.cancel()
+                    raise LeaseLostError(str(job["_id"]))
+
+    def _finalize_sign(self, job: Mapping[str, Any], stored_pdf: StoredPdf, report: RenderReport) -> bool:
+        payload = job.get("payload") or {}
+        result = self.contracts.update_one(
+            {"_id": job["contractId"], "status": CONTRACT_PENDING, "renderJobId": job["_id"]},
+            {
+                "$set": {
+                    "status": CONTRACT_SIGNED,
+                    "signedAt": payload.get("signed_date") or _utcnow(),
+                    "pendingAt": None,
+                    "pdf_key": stored_pdf.key,
+                    "pdf_sha256": stored_pdf.sha256,
+                    "pdf_size": stored_pdf.size_bytes,
+                    "renderMeta": {**report.as_metadata(), "renderedAt": _utcnow()},
+                    "signatures.client": payload.get("signature_client"),
+                }
+            },
+        )
+        return result.matched_count == 1
+
+    def _rollback_sign(self, job: Mapping[str, Any]) -> None:
+        """Return the contract to 'sent' so the client can sign again."""
+        if job.get("signatureId") is not None:
+            self.signatures.delete_one({"_id": job["signatureId"]})
+        self.contracts.update_one(
+            {"_id": job["contractId"], "status": CONTRACT_PENDING, "renderJobId": job["_id"]},
+            {
+                "$set": {
+                    "status": CONTRACT_SENT,
+                    "signedAt": None,
+                    "pendingAt": None,
+                    "renderJobId": None,
+                }
+            },
+        )
+
+
+def _connect_database(mongo_uri: str = PDF_JOBS_MONGO_URI, database_name: str = PDF_JOBS_DATABASE_NAME) -> Any:
+    return MongoClient(mongo_uri)[database_name]
+
+
+def start_embedded_workers(
+    count: int,
+    interactive_reserved: int = PDF_RENDER_INTERACTIVE_RESERVED,
+) -> Callable[[], None]:
+    """Run render workers as daemon threads of the current process.
+
+    ``interactive_reserved`` of the threads never claim batch jobs; a
+    process that only exists to work through a backfill passes 0.
+
+    Returns:
+        A callable that signals the workers to stop.
+    """
+    stop_event = threading.Event()
+    if count <= 0:
+        return stop_event.set
+
+    database = _connect_database()
+    RenderJobQueue(database[RENDER_JOBS_COLLECTION]).ensure_indexes()
+    count, batch_slots = batch_job_slots(count, interactive_reserved)
+    for index in range(count):
+        worker = RenderWorker(database, worker_id=_default_worker_id(index), batch_slots=batch_slots)
+        thread = threading.Thread(
+            target=worker.run_forever,
+            args=(stop_event,),
+            name=f"pdf-render-worker-{index}",
+            daemon=True,
+        )
+        thread.start()
+    return stop_event.set
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Process queued contract PDF render jobs.")
+    parser.add_argument(
+        "--concurrency",
+        type=int,
+        default=max(1, PDF_RENDER_WORKERS),
+        help="Number of jobs processed at once (default: PDF_RENDER_WORKERS).",
+    )
+    parser.add_argument(
+        "--once",
+        action="store_true",
+        help="Exit once the queue is empty instead of polling forever.",
+    )
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(name)s: %(message)s")
+    database = _connect_database()
+    RenderJobQueue(database[RENDER_JOBS_COLLECTION]).ensure_indexes()
+
+    thread_count, batch_slots = batch_job_slots(max(1, args.concurrency))
+    workers = [
+        RenderWorker(database, worker_id=_default_worker_id(index), batch_slots=batch_slots)
+        for index in range(thread_count)
+    ]
+
+    if args.once:
+        try:
+            while workers[0].run_once():
+                pass
+        finally:
+            shutdown_render_executor()
+        return 0
+
+    stop_event = threading.Event()
+    threads = [
+        threading.Thread(target=worker.run_forever, args=(stop_event,), name=f"pdf-render-worker-{index}")
+        for index, worker in enumerate(workers)
+    ]
+    for thread in threads:
+        thread.start()
+
+    try:
+        while any(thread.is_alive() for thread in threads):
+            for thread in threads:
+                thread.join(timeout=1.0)
+    except KeyboardInterrupt:
+        LOGGER.info("Stopping render workers")
+        stop_event.set()
+        for thread in threads:
+            thread.join()
+    finally:
+        shutdown_render_executor()
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())